@@ -1,16 +1,31 @@
 # -*- mode: python ; coding: utf-8 -*-
 from PyInstaller.utils.hooks import collect_all
 
-datas = [('src', 'src'), ('pandoc', 'pandoc'), ('resource', 'resource')]
+datas = [('src', 'src'), ('pandoc', 'pandoc'), ('resource', 'resource'), ('templates', 'templates')]
 binaries = []
 hiddenimports = []
 
+# === 运行时缓存模式 ===
+# 启用后pandoc目录以单个压缩包打入exe，首次启动时解压到用户缓存目录
+# （%LOCALAPPDATA%\jindouyun-typesetter\runtime）并经哈希校验后复用，
+# 避免每次启动都把完整的pandoc目录解压到新的_MEIPASS临时目录
+# （引导程序每次启动仍会把pandoc.zip本身解压到_MEIPASS，单目录打包才能完全避免）
+# 此时exe中不再包含原样的pandoc目录，缓存目录不可写时由程序把压缩包解压到_MEIPASS
+USE_RUNTIME_CACHE = True
+if USE_RUNTIME_CACHE:
+    import os
+    import sys
+    sys.path.insert(0, os.path.join(SPECPATH, 'src'))
+    from core.runtime_cache import build_payload_archive
+    datas = [('src', 'src'), ('resource', 'resource'), ('templates', 'templates')]
+    datas += build_payload_archive('pandoc', os.path.join(SPECPATH, 'pandoc'), os.path.join(workpath, 'payload'))
+
 # === 自动生成的PyQt5配置 ===
-# 以下配置由generate_pyqt5_config.py自动生成，请勿手动修改
+# 以下配置由auto_detect_deps.py根据导入图可达性分析自动生成，请勿手动修改
 from PyInstaller.utils.hooks import collect_data_files, collect_submodules, collect_dynamic_libs
 
 # 自动检测到的PyQt5组件:
-# 检测到的模块: ['Qt', 'QtCore', 'QtGui', 'QtWidgets']
+# 检测到的模块: ['Qt', 'QtCore', 'QtGui', 'QtNetwork', 'QtWidgets']
 
 datas += collect_data_files('PyQt5.Qt')
 binaries += collect_dynamic_libs('PyQt5.Qt')
@@ -21,45 +36,33 @@ hiddenimports += collect_submodules('PyQt5.QtCore')
 datas += collect_data_files('PyQt5.QtGui')
 binaries += collect_dynamic_libs('PyQt5.QtGui')
 hiddenimports += collect_submodules('PyQt5.QtGui')
+datas += collect_data_files('PyQt5.QtNetwork')
+binaries += collect_dynamic_libs('PyQt5.QtNetwork')
+hiddenimports += collect_submodules('PyQt5.QtNetwork')
 datas += collect_data_files('PyQt5.QtWidgets')
 binaries += collect_dynamic_libs('PyQt5.QtWidgets')
 hiddenimports += collect_submodules('PyQt5.QtWidgets')
 
 # === 自动生成的Python标准库排除列表 ===
-# 以下是由generate_pyqt5_config.py自动生成的标准库排除列表
+# 仅排除从入口文件出发不可达的标准库模块
 
-excludes=[
-    'abc', 'argparse', 'array', 'asyncio', 'atexit', 'base64', 'bdb', 'binascii',
-    'bisect', 'bz2', 'calendar', 'cgi', 'cgitb', 'chunk', 'cmd', 'code',
-    'codecs', 'codeop', 'collections', 'colorsys', 'compileall', 'concurrent', 'configparser', 'contextlib',
-    'contextvars', 'copy', 'copyreg', 'crypt', 'csv', 'ctypes', 'curses', 'dataclasses',
-    'decimal', 'difflib', 'dis', 'doctest', 'email', 'enum', 'errno', 'faulthandler',
-    'fcntl', 'filecmp', 'fileinput', 'fnmatch', 'formatter', 'fractions', 'ftplib', 'functools',
-    'gc', 'getopt', 'getpass', 'gettext', 'glob', 'grp', 'gzip', 'hashlib',
-    'heapq', 'hmac', 'html', 'http', 'imaplib', 'imghdr', 'imp', 'inspect',
-    'ipaddress', 'itertools', 'json', 'keyword', 'linecache', 'locale', 'logging', 'lzma',
-    'mailbox', 'mailcap', 'marshal', 'math', 'mimetypes', 'mmap', 'modulefinder', 'msvcrt',
-    'multiprocessing', 'netrc', 'nntplib', 'numbers', 'operator', 'optparse', 'ossaudiodev', 'pathlib',
-    'pdb', 'pickle', 'pickletools', 'pipes', 'pkgutil', 'platform', 'plistlib', 'poplib',
-    'posix', 'pprint', 'profile', 'pstats', 'pty', 'pwd', 'py_compile', 'pyclbr',
-    'pydoc', 'queue', 'quopri', 'random', 're', 'readline', 'reprlib', 'resource',
-    'rlcompleter', 'runpy', 'sched', 'secrets', 'select', 'selectors', 'shelve', 'shlex',
-    'shutil', 'signal', 'site', 'smtpd', 'smtplib', 'sndhdr', 'socket', 'socketserver',
-    'sqlite3', 'ssl', 'stat', 'statistics', 'string', 'stringprep', 'struct', 'sunau',
-    'symbol', 'symtable', 'sysconfig', 'syslog', 'tabnanny', 'tarfile', 'telnetlib', 'termios',
-    'textwrap', 'threading', 'time', 'timeit', 'tkinter', 'token', 'tokenize', 'trace',
-    'traceback', 'tracemalloc', 'tty', 'turtle', 'typing', 'unicodedata', 'unittest', 'urllib',
-    'uu', 'uuid', 'venv', 'warnings', 'wave', 'weakref', 'webbrowser', 'win32api',
-    'win32con', 'win32file', 'win32gui', 'winreg', 'winsound', 'wsgiref', 'xdrlib', 'xml',
-    'xmlrpc', 'zipapp', 'zipfile', 'zipimport', 'zlib',
-],
+excludes = [
+    'aifc', 'antigravity', 'asynchat', 'asyncore', 'audioop', 'cProfile', 'cgi', 'cgitb',
+    'chunk', 'cmath', 'colorsys', 'compileall', 'configparser', 'crypt', 'curses', 'dbm',
+    'distutils', 'ensurepip', 'filecmp', 'fileinput', 'graphlib', 'idlelib', 'imaplib', 'imghdr',
+    'imp', 'lib2to3', 'mailbox', 'mailcap', 'modulefinder', 'nis', 'nntplib', 'optparse',
+    'ossaudiodev', 'pickletools', 'pipes', 'poplib', 'profile', 'pstats', 'pty', 'pyclbr',
+    'resource', 'rlcompleter', 'sched', 'shelve', 'site', 'smtpd', 'smtplib', 'sndhdr',
+    'spwd', 'stringprep', 'sunau', 'symtable', 'syslog', 'tabnanny', 'telnetlib', 'this',
+    'tkinter', 'tomllib', 'trace', 'turtle', 'turtledemo', 'uu', 'venv', 'wave',
+    'wsgiref', 'xdrlib', 'zipapp', 'zoneinfo',
+]
 
-# === 以下为手动添加的其他依赖 ===
-# === 以下为手动添加的其他依赖 ===
-# === 以下为手动添加的其他依赖 ===
 # === 以下为手动添加的其他依赖 ===
 tmp_ret = collect_all('ntplib')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+# 可选：嵌入中文字体（未安装fontTools时该功能自动跳过）
+hiddenimports += collect_submodules('fontTools.subset') + collect_submodules('fontTools.ttLib')
 
 
 a = Analysis(
@@ -68,6 +71,7 @@ a = Analysis(
     binaries=binaries,
     datas=datas,
     hiddenimports=hiddenimports,
+    excludes=excludes,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
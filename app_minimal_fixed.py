@@ -7,6 +7,9 @@ Pandoc GUI 最小化入口点（修复版本）
 import sys
 import os
 
+# 打包资源无法解压时的错误信息，创建QApplication后提示并退出
+pandoc_error = None
+
 # 获取应用程序路径
 if getattr(sys, 'frozen', False):
     # 如果是打包后的可执行文件
@@ -31,6 +34,19 @@ if getattr(sys, 'frozen', False):
     
     # 确保pandoc路径可用
     pandoc_path = os.path.join(temp_dir, 'pandoc', 'pandoc.exe') if hasattr(sys, '_MEIPASS') else os.path.join(application_path, 'pandoc', 'pandoc.exe')
+    
+    # 运行时缓存模式：pandoc以压缩包形式打包，首次启动解压到用户缓存目录并在之后复用
+    if hasattr(sys, '_MEIPASS'):
+        from core.runtime_cache import resolve_bundled_payload, PayloadError
+        try:
+            cached_pandoc_dir = resolve_bundled_payload('pandoc', temp_dir)
+        except PayloadError as e:
+            cached_pandoc_dir = None
+            pandoc_error = str(e)
+        if cached_pandoc_dir:
+            pandoc_path = os.path.join(cached_pandoc_dir, 'pandoc.exe')
+            print(f"Using cached pandoc runtime: {cached_pandoc_dir}")
+    
     os.environ['PANDOC_PATH'] = pandoc_path
 else:
     # 如果是开发环境
@@ -49,27 +65,31 @@ try:
     from PyQt5.QtGui import QIcon, QPixmap
     print("PyQt5 import successful")
     
-    # 尝试直接导入模块，不使用包结构
-    import importlib.util
-    
-    # 加载simple_main_window.py
-    main_window_path = os.path.join(os.path.dirname(__file__), 'src', 'ui', 'simple_main_window.py')
-    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-        main_window_path = os.path.join(sys._MEIPASS, 'src', 'ui', 'simple_main_window.py')
-    
-    print(f"Loading simple_main_window from: {main_window_path}")
-    
-    spec = importlib.util.spec_from_file_location("simple_main_window", main_window_path)
-    main_window_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(main_window_module)
-    
-    SimpleMainWindow = main_window_module.SimpleMainWindow
-    print("SimpleMainWindow class loaded successfully")
+    # 单实例：已有实例在运行时把启动参数（如要转换的文件）转交给它并立即退出，
+    # 不再创建QApplication、显示启动画面和执行版本检查
+    from ui.single_instance import forward_to_running_instance, SingleInstanceServer
+    if forward_to_running_instance(sys.argv[1:]):
+        print("Arguments forwarded to the running instance")
+        sys.exit(0)
     
     # 创建应用程序
     app = QApplication(sys.argv)
     print("QApplication created")
     
+    if pandoc_error:
+        QMessageBox.critical(None, "错误", f"程序附带的Pandoc无法解压，请重新下载安装包：\n{pandoc_error}")
+        sys.exit(1)
+    
+    instance_server = SingleInstanceServer()
+    if not instance_server.listen():
+        # 另一个实例恰好同时启动并先开始了监听
+        forward_to_running_instance(sys.argv[1:])
+        sys.exit(0)
+    
+    # 界面卡顿监测（用户开启后才运行），在版本检查之前启动，启动阶段的阻塞同样会被记录
+    from ui.stall_monitor import install_stall_monitor
+    install_stall_monitor()
+    
     # 创建启动画面 - 使用QSplashScreen
     # 获取图片路径
     if getattr(sys, 'frozen', False):
@@ -94,6 +114,28 @@ try:
     if not check_expiration():
         sys.exit(1)
     
+    # 主窗口模块在启动画面显示之后再加载，缩短首帧出现前的等待
+    def load_main_window_class():
+        # 尝试直接导入模块，不使用包结构
+        import importlib.util
+        
+        # 加载simple_main_window.py
+        main_window_path = os.path.join(os.path.dirname(__file__), 'src', 'ui', 'simple_main_window.py')
+        if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+            main_window_path = os.path.join(sys._MEIPASS, 'src', 'ui', 'simple_main_window.py')
+        
+        print(f"Loading simple_main_window from: {main_window_path}")
+        
+        spec = importlib.util.spec_from_file_location("simple_main_window", main_window_path)
+        main_window_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(main_window_module)
+        
+        SimpleMainWindow = main_window_module.SimpleMainWindow
+        print("SimpleMainWindow class loaded successfully")
+        return SimpleMainWindow
+    
+    SimpleMainWindow = load_main_window_class()
+    
     # 定义显示主窗口的函数
     def show_main_window():
         # 创建主窗口
@@ -104,6 +146,11 @@ try:
         # 关闭启动画面
         if splash:
             splash.finish(window)
+        
+        # 打开命令行参数中的文件，之后的启动转交过来的参数也交给主窗口处理
+        if len(sys.argv) > 1:
+            window.handle_launch_args(sys.argv[1:])
+        instance_server.attach(window.handle_launch_args)
     
     # 设置2秒后显示主窗口并关闭启动画面
     QTimer.singleShot(2000, show_main_window)
@@ -1,310 +1,545 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-PyQt5组件和Python标准库自动检测脚本
-用于自动检测项目中实际使用的PyQt5组件和Python标准库模块，并生成相应的PyInstaller配置
+依赖可达性分析脚本
+从入口文件出发，单遍解析并传递性地遍历导入图，得到应用实际需要的最小模块集合，
+据此生成PyInstaller的PyQt5收集配置和标准库排除列表，并报告打包体积与解压耗时的节省
 """
 
 import os
 import re
 import ast
 import sys
-from typing import Set, List, Tuple, Dict
-
-def find_python_files(directory: str) -> List[str]:
-    """查找目录中的所有Python文件"""
-    python_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.py'):
-                python_files.append(os.path.join(root, file))
-    return python_files
-
-def extract_pyqt5_imports(file_path: str) -> Set[str]:
-    """从Python文件中提取PyQt5相关的导入"""
-    pyqt5_modules = set()
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 使用AST解析导入语句
-        try:
-            tree = ast.parse(content)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        if alias.name.startswith('PyQt5'):
-                            parts = alias.name.split('.')
-                            if len(parts) > 1:
-                                pyqt5_modules.add(parts[1])  # 获取PyQt5后面的模块名
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module and node.module.startswith('PyQt5'):
-                        parts = node.module.split('.')
-                        if len(parts) > 1:
-                            pyqt5_modules.add(parts[1])  # 获取PyQt5后面的模块名
-        except SyntaxError:
-            # 如果AST解析失败，使用正则表达式作为备选方案
-            pattern = r'(?:from\s+PyQt5\.(\w+)|import\s+PyQt5\.(\w+))'
-            matches = re.findall(pattern, content)
-            for match in matches:
-                module = match[0] if match[0] else match[1]
-                if module:
-                    pyqt5_modules.add(module)
-    except (UnicodeDecodeError, IOError):
-        pass
-    
-    return pyqt5_modules
-
-def extract_stdlib_imports(file_path: str) -> Set[str]:
-    """从Python文件中提取Python标准库相关的导入"""
-    stdlib_modules = set()
-    
-    # 获取Python标准库模块列表
-    stdlib_list = get_stdlib_modules()
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 使用AST解析导入语句
-        try:
-            tree = ast.parse(content)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        # 获取顶级模块名
-                        module_name = alias.name.split('.')[0]
-                        if module_name in stdlib_list:
-                            stdlib_modules.add(module_name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        # 获取顶级模块名
-                        module_name = node.module.split('.')[0]
-                        if module_name in stdlib_list:
-                            stdlib_modules.add(module_name)
-        except SyntaxError:
-            # 如果AST解析失败，使用正则表达式作为备选方案
-            pattern = r'(?:from\s+(\w+)|import\s+(\w+))'
-            matches = re.findall(pattern, content)
-            for match in matches:
-                module_name = match[0] if match[0] else match[1]
-                if module_name and module_name in stdlib_list:
-                    stdlib_modules.add(module_name)
-    except (UnicodeDecodeError, IOError):
-        pass
-    
-    return stdlib_modules
+import json
+import time
+import tempfile
+from importlib.machinery import PathFinder, EXTENSION_SUFFIXES
+from typing import Dict, List, Optional, Set, Tuple
+
+# 解析缓存默认位置（按文件mtime和大小失效）
+DEFAULT_CACHE_FILE = ".deps_cache.json"
+
+# PyInstaller引导阶段必需的标准库模块，无论分析结果如何都不能排除
+PYINSTALLER_BASE_MODULES = {
+    'sys', 'os', 'builtins', 'types', 'importlib', 'io', 'abc', 'codecs',
+    'collections', 'copyreg', 'encodings', 'enum', 'functools', 'genericpath',
+    'heapq', 'keyword', 'linecache', 'locale', 'ntpath', 'operator', 'posixpath',
+    're', 'reprlib', 'sre_compile', 'sre_constants', 'sre_parse', 'stat',
+    'traceback', 'warnings', 'weakref', 'struct', 'marshal', 'zlib', 'zipimport',
+}
+
+# CPython回归测试包只在标准库的测试辅助函数中被导入，不跟踪
+SKIPPED_PACKAGES = {'test', '_testcapi', '_testinternalcapi'}
+
 
 def get_stdlib_modules() -> Set[str]:
-    """获取Python标准库模块列表"""
+    """获取可作为排除候选的Python标准库顶层模块列表"""
     # 常见的Python标准库模块
     stdlib_modules = {
-        'abc', 'argparse', 'array', 'asyncio', 'atexit', 'base64', 'bdb', 'binascii', 
-        'bisect', 'builtins', 'bz2', 'calendar', 'cgi', 'cgitb', 'chunk', 'cmd', 'code', 
-        'codecs', 'codeop', 'collections', 'colorsys', 'compileall', 'concurrent', 
-        'configparser', 'contextlib', 'contextvars', 'copy', 'copyreg', 'crypt', 'csv', 
-        'ctypes', 'curses', 'dataclasses', 'datetime', 'decimal', 'difflib', 'dis', 
-        'doctest', 'email', 'enum', 'errno', 'faulthandler', 'fcntl', 'filecmp', 
-        'fileinput', 'fnmatch', 'formatter', 'fractions', 'ftplib', 'functools', 
-        'gc', 'getopt', 'getpass', 'gettext', 'glob', 'grp', 'gzip', 'hashlib', 'heapq', 
-        'hmac', 'html', 'http', 'imaplib', 'imghdr', 'imp', 'importlib', 'inspect', 
-        'io', 'ipaddress', 'itertools', 'json', 'keyword', 'linecache', 'locale', 
-        'logging', 'lzma', 'mailbox', 'mailcap', 'marshal', 'math', 'mimetypes', 
-        'mmap', 'modulefinder', 'multiprocessing', 'netrc', 'nntplib', 'numbers', 
-        'operator', 'optparse', 'os', 'ossaudiodev', 'pathlib', 'pdb', 'pickle', 
-        'pickletools', 'pipes', 'pkgutil', 'platform', 'plistlib', 'poplib', 'posix', 
-        'pprint', 'profile', 'pstats', 'pty', 'pwd', 'py_compile', 'pyclbr', 'pydoc', 
-        'queue', 'quopri', 'random', 're', 'readline', 'reprlib', 'resource', 
-        'rlcompleter', 'runpy', 'sched', 'secrets', 'select', 'selectors', 'shelve', 
-        'shlex', 'shutil', 'signal', 'site', 'smtpd', 'smtplib', 'sndhdr', 'socket', 
-        'socketserver', 'sqlite3', 'ssl', 'stat', 'statistics', 'string', 'stringprep', 
-        'struct', 'subprocess', 'sunau', 'symbol', 'symtable', 'sys', 'sysconfig', 
-        'syslog', 'tabnanny', 'tarfile', 'telnetlib', 'tempfile', 'termios', 'textwrap', 
-        'threading', 'time', 'timeit', 'tkinter', 'token', 'tokenize', 'trace', 
-        'traceback', 'tracemalloc', 'tty', 'turtle', 'types', 'typing', 'unicodedata', 
-        'unittest', 'urllib', 'uu', 'uuid', 'venv', 'warnings', 'wave', 'weakref', 
-        'webbrowser', 'winreg', 'winsound', 'wsgiref', 'xdrlib', 'xml', 'xmlrpc', 
+        'abc', 'argparse', 'array', 'asyncio', 'atexit', 'base64', 'bdb', 'binascii',
+        'bisect', 'builtins', 'bz2', 'calendar', 'cgi', 'cgitb', 'chunk', 'cmd', 'code',
+        'codecs', 'codeop', 'collections', 'colorsys', 'compileall', 'concurrent',
+        'configparser', 'contextlib', 'contextvars', 'copy', 'copyreg', 'crypt', 'csv',
+        'ctypes', 'curses', 'dataclasses', 'datetime', 'decimal', 'difflib', 'dis',
+        'doctest', 'email', 'enum', 'errno', 'faulthandler', 'fcntl', 'filecmp',
+        'fileinput', 'fnmatch', 'formatter', 'fractions', 'ftplib', 'functools',
+        'gc', 'getopt', 'getpass', 'gettext', 'glob', 'grp', 'gzip', 'hashlib', 'heapq',
+        'hmac', 'html', 'http', 'imaplib', 'imghdr', 'imp', 'importlib', 'inspect',
+        'io', 'ipaddress', 'itertools', 'json', 'keyword', 'linecache', 'locale',
+        'logging', 'lzma', 'mailbox', 'mailcap', 'marshal', 'math', 'mimetypes',
+        'mmap', 'modulefinder', 'multiprocessing', 'netrc', 'nntplib', 'numbers',
+        'operator', 'optparse', 'os', 'ossaudiodev', 'pathlib', 'pdb', 'pickle',
+        'pickletools', 'pipes', 'pkgutil', 'platform', 'plistlib', 'poplib', 'posix',
+        'pprint', 'profile', 'pstats', 'pty', 'pwd', 'py_compile', 'pyclbr', 'pydoc',
+        'queue', 'quopri', 'random', 're', 'readline', 'reprlib', 'resource',
+        'rlcompleter', 'runpy', 'sched', 'secrets', 'select', 'selectors', 'shelve',
+        'shlex', 'shutil', 'signal', 'site', 'smtpd', 'smtplib', 'sndhdr', 'socket',
+        'socketserver', 'sqlite3', 'ssl', 'stat', 'statistics', 'string', 'stringprep',
+        'struct', 'subprocess', 'sunau', 'symbol', 'symtable', 'sys', 'sysconfig',
+        'syslog', 'tabnanny', 'tarfile', 'telnetlib', 'tempfile', 'termios', 'textwrap',
+        'threading', 'time', 'timeit', 'tkinter', 'token', 'tokenize', 'trace',
+        'traceback', 'tracemalloc', 'tty', 'turtle', 'types', 'typing', 'unicodedata',
+        'unittest', 'urllib', 'uu', 'uuid', 'venv', 'warnings', 'wave', 'weakref',
+        'webbrowser', 'winreg', 'winsound', 'wsgiref', 'xdrlib', 'xml', 'xmlrpc',
         'zipapp', 'zipfile', 'zipimport', 'zlib'
     }
-    
+
+    # 当前解释器自带的完整标准库清单（Python 3.10+）
+    if hasattr(sys, 'stdlib_module_names'):
+        stdlib_modules.update(name for name in sys.stdlib_module_names if not name.startswith('_'))
+
     # 添加平台特定的标准库模块
     if sys.platform.startswith('win'):
-        stdlib_modules.update(['msvcrt', 'win32api', 'win32con', 'win32file', 'win32gui'])
+        stdlib_modules.update(['msvcrt', 'winreg', 'winsound', '_winapi'])
     elif sys.platform.startswith('linux'):
         stdlib_modules.update(['fcntl', 'grp', 'pwd', 'posix', 'pty', 'termios'])
-    
+
     return stdlib_modules
 
-def generate_pyqt5_config(project_dir: str = "src") -> str:
-    """生成PyQt5相关的PyInstaller配置"""
-    python_files = find_python_files(project_dir)
-    all_pyqt5_modules = set()
-    
-    for file_path in python_files:
-        modules = extract_pyqt5_imports(file_path)
-        all_pyqt5_modules.update(modules)
-    
+
+def is_stdlib_module(name: str) -> bool:
+    """判断顶层模块名是否属于标准库"""
+    top = name.split('.')[0]
+    if hasattr(sys, 'stdlib_module_names'):
+        return top in sys.stdlib_module_names
+    return top in get_stdlib_modules() or top.startswith('_')
+
+
+def _walk_skipping_main_guard(tree: ast.AST):
+    """遍历语法树，跳过 if __name__ == '__main__' 代码块（打包后不会执行）"""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in ast.iter_child_nodes(node):
+            if (isinstance(child, ast.If) and isinstance(child.test, ast.Compare)
+                    and isinstance(child.test.left, ast.Name) and child.test.left.id == '__name__'
+                    and any(isinstance(c, ast.Constant) and c.value == '__main__'
+                            for c in child.test.comparators)):
+                stack.extend(child.orelse)
+                continue
+            stack.append(child)
+
+
+class ImportGraph:
+    """导入图分析器：每个文件只解析一次，解析结果按mtime缓存到磁盘"""
+
+    def __init__(self, project_dir: str, cache_file: Optional[str] = None):
+        self.project_dir = os.path.abspath(project_dir)
+        # 与入口程序的sys.path设置保持一致：项目根目录和src目录
+        self.project_paths = [self.project_dir, os.path.join(self.project_dir, 'src')]
+        self.search_paths = self.project_paths + [p for p in sys.path if p and os.path.isdir(p)]
+        self.cache_file = cache_file
+        self.cache = self._load_cache()
+        self.parsed_files = 0
+        self.cached_files = 0
+        self._spec_cache = {}
+        self.modules = {}  # {模块名: (类别, 文件路径)}
+        self.missing = set()
+
+    # ---- 解析缓存 ----
+
+    def _load_cache(self) -> Dict:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        """把解析缓存写回磁盘"""
+        if not self.cache_file:
+            return
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f)
+
+    def parse_file(self, file_path: str) -> Dict:
+        """解析文件中的全部导入（包括函数内的延迟导入），文件未变化时直接读取缓存
+
+        Returns:
+            dict: {'imports': [[模块, 相对层级, [导入名...]], ...], 'py_refs': [字符串中的.py文件名...]}
+        """
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        cached = self.cache.get(key)
+        if cached and cached['mtime'] == stat.st_mtime and cached['size'] == stat.st_size:
+            self.cached_files += 1
+            return cached
+
+        self.parsed_files += 1
+        imports = []
+        py_refs = []
+        try:
+            with open(file_path, 'rb') as f:
+                tree = ast.parse(f.read(), filename=file_path)
+        except (SyntaxError, ValueError):
+            tree = None
+
+        if tree is not None:
+            for node in _walk_skipping_main_guard(tree):
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        imports.append([alias.name, 0, []])
+                elif isinstance(node, ast.ImportFrom):
+                    imports.append([node.module or '', node.level, [a.name for a in node.names]])
+                elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+                    # 通过importlib按文件路径动态加载的模块（如simple_main_window.py）
+                    if re.fullmatch(r'[\w.-]+\.py', node.value):
+                        py_refs.append(node.value)
+
+        entry = {'mtime': stat.st_mtime, 'size': stat.st_size, 'imports': imports, 'py_refs': py_refs}
+        self.cache[key] = entry
+        return entry
+
+    # ---- 模块定位（不执行任何导入） ----
+
+    def find_spec(self, name: str):
+        """按名称定位模块，返回ModuleSpec或None"""
+        if name in self._spec_cache:
+            return self._spec_cache[name]
+
+        parent, _, _ = name.rpartition('.')
+        if parent:
+            parent_spec = self.find_spec(parent)
+            locations = parent_spec.submodule_search_locations if parent_spec else None
+            spec = PathFinder.find_spec(name, list(locations)) if locations else None
+        elif name in sys.builtin_module_names:
+            spec = None
+        else:
+            spec = PathFinder.find_spec(name, self.search_paths)
+
+        self._spec_cache[name] = spec
+        return spec
+
+    def classify(self, name: str, origin: Optional[str]) -> str:
+        """将模块分为 project / stdlib / third_party / builtin"""
+        if origin is None:
+            return 'builtin' if name.split('.')[0] in sys.builtin_module_names else 'namespace'
+        origin = os.path.abspath(origin)
+        if 'site-packages' in origin or 'dist-packages' in origin:
+            return 'third_party'
+        if is_stdlib_module(name):
+            return 'stdlib'
+        if any(origin.startswith(p + os.sep) for p in self.project_paths):
+            return 'project'
+        return 'third_party'
+
+    def module_name_for_file(self, file_path: str) -> str:
+        """根据文件所在的搜索路径推算模块名"""
+        file_path = os.path.abspath(file_path)
+        for base in reversed(self.project_paths):
+            if file_path.startswith(base + os.sep):
+                relative = os.path.relpath(file_path, base)[:-3].replace(os.sep, '.')
+                return relative[:-len('.__init__')] if relative.endswith('.__init__') else relative
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    # ---- 遍历 ----
+
+    def walk(self, entry_files: List[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        """从入口文件出发传递性遍历导入图"""
+        queue = [(self.module_name_for_file(f), os.path.abspath(f), 'project') for f in entry_files]
+
+        while queue:
+            name, path, kind = queue.pop()
+            if name in self.modules:
+                continue
+            self.modules[name] = (kind, path)
+
+            # 扩展模块和PyQt5这样的二进制包没有可解析的源码
+            if not path or not path.endswith('.py'):
+                continue
+
+            parsed = self.parse_file(path)
+            package = name if path.endswith('__init__.py') else name.rpartition('.')[0]
+
+            for module, level, names in parsed['imports']:
+                if level:
+                    base = package.split('.') if package else []
+                    base = base[:len(base) - (level - 1)] if level > 1 else base
+                    module = '.'.join(base + ([module] if module else []))
+                candidates = [module] if module else []
+                candidates += [f'{module}.{n}' if module else n for n in names if n != '*']
+                for candidate in candidates:
+                    self._enqueue(candidate, queue, required=candidate == module)
+
+            # 只有项目文件中的.py字符串才可能是动态加载的模块
+            for py_ref in parsed['py_refs'] if kind == 'project' else []:
+                for ref_path in self._find_project_file(py_ref):
+                    queue.append((self.module_name_for_file(ref_path), ref_path, 'project'))
+
+        return self.modules
+
+    def _enqueue(self, name: str, queue: List, required: bool):
+        """把模块及其所有父包加入待遍历队列"""
+        parts = name.split('.')
+        if parts[0] in SKIPPED_PACKAGES:
+            return
+        for i in range(1, len(parts) + 1):
+            partial = '.'.join(parts[:i])
+            if partial in self.modules:
+                continue
+            spec = self.find_spec(partial)
+            if spec is None and partial not in sys.builtin_module_names:
+                # from X import 名称 中的名称多数是属性而不是子模块
+                if required or i < len(parts):
+                    self.missing.add(partial)
+                return
+            origin = spec.origin if spec and spec.has_location else None
+            queue.append((partial, origin, self.classify(partial, origin)))
+
+    def _find_project_file(self, file_name: str) -> List[str]:
+        matches = []
+        for root, dirs, files in os.walk(self.project_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('venv', 'build', 'dist', '__pycache__')]
+            if file_name in files:
+                matches.append(os.path.join(root, file_name))
+        return matches
+
+
+def module_footprint(name: str, graph: ImportGraph) -> Tuple[int, int]:
+    """统计顶层模块占用的字节数，返回 (纯Python字节数, 二进制扩展字节数)"""
+    spec = graph.find_spec(name)
+    if spec is None or not spec.has_location or not spec.origin:
+        return 0, 0
+
+    if spec.submodule_search_locations:
+        files = []
+        for location in spec.submodule_search_locations:
+            for root, dirs, names in os.walk(location):
+                dirs[:] = [d for d in dirs if d not in ('__pycache__', 'test', 'tests', 'idle_test')]
+                files.extend(os.path.join(root, n) for n in names)
+    else:
+        files = [spec.origin]
+
+    pure = binary = 0
+    for file_path in files:
+        size = os.path.getsize(file_path)
+        if file_path.endswith('.py'):
+            pure += size
+        elif any(file_path.endswith(suffix) for suffix in EXTENSION_SUFFIXES) or file_path.endswith('.dll'):
+            binary += size
+    return pure, binary
+
+
+def measure_write_throughput(size_mb: int = 16) -> float:
+    """测量本机临时目录的写入吞吐（字节/秒），用于估算单文件exe的解压耗时"""
+    data = os.urandom(1024 * 1024)
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        path = f.name
+        start = time.perf_counter()
+        for _ in range(size_mb):
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        elapsed = time.perf_counter() - start
+    os.unlink(path)
+    return size_mb * 1024 * 1024 / max(elapsed, 1e-6)
+
+
+def analyze(project_dir: str = ".", entry: str = "app_minimal_fixed.py",
+            cache_file: Optional[str] = DEFAULT_CACHE_FILE) -> Dict:
+    """分析入口文件的导入闭包
+
+    Returns:
+        dict: 包含模块集合、PyQt5组件、排除列表等信息的分析结果
+    """
+    cache_path = os.path.join(project_dir, cache_file) if cache_file else None
+    graph = ImportGraph(project_dir, cache_path)
+    start = time.perf_counter()
+    modules = graph.walk([os.path.join(project_dir, entry)])
+    elapsed = time.perf_counter() - start
+    graph.save_cache()
+
+    stdlib_used = sorted({n.split('.')[0] for n, (kind, _) in modules.items() if kind in ('stdlib', 'builtin')})
+    third_party = sorted({n.split('.')[0] for n, (kind, _) in modules.items() if kind == 'third_party'})
+    pyqt5_used = {n.split('.')[1] for n in modules if n.startswith('PyQt5.')}
     # 确保核心模块始终包含
-    core_modules = {'Qt', 'QtCore', 'QtGui', 'QtWidgets'}
-    all_pyqt5_modules.update(core_modules)
-    
-    # 生成配置字符串
+    pyqt5_used.update({'Qt', 'QtCore', 'QtGui', 'QtWidgets'})
+
+    keep = set(stdlib_used) | PYINSTALLER_BASE_MODULES
+    excludes = sorted(m for m in get_stdlib_modules() - keep if graph.find_spec(m) is not None)
+
+    return {
+        'graph': graph,
+        'elapsed': elapsed,
+        'modules': sorted(modules),
+        'project_modules': sorted(n for n, (kind, _) in modules.items() if kind == 'project'),
+        'stdlib_used': stdlib_used,
+        'third_party': third_party,
+        'pyqt5_modules': sorted(pyqt5_used),
+        'excludes': excludes,
+        'missing': sorted(graph.missing),
+    }
+
+
+def generate_pyqt5_config(result: Dict) -> str:
+    """根据分析结果生成PyInstaller配置片段"""
     config_lines = [
         "# === 自动生成的PyQt5配置 ===",
-        "# 以下配置由generate_pyqt5_config.py自动生成，请勿手动修改",
+        "# 以下配置由auto_detect_deps.py根据导入图可达性分析自动生成，请勿手动修改",
         "from PyInstaller.utils.hooks import collect_data_files, collect_submodules, collect_dynamic_libs",
         "",
         "# 自动检测到的PyQt5组件:",
-        f"# 检测到的模块: {sorted(all_pyqt5_modules)}",
+        f"# 检测到的模块: {result['pyqt5_modules']}",
         "",
     ]
-    
+
     # 为每个模块生成收集配置
-    for module in sorted(all_pyqt5_modules):
+    for module in result['pyqt5_modules']:
         full_module_name = f"PyQt5.{module}"
         config_lines.extend([
             f"datas += collect_data_files('{full_module_name}')",
             f"binaries += collect_dynamic_libs('{full_module_name}')",
             f"hiddenimports += collect_submodules('{full_module_name}')",
         ])
-    
+
     config_lines.extend([
         "",
         "# === 自动生成的Python标准库排除列表 ===",
-        "# 以下是由generate_pyqt5_config.py自动生成的标准库排除列表",
+        "# 仅排除从入口文件出发不可达的标准库模块",
         "",
+        "excludes = [",
     ])
-    
-    # 生成标准库排除列表
-    all_stdlib_modules = set()
-    for file_path in python_files:
-        modules = extract_stdlib_imports(file_path)
-        all_stdlib_modules.update(modules)
-    
-    # 获取所有标准库模块
-    all_available_stdlib = get_stdlib_modules()
-    
-    # 计算未使用的标准库模块（这些将被排除）
-    unused_stdlib = sorted(all_available_stdlib - all_stdlib_modules)
-    
-    # 过滤掉一些可能会引起问题的模块
-    filtered_excludes = []
-    for module in unused_stdlib:
-        # 保留一些可能会被间接需要的模块
-        if module not in ['sys', 'os', 'builtins', 'types', 'importlib', 'io']:
-            filtered_excludes.append(f"'{module}'")
-    
-    if filtered_excludes:
-        # 将排除项分成多行，每行8个
-        excludes_lines = []
-        for i in range(0, len(filtered_excludes), 8):
-            chunk = filtered_excludes[i:i+8]
-            if i == 0:
-                excludes_lines.append("excludes=[\n    " + ", ".join(chunk) + ",")
-            else:
-                excludes_lines.append("    " + ", ".join(chunk) + ",")
-        excludes_lines.append("],")
-        
-        # 不再添加中文注释，直接添加排除列表
-        for line in excludes_lines:
-            config_lines.append(line)
-    
+    quoted = [f"'{module}'" for module in result['excludes']]
+    for i in range(0, len(quoted), 8):
+        config_lines.append("    " + ", ".join(quoted[i:i + 8]) + ",")
     config_lines.extend([
-        "",
-        "# === 以下为手动添加的其他依赖 ===",
+        "]",
         "",
     ])
-    
+
     return "\n".join(config_lines)
 
+
+def read_spec_excludes(spec_file: str) -> Set[str]:
+    """读取spec文件中现有的排除列表"""
+    try:
+        with open(spec_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return set()
+    match = re.search(r'excludes\s*=\s*\[(.*?)\]', content, re.S)
+    return set(re.findall(r"'([\w.]+)'", match.group(1))) if match else set()
+
+
+def build_report(result: Dict, spec_file: Optional[str] = None, throughput: Optional[float] = None) -> Dict:
+    """估算排除列表带来的打包体积与解压耗时节省"""
+    graph = result['graph']
+    pure_saved = binary_saved = 0
+    for module in result['excludes']:
+        pure, binary = module_footprint(module, graph)
+        pure_saved += pure
+        binary_saved += binary
+
+    throughput = throughput or measure_write_throughput()
+    report = {
+        'entry_closure_modules': len(result['modules']),
+        'project_modules': result['project_modules'],
+        'stdlib_used': result['stdlib_used'],
+        'third_party': result['third_party'],
+        'pyqt5_modules': result['pyqt5_modules'],
+        'excludes': result['excludes'],
+        'unresolved_imports': result['missing'],
+        'analysis_seconds': round(result['elapsed'], 3),
+        'files_parsed': graph.parsed_files,
+        'files_from_cache': graph.cached_files,
+        # 以下为上限估计：只有PyInstaller本会收集的模块才会真正节省
+        'excluded_pure_python_bytes': pure_saved,
+        'excluded_extension_bytes': binary_saved,
+        'write_throughput_mb_s': round(throughput / 1024 / 1024, 1),
+        'estimated_extraction_ms_saved': round(binary_saved / throughput * 1000, 1),
+    }
+
+    if spec_file:
+        # 旧排除列表中实际被使用的模块：打包后会出现ModuleNotFoundError
+        previous = read_spec_excludes(spec_file)
+        report['previously_excluded_but_used'] = sorted(previous & set(result['stdlib_used']))
+    return report
+
+
+def print_report(report: Dict):
+    """打印分析报告"""
+    print(f"导入闭包: {report['entry_closure_modules']} 个模块 "
+          f"(解析 {report['files_parsed']} 个文件，缓存命中 {report['files_from_cache']} 个，"
+          f"耗时 {report['analysis_seconds']} 秒)")
+    print(f"项目模块: {', '.join(report['project_modules'])}")
+    print(f"使用的标准库: {', '.join(report['stdlib_used'])}")
+    print(f"第三方依赖: {', '.join(report['third_party'])}")
+    print(f"PyQt5组件: {', '.join(report['pyqt5_modules'])}")
+    print(f"排除的标准库: {len(report['excludes'])} 个")
+    print(f"预计减少纯Python代码: {report['excluded_pure_python_bytes'] / 1024:.0f} KB（上限）")
+    print(f"预计减少二进制扩展: {report['excluded_extension_bytes'] / 1024:.0f} KB（上限）")
+    print(f"预计每次启动减少解压耗时: {report['estimated_extraction_ms_saved']} ms "
+          f"(按本机写入速度 {report['write_throughput_mb_s']} MB/s 估算)")
+    if report.get('previously_excluded_but_used'):
+        print(f"旧配置错误排除的模块: {', '.join(report['previously_excluded_but_used'])}")
+
+
 def update_spec_file(spec_file: str, config: str):
     """更新spec文件中的PyQt5配置和标准库排除列表"""
     with open(spec_file, 'r', encoding='utf-8') as f:
         content = f.read()
-    
-    # 查找PyQt5配置部分的开始和结束
+
+    # 查找自动生成部分的开始和结束
     start_marker = "# === 自动生成的PyQt5配置 ==="
     end_marker = "# === 以下为手动添加的其他依赖 ==="
-    
+
     start_idx = content.find(start_marker)
     end_idx = content.find(end_marker)
-    
+
     if start_idx != -1 and end_idx != -1:
         # 替换现有的自动生成部分
-        new_content = content[:start_idx] + config + content[end_idx:]
+        new_content = content[:start_idx] + config + "\n" + content[end_idx:]
     else:
-        # 如果没有找到标记，在import语句后插入
-        import_end = content.find("\n\n", content.find("from PyInstaller.utils.hooks import"))
-        if import_end != -1:
-            new_content = content[:import_end] + "\n\n" + config + content[import_end:]
-        else:
+        # 如果没有找到标记，在Analysis之前插入
+        analysis_idx = content.find("a = Analysis(")
+        if analysis_idx == -1:
             raise ValueError("无法在spec文件中找到合适的位置插入配置")
-    
-    # 更新Analysis部分的excludes
-    if "excludes=[" in new_content:
-        # 找到excludes部分
-        excludes_start = new_content.find("excludes=[")
-        excludes_end = new_content.find("],", excludes_start)
-        
-        if excludes_end != -1:
-            # 在配置中查找excludes列表
-            excludes_start_in_config = config.find("excludes=[")
-            excludes_end_in_config = config.find("],", excludes_start_in_config)
-            
-            if excludes_start_in_config != -1 and excludes_end_in_config != -1:
-                # 提取排除列表内容
-                excludes_content = config[excludes_start_in_config:excludes_end_in_config+2]
-                
-                # 替换原有的excludes
-                new_content = (
-                    new_content[:excludes_start] + 
-                    excludes_content + 
-                    new_content[excludes_end+2:]
-                )
-    
+        new_content = content[:analysis_idx] + config + "\n" + end_marker + "\n\n" + content[analysis_idx:]
+
+    # 确保Analysis使用生成的排除列表
+    if "excludes=excludes" not in new_content:
+        new_content = new_content.replace("    hiddenimports=hiddenimports,\n",
+                                          "    hiddenimports=hiddenimports,\n    excludes=excludes,\n", 1)
+
     with open(spec_file, 'w', encoding='utf-8') as f:
         f.write(new_content)
-    
+
     print(f"已更新 {spec_file} 中的PyQt5配置和标准库排除列表")
 
-def test_detection(src_dir="src"):
+
+def test_detection(project_dir=".", entry="app_minimal_fixed.py"):
     """测试自动检测功能"""
-    print("测试PyQt5和Python标准库自动检测系统")
+    print("测试导入图可达性分析")
     print("=" * 50)
-    
-    # 查找Python文件
-    python_files = find_python_files(src_dir)
-    print(f"找到 {len(python_files)} 个Python文件:")
-    for file in python_files:
-        print(f"  - {file}")
-    
+
+    result = analyze(project_dir, entry)
+    print(f"从 {entry} 可达的模块共 {len(result['modules'])} 个:")
+    for module in result['modules']:
+        kind, path = result['graph'].modules[module]
+        print(f"  - [{kind}] {module}")
+    if result['missing']:
+        print(f"\n无法定位的导入（可能是平台相关模块）: {', '.join(result['missing'])}")
+
     print("\n生成的配置:")
     print("-" * 30)
-    config = generate_pyqt5_config(src_dir)
-    print(config)
-    
+    print(generate_pyqt5_config(result))
+
     print("\n测试完成!")
     return True
 
+
 if __name__ == "__main__":
     import argparse
-    
-    parser = argparse.ArgumentParser(description="自动检测PyQt5组件并更新PyInstaller spec文件")
+
+    parser = argparse.ArgumentParser(description="分析入口文件的导入闭包并更新PyInstaller spec文件")
     parser.add_argument("--spec", default="Pandoc-GUI.spec", help="PyInstaller spec文件路径")
-    parser.add_argument("--src", default="src", help="源代码目录路径")
+    parser.add_argument("--entry", default="app_minimal_fixed.py", help="入口文件路径")
+    parser.add_argument("--project", default=".", help="项目根目录")
+    parser.add_argument("--no-cache", action="store_true", help="不使用解析缓存")
+    parser.add_argument("--report", help="将分析报告以JSON格式写入指定文件")
     parser.add_argument("--print-only", action="store_true", help="只打印配置而不更新文件")
     parser.add_argument("--test", action="store_true", help="测试自动检测功能而不更新文件")
-    
+
     args = parser.parse_args()
-    
+
     if args.test:
-        test_detection(args.src)
+        test_detection(args.project, args.entry)
     else:
-        config = generate_pyqt5_config(args.src)
-        
+        result = analyze(args.project, args.entry, None if args.no_cache else DEFAULT_CACHE_FILE)
+        config = generate_pyqt5_config(result)
+        report = build_report(result, args.spec)
+
         if args.print_only:
             print(config)
         else:
             update_spec_file(args.spec, config)
-            print("PyQt5配置已更新!")
\ No newline at end of file
+            print("PyQt5配置已更新!")
+
+        print()
+        print_report(report)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
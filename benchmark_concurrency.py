@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发数扫描基准脚本
+用 test_tags.md 拼出不同大小的HTML文档，按批量转换的方式（任务队列 + 转换器）以不同的并发数转换，
+输出每个大小分档在各并发数下的吞吐量和延迟（文本形式的饱和曲线，--json 输出JSON报告）；
+--save 把每档吞吐量饱和时的最小并发数保存下来，watch_folder.py 和 conversion_worker.py
+未指定并发数时自动使用
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+CORPUS_FILE = "test_tags.md"
+
+# 各分档测量用的文档大小（字节）
+SAMPLE_BYTES = {
+    'small': 64 * 1024,
+    'medium': 1024 * 1024,
+    'large': 8 * 1024 * 1024,
+    'huge': 32 * 1024 * 1024,
+}
+DEFAULT_SIZES = ['small', 'medium', 'large']
+
+BAR_WIDTH = 30
+
+
+def default_worker_counts() -> List[int]:
+    """默认扫描的并发数：从1到核数的两倍"""
+    limit = max(2, (os.cpu_count() or 1) * 2)
+    return [count for count in (1, 2, 3, 4, 6, 8, 12, 16, 24, 32) if count <= limit]
+
+
+def build_document(corpus_file: str, size_bytes: int) -> str:
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+    head, _, rest = html.partition('<body>')
+    body, _, tail = rest.rpartition('</body>')
+    repeat = max(1, int(size_bytes / max(1, len(body.encode('utf-8')))))
+    return f'{head}<body>{body * repeat}</body>{tail}'
+
+
+def document_for(base: str, index: int) -> str:
+    # 每个任务内容不同，任务队列不会合并
+    return base.replace('</body>', f'<p>第 {index + 1} 份</p></body>', 1)
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def run_point(converter, base: str, workers: int, jobs: int, temp_dir: str) -> Dict:
+    """以 workers 个并发转换 jobs 个文档，返回吞吐量和延迟"""
+    from core.conversion_queue import ConversionQueue, PRIORITY_BATCH
+
+    finished = []
+    all_done = threading.Event()
+    lock = threading.Lock()
+
+    def on_update(job):
+        if job.finished_at is None:
+            return
+        with lock:
+            finished.append(job)
+            if len(finished) == jobs:
+                all_done.set()
+
+    queue = ConversionQueue(converter, max_workers=workers, history_size=jobs, on_update=on_update)
+    start = time.perf_counter()
+    for index in range(jobs):
+        queue.submit(document_for(base, index), 'simple', os.path.join(temp_dir, f'{workers}_{index}.docx'),
+                     priority=PRIORITY_BATCH)
+    all_done.wait()
+    elapsed = time.perf_counter() - start
+
+    succeeded = [job for job in finished if job.status == 'succeeded']
+    latencies = [job.duration for job in succeeded]
+    for job in finished:
+        try:
+            os.remove(job.output_file)
+        except OSError:
+            pass
+    return {
+        'workers': workers,
+        'jobs': jobs,
+        'succeeded': len(succeeded),
+        'seconds': elapsed,
+        'jobs_per_second': len(succeeded) / elapsed if succeeded else 0.0,
+        'mb_per_second': len(succeeded) * len(base.encode('utf-8')) / (1024 * 1024) / elapsed if succeeded else 0.0,
+        'latency_p50': percentile(latencies, 0.5) if latencies else None,
+        'latency_p95': percentile(latencies, 0.95) if latencies else None,
+        'error': None if succeeded else (finished[0].message if finished else '没有完成的任务'),
+    }
+
+
+def sweep(args) -> Dict:
+    """按分档和并发数逐一测量，返回报告"""
+    sys.path.insert(0, args.src)
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.concurrency_tuning import best_workers
+
+    converter = EnhancedPandocConverter(args.pandoc, use_native_writer=not args.pandoc_only)
+    report = {
+        'cpu_count': os.cpu_count(),
+        'pandoc_path': args.pandoc,
+        'native_writer': not args.pandoc_only,
+        'sizes': [],
+    }
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in args.sizes:
+            base = build_document(args.corpus, SAMPLE_BYTES[name])
+            # 预热：载入模板和模块，不计入测量
+            converter.convert_html_to_docx(base, os.path.join(temp_dir, 'warmup.docx'), 'simple')
+            points = []
+            for workers in args.workers:
+                jobs = max(args.min_jobs, workers * args.jobs_per_worker)
+                point = run_point(converter, base, workers, jobs, temp_dir)
+                points.append(point)
+                print(f"  {name} {workers} 个并发：{point['jobs_per_second']:.2f} 个/秒", file=sys.stderr)
+            report['sizes'].append({
+                'size_class': name,
+                'bytes': len(base.encode('utf-8')),
+                'points': points,
+                'best_workers': best_workers(points),
+            })
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """文本形式的饱和曲线：每个分档一张表，吞吐量用条形表示"""
+    lines = [f"CPU核数 {report['cpu_count']}，{'原生写入器优先' if report['native_writer'] else '只使用Pandoc'}"]
+    for entry in report['sizes']:
+        points = entry['points']
+        peak = max((point['jobs_per_second'] for point in points), default=0) or 1
+        lines.append('')
+        lines.append(f"{entry['size_class']}（每个文档 {entry['bytes'] / 1024:.0f} KB），最佳并发数：{entry['best_workers'] or '-'}")
+        lines.append(f"{'并发':>4}  {'个/秒':>7}  {'MB/秒':>7}  {'P50延迟':>8}  {'P95延迟':>8}  吞吐量")
+        for point in points:
+            bar = '█' * max(1, round(point['jobs_per_second'] / peak * BAR_WIDTH)) if point['jobs_per_second'] else ''
+            marker = ' ◀' if point['workers'] == entry['best_workers'] else ''
+            p50 = '-' if point['latency_p50'] is None else f"{point['latency_p50']:.2f}秒"
+            p95 = '-' if point['latency_p95'] is None else f"{point['latency_p95']:.2f}秒"
+            lines.append(f"{point['workers']:>4}  {point['jobs_per_second']:>7.2f}  {point['mb_per_second']:>7.2f}  "
+                         f"{p50:>8}  {p95:>8}  {bar}{marker}")
+            if point['error']:
+                lines.append(f"      失败：{' '.join(point['error'].split())[:200]}")
+    return '\n'.join(lines)
+
+
+def save_report(report: Dict) -> Optional[str]:
+    from core.concurrency_tuning import save_tuning
+
+    size_classes = {}
+    for entry in report['sizes']:
+        if not entry['best_workers']:
+            continue
+        best = next(point for point in entry['points'] if point['workers'] == entry['best_workers'])
+        size_classes[entry['size_class']] = {
+            'workers': entry['best_workers'],
+            'sample_bytes': entry['bytes'],
+            'jobs_per_second': best['jobs_per_second'],
+            'latency_p95': best['latency_p95'],
+        }
+    if not size_classes:
+        return None
+    return save_tuning(size_classes, report['pandoc_path'], report['native_writer'])
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="扫描并发数和输入大小，测量转换吞吐量和延迟的饱和曲线")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--corpus", default=os.path.join(root_dir, CORPUS_FILE), help="语料文件")
+    parser.add_argument("--pandoc", default=os.environ.get('PANDOC_PATH') or os.path.join(root_dir, 'pandoc', 'pandoc.exe'),
+                        help="pandoc可执行文件路径")
+    parser.add_argument("--sizes", nargs="+", choices=list(SAMPLE_BYTES), default=DEFAULT_SIZES, help="测量的大小分档")
+    parser.add_argument("--workers", nargs="+", type=int, default=default_worker_counts(), help="扫描的并发数")
+    parser.add_argument("--jobs-per-worker", type=int, default=3, help="每个并发转换的文档数")
+    parser.add_argument("--min-jobs", type=int, default=6, help="每个测量点至少转换的文档数")
+    parser.add_argument("--pandoc-only", action="store_true", help="不使用原生写入器，全部交给Pandoc")
+    parser.add_argument("--json", metavar="PATH", help="把报告写入JSON文件（- 表示标准输出）")
+    parser.add_argument("--save", action="store_true",
+                        help="保存各分档的最佳并发数，供 watch_folder.py 和 conversion_worker.py 自动使用")
+
+    args = parser.parse_args(argv)
+    args.workers = sorted(set(count for count in args.workers if count > 0))
+    report = sweep(args)
+
+    if args.json == '-':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n报告已写入: {args.json}")
+
+    if args.save:
+        path = save_report(report)
+        print(f"已保存最佳并发数: {path}" if path else "没有成功的测量，未保存", file=sys.stderr if args.json == '-' else sys.stdout)
+    return 0 if all(entry['best_workers'] for entry in report['sizes']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
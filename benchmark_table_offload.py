@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大表格直接写入基准脚本
+生成含有一个大表格（默认1千、1万、5万行）的HTML，分别用两种方式经Pandoc路径转换，输出耗时和峰值内存：
+  pandoc   整个文档交给Pandoc（对照组）
+  offload  大表格以占位段落代替后交给Pandoc，表格由原生写入器直接写回生成的文档
+两种方式都不使用原生写入器转换整个文档（相当于文档中有原生写入器不支持的内容，或学术论文模板），
+每次转换在单独的进程中运行，峰值内存分别统计脚本进程和Pandoc进程
+（Linux上子进程的峰值包含启动时从脚本进程继承的部分，Pandoc本身占用较少时接近脚本进程的峰值）
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zipfile
+import tempfile
+import subprocess
+from typing import Dict, Optional
+
+MODES = ('pandoc', 'offload')
+DEFAULT_ROWS = [1000, 10000, 50000]
+
+ROW_PATTERN = re.compile(rb'<w:tr[ >]')
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """当前进程（或已退出子进程中最大的）峰值常驻内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # macOS上的单位是字节，Linux上是KB
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def build_document(rows: int, columns: int) -> str:
+    """一段说明文字和一个 rows 行的数据表格，单元格包含数字、中英文混排、加粗和链接"""
+    header = ''.join(f'<th>字段{column + 1}</th>' for column in range(columns))
+    body = []
+    for index in range(rows):
+        cells = [f'<td>{index + 1}</td>', f'<td>样本{index % 97}组Group {index % 13}</td>',
+                 f'<td><strong>{index * 37 % 1000 / 10:.1f}%</strong></td>',
+                 f'<td><a href="https://example.com/items/{index}">明细</a></td>']
+        cells += [f'<td>备注 {index % 7}</td>'] * (columns - len(cells))
+        body.append(f'<tr>{"".join(cells[:columns])}</tr>')
+    return (f'<html><body><h1>数据报告</h1><p>以下为全部 {rows} 条记录的统计结果。</p>'
+            f'<table><thead><tr>{header}</tr></thead><tbody>{"".join(body)}</tbody></table>'
+            f'<p>以上数据由系统自动生成。</p></body></html>')
+
+
+def count_rows(docx_path: str) -> int:
+    """生成的文档中表格行的数量（用于核对两种方式的结果）"""
+    count = 0
+    with zipfile.ZipFile(docx_path) as docx, docx.open('word/document.xml') as document:
+        rest = b''
+        while True:
+            data = document.read(1024 * 1024)
+            if not data:
+                break
+            data = rest + data
+            count += len(ROW_PATTERN.findall(data))
+            # 保留末尾可能被截断的标签
+            rest = data[-6:]
+            count -= len(ROW_PATTERN.findall(rest))
+    return count
+
+
+def run_trial(args) -> Dict:
+    """在当前进程中转换一次，返回测量结果"""
+    sys.path.insert(0, args.src)
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+
+    html = build_document(args.rows, args.columns)
+    converter = EnhancedPandocConverter(args.pandoc, use_native_writer=False, optimize_output=False,
+                                        offload_tables=args.trial == 'offload')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, 'table.docx')
+        start = time.perf_counter()
+        success, message = converter.convert_html_to_docx(html, output_file, args.template)
+        elapsed = time.perf_counter() - start
+        return {
+            'mode': args.trial,
+            'rows': args.rows,
+            'success': success,
+            'message': None if success else message,
+            'seconds': elapsed,
+            'html_mb': len(html.encode('utf-8')) / (1024 * 1024),
+            'docx_kb': os.path.getsize(output_file) / 1024 if success else None,
+            'table_rows': count_rows(output_file) if success else None,
+            'script_rss_mb': peak_rss_mb(),
+            'pandoc_rss_mb': peak_rss_mb(children=True),
+        }
+
+
+def compare(args) -> bool:
+    print(f"Pandoc: {args.pandoc}，模板 {args.template}，每行 {args.columns} 列")
+    print(f"{'行数':>6}  {'方式':<8}{'耗时(秒)':>10}{'加速':>8}{'输出(KB)':>10}{'表格行':>8}"
+          f"{'脚本峰值(MB)':>14}{'Pandoc峰值(MB)':>16}")
+    passed = True
+    results = []
+    for rows in args.rows:
+        baseline = None
+        for mode in args.modes:
+            command = [sys.executable, os.path.abspath(__file__), '--trial', mode, '--src', args.src,
+                       '--pandoc', args.pandoc, '--template', args.template, '--rows', str(rows),
+                       '--columns', str(args.columns)]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            lines = completed.stdout.strip().splitlines()
+            if completed.returncode != 0 or not lines:
+                print(f"{rows:>6}  {mode:<8}运行失败：{completed.stderr.strip()[-500:]}")
+                passed = False
+                continue
+            result = json.loads(lines[-1])
+            results.append(result)
+            if not result['success']:
+                print(f"{rows:>6}  {mode:<8}转换失败：{' '.join(result['message'].split())[:200]}")
+                passed = False
+                continue
+            if mode == 'pandoc':
+                baseline = result['seconds']
+            speedup = f"{baseline / result['seconds']:.1f}x" if baseline and mode != 'pandoc' else '-'
+            rss = ['-' if result[key] is None else f"{result[key]:.0f}" for key in ('script_rss_mb', 'pandoc_rss_mb')]
+            print(f"{rows:>6}  {mode:<8}{result['seconds']:>10.2f}{speedup:>8}{result['docx_kb']:>10.0f}"
+                  f"{result['table_rows']:>8}{rss[0]:>14}{rss[1]:>16}")
+            # 表头一行加数据行
+            passed = passed and result['table_rows'] == rows + 1
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入: {args.json}")
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="对比大表格交给Pandoc与原生写入器直接写入的耗时和峰值内存")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--pandoc", default=os.environ.get('PANDOC_PATH') or os.path.join(root_dir, 'pandoc', 'pandoc.exe'),
+                        help="pandoc可执行文件路径")
+    parser.add_argument("--template", default="simple",
+                        choices=["simple", "academic", "business", "technical"], help="排版模板")
+    parser.add_argument("--rows", nargs="+", type=int, default=DEFAULT_ROWS, help="表格行数")
+    parser.add_argument("--columns", type=int, default=6, help="表格列数")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="对比的方式")
+    parser.add_argument("--json", metavar="PATH", help="把结果写入JSON文件")
+    # 以下参数由脚本自身启动子进程时使用
+    parser.add_argument("--trial", choices=MODES, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.trial:
+        args.rows = args.rows[0]
+        print(json.dumps(run_trial(args)))
+        sys.exit(0)
+    sys.exit(0 if compare(args) else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+界面性能基准脚本
+测量主窗口构建、模板切换、清空内容和主题切换的耗时（默认使用offscreen平台，无需显示器），
+--draft-mb 可测量大草稿下每次按键的草稿自动保存开销
+"""
+
+import os
+import sys
+import time
+import tempfile
+from typing import Callable, Dict, List
+
+TEMPLATE_IDS = ['simple', 'academic', 'business', 'technical']
+
+
+def measure(action: Callable, app, repeat: int) -> List[float]:
+    """重复执行操作并处理挂起的事件，返回每次耗时（毫秒）"""
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        action(i)
+        app.processEvents()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: List[float]) -> str:
+    ordered = sorted(timings)
+    median = ordered[len(ordered) // 2]
+    return f"中位数 {median:.2f} ms，最小 {ordered[0]:.2f} ms，最大 {ordered[-1]:.2f} ms"
+
+
+def run(src_dir: str = "src", repeat: int = 20) -> Dict[str, List[float]]:
+    """执行基准测试，返回各项操作的耗时"""
+    sys.path.insert(0, src_dir)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QEvent
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    from ui.simple_main_window import SimpleMainWindow
+
+    results = {}
+    windows = []
+
+    def construct(_):
+        window = SimpleMainWindow()
+        windows.append(window)
+
+    # 首次构建包含样式表解析等一次性开销，单独统计
+    results['首次构建主窗口'] = measure(construct, app, 1)
+    results['构建主窗口'] = measure(construct, app, max(3, repeat // 4))
+    for window in windows[:-1]:
+        window.close()
+        window.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    window = windows[-1]
+    results['切换模板'] = measure(
+        lambda i: window._on_template_button_clicked({'id': TEMPLATE_IDS[(i + 1) % len(TEMPLATE_IDS)]}),
+        app, repeat
+    )
+    results['清空内容'] = measure(lambda i: window._clear_content(), app, repeat)
+
+    if hasattr(window, 'set_theme'):
+        theme_name = window.theme_name
+        results['切换主题'] = measure(lambda i: window._toggle_theme(), app, max(2, repeat // 4) // 2 * 2)
+        window.set_theme(theme_name)
+
+    for name, timings in results.items():
+        print(f"{name}: {summarize(timings)}")
+    return results
+
+
+def run_draft(src_dir: str = "src", size_mb: float = 5, keystrokes: int = 200) -> Dict[str, List[float]]:
+    """测量大草稿下每次按键的耗时：不保存、追加日志、每次重写完整草稿，以及重启后恢复草稿的耗时"""
+    sys.path.insert(0, src_dir)
+    from PyQt5.QtWidgets import QApplication, QTextEdit
+    from PyQt5.QtGui import QTextCursor
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    from ui.draft_autosave import DraftAutosave
+
+    line = '<p>这是一段用于测试草稿自动保存的中文内容，包含English text和数字12345。</p>\n'
+    draft = line * max(1, int(size_mb * 1024 * 1024 / len(line.encode('utf-8'))))
+    print(f"草稿大小：{len(draft.encode('utf-8')) / 1024 / 1024:.1f} MB")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def type_keys(editor, after_key=None):
+            cursor = QTextCursor(editor.document())
+            cursor.setPosition(len(draft) // 2)
+            timings = []
+            for i in range(keystrokes):
+                start = time.perf_counter()
+                cursor.insertText('字')
+                if after_key:
+                    after_key()
+                timings.append((time.perf_counter() - start) * 1000)
+            return timings
+
+        editor = QTextEdit()
+        editor.setAcceptRichText(False)
+        editor.setPlainText(draft)
+        results['按键（不保存）'] = type_keys(editor)
+
+        # 每次按键把完整草稿重写到磁盘
+        naive_path = os.path.join(temp_dir, 'naive.html')
+
+        def rewrite():
+            with open(naive_path, 'w', encoding='utf-8') as f:
+                f.write(editor.toPlainText())
+        results['按键（每次重写完整草稿）'] = type_keys(editor, rewrite)
+
+        journal_dir = os.path.join(temp_dir, 'drafts')
+        editor = QTextEdit()
+        editor.setAcceptRichText(False)
+        autosave = DraftAutosave(editor, journal_dir)
+        autosave.restore()
+        editor.setPlainText(draft)
+        autosave.sync()
+        results['按键（追加草稿日志）'] = type_keys(editor)
+        results['刷盘'] = measure(lambda i: autosave.sync(), app, 5)
+        expected = editor.toPlainText()
+        autosave.close()
+
+        restored_editor = QTextEdit()
+        restored_editor.setAcceptRichText(False)
+        restored = DraftAutosave(restored_editor, journal_dir)
+        start = time.perf_counter()
+        restored.restore()
+        results['恢复草稿'] = [(time.perf_counter() - start) * 1000]
+        if restored_editor.toPlainText() != expected:
+            print("警告：恢复的草稿与编辑框内容不一致")
+        restored.close()
+
+    for name, timings in results.items():
+        print(f"{name}: {summarize(timings)}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="测量主窗口构建与交互的耗时")
+    parser.add_argument("--src", default="src", help="源代码目录路径")
+    parser.add_argument("--repeat", type=int, default=20, help="每项操作的重复次数")
+    parser.add_argument("--platform", default="offscreen", help="Qt平台插件，传入空字符串则使用系统默认")
+    parser.add_argument("--draft-mb", type=float, default=0, help="测量指定大小（MB）草稿的自动保存开销")
+
+    args = parser.parse_args()
+    if args.platform:
+        os.environ.setdefault('QT_QPA_PLATFORM', args.platform)
+    # 基准中创建的窗口不能读写用户真实的草稿
+    data_dir = tempfile.mkdtemp(prefix='benchmark_ui_')
+    os.environ['XDG_DATA_HOME'] = os.environ['LOCALAPPDATA'] = data_dir
+    if args.draft_mb:
+        run_draft(os.path.abspath(args.src), args.draft_mb)
+    else:
+        run(os.path.abspath(args.src), args.repeat)
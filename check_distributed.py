@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式转换检查脚本
+在本机启动协调进程和多个 conversion_worker.py 工作进程，用 test_tags.md 生成一批内容不同的任务：
+检查全部任务都能完成、输出文档通过校验，并输出各工作进程的吞吐量；
+--fault 会在转换过程中杀死一个工作进程、暂停另一个（Linux下使用SIGSTOP模拟失联），
+检查断开和心跳超时的工作进程上的任务被重新分派；
+--upload-fault 让一个模拟的工作进程在传回结果的中途被杀死（正常关闭连接和连接重置各一次），
+检查任务被重新分派给正常的工作进程、调用方不会一直等待、不残留不完整的临时文件
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import struct
+import socket
+import tempfile
+import threading
+import subprocess
+from typing import List
+
+CORPUS_FILE = "test_tags.md"
+
+
+def start_workers(root_dir: str, address, count: int, slots: int, token: str) -> List[subprocess.Popen]:
+    """启动本机工作进程"""
+    workers = []
+    for index in range(count):
+        workers.append(subprocess.Popen(
+            [sys.executable, os.path.join(root_dir, 'conversion_worker.py'), f'{address[0]}:{address[1]}',
+             '--slots', str(slots), '--token', token, '--name', f'local-{index + 1}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+    return workers
+
+
+def wait_for_workers(coordinator, count: int, timeout: float = 30) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if sum(1 for stats in coordinator.worker_stats() if stats['alive']) >= count:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def run_check(root_dir: str, corpus_file: str, worker_count: int, slots: int, job_count: int, fault: bool) -> bool:
+    from core.distributed_workers import Coordinator
+    from core.conversion_queue import ConversionQueue, STATUS_SUCCEEDED
+    from core.docx_optimizer import check_docx
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    token = os.urandom(8).hex()
+    # 缩短心跳超时，让失联检测在检查中很快发生
+    coordinator = Coordinator('127.0.0.1', 0, token=token, heartbeat_interval=0.5, heartbeat_timeout=3)
+    address = coordinator.start()
+    workers = start_workers(root_dir, address, worker_count, slots, token)
+    passed = True
+    try:
+        if not wait_for_workers(coordinator, worker_count):
+            print("工作进程未能在30秒内连接")
+            return False
+        print(f"协调进程 {address[0]}:{address[1]}，{worker_count} 个工作进程，每个 {slots} 槽位")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # 模板本身存在的问题不算作分布式转换引入的问题
+            baseline_file = os.path.join(temp_dir, 'baseline.docx')
+            EnhancedPandocConverter().convert_html_to_docx(html, baseline_file, 'simple')
+            baseline_problems = set(check_docx(baseline_file))
+
+            finished = []
+            queue = ConversionQueue(coordinator, max_workers=worker_count * slots * 2,
+                                    history_size=job_count, on_update=lambda job: finished.append(job)
+                                    if job.finished_at is not None else None)
+            start = time.perf_counter()
+            for index in range(job_count):
+                # 每个任务内容不同，避免被任务队列合并
+                content = html.replace('</body>', f'<p>第 {index + 1} 份</p></body>')
+                queue.submit(content, 'simple', os.path.join(temp_dir, f'job_{index + 1}.docx'))
+
+            if fault and len(workers) >= 3:
+                while len(finished) < job_count // 4:
+                    time.sleep(0.01)
+                workers[0].kill()
+                print("已杀死工作进程 local-1")
+                if hasattr(signal, 'SIGSTOP'):
+                    workers[1].send_signal(signal.SIGSTOP)
+                    print("已暂停工作进程 local-2（模拟失联）")
+
+            while queue.pending_count():
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - start
+
+            jobs = list(queue.history)
+            failed = [job for job in jobs if job.status != STATUS_SUCCEEDED]
+            invalid = [job for job in jobs
+                       if job.status == STATUS_SUCCEEDED and set(check_docx(job.output_file)) - baseline_problems]
+            print(f"完成 {len(jobs) - len(failed)}/{job_count} 个任务，耗时 {elapsed:.2f} 秒"
+                  f"（{job_count / elapsed:.1f} 个/秒）")
+            for job in failed:
+                print(f"  [失败] {os.path.basename(job.output_file)}: {job.message}")
+            for job in invalid:
+                problems = sorted(set(check_docx(job.output_file)) - baseline_problems)
+                print(f"  [校验失败] {os.path.basename(job.output_file)}: {problems}")
+            passed = not failed and not invalid
+
+        print(coordinator.format_stats())
+        if fault and len(workers) >= 3:
+            lost = sum(stats['lost'] for stats in coordinator.worker_stats())
+            alive = [stats['worker_id'] for stats in coordinator.worker_stats() if stats['alive']]
+            print(f"重新分派 {lost} 个任务，在线工作进程：{'、'.join(alive)}")
+            if 'local-2' in alive:
+                print("  - 暂停的工作进程没有被判定为失联")
+                passed = False
+    finally:
+        for worker in workers:
+            if hasattr(signal, 'SIGCONT'):
+                worker.send_signal(signal.SIGCONT)
+            worker.terminate()
+        for worker in workers:
+            worker.wait(timeout=10)
+        coordinator.stop()
+    return passed
+
+
+def run_fake_uploader(address: str, token: str, reset: bool) -> int:
+    """模拟的工作进程：领取一个任务，传回结果时只发送一半，然后等待被杀死
+
+    reset 为True时设置 SO_LINGER 为0，进程被杀死时连接以RST关闭（协调进程读到OSError），
+    否则正常关闭（协调进程读到 ProtocolError）
+    """
+    from core.distributed_workers import Channel, PROTOCOL_VERSION, _NullSink, parse_address
+
+    sock = socket.create_connection(parse_address(address))
+    if reset:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    channel = Channel(sock)
+    channel.send({'type': 'hello', 'version': PROTOCOL_VERSION, 'token': token,
+                  'worker_id': 'uploader', 'slots': 1, 'shared_memory': False})
+    channel.receive()
+    channel.send({'type': 'pull'})
+    while True:
+        header = channel.receive()
+        if header.get('type') == 'job':
+            break
+    channel.read_payload(header, _NullSink())
+
+    size = 4 * 1024 * 1024
+    data = json.dumps({'type': 'result', 'job_id': header['job_id'], 'success': True,
+                       'message': 'output.docx', 'size': size}).encode('utf-8')
+    sock.sendall(struct.pack('!I', len(data)) + data + b'\0' * (size // 2))
+    print('uploading', flush=True)
+    time.sleep(60)
+    return 1
+
+
+def run_upload_fault_check(root_dir: str, src_dir: str, corpus_file: str) -> bool:
+    """工作进程在传回结果中途被杀死时，任务重新分派给正常的工作进程"""
+    from core.distributed_workers import Coordinator
+    from core.docx_optimizer import check_docx
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    passed = True
+    for reset in (False, True):
+        label = '连接重置' if reset else '连接关闭'
+        token = os.urandom(8).hex()
+        coordinator = Coordinator('127.0.0.1', 0, token=token, heartbeat_interval=0.5, heartbeat_timeout=3)
+        address = coordinator.start()
+        uploader = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--src', src_dir,
+             '--fake-uploader', f'{address[0]}:{address[1]}', '--token', token] + (['--reset'] if reset else []),
+            stdout=subprocess.PIPE, text=True,
+        )
+        workers = []
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                output_file = os.path.join(temp_dir, 'upload.docx')
+                result = []
+                thread = threading.Thread(
+                    target=lambda: result.append(coordinator.convert_html_to_docx(html, output_file, 'simple')),
+                    daemon=True,
+                )
+                thread.start()
+
+                if uploader.stdout.readline().strip() != 'uploading':
+                    print(f"[失败] {label}：模拟的工作进程没有开始传回结果")
+                    passed = False
+                    continue
+                uploader.kill()
+                uploader.wait(timeout=10)
+                workers = start_workers(root_dir, address, 1, 1, token)
+
+                thread.join(timeout=60)
+                problems = []
+                if thread.is_alive():
+                    problems.append("60秒内没有结束，任务既没有完成也没有重新分派")
+                elif not result[0][0]:
+                    problems.append(f"任务失败：{result[0][1]}")
+                else:
+                    # 模板本身存在的问题不算作分布式转换引入的问题
+                    baseline_file = os.path.join(temp_dir, 'baseline.docx')
+                    EnhancedPandocConverter().convert_html_to_docx(html, baseline_file, 'simple')
+                    new_problems = set(check_docx(output_file)) - set(check_docx(baseline_file))
+                    if new_problems:
+                        problems.append(f"输出文档未通过校验：{sorted(new_problems)}")
+                leftovers = [name for name in os.listdir(temp_dir) if name.endswith('.part')]
+                if leftovers:
+                    problems.append(f"残留不完整的临时文件：{leftovers}")
+                lost = sum(stats['lost'] for stats in coordinator.worker_stats())
+                if lost != 1:
+                    problems.append(f"重新分派的任务数为 {lost}，应为1")
+
+                print(f"[{'通过' if not problems else '失败'}] 传回结果中途杀死工作进程（{label}）")
+                for problem in problems:
+                    print(f"  - {problem}")
+                passed = passed and not problems
+        finally:
+            if uploader.poll() is None:
+                uploader.kill()
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.wait(timeout=10)
+            coordinator.stop()
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="在本机用多个工作进程检查分布式转换")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--corpus", default=os.path.join(root_dir, CORPUS_FILE), help="语料文件")
+    parser.add_argument("--workers", type=int, default=3, help="启动的工作进程数")
+    parser.add_argument("--slots", type=int, default=1, help="每个工作进程的槽位数")
+    parser.add_argument("--jobs", type=int, default=60, help="任务数")
+    parser.add_argument("--fault", action="store_true", help="转换过程中杀死和暂停工作进程（至少3个工作进程）")
+    parser.add_argument("--upload-fault", action="store_true", help="只检查传回结果中途杀死工作进程时任务被重新分派")
+    # 以下参数由脚本自身启动子进程时使用
+    parser.add_argument("--fake-uploader", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    parser.add_argument("--reset", action="store_true", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    sys.path.insert(0, args.src)
+    if args.fake_uploader:
+        sys.exit(run_fake_uploader(args.fake_uploader, args.token, args.reset))
+    if args.upload_fault:
+        sys.exit(0 if run_upload_fault_check(root_dir, args.src, args.corpus) else 1)
+    sys.exit(0 if run_check(root_dir, args.corpus, args.workers, args.slots, args.jobs, args.fault) else 1)
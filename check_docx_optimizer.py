@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOCX体积优化检查脚本
+不依赖Pandoc，按已知内容构造一个小文档，检查 src/core/docx_optimizer.py：
+  精简样式   未引用的样式被删除，默认样式、继承链上的样式和标题样式保留，命名空间声明不变
+  合并图片   内容相同的图片只保留一份，关系指向保留的副本，可选部件和无引用的部件被移除
+  兼容校验   优化结果通过 check_docx；人为破坏的文档（关系、内容类型、XML、样式引用）能被 check_docx 发现
+  出错保护   优化出错时转换器保留未优化的文件
+"""
+
+import os
+import re
+import sys
+import random
+import zipfile
+import tempfile
+from typing import Callable, Dict, List
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+REL_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# 两张内容相同的图片和一张不同的图片（不需要是合法的PNG，内容为随机字节，与真实图片一样无法再压缩）
+_random = random.Random(31)
+IMAGE_A = b'\x89PNG\r\n\x1a\n' + _random.randbytes(4096)
+IMAGE_B = b'\x89PNG\r\n\x1a\n' + _random.randbytes(4096)
+
+CONTENT_TYPES = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="png" ContentType="image/png"/>
+<Default Extension="jpeg" ContentType="image/jpeg"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/word/stylesWithEffects.xml" ContentType="application/vnd.ms-word.stylesWithEffects+xml"/>
+</Types>'''
+
+PACKAGE_RELS = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="{PACKAGE_RELS_NS}">
+<Relationship Id="rId1" Type="{REL_TYPE}/officeDocument" Target="word/document.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/thumbnail" Target="docProps/thumbnail.jpeg"/>
+</Relationships>'''
+
+DOCUMENT_RELS = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="{PACKAGE_RELS_NS}">
+<Relationship Id="rId1" Type="{REL_TYPE}/styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="{REL_TYPE}/image" Target="media/image1.png"/>
+<Relationship Id="rId3" Type="{REL_TYPE}/image" Target="media/image2.png"/>
+<Relationship Id="rId4" Type="{REL_TYPE}/image" Target="media/image3.png"/>
+<Relationship Id="rId5" Type="http://schemas.microsoft.com/office/2007/relationships/stylesWithEffects" Target="stylesWithEffects.xml"/>
+<Relationship Id="rId6" Type="{REL_TYPE}/hyperlink" Target="https://example.com/" TargetMode="External"/>
+</Relationships>'''
+
+
+def _image(rel_id: str) -> str:
+    return (f'<w:r><w:drawing><a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+            f'<a:blip r:embed="{rel_id}"/></a:graphic></w:drawing></w:r>')
+
+
+DOCUMENT = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}"><w:body>
+<w:p><w:pPr><w:pStyle w:val="Used"/></w:pPr><w:r><w:rPr><w:rStyle w:val="UsedChar"/></w:rPr><w:t>正文</w:t></w:r></w:p>
+<w:p><w:hyperlink r:id="rId6"><w:r><w:t>链接</w:t></w:r></w:hyperlink></w:p>
+<w:p>{_image('rId2')}{_image('rId3')}{_image('rId4')}</w:p>
+</w:body></w:document>'''
+
+
+def _style(style_id: str, name: str, style_type: str = 'paragraph', extra: str = '') -> str:
+    return f'<w:style w:type="{style_type}" w:styleId="{style_id}"><w:name w:val="{name}"/>{extra}</w:style>'
+
+
+STYLES = (
+    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:styles xmlns:w="{W_NS}" xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    f'xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml" mc:Ignorable="w14">'
+    + '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+    + _style('Parent', 'Parent', extra='<w:basedOn w:val="Normal"/>')
+    + _style('Used', 'Used', extra='<w:basedOn w:val="Parent"/><w:next w:val="NextStyle"/>')
+    + _style('NextStyle', 'Next Style')
+    + _style('UsedChar', 'Used Char', 'character')
+    + _style('Heading1', 'heading 1', extra='<w:basedOn w:val="Normal"/>')
+    + _style('Unused', 'Unused')
+    + _style('UnusedChild', 'Unused Child', extra='<w:basedOn w:val="Unused"/>')
+    + '</w:styles>'
+)
+
+KEPT_STYLES = {'Normal', 'Parent', 'Used', 'NextStyle', 'UsedChar', 'Heading1'}
+ALL_STYLES = KEPT_STYLES | {'Unused', 'UnusedChild'}
+
+
+def base_parts() -> Dict[str, bytes]:
+    """构造文档的各部件（部件名 → 内容）"""
+    parts = {
+        '[Content_Types].xml': CONTENT_TYPES,
+        '_rels/.rels': PACKAGE_RELS,
+        'docProps/thumbnail.jpeg': b'\xff\xd8\xff' + b'T' * 512,
+        'word/document.xml': DOCUMENT,
+        'word/_rels/document.xml.rels': DOCUMENT_RELS,
+        'word/styles.xml': STYLES,
+        'word/stylesWithEffects.xml': STYLES,
+        'word/media/image1.png': IMAGE_A,
+        'word/media/image2.png': IMAGE_A,
+        'word/media/image3.png': IMAGE_B,
+        # 没有任何关系指向的部件（如模板中残留的图片）
+        'word/media/orphan.png': IMAGE_B + b'orphan',
+    }
+    return {name: data.encode('utf-8') if isinstance(data, str) else data for name, data in parts.items()}
+
+
+def write_docx(path: str, parts: Dict[str, bytes]) -> str:
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as docx:
+        for name, data in parts.items():
+            docx.writestr(name, data)
+    return path
+
+
+def read_parts(path: str) -> Dict[str, bytes]:
+    with zipfile.ZipFile(path) as docx:
+        return {name: docx.read(name) for name in docx.namelist()}
+
+
+def style_ids(styles_xml: bytes) -> set:
+    return {value.decode('utf-8') for value in re.findall(rb'<w:style\b[^>]*?\sw:styleId="([^"]*)"', styles_xml)}
+
+
+def relationship_targets(rels_xml: bytes) -> Dict[str, str]:
+    return {
+        rel_id.decode('utf-8'): target.decode('utf-8')
+        for rel_id, target in re.findall(rb'<Relationship\b[^>]*?\sId="([^"]*)"[^>]*?\sTarget="([^"]*)"', rels_xml)
+    }
+
+
+def check_optimized(temp_dir: str) -> List[str]:
+    """默认选项优化后的文档：精简样式、合并图片、移除可选部件，并通过 check_docx"""
+    from core.docx_optimizer import optimize_docx, check_docx
+
+    problems = []
+    path = write_docx(os.path.join(temp_dir, 'optimize.docx'), base_parts())
+    original_problems = check_docx(path)
+    if original_problems:
+        return [f"构造的文档未通过校验：{problem}" for problem in original_problems]
+    original_size = os.path.getsize(path)
+
+    success, message = optimize_docx(path)
+    if not success:
+        return [f"优化失败：{message}"]
+    problems.extend(f"优化结果未通过校验：{problem}" for problem in check_docx(path))
+    if os.path.getsize(path) >= original_size:
+        problems.append(f"优化后体积没有减小：{original_size} → {os.path.getsize(path)} 字节")
+    if os.path.exists(path + '.opt'):
+        problems.append("优化后残留临时文件")
+
+    parts = read_parts(path)
+    before = base_parts()
+
+    # 精简样式
+    remaining = style_ids(parts['word/styles.xml'])
+    if remaining != KEPT_STYLES:
+        problems.append(f"保留的样式为 {sorted(remaining)}，应为 {sorted(KEPT_STYLES)}")
+    root = re.search(rb'<w:styles\b[^>]*>', parts['word/styles.xml']).group(0)
+    if root != re.search(rb'<w:styles\b[^>]*>', before['word/styles.xml']).group(0):
+        problems.append("styles.xml 的根元素（命名空间声明、mc:Ignorable）被改写")
+    if parts['word/document.xml'] != before['word/document.xml']:
+        problems.append("document.xml 的内容被改写")
+
+    # 合并图片、移除可选部件和无引用的部件
+    for name in ('word/media/image2.png', 'word/stylesWithEffects.xml', 'docProps/thumbnail.jpeg',
+                 'word/media/orphan.png'):
+        if name in parts:
+            problems.append(f"未移除部件：{name}")
+    for name in ('word/media/image1.png', 'word/media/image3.png'):
+        if parts.get(name) != before[name]:
+            problems.append(f"图片丢失或内容改变：{name}")
+    targets = relationship_targets(parts['word/_rels/document.xml.rels'])
+    expected = {'rId1': 'styles.xml', 'rId2': 'media/image1.png', 'rId3': 'media/image1.png',
+                'rId4': 'media/image3.png', 'rId6': 'https://example.com/'}
+    if targets != expected:
+        problems.append(f"document.xml.rels 中的关系为 {targets}，应为 {expected}")
+    if 'docProps/thumbnail.jpeg' in relationship_targets(parts['_rels/.rels']).values():
+        problems.append("包关系中仍有指向缩略图的关系")
+    if b'stylesWithEffects' in parts['[Content_Types].xml']:
+        problems.append("[Content_Types].xml 中仍有已移除部件的声明")
+
+    # 图片直接存储，XML部件压缩
+    with zipfile.ZipFile(path) as docx:
+        if docx.getinfo('word/media/image1.png').compress_type != zipfile.ZIP_STORED:
+            problems.append("图片被重新压缩")
+        if docx.getinfo('word/styles.xml').compress_type != zipfile.ZIP_DEFLATED:
+            problems.append("XML部件没有压缩")
+        if docx.namelist()[0] != '[Content_Types].xml':
+            problems.append("[Content_Types].xml 不是压缩包中的第一个部件")
+
+    # 再次优化时文档已是最小体积，内容不变
+    optimized = read_parts(path)
+    success, message = optimize_docx(path)
+    if not success or read_parts(path) != optimized:
+        problems.append(f"再次优化改变了文档：{message}")
+    return problems
+
+
+def check_options(temp_dir: str) -> List[str]:
+    """关闭某一项优化时对应的内容保持不变"""
+    from core.docx_optimizer import optimize_docx, check_docx
+
+    problems = []
+    path = write_docx(os.path.join(temp_dir, 'no_prune.docx'), base_parts())
+    success, message = optimize_docx(path, prune_styles=False)
+    if not success:
+        problems.append(f"不精简样式时优化失败：{message}")
+    elif style_ids(read_parts(path)['word/styles.xml']) != ALL_STYLES:
+        problems.append("prune_styles=False 时样式仍被删除")
+
+    path = write_docx(os.path.join(temp_dir, 'no_dedupe.docx'), base_parts())
+    success, message = optimize_docx(path, dedupe_media=False)
+    if not success:
+        problems.append(f"不合并图片时优化失败：{message}")
+    else:
+        parts = read_parts(path)
+        if 'word/media/image2.png' not in parts:
+            problems.append("dedupe_media=False 时重复图片仍被合并")
+        if relationship_targets(parts['word/_rels/document.xml.rels']).get('rId3') != 'media/image2.png':
+            problems.append("dedupe_media=False 时图片关系被改写")
+
+    path = write_docx(os.path.join(temp_dir, 'keep_optional.docx'), base_parts())
+    success, message = optimize_docx(path, remove_optional_parts=False)
+    if not success:
+        problems.append(f"保留可选部件时优化失败：{message}")
+    elif 'word/stylesWithEffects.xml' not in read_parts(path):
+        problems.append("remove_optional_parts=False 时可选部件仍被移除")
+    problems.extend(f"优化结果未通过校验：{problem}" for problem in check_docx(path))
+    return problems
+
+
+def _replace(name: str, old: bytes, new: bytes) -> Callable[[Dict[str, bytes]], None]:
+    def mutate(parts):
+        assert old in parts[name], (name, old)
+        parts[name] = parts[name].replace(old, new)
+    return mutate
+
+
+def _remove(name: str) -> Callable[[Dict[str, bytes]], None]:
+    def mutate(parts):
+        del parts[name]
+    return mutate
+
+
+# 人为破坏的文档 → check_docx 应报告的问题中包含的文字
+BROKEN_DOCUMENTS = [
+    ('关系指向不存在的部件', _remove('word/media/image3.png'), '指向不存在的部件: word/media/image3.png'),
+    ('部件缺少内容类型', _replace('[Content_Types].xml', b'<Default Extension="png" ContentType="image/png"/>', b''),
+     '部件缺少内容类型: word/media/image1.png'),
+    ('内容类型指向不存在的部件', _remove('word/stylesWithEffects.xml'), '内容类型指向不存在的部件: word/stylesWithEffects.xml'),
+    ('XML不合法', _replace('word/document.xml', b'</w:body>', b'</w:bdy>'), '部件不是合法的XML: word/document.xml'),
+    ('引用不存在的关系', _replace('word/document.xml', b'r:embed="rId4"', b'r:embed="rId9"'),
+     'word/document.xml 引用了不存在的关系: rId9'),
+    ('引用不存在的样式', _replace('word/document.xml', b'<w:pStyle w:val="Used"/>', b'<w:pStyle w:val="Missing"/>'),
+     'word/document.xml 引用了不存在的样式: Missing'),
+    ('缺少主文档', _replace('_rels/.rels', b'/officeDocument"', b'/document"'), '包关系中缺少主文档'),
+    ('缺少内容类型声明', _remove('[Content_Types].xml'), '缺少 [Content_Types].xml'),
+]
+
+
+def check_validator(temp_dir: str) -> List[str]:
+    """check_docx 能发现每一种人为破坏"""
+    from core.docx_optimizer import check_docx
+
+    problems = []
+    for index, (label, mutate, expected) in enumerate(BROKEN_DOCUMENTS):
+        parts = base_parts()
+        mutate(parts)
+        found = check_docx(write_docx(os.path.join(temp_dir, f'broken_{index}.docx'), parts))
+        if not any(expected in problem for problem in found):
+            problems.append(f"{label}：未报告“{expected}”（报告：{found}）")
+
+    path = os.path.join(temp_dir, 'not_a_zip.docx')
+    with open(path, 'wb') as f:
+        f.write(b'not a zip file')
+    if not any('无法打开压缩包' in problem for problem in check_docx(path)):
+        problems.append("非压缩包文件未报告无法打开")
+    return problems
+
+
+def check_converter(temp_dir: str) -> List[str]:
+    """转换器默认不优化；优化出错时保留未优化的文件"""
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+
+    problems = []
+    if EnhancedPandocConverter().optimize_output:
+        problems.append("转换器默认开启了体积优化")
+
+    # 缺少 [Content_Types].xml 的文档会让优化在重写时出错
+    parts = base_parts()
+    del parts['[Content_Types].xml']
+    path = write_docx(os.path.join(temp_dir, 'failing.docx'), parts)
+    with open(path, 'rb') as f:
+        original = f.read()
+    try:
+        EnhancedPandocConverter(optimize_output=True)._optimize_output(path)
+    except Exception as e:
+        problems.append(f"优化出错时异常没有被处理：{e!r}")
+    with open(path, 'rb') as f:
+        if f.read() != original:
+            problems.append("优化出错后文件被改变")
+    if os.path.exists(path + '.opt'):
+        problems.append("优化出错后残留临时文件")
+    return problems
+
+
+def run_checks() -> bool:
+    checks = [
+        ('精简样式与合并图片', check_optimized),
+        ('优化选项', check_options),
+        ('兼容性校验', check_validator),
+        ('转换器出错保护', check_converter),
+    ]
+    passed = True
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for label, check in checks:
+            problems = check(temp_dir)
+            print(f"[{'通过' if not problems else '失败'}] {label}")
+            for problem in problems:
+                print(f"  - {problem}")
+            passed = passed and not problems
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="检查DOCX体积优化和兼容性校验")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+
+    args = parser.parse_args()
+    sys.path.insert(0, args.src)
+    sys.exit(0 if run_checks() else 1)
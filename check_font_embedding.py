@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字体嵌入检查脚本
+用 test_tags.md 作为语料，按每个排版方案转换后嵌入中文字体子集：
+检查嵌入的字体能还原为有效字体、覆盖文档中用到的全部中文字符，
+并对比嵌入前后的文件体积、首次嵌入（生成子集）和命中子集缓存时的耗时
+"""
+
+import io
+import os
+import re
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+from typing import Dict, List, Optional
+
+CORPUS_FILE = "test_tags.md"
+
+
+def check_embedded(docx_path: str) -> List[str]:
+    """检查嵌入了字体的文档，返回发现的问题列表"""
+    from fontTools.ttLib import TTFont
+    from core.font_embedder import FONT_TABLE, FONT_TABLE_RELS, obfuscate_font, collect_font_usage
+    from core.cjk_typography import CJK_CHARS
+
+    problems = []
+    with zipfile.ZipFile(docx_path) as docx:
+        names = set(docx.namelist())
+        chars, _, _ = collect_font_usage(docx, names)
+        font_table = docx.read(FONT_TABLE).decode('utf-8')
+        rels = docx.read(FONT_TABLE_RELS).decode('utf-8') if FONT_TABLE_RELS in names else ''
+        settings = docx.read('word/settings.xml').decode('utf-8')
+        cjk = {ord(char) for char in chars if re.match(f'[{CJK_CHARS}]', char)}
+
+        if '<w:embedTrueTypeFonts/>' not in settings:
+            problems.append("设置中没有开启 embedTrueTypeFonts")
+        for name, relationship_id, key in re.findall(
+            r'<w:font w:name="([^"]+)">(?:(?!</w:font>).)*?<w:embedRegular r:id="([^"]+)" w:fontKey="([^"]+)"',
+            font_table, re.S
+        ):
+            target = re.search(rf'Id="{relationship_id}"[^>]*Target="([^"]+)"', rels)
+            if target is None or f'word/{target.group(1)}' not in names:
+                problems.append(f"{name}：嵌入字体的关系指向不存在的部件")
+                continue
+            try:
+                font = TTFont(io.BytesIO(obfuscate_font(docx.read(f'word/{target.group(1)}'), key)))
+                cmap = font.getBestCmap() or {}
+            except Exception as e:
+                problems.append(f"{name}：嵌入的字体无法还原（{e}）")
+                continue
+            missing = cjk - set(cmap)
+            if missing and len(missing) == len(cjk):
+                problems.append(f"{name}：嵌入的字体不含文档中的中文字符")
+            elif missing:
+                # 原字体本身不含的字符不计入
+                print(f"  {name} 不含 {len(missing)} 个文档用到的中文字符（原字体缺字）")
+    return problems
+
+
+def run_corpus(corpus_file: str, pandoc_path: Optional[str], font_dirs: List[str]) -> bool:
+    """按每个排版方案转换语料、嵌入字体并检查，输出体积和耗时"""
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.cjk_typography import TYPOGRAPHY_SETTINGS
+    from core.font_embedder import FontIndex, embed_fonts, fonttools_available
+
+    if not fonttools_available():
+        print("未安装fontTools，无法检查字体嵌入（pip install fonttools）")
+        return False
+
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    passed = True
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_dir = os.path.join(temp_dir, 'fonts')
+        start = time.perf_counter()
+        font_index = FontIndex(font_dirs or None, cache_dir)
+        print(f"字体索引：{len(font_index.faces)} 个字体名，耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        converter = EnhancedPandocConverter(pandoc_path, typography=True)
+        for template_style in TYPOGRAPHY_SETTINGS:
+            original_file = os.path.join(temp_dir, f'{template_style}_original.docx')
+            output_file = os.path.join(temp_dir, f'{template_style}.docx')
+            success, message = converter.convert_html_to_docx(html, original_file, template_style)
+            if not success:
+                # 需要Pandoc的方案（如学术论文的目录）在Pandoc不可用时无法检查
+                print(f"[跳过] {template_style}: {' '.join(message.split())}")
+                continue
+
+            timings: Dict[str, float] = {}
+            for run in ('首次', '缓存'):
+                shutil.copyfile(original_file, output_file)
+                start = time.perf_counter()
+                success, message = embed_fonts(output_file, font_index, cache_dir)
+                timings[run] = (time.perf_counter() - start) * 1000
+                if not success:
+                    break
+            if not success:
+                print(f"[失败] {template_style}: {message}")
+                passed = False
+                continue
+
+            original_size = os.path.getsize(original_file)
+            embedded_size = os.path.getsize(output_file)
+            if embedded_size == original_size:
+                print(f"[跳过] {template_style}: {message}")
+                continue
+            problems = check_embedded(output_file)
+            status = "通过" if not problems else "失败"
+            print(f"[{status}] {template_style}：{original_size / 1024:.1f} KB → {embedded_size / 1024:.1f} KB，"
+                  f"首次 {timings['首次']:.0f} ms，命中缓存 {timings['缓存']:.0f} ms")
+            print(f"  {message}")
+            for problem in problems:
+                print(f"  - {problem}")
+            passed = passed and not problems
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="检查中文字体子集嵌入并测量体积和耗时")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--corpus", default=os.path.join(root_dir, CORPUS_FILE), help="语料文件")
+    parser.add_argument("--pandoc", default=os.environ.get('PANDOC_PATH') or os.path.join(root_dir, 'pandoc', 'pandoc.exe'),
+                        help="pandoc可执行文件路径")
+    parser.add_argument("--font-dir", action="append", default=[],
+                        help="字体目录（可重复），默认使用系统字体目录")
+
+    args = parser.parse_args()
+    sys.path.insert(0, args.src)
+    sys.exit(0 if run_corpus(args.corpus, args.pandoc, args.font_dir) else 1)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动导入耗时检查脚本
+基于 python -X importtime 统计启动路径的模块导入开销，超出预算或提前导入了应延迟加载的模块时返回非零退出码。
+启动路径取自入口脚本：入口脚本在模块级（不含函数体）导入的全部模块，加上按文件路径加载的主窗口模块
+"""
+
+import os
+import sys
+import ast
+import subprocess
+from typing import Dict, List, Tuple
+
+# 入口脚本（打包和直接运行时使用的同一个文件）
+ENTRY_POINT = 'app_minimal_fixed.py'
+
+# 入口脚本按文件路径加载、import语句中看不到的模块
+LOADED_BY_PATH = ['ui.simple_main_window']
+
+# 基线：PyQt5本身的导入开销不计入应用预算
+BASELINE_MODULES = ['PyQt5.QtWidgets', 'PyQt5.QtCore', 'PyQt5.QtGui']
+
+# 这些模块应在首次使用时才导入
+DEFERRED_MODULES = [
+    'ntplib', 'subprocess', 'tempfile',
+    'core.enhanced_pandoc_converter', 'core.pandoc_converter', 'core.native_docx_writer',
+    'core.docx_optimizer', 'core.conversion_queue', 'core.clipboard_payload', 'core.folder_watcher',
+    'core.cjk_typography', 'core.draft_journal', 'core.source_file', 'core.template_preview',
+    'core.stall_watchdog', 'core.font_embedder', 'fontTools', 'core.distributed_workers',
+    'core.job_store', 'sqlite3', 'core.shared_input', 'multiprocessing', 'core.batch_archive',
+    'core.speculative_conversion', 'core.block_hashes', 'ui.content_fingerprint', 'core.table_offload',
+    'ui.bottom_tab_widget', 'ui.about_dialog', 'ui.job_history_widget', 'ui.draft_autosave',
+    'ui.template_thumbnails', 'ui.tray_icon',
+]
+# ui.single_instance（及 PyQt5.QtNetwork）和 ui.stall_monitor 不在其中：
+# 转交启动参数必须在创建QApplication之前完成，卡顿监测需要记录启动阶段，两者都属于启动路径，计入预算
+
+# 默认预算（毫秒），为应用自身导入开销减去基线后的值
+DEFAULT_BUDGET_MS = 60.0
+
+
+def entry_point_modules(entry_file: str) -> List[str]:
+    """入口脚本启动时导入的模块：模块级语句（包括if/try/with中的）里的import，不含函数、类和except分支中的"""
+    with open(entry_file, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), entry_file)
+
+    modules = []
+
+    def visit(statements):
+        for node in statements:
+            if isinstance(node, ast.Import):
+                modules.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules.append(node.module)
+            elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                # except分支只在启动出错时执行，不计入
+                for field in ('body', 'orelse', 'finalbody'):
+                    visit(getattr(node, field, []))
+
+    visit(tree.body)
+    return list(dict.fromkeys(modules + LOADED_BY_PATH))
+
+
+def measure_imports(modules: List[str], src_dir: str) -> Dict[str, Tuple[int, int]]:
+    """在子进程中导入指定模块，返回各模块的导入耗时"""
+    code = f"import sys; sys.path.insert(0, {src_dir!r}); " + "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入失败：\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """解析 -X importtime 的输出，返回 {模块名: (累计耗时(微秒), 嵌套深度)}"""
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings[name.strip()] = (int(cumulative_us.strip()), depth)
+    return timings
+
+
+def top_level_cost(timings: Dict[str, Tuple[int, int]]) -> int:
+    """累加最外层导入的累计耗时（微秒）"""
+    return sum(cumulative for cumulative, depth in timings.values() if depth == 0)
+
+
+def check(src_dir: str = "src", entry_file: str = ENTRY_POINT, budget_ms: float = DEFAULT_BUDGET_MS,
+          runs: int = 3) -> bool:
+    """执行检查，返回是否通过"""
+    startup_modules = entry_point_modules(entry_file)
+    print(f"启动路径（{os.path.basename(entry_file)}）: {', '.join(startup_modules)}")
+
+    # 多次测量取最小值，减少磁盘缓存和系统负载带来的抖动
+    baseline_runs = [measure_imports(BASELINE_MODULES, src_dir) for _ in range(runs)]
+    startup_runs = [measure_imports(startup_modules, src_dir) for _ in range(runs)]
+
+    baseline_us = min(top_level_cost(t) for t in baseline_runs)
+    startup_us = min(top_level_cost(t) for t in startup_runs)
+    app_ms = max(0, startup_us - baseline_us) / 1000
+
+    print(f"PyQt5基线导入耗时: {baseline_us / 1000:.1f} ms")
+    print(f"启动路径导入耗时: {startup_us / 1000:.1f} ms")
+    print(f"应用自身导入耗时: {app_ms:.1f} ms (预算 {budget_ms:.1f} ms)")
+
+    passed = True
+    startup = startup_runs[0]
+    baseline = baseline_runs[0]
+    early = [m for m in DEFERRED_MODULES if m in startup and m not in baseline]
+    if early:
+        passed = False
+        print("以下模块应延迟导入，但在启动时已被加载:")
+        for module in early:
+            print(f"  - {module} ({startup[module][0] / 1000:.1f} ms)")
+
+    if app_ms > budget_ms:
+        passed = False
+        print("启动导入耗时超出预算，耗时最多的应用模块:")
+        own = sorted(
+            ((name, cost) for name, (cost, _) in startup.items() if name not in baseline),
+            key=lambda item: item[1], reverse=True
+        )
+        for name, cost in own[:10]:
+            print(f"  - {name}: {cost / 1000:.1f} ms")
+
+    print("检查通过" if passed else "检查未通过")
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="检查启动路径的模块导入耗时")
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--src", default="src", help="源代码目录路径")
+    parser.add_argument("--entry", default=os.path.join(root_dir, ENTRY_POINT), help="入口脚本路径")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="应用自身导入耗时预算（毫秒）")
+    parser.add_argument("--runs", type=int, default=3, help="测量次数，取最小值")
+
+    args = parser.parse_args()
+    src_dir = os.path.abspath(args.src)
+    sys.exit(0 if check(src_dir, args.entry, args.budget_ms, args.runs) else 1)
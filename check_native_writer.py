@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+快速写入器对照检查脚本
+用 test_tags.md 作为语料，按每个排版方案分别用快速写入器和Pandoc转换，
+逐块比较两份 document.xml 的结构：段落样式、列表层级、正文文字、粗体/斜体/代码/链接文字、
+图片数量以及表格的行列和单元格文字。Pandoc不可用时跳过（快速写入器只能和Pandoc对照）
+"""
+
+import os
+import re
+import sys
+import zipfile
+import tempfile
+import unicodedata
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+CORPUS_FILE = "test_tags.md"
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Pandoc按位置选用的正文样式，与快速写入器统一使用的正文样式视为相同
+STYLE_ALIASES = {'first paragraph': 'body text'}
+
+
+def style_names(styles_xml: str) -> Dict[str, str]:
+    """样式ID → 样式名称（小写，WPS生成的模板使用数字ID，只能按名称比较）"""
+    names = {}
+    for match in re.finditer(r'<w:style\b([^>]*)>\s*<w:name w:val="([^"]+)"', styles_xml):
+        style_id = re.search(r'w:styleId="([^"]+)"', match.group(1))
+        if style_id:
+            name = match.group(2).lower()
+            names[style_id.group(1)] = STYLE_ALIASES.get(name, name)
+    return names
+
+
+def _text(value: str) -> str:
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', value)).strip()
+
+
+def _run_kinds(run, styles: Dict[str, str], in_link: bool) -> List[str]:
+    """文字片段的格式：粗体、斜体、代码、链接"""
+    kinds = []
+    rpr = run.find(f'{W}rPr')
+    if rpr is not None:
+        run_style = rpr.find(f'{W}rStyle')
+        style = styles.get(run_style.get(f'{W}val'), '') if run_style is not None else ''
+        fonts = rpr.find(f'{W}rFonts')
+        if style in ('verbatim char', 'html code') or (fonts is not None and 'Consolas' in fonts.get(f'{W}ascii', '')):
+            kinds.append('code')
+        for tag, kind in (('b', 'bold'), ('i', 'italic')):
+            element = rpr.find(f'{W}{tag}')
+            if element is not None and element.get(f'{W}val') not in ('0', 'false'):
+                kinds.append(kind)
+    if in_link:
+        kinds.append('link')
+    return kinds
+
+
+def _paragraph(paragraph, styles: Dict[str, str]) -> Tuple:
+    """段落的结构：(样式, 列表层级, 是否分隔线, 正文, 各格式的文字, 图片数)"""
+    ppr = paragraph.find(f'{W}pPr')
+    style, level, rule = 'normal', None, False
+    if ppr is not None:
+        p_style = ppr.find(f'{W}pStyle')
+        if p_style is not None:
+            style = styles.get(p_style.get(f'{W}val'), p_style.get(f'{W}val'))
+        ilvl = ppr.find(f'{W}numPr/{W}ilvl')
+        if ilvl is not None:
+            level = ilvl.get(f'{W}val')
+        rule = ppr.find(f'{W}pBdr') is not None
+    # Pandoc把分隔线写成VML的水平线
+    rule = rule or any(
+        key.endswith('}hr') and value == 't' for element in paragraph.iter() for key, value in element.attrib.items()
+    )
+
+    text, formatted = [], {'bold': [], 'italic': [], 'code': [], 'link': []}
+    images = 0
+
+    def walk(element, in_link):
+        nonlocal images
+        for child in element:
+            if child.tag == f'{W}hyperlink':
+                walk(child, True)
+            elif child.tag == f'{W}r':
+                run_text = ''.join(
+                    node.text or '' if node.tag == f'{W}t' else ' ' if node.tag in (f'{W}br', f'{W}tab') else ''
+                    for node in child
+                )
+                images += len(child.findall(f'.//{W}drawing'))
+                text.append(run_text)
+                for kind in _run_kinds(child, styles, in_link):
+                    formatted[kind].append(run_text)
+            elif child.tag != f'{W}pPr':
+                walk(child, in_link)
+
+    walk(paragraph, False)
+    return (style, level, rule, _text(''.join(text)),
+            tuple((kind, _text(''.join(parts))) for kind, parts in formatted.items() if _text(''.join(parts))),
+            images)
+
+
+def document_blocks(docx_path: str) -> List[Tuple]:
+    """按顺序提取正文的块级结构（段落和表格）"""
+    with zipfile.ZipFile(docx_path) as docx:
+        body = ET.fromstring(docx.read('word/document.xml')).find(f'{W}body')
+        styles = style_names(docx.read('word/styles.xml').decode('utf-8'))
+
+    blocks = []
+    for element in body:
+        if element.tag == f'{W}p':
+            block = _paragraph(element, styles)
+            # 空段落（如Pandoc在表格后补的段落）不参与比较
+            if block[2] or block[3] or block[5]:
+                blocks.append(('段落',) + block)
+        elif element.tag == f'{W}tbl':
+            rows = tuple(
+                tuple(_text(' '.join(_paragraph(p, styles)[3] for p in cell.iter(f'{W}p')))
+                      for cell in row.findall(f'{W}tc'))
+                for row in element.findall(f'{W}tr')
+            )
+            blocks.append(('表格', rows))
+    return blocks
+
+
+def compare_documents(native_path: str, pandoc_path: str) -> List[str]:
+    """比较两份文档的块级结构，返回差异列表"""
+    from difflib import SequenceMatcher
+
+    native, pandoc = document_blocks(native_path), document_blocks(pandoc_path)
+    problems = []
+    matcher = SequenceMatcher(None, pandoc, native, autojunk=False)
+    for operation, p_start, p_end, n_start, n_end in matcher.get_opcodes():
+        if operation == 'equal':
+            continue
+        for block in pandoc[p_start:p_end]:
+            problems.append(f"Pandoc：{_describe(block)}")
+        for block in native[n_start:n_end]:
+            problems.append(f"快速写入器：{_describe(block)}")
+    return problems
+
+
+def _describe(block: Tuple) -> str:
+    if block[0] == '表格':
+        rows = block[1]
+        return f"表格 {len(rows)} 行 {[len(row) for row in rows]} 列：{rows[0] if rows else ''}"
+    _, style, level, rule, text, formatted, images = block
+    parts = [f"[{style}]"]
+    if level is not None:
+        parts.append(f"列表{level}级")
+    if rule:
+        parts.append("分隔线")
+    if images:
+        parts.append(f"图片{images}")
+    parts.append(text[:40])
+    parts.extend(f"{kind}={value[:20]}" for kind, value in formatted)
+    return ' '.join(parts)
+
+
+def pandoc_available(pandoc_path: Optional[str]) -> bool:
+    """Pandoc是否可以执行"""
+    import subprocess
+    if not pandoc_path:
+        return False
+    try:
+        subprocess.run([pandoc_path, '--version'], capture_output=True, check=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def run_corpus(corpus_file: str, pandoc_path: str) -> bool:
+    """按每个排版方案用两条路径转换语料并比较"""
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.native_docx_writer import NativeDocxWriter, UnsupportedContentError
+    from core.cjk_typography import TYPOGRAPHY_SETTINGS
+
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    converter = EnhancedPandocConverter(pandoc_path, use_native_writer=False, optimize_output=False, typography=True)
+    passed = True
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for template_style in TYPOGRAPHY_SETTINGS:
+            native_file = os.path.join(temp_dir, f'{template_style}_native.docx')
+            pandoc_file = os.path.join(temp_dir, f'{template_style}_pandoc.docx')
+
+            typography = converter.get_typography(template_style)
+            template_file = converter.get_reference_doc(template_style, typography)
+            try:
+                NativeDocxWriter(typography).convert_html_to_docx(
+                    html, native_file, template_file, converter.get_style_options(template_style)
+                )
+            except UnsupportedContentError as e:
+                # 转换时这些方案直接交给Pandoc，不经过快速写入器
+                print(f"[跳过] {template_style}: 快速写入器不处理（{e}）")
+                continue
+
+            success, message = converter.convert_html_to_docx(html, pandoc_file, template_style)
+            if not success:
+                print(f"[失败] {template_style}: Pandoc转换失败：{' '.join(message.split())}")
+                passed = False
+                continue
+
+            problems = compare_documents(native_file, pandoc_file)
+            status = "通过" if not problems else "失败"
+            print(f"[{status}] {template_style}")
+            for problem in problems:
+                print(f"  - {problem}")
+            passed = passed and not problems
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="对照Pandoc检查快速写入器的输出结构")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--corpus", default=os.path.join(root_dir, CORPUS_FILE), help="语料文件")
+    parser.add_argument("--pandoc", default=os.environ.get('PANDOC_PATH') or os.path.join(root_dir, 'pandoc', 'pandoc.exe'),
+                        help="pandoc可执行文件路径")
+
+    args = parser.parse_args()
+    sys.path.insert(0, args.src)
+
+    if not pandoc_available(args.pandoc):
+        print(f"[跳过] Pandoc不可用（{args.pandoc}），快速写入器只能和Pandoc对照")
+        sys.exit(0)
+    sys.exit(0 if run_corpus(args.corpus, args.pandoc) else 1)
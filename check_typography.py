@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中文排版检查脚本
+用 test_tags.md 作为语料，按每个排版方案转换后检查输出文档：
+中文后不再有半角标点、中英文间距符合方案设置、正文内容没有丢失、中文字体不再依赖主题；
+另用一段含行内代码和代码块的文档检查代码内容不被排版规则改写；
+--benchmark-mb 可测量中文排版在大文档上的额外耗时
+"""
+
+import os
+import re
+import sys
+import time
+import zipfile
+import tempfile
+import unicodedata
+from typing import Dict, List, Optional
+
+CORPUS_FILE = "test_tags.md"
+
+# 代码内容检查：代码中的半角标点和空格必须原样保留，代码外的同样文字必须被处理
+CODE_SPANS = ['中文.', '(中文', '中文, English', 'f(参数): 返回 值;']
+CODE_BLOCK = 'print("中文, ok")  # 注释.'
+CODE_SPAN_HTML = (
+    '<html><body>'
+    + ''.join(f'<p>行内代码<code>{code}</code>之后的正文,例如这样.</p>' for code in CODE_SPANS)
+    + f'<pre><code>{CODE_BLOCK}</code></pre>'
+    + '</body></html>'
+)
+
+# 半角和全角标点的对应关系，用于比较转换前后的正文内容
+PUNCTUATION_PAIRS = {'，': ',', '；': ';', '：': ':', '！': '!', '？': '?', '。': '.', '（': '(', '）': ')'}
+
+
+def normalize(text: str) -> str:
+    """去掉空白并把全角标点还原为半角，用于比较内容是否丢失"""
+    text = ''.join(PUNCTUATION_PAIRS.get(char, char) for char in text)
+    return re.sub(r'\s+', '', unicodedata.normalize('NFC', text))
+
+
+def document_paragraphs(docx_path: str) -> List[str]:
+    """提取正文段落文本，跳过代码段落和代码文字"""
+    from core.native_docx_writer import StyleMap
+
+    with zipfile.ZipFile(docx_path) as docx:
+        document = docx.read('word/document.xml').decode('utf-8')
+        styles = StyleMap(docx.read('word/styles.xml').decode('utf-8'))
+
+    code_paragraph_styles = {styles.find(name) for name in ('Source Code', 'HTML Preformatted', 'macro')} - {None}
+    code_run_styles = {styles.find(name) for name in ('Verbatim Char', 'HTML Code')} - {None}
+
+    paragraphs = []
+    for paragraph in re.findall(r'<w:p[ >].*?</w:p>', document, re.S):
+        style = re.search(r'<w:pStyle w:val="([^"]+)"', paragraph)
+        if style and style.group(1) in code_paragraph_styles:
+            continue
+        texts = []
+        for run in re.findall(r'<w:r[ >].*?</w:r>', paragraph, re.S):
+            run_style = re.search(r'<w:rStyle w:val="([^"]+)"', run)
+            if (run_style and run_style.group(1) in code_run_styles) or 'Consolas' in run:
+                continue
+            texts.extend(re.findall(r'<w:t(?: [^>]*)?>([^<]*)</w:t>', run))
+        paragraphs.append(''.join(texts))
+    return paragraphs
+
+
+def document_code(docx_path: str) -> List[str]:
+    """提取代码段落和代码文字（每个代码段落或连续的代码文字为一项）"""
+    from xml.sax.saxutils import unescape
+    from core.native_docx_writer import StyleMap
+
+    with zipfile.ZipFile(docx_path) as docx:
+        document = docx.read('word/document.xml').decode('utf-8')
+        styles = StyleMap(docx.read('word/styles.xml').decode('utf-8'))
+
+    code_paragraph_styles = {styles.find(name) for name in ('Source Code', 'HTML Preformatted', 'macro')} - {None}
+    code_run_styles = {styles.find(name) for name in ('Verbatim Char', 'HTML Code')} - {None}
+
+    code = []
+    for paragraph in re.findall(r'<w:p[ >].*?</w:p>', document, re.S):
+        style = re.search(r'<w:pStyle w:val="([^"]+)"', paragraph)
+        in_code_paragraph = bool(style and style.group(1) in code_paragraph_styles)
+        current = None
+        for run in re.findall(r'<w:r[ >].*?</w:r>', paragraph, re.S):
+            run_style = re.search(r'<w:rStyle w:val="([^"]+)"', run)
+            is_code = in_code_paragraph or (run_style and run_style.group(1) in code_run_styles) or 'Consolas' in run
+            if not is_code:
+                current = None
+                continue
+            parts = re.findall(r'<w:t(?: [^>]*)?>([^<]*)</w:t>|<w:(br)/>', run)
+            text = ''.join('\n' if line_break else value for value, line_break in parts)
+            if current is None:
+                code.append('')
+                current = len(code) - 1
+            code[current] += unescape(text)
+    return code
+
+
+def check_code_spans(docx_path: str) -> List[str]:
+    """检查代码内容原样保留、代码外的文字已按规则处理"""
+    problems = []
+    code = document_code(docx_path)
+    for sample in CODE_SPANS + [CODE_BLOCK]:
+        if sample not in code:
+            problems.append(f"代码内容被改写：{sample} 不在 {code}")
+    paragraphs = document_paragraphs(docx_path)
+    if not any('正文，例如这样。' in text for text in paragraphs):
+        problems.append(f"代码之外的正文没有处理：{paragraphs[:1]}")
+    return problems
+
+
+def check_document(docx_path: str, settings: Dict, baseline_path: str) -> List[str]:
+    """检查一个输出文档，返回发现的问题列表
+
+    Args:
+        docx_path: 开启中文排版的输出文档
+        settings: 排版方案的中文排版设置
+        baseline_path: 关闭中文排版的输出文档，用于确认正文内容只改动了标点和空格
+    """
+    from xml.sax.saxutils import unescape
+    from core.cjk_typography import CJK_CHARS, LATIN_CHARS
+
+    problems = []
+    paragraphs = [unescape(text) for text in document_paragraphs(docx_path)]
+
+    for text in paragraphs:
+        if settings['punctuation']:
+            match = re.search(rf'[{CJK_CHARS}][,;:!?]', text)
+            if match:
+                problems.append(f"中文后仍有半角标点：{match.group(0)}（{text[:30]}…）")
+        if settings['spacing'] == 'auto':
+            match = re.search(rf'[{CJK_CHARS}] +[{LATIN_CHARS}]|[{LATIN_CHARS}] +[{CJK_CHARS}]', text)
+            if match:
+                problems.append(f"中英文之间仍有手动空格：{match.group(0)}（{text[:30]}…）")
+
+    baseline = [unescape(text) for text in document_paragraphs(baseline_path)]
+    if len(baseline) != len(paragraphs):
+        problems.append(f"段落数量变化：{len(baseline)} → {len(paragraphs)}")
+    for before, after in zip(baseline, paragraphs):
+        if normalize(before) != normalize(after):
+            problems.append(f"正文内容被改写：{before[:30]}… → {after[:30]}…")
+
+    with zipfile.ZipFile(docx_path) as docx:
+        styles_xml = docx.read('word/styles.xml').decode('utf-8')
+        settings_xml = docx.read('word/settings.xml').decode('utf-8')
+    if 'w:eastAsiaTheme=' in styles_xml:
+        problems.append("样式中仍有依赖主题的中文字体（eastAsiaTheme）")
+    theme_lang = re.search(r'<w:themeFontLang\b[^>]*w:eastAsia="([^"]*)"', settings_xml)
+    if theme_lang and theme_lang.group(1) != 'zh-CN':
+        problems.append(f"主题字体的东亚语言为 {theme_lang.group(1)}，应为 zh-CN")
+    return problems
+
+
+def pandoc_available(pandoc_path: Optional[str]) -> bool:
+    """Pandoc是否可以执行"""
+    import subprocess
+    if not pandoc_path:
+        return False
+    try:
+        subprocess.run([pandoc_path, '--version'], capture_output=True, check=True)
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def run_corpus(corpus_file: str, pandoc_path: Optional[str]) -> bool:
+    """按每个排版方案转换语料并检查，Pandoc可用时同时检查Pandoc路径"""
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.cjk_typography import TYPOGRAPHY_SETTINGS
+
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    paths = [('快速写入器', True)]
+    if pandoc_available(pandoc_path):
+        paths.append(('Pandoc', False))
+    else:
+        print(f"Pandoc不可用（{pandoc_path}），只检查快速写入器路径")
+
+    passed = True
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for path_name, use_native_writer in paths:
+            converter = EnhancedPandocConverter(pandoc_path, use_native_writer=use_native_writer, typography=True)
+            baseline_converter = EnhancedPandocConverter(
+                pandoc_path, use_native_writer=use_native_writer, typography=False
+            )
+            for template_style, settings in TYPOGRAPHY_SETTINGS.items():
+                output_file = os.path.join(temp_dir, f'{template_style}_{use_native_writer}.docx')
+                baseline_file = os.path.join(temp_dir, f'{template_style}_{use_native_writer}_baseline.docx')
+                success, message = converter.convert_html_to_docx(html, output_file, template_style)
+                if success:
+                    success, message = baseline_converter.convert_html_to_docx(html, baseline_file, template_style)
+                if not success:
+                    # 需要Pandoc的方案（如学术论文的目录）在Pandoc不可用时无法检查
+                    print(f"[跳过] {path_name} / {template_style}: {' '.join(message.split())}")
+                    continue
+                problems = check_document(output_file, settings, baseline_file)
+                status = "通过" if not problems else "失败"
+                print(f"[{status}] {path_name} / {template_style}")
+                for problem in problems:
+                    print(f"  - {problem}")
+                passed = passed and not problems
+
+            # 代码内容：simple 方案的标点和间距规则都开启
+            code_file = os.path.join(temp_dir, f'code_{use_native_writer}.docx')
+            success, message = converter.convert_html_to_docx(CODE_SPAN_HTML, code_file, 'simple')
+            problems = check_code_spans(code_file) if success else [f"转换失败：{' '.join(message.split())}"]
+            status = "通过" if not problems else "失败"
+            print(f"[{status}] {path_name} / 代码内容")
+            for problem in problems:
+                print(f"  - {problem}")
+            passed = passed and not problems
+    return passed
+
+
+def run_benchmark(corpus_file: str, size_mb: float, pandoc_path: Optional[str], repeat: int) -> None:
+    """测量中文排版在大文档上的额外耗时（开启与关闭排版分别转换）"""
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.cjk_typography import TYPOGRAPHY_SETTINGS, apply_typography
+
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        corpus = f.read()
+    body = re.search(r'<body>(.*)</body>', corpus, re.S).group(1)
+    # 去掉图片，避免大文档中重复读取不存在的图片
+    body = re.sub(r'<img[^>]*>', '', body)
+    copies = max(1, int(size_mb * 1024 * 1024 / len(body.encode('utf-8'))))
+    html = f'<html><body>{body * copies}</body></html>'
+    print(f"基准文档：{len(html.encode('utf-8')) / 1024 / 1024:.1f} MB（语料重复 {copies} 次）")
+
+    # 只统计规则本身（按文本片段调用，与快速写入器相同）的耗时
+    settings = TYPOGRAPHY_SETTINGS['simple']
+    chunks = [text for text in (re.sub(r'\s+', ' ', data).strip() for data in re.findall(r'>([^<]+)<', html)) if text]
+    start = time.perf_counter()
+    for text in chunks:
+        apply_typography(text, settings)
+    print(f"排版规则：{(time.perf_counter() - start) * 1000:.0f} ms（{len(chunks)} 个文本片段）")
+
+    paths = [('快速写入器', True)]
+    if pandoc_available(pandoc_path):
+        paths.append(('Pandoc', False))
+    else:
+        print(f"Pandoc不可用（{pandoc_path}），只测量快速写入器路径")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_file = os.path.join(temp_dir, 'benchmark.docx')
+        for path_name, use_native_writer in paths:
+            converters = {
+                typography: EnhancedPandocConverter(
+                    pandoc_path, use_native_writer=use_native_writer, optimize_output=False, typography=typography
+                )
+                for typography in (False, True)
+            }
+            # 开启和关闭交替执行，减少机器负载波动的影响
+            timings = {False: None, True: None}
+            for _ in range(repeat):
+                for typography, converter in converters.items():
+                    start = time.perf_counter()
+                    success, message = converter.convert_html_to_docx(html, output_file, 'simple')
+                    elapsed = time.perf_counter() - start
+                    if not success:
+                        raise RuntimeError(message)
+                    best = timings[typography]
+                    timings[typography] = elapsed if best is None else min(best, elapsed)
+            overhead = timings[True] - timings[False]
+            print(f"{path_name}：关闭排版 {timings[False]:.2f} 秒，开启排版 {timings[True]:.2f} 秒，"
+                  f"额外耗时 {overhead:.2f} 秒（{overhead / timings[False] * 100:+.1f}%）")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="检查中文排版规则并测量其耗时")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--corpus", default=os.path.join(root_dir, CORPUS_FILE), help="语料文件")
+    parser.add_argument("--pandoc", default=os.environ.get('PANDOC_PATH') or os.path.join(root_dir, 'pandoc', 'pandoc.exe'),
+                        help="pandoc可执行文件路径")
+    parser.add_argument("--benchmark-mb", type=float, default=0, help="生成指定大小（MB）的文档测量排版耗时")
+    parser.add_argument("--repeat", type=int, default=3, help="基准测试的重复次数，取最小值")
+
+    args = parser.parse_args()
+    sys.path.insert(0, args.src)
+
+    if args.benchmark_mb:
+        run_benchmark(args.corpus, args.benchmark_mb, args.pandoc, args.repeat)
+        sys.exit(0)
+    sys.exit(0 if run_corpus(args.corpus, args.pandoc) else 1)
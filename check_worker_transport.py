@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作进程任务传输对比脚本
+用 test_tags.md 拼出一批大HTML文档，分别用三种方式交给本机的工作进程转换，输出吞吐量和峰值内存：
+  pickle  multiprocessing进程池，HTML字符串经pickle序列化后通过管道传给子进程（对照组）
+  stream  conversion_worker 协议，HTML内容经TCP连接按块发送，工作进程写入临时文件后读取
+  shared  conversion_worker 协议，HTML内容放在共享内存中只发送名称，工作进程直接映射读取
+每种方式在单独的进程中运行，峰值内存分别统计主进程和工作进程（取各工作进程的最大值）；
+--sink 时工作进程只按块解码内容而不转换，只测量传输本身的开销
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+CORPUS_FILE = "test_tags.md"
+
+MODES = ('pickle', 'stream', 'shared')
+
+
+class SinkConverter:
+    """只读取任务内容、不做转换的转换器（测量传输开销）"""
+
+    def convert_html_to_docx(self, html_content, output_file, template_style='simple'):
+        from core.source_file import SourceFile
+
+        if isinstance(html_content, SourceFile):
+            for _ in html_content.iter_text():
+                pass
+        with open(output_file, 'wb'):
+            pass
+        return True, f"转换成功：{os.path.basename(output_file)}"
+
+
+def create_converter(pandoc_path: Optional[str], sink: bool):
+    if sink:
+        return SinkConverter()
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    return EnhancedPandocConverter(pandoc_path)
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """当前进程（或已退出子进程中最大的）峰值常驻内存（MB），不支持的平台返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # macOS上的单位是字节，Linux上是KB
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def build_document(corpus_file: str, size_mb: float) -> str:
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        html = f.read()
+    head, _, rest = html.partition('<body>')
+    body, _, tail = rest.rpartition('</body>')
+    repeat = max(1, int(size_mb * 1024 * 1024 / max(1, len(body.encode('utf-8')))))
+    return f'{head}<body>{body * repeat}</body>{tail}'
+
+
+def document_for(base: str, index: int) -> str:
+    # 每个任务内容不同，与实际批量转换一致
+    return base.replace('</body>', f'<p>第 {index + 1} 份</p></body>', 1)
+
+
+_pool_converter = None
+
+
+def _pool_init(src_dir: str, pandoc_path: Optional[str], sink: bool):
+    global _pool_converter
+    sys.path.insert(0, src_dir)
+    _pool_converter = create_converter(pandoc_path, sink)
+
+
+def _pool_convert(html: str, output_file: str):
+    return _pool_converter.convert_html_to_docx(html, output_file, 'simple')
+
+
+def run_pickle(args, base: str, temp_dir: str) -> List[bool]:
+    import multiprocessing
+
+    results = []
+    # 进行中的任务数与其他方式一致（每个工作进程2个），避免一次把全部文档放入进程池的队列
+    limit = threading.BoundedSemaphore(args.workers * 2)
+
+    def done(result):
+        results.append(result[0])
+        limit.release()
+
+    with multiprocessing.Pool(args.workers, _pool_init, (args.src, args.pandoc, args.sink)) as pool:
+        for index in range(args.jobs):
+            limit.acquire()
+            pool.apply_async(_pool_convert, (document_for(base, index), os.path.join(temp_dir, f'{index}.docx')),
+                             callback=done, error_callback=lambda e: done((False, str(e))))
+        pool.close()
+        pool.join()
+    return results
+
+
+def run_workers(args, base: str, temp_dir: str, shared_memory: bool) -> List[bool]:
+    from concurrent.futures import ThreadPoolExecutor
+    from core.distributed_workers import Coordinator
+
+    token = os.urandom(8).hex()
+    coordinator = Coordinator('127.0.0.1', 0, token=token, optimize_output=False, shared_memory=shared_memory)
+    address = coordinator.start()
+    command = [sys.executable, os.path.abspath(__file__), '--src', args.src, '--worker', f'{address[0]}:{address[1]}',
+               '--token', token] + (['--pandoc', args.pandoc] if args.pandoc else []) + (['--sink'] if args.sink else [])
+    workers = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(args.workers)]
+    try:
+        deadline = time.time() + 30
+        while sum(1 for stats in coordinator.worker_stats() if stats['alive']) < args.workers:
+            if time.time() > deadline:
+                raise RuntimeError('工作进程未能在30秒内连接')
+            time.sleep(0.05)
+
+        def convert(index):
+            return coordinator.convert_html_to_docx(
+                document_for(base, index), os.path.join(temp_dir, f'{index}.docx'), 'simple'
+            )[0]
+
+        with ThreadPoolExecutor(args.workers * 2) as executor:
+            return list(executor.map(convert, range(args.jobs)))
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait(timeout=10)
+        coordinator.stop()
+
+
+def run_mode(args) -> Dict:
+    """在当前进程中运行一种方式，返回测量结果"""
+    sys.path.insert(0, args.src)
+    base = build_document(args.corpus, args.size_mb)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        if args.mode == 'pickle':
+            results = run_pickle(args, base, temp_dir)
+        else:
+            results = run_workers(args, base, temp_dir, shared_memory=args.mode == 'shared')
+        elapsed = time.perf_counter() - start
+    total_mb = len(base.encode('utf-8')) * args.jobs / (1024 * 1024)
+    return {
+        'mode': args.mode,
+        'succeeded': sum(1 for result in results if result),
+        'seconds': elapsed,
+        'mb_per_second': total_mb / elapsed,
+        'jobs_per_second': args.jobs / elapsed,
+        'parent_rss_mb': peak_rss_mb(),
+        'worker_rss_mb': peak_rss_mb(children=True),
+    }
+
+
+def run_worker_process(args) -> int:
+    sys.path.insert(0, args.src)
+    from core.distributed_workers import parse_address, run_worker
+
+    return run_worker(parse_address(args.worker), lambda options: create_converter(args.pandoc, args.sink),
+                      token=args.token, shared_memory=True)
+
+
+def compare(args) -> bool:
+    size = os.path.getsize(args.corpus)
+    print(f"{args.jobs} 个任务，每个约 {args.size_mb:g} MB（语料 {size / 1024:.0f} KB 重复拼接），"
+          f"{args.workers} 个工作进程，{'只传输不转换' if args.sink else '转换为DOCX'}")
+    print(f"{'方式':<8}{'成功':>6}{'耗时(秒)':>10}{'MB/秒':>10}{'个/秒':>8}{'主进程峰值(MB)':>16}{'工作进程峰值(MB)':>18}")
+    passed = True
+    for mode in args.modes:
+        command = [sys.executable, os.path.abspath(__file__), '--mode', mode, '--src', args.src,
+                   '--corpus', args.corpus, '--size-mb', str(args.size_mb), '--jobs', str(args.jobs),
+                   '--workers', str(args.workers)] + (['--pandoc', args.pandoc] if args.pandoc else []) \
+            + (['--sink'] if args.sink else [])
+        completed = subprocess.run(command, capture_output=True, text=True)
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            print(f"{mode:<8}运行失败：{completed.stderr.strip()[-500:]}")
+            passed = False
+            continue
+        result = json.loads(lines[-1])
+        rss = ['-' if result[key] is None else f"{result[key]:.0f}" for key in ('parent_rss_mb', 'worker_rss_mb')]
+        print(f"{mode:<8}{result['succeeded']:>6}{result['seconds']:>10.2f}{result['mb_per_second']:>10.1f}"
+              f"{result['jobs_per_second']:>8.2f}{rss[0]:>16}{rss[1]:>18}")
+        passed = passed and result['succeeded'] == args.jobs
+    return passed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="对比pickle、TCP和共享内存三种方式把大HTML交给工作进程的吞吐量和峰值内存")
+    parser.add_argument("--src", default=os.path.join(root_dir, "src"), help="源代码目录路径")
+    parser.add_argument("--corpus", default=os.path.join(root_dir, CORPUS_FILE), help="语料文件")
+    parser.add_argument("--pandoc", default=os.environ.get('PANDOC_PATH') or os.path.join(root_dir, 'pandoc', 'pandoc.exe'),
+                        help="pandoc可执行文件路径")
+    parser.add_argument("--size-mb", type=float, default=8, help="每个文档的大小（MB）")
+    parser.add_argument("--jobs", type=int, default=16, help="任务数")
+    parser.add_argument("--workers", type=int, default=2, help="工作进程数")
+    parser.add_argument("--sink", action="store_true", help="工作进程只读取内容不转换，只测量传输开销")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="对比的方式")
+    # 以下参数由脚本自身启动子进程时使用
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.worker:
+        sys.exit(run_worker_process(args))
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        sys.exit(0)
+    sys.exit(0 if compare(args) else 1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分布式转换工作进程（无界面模式）
+连接协调进程（如 watch_folder.py --coordinator），领取转换任务并把生成的DOCX传回，
+可以在多台电脑上各运行一个或多个，也可以在本机启动多个进程（本机进程经共享内存接收任务内容）
+"""
+
+import os
+import sys
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="连接协调进程并执行HTML到Word文档的转换任务")
+    parser.add_argument("coordinator", help="协调进程地址，如 192.168.1.10:8765")
+    parser.add_argument("--slots", type=int,
+                        help="同时转换的任务数，默认使用 benchmark_concurrency.py --save 保存的结果（没有结果时为1）")
+    parser.add_argument("--token",
+                        help="连接令牌，默认读取环境变量 JINDOUYUN_WORKER_TOKEN（连接其他电脑上的协调进程时必须设置）")
+    parser.add_argument("--name", help="工作进程名称，默认为“主机名-进程号”")
+    parser.add_argument("--pandoc", help="pandoc可执行文件路径，默认使用项目内置或PANDOC_PATH")
+    parser.add_argument("--native-writer", action="store_true",
+                        help="简单的HTML文档由进程内的快速写入器直接生成，不经过Pandoc")
+    parser.add_argument("--no-shared-memory", action="store_true",
+                        help="与协调进程在同一台电脑上时也经连接接收任务内容，不使用共享内存")
+    parser.add_argument("--src", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"),
+                        help="源代码目录路径")
+
+    args = parser.parse_args(argv)
+    sys.path.insert(0, args.src)
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.distributed_workers import parse_address, run_worker
+
+    pandoc_path = args.pandoc
+    if not pandoc_path:
+        bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pandoc', 'pandoc.exe')
+        pandoc_path = os.environ.get('PANDOC_PATH') or (bundled if os.path.exists(bundled) else 'pandoc')
+
+    def create_converter(options):
+        # 每个任务使用独立的转换器，选项由协调进程随任务下发
+        return EnhancedPandocConverter(
+            pandoc_path,
+            use_native_writer=args.native_writer,
+            optimize_output=options.get('optimize_output', False),
+            typography=options.get('typography', False),
+            embed_fonts=options.get('embed_fonts', False),
+            offload_tables=options.get('offload_tables', False),
+        )
+
+    if args.slots is None:
+        from core.concurrency_tuning import recommended_workers
+        args.slots = recommended_workers(default=1)
+
+    address = parse_address(args.coordinator)
+    print(f"正在连接协调进程: {address[0]}:{address[1]}（并发: {args.slots}）")
+    try:
+        return run_worker(address, create_converter, slots=args.slots, token=args.token, worker_id=args.name,
+                          shared_memory=not args.no_shared_memory)
+    except KeyboardInterrupt:
+        print("\n工作进程已退出")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,6 +18,12 @@ if %ERRORLEVEL% == 1 (
     echo [1/2] Skipping dependency detection, building with existing configuration...
 )
 
+REM Startup import budget check (see check_import_time.py)
+python check_import_time.py
+if %ERRORLEVEL% neq 0 (
+    echo Warning: Startup import check failed, see output above.
+)
+
 REM Build command using spec file
 pyinstaller Pandoc-GUI.spec
 if %ERRORLEVEL% neq 0 (
@@ -0,0 +1,242 @@
+"""
+批量输出归档模块
+批量转换时把每个完成的文档立即写入同一个ZIP归档，而不是在输出目录中逐个创建文件：
+网络共享或同步盘上创建成千上万个小文件的开销远大于追加写入一个文件。
+文档先在本地临时目录生成，写入归档后删除；DOCX本身已是ZIP压缩格式，归档中原样存储不再压缩。
+结束时写入清单 manifest.jsonl（每行一个输入：源文件、模板、状态、执行次数、耗时和归档中的文件名）。
+
+内存中只保留ZIP中央目录（每个文档约一百字节），文档和清单都按块流式写入；
+进程中断时归档缺少中央目录，下次打开时按各文档的本地文件头恢复已完整写入的文档后继续追加
+"""
+
+import os
+import json
+import time
+import shutil
+import struct
+import zipfile
+import tempfile
+import threading
+
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+# ZIP本地文件头和中央目录结束记录
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+END_RECORD = struct.Struct('<4s4H2LH')
+END_RECORD_SIGNATURE = b'PK\x05\x06'
+
+
+class BatchArchive:
+    """批量输出的ZIP归档（线程安全）
+
+    转换器把文档写到 staging_dir 中，转换成功后调用 add() 移入归档，最后调用 close() 写入清单
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.staging_dir = tempfile.mkdtemp(prefix='jindouyun-batch-')
+        self.added_count = 0
+        self.recovered_count = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file, self._zip = self._open()
+        self._names = set(self._zip.NameToInfo)
+
+    def _open(self):
+        """打开归档准备追加：上次的清单会被新的清单替换，中断留下的不完整归档先恢复"""
+        if not os.path.exists(self.path):
+            f = open(self.path, 'w+b')
+            return f, zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED)
+
+        f = open(self.path, 'r+b')
+        try:
+            if is_complete_archive(f):
+                with zipfile.ZipFile(f) as existing:
+                    entries = existing.infolist()
+            else:
+                entries = salvage_entries(f)
+                self.recovered_count = len(entries)
+                print(f"归档不完整（上次转换中断），已恢复 {len(entries)} 个文档: {self.path}")
+
+            # 清单总是最后写入，从它开始覆盖；没有清单时从最后一个文档之后开始追加
+            manifest = next((info for info in entries if info.filename == MANIFEST_NAME), None)
+            entries = [info for info in entries if info.filename != MANIFEST_NAME]
+            if manifest is not None:
+                end = manifest.header_offset
+            else:
+                end = max((entry_end(f, info) for info in entries), default=0)
+            f.seek(end)
+            f.truncate()
+            archive = zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED)
+        except BaseException:
+            f.close()
+            raise
+        # 已有的文档保留在原位置，关闭时与新文档一起写入中央目录
+        archive.filelist.extend(entries)
+        archive.NameToInfo.update((info.filename, info) for info in entries)
+        return f, archive
+
+    def add(self, staged_file):
+        """把暂存目录中生成的文档移入归档（原样存储），返回归档中的文件名
+
+        Raises:
+            OSError: 无法读取文档或写入归档
+            ValueError: 归档已关闭
+        """
+        with self._lock:
+            if self._zip is None:
+                raise ValueError('归档已关闭')
+            name = self._unique_name(os.path.basename(staged_file))
+            self._zip.write(staged_file, name, compress_type=zipfile.ZIP_STORED)
+            self._file.flush()
+            self._names.add(name)
+            self.added_count += 1
+        os.remove(staged_file)
+        return name
+
+    def member_path(self, name):
+        """归档中文档的显示路径（记录到任务记录中）"""
+        return os.path.join(self.path, name)
+
+    def close(self, records=()):
+        """写入清单和中央目录，删除暂存目录
+
+        Args:
+            records: 任务记录（JobStore.iter_records()），逐条写入清单
+        """
+        with self._lock:
+            if self._zip is None:
+                return
+            archive, self._zip = self._zip, None
+        try:
+            info = zipfile.ZipInfo(MANIFEST_NAME, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, 'w') as manifest:
+                for record in records:
+                    line = json.dumps(self._manifest_entry(record), ensure_ascii=False)
+                    manifest.write(line.encode('utf-8') + b'\n')
+        finally:
+            archive.close()
+            self._file.close()
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def _manifest_entry(self, record):
+        output = record.get('output_file') or ''
+        prefix = self.path + os.sep
+        return {
+            'input': record.get('source_path'),
+            'template': record.get('template'),
+            'content_hash': record.get('content_hash'),
+            'status': record.get('status'),
+            'attempts': record.get('attempts'),
+            'document': output[len(prefix):] if output.startswith(prefix) else None,
+            'submitted_at': _timestamp(record.get('submitted_at')),
+            'started_at': _timestamp(record.get('started_at')),
+            'finished_at': _timestamp(record.get('finished_at')),
+            'duration': record.get('duration'),
+            'message': record.get('message') or '',
+        }
+
+    def _unique_name(self, name):
+        # 同名源文件修改后再次转换时，旧版本保留在归档中
+        stem, extension = os.path.splitext(name)
+        candidate, index = name, 2
+        while candidate in self._names or candidate == MANIFEST_NAME:
+            candidate = f'{stem} ({index}){extension}'
+            index += 1
+        return candidate
+
+
+def _timestamp(value):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(value)) if value else None
+
+
+def is_complete_archive(f):
+    """归档末尾是否为本归档的中央目录结束记录
+
+    存储的DOCX本身也是ZIP，中断后文件末尾可能恰好是最后一个文档自己的结束记录，
+    只有中央目录恰好延伸到该记录之前时才是完整的归档
+    """
+    size = f.seek(0, os.SEEK_END)
+    if size < END_RECORD.size:
+        return False
+    f.seek(size - END_RECORD.size)
+    signature, _, _, _, _, cd_size, cd_offset, comment_length = END_RECORD.unpack(f.read(END_RECORD.size))
+    if signature != END_RECORD_SIGNATURE or comment_length:
+        return False
+    if cd_offset == 0xFFFFFFFF:
+        # ZIP64归档：结束记录之前还有ZIP64结束记录和定位器，交由zipfile校验
+        try:
+            zipfile.ZipFile(f).close()
+        except zipfile.BadZipFile:
+            return False
+        return True
+    return cd_offset + cd_size + END_RECORD.size == size
+
+
+def salvage_entries(f):
+    """按本地文件头从头扫描中断的归档，返回已完整写入的文档
+
+    zipfile在写完文档后才回填本地文件头中的长度，长度为0说明这个文档没有写完；
+    扫描在第一个不完整或不是由本模块写入的条目处停止
+    """
+    size = f.seek(0, os.SEEK_END)
+    entries = []
+    offset = 0
+    while offset + LOCAL_HEADER.size <= size:
+        f.seek(offset)
+        (signature, _, flag_bits, compress_type, dos_time, dos_date,
+         crc, compress_size, file_size, name_length, extra_length) = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+        if signature != LOCAL_HEADER_SIGNATURE or flag_bits & 0x08:
+            break
+        raw_name = f.read(name_length)
+        extra = f.read(extra_length)
+        if compress_size == 0xFFFFFFFF or file_size == 0xFFFFFFFF:
+            file_size, compress_size = _zip64_sizes(extra, file_size, compress_size)
+        name = raw_name.decode('utf-8' if flag_bits & 0x800 else 'cp437', errors='replace')
+        end = offset + LOCAL_HEADER.size + name_length + extra_length + compress_size
+        # 只接受本模块写入的条目：根目录下非空的文档或清单（DOCX内部的部件名都不符合）
+        if not file_size or end > size or '/' in name or not (name.endswith('.docx') or name == MANIFEST_NAME):
+            break
+
+        info = zipfile.ZipInfo(name, (
+            (dos_date >> 9) + 1980, (dos_date >> 5) & 0xF, dos_date & 0x1F,
+            dos_time >> 11, (dos_time >> 5) & 0x3F, (dos_time & 0x1F) * 2,
+        ))
+        info.flag_bits = flag_bits
+        info.compress_type = compress_type
+        info.CRC = crc
+        info.compress_size = compress_size
+        info.file_size = file_size
+        info.header_offset = offset
+        info.extra = extra
+        entries.append(info)
+        offset = end
+    return entries
+
+
+def entry_end(f, info):
+    """条目数据在归档中的结束位置（本地文件头的扩展字段长度可能与中央目录中的不同）"""
+    f.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))
+    return info.header_offset + LOCAL_HEADER.size + header[9] + header[10] + info.compress_size
+
+
+def _zip64_sizes(extra, file_size, compress_size):
+    """从ZIP64扩展字段中读取超过4GB的长度"""
+    offset = 0
+    while offset + 4 <= len(extra):
+        tag, length = struct.unpack_from('<HH', extra, offset)
+        if tag == 1:
+            values = list(struct.unpack_from(f'<{length // 8}Q', extra, offset + 4))
+            if file_size == 0xFFFFFFFF and values:
+                file_size = values.pop(0)
+            if compress_size == 0xFFFFFFFF and values:
+                compress_size = values.pop(0)
+            break
+        offset += 4 + length
+    return file_size, compress_size
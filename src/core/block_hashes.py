@@ -0,0 +1,147 @@
+"""
+分块内容哈希模块
+编辑框内容按段落（文本块）分别计算哈希，相邻段落的哈希再按内容决定的边界分组，
+组哈希和总指纹构成两层的Merkle树：编辑时只重新计算被修改的段落及其所在组的哈希，
+计算量取决于修改的大小而不是文档的大小；比较两次的组哈希即可知道哪些段落发生了变化。
+分组边界只由段落哈希决定，同样的内容无论经过怎样的编辑得到，指纹都相同
+"""
+
+import hashlib
+
+
+# 段落哈希最后一个字节的这些位全为0时结束一组，平均每组64个段落
+GROUP_MASK = 0x3F
+
+
+def block_digest(text):
+    """一个段落的哈希"""
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).digest()
+
+
+def _is_boundary(digest):
+    return not digest[-1] & GROUP_MASK
+
+
+class _Group:
+    """一组相邻段落的哈希，组哈希在需要时计算"""
+
+    __slots__ = ('leaves', '_digest')
+
+    def __init__(self, leaves):
+        self.leaves = leaves
+        self._digest = None
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            self._digest = hashlib.sha256(b''.join(self.leaves)).digest()
+        return self._digest
+
+
+def _group(leaves):
+    """按边界把段落哈希分组（最后一组可能不以边界结束）"""
+    groups = []
+    start = 0
+    for index, digest in enumerate(leaves):
+        if _is_boundary(digest):
+            groups.append(_Group(leaves[start:index + 1]))
+            start = index + 1
+    if start < len(leaves):
+        groups.append(_Group(leaves[start:]))
+    return groups
+
+
+class BlockHashes:
+    """文档各段落的哈希和整体指纹
+
+    段落按顺序编号；编辑后调用 replace() 替换受影响的段落，fingerprint() 返回整体指纹
+    """
+
+    def __init__(self, texts=()):
+        self.reset(texts)
+
+    def __len__(self):
+        return self._count
+
+    def reset(self, texts):
+        """按全部段落的文本重新计算"""
+        leaves = [block_digest(text) for text in texts]
+        self._groups = _group(leaves)
+        self._count = len(leaves)
+        self._fingerprint = None
+
+    def replace(self, first, removed, texts):
+        """把从第 first 段开始的 removed 个段落替换为 texts 中的段落
+
+        Raises:
+            IndexError: 替换范围超出文档
+        """
+        if first < 0 or removed < 0 or first + removed > self._count:
+            raise IndexError(f'段落范围超出文档: {first}+{removed} > {self._count}')
+        new_leaves = [block_digest(text) for text in texts]
+
+        # 找到替换范围所在的组（在末尾追加时并入最后一组）
+        if self._groups and first == self._count:
+            start_group, group_start = len(self._groups) - 1, self._count - len(self._groups[-1].leaves)
+        else:
+            start_group, group_start = self._locate(first)
+        end_group, end_start = self._locate(first + removed - 1) if removed else (start_group, group_start)
+
+        if self._groups:
+            head = self._groups[start_group].leaves[:first - group_start]
+            tail = self._groups[end_group].leaves[first + removed - end_start:]
+        else:
+            head, tail = [], []
+        leaves = head + new_leaves + tail
+        stop = end_group + 1
+        # 最后一段不再是边界时，与后面一组合并（后面一组以边界结束，合并一组即可）
+        if leaves and not _is_boundary(leaves[-1]) and stop < len(self._groups):
+            leaves += self._groups[stop].leaves
+            stop += 1
+
+        self._groups[start_group:stop] = _group(leaves)
+        self._count += len(new_leaves) - removed
+        self._fingerprint = None
+
+    def fingerprint(self):
+        """整体指纹（十六进制字符串），只重新计算变化了的组"""
+        if self._fingerprint is None:
+            digest = hashlib.sha256(self._count.to_bytes(8, 'little'))
+            for group in self._groups:
+                digest.update(group.digest)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def snapshot(self):
+        """当前各组的哈希和段落数，用于之后比较哪些段落发生了变化"""
+        return tuple((group.digest, len(group.leaves)) for group in self._groups)
+
+    def changed_ranges(self, snapshot):
+        """与 snapshot 相比发生变化的段落范围（按组的粒度）
+
+        Returns:
+            list: [(start, end), ...] 当前文档中的段落范围（不含 end），只删除了段落时 start == end
+        """
+        from difflib import SequenceMatcher
+
+        old = [digest for digest, _ in snapshot]
+        new = [group.digest for group in self._groups]
+        starts = [0]
+        for group in self._groups:
+            starts.append(starts[-1] + len(group.leaves))
+
+        ranges = []
+        matcher = SequenceMatcher(None, old, new, autojunk=False)
+        for tag, _, _, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                ranges.append((starts[j1], starts[j2]))
+        return ranges
+
+    def _locate(self, index):
+        """段落所在的组及该组第一段的编号（超出末尾时返回组数和段落数）"""
+        start = 0
+        for group_index, group in enumerate(self._groups):
+            if index < start + len(group.leaves):
+                return group_index, start
+            start += len(group.leaves)
+        return len(self._groups), start
@@ -0,0 +1,202 @@
+"""
+中文排版模块
+处理中英文混排间距、中文语境中的半角标点以及各排版方案的中文字体：
+Pandoc转换时由随模板提供的Lua过滤器（templates/filters/cjk_typography.lua）在Pandoc进程内处理正文，
+快速写入器使用本模块中规则相同的 apply_typography；
+中文字体和语言写入处理后的参考模板（按模板内容缓存），两条转换路径共用
+"""
+
+import os
+import re
+import json
+import hashlib
+import zipfile
+
+
+# 各排版方案的中文排版设置
+#   spacing: auto 去掉中英文之间的手动空格，由Word的中西文自动间距统一处理；
+#            space 在中英文之间补一个空格；keep 保持原样（技术文档中的标识符常带空格）
+#   punctuation: 中文语境中的半角标点改为全角，并去掉全角标点后多余的空格
+#   body_font / heading_font: 正文和标题的中文字体，替换模板中依赖主题的中文字体
+TYPOGRAPHY_SETTINGS = {
+    'simple': {'spacing': 'auto', 'punctuation': True, 'body_font': '宋体', 'heading_font': '宋体'},
+    'academic': {'spacing': 'auto', 'punctuation': True, 'body_font': '宋体', 'heading_font': '黑体'},
+    'business': {'spacing': 'auto', 'punctuation': True, 'body_font': '微软雅黑', 'heading_font': '微软雅黑'},
+    'technical': {'spacing': 'keep', 'punctuation': True, 'body_font': '宋体', 'heading_font': '黑体'},
+}
+
+FILTER_NAME = 'cjk_typography.lua'
+
+# 参考模板处理逻辑变化时递增，使旧的缓存失效
+REFERENCE_DOC_VERSION = 1
+
+CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+LATIN_CHARS = '0-9A-Za-z'
+
+# 只有中文与半角字符相邻、或全角标点后有空格时才需要处理，其余文本直接跳过
+NEEDS_TYPOGRAPHY = re.compile(
+    rf'[{CJK_CHARS}][ ,;:!?.(){LATIN_CHARS}]|[ (){LATIN_CHARS}][{CJK_CHARS}]|[，；：！？。、）] '
+)
+HALF_WIDTH_PUNCTUATION = re.compile(
+    rf'(?<=[{CJK_CHARS}])[,;:!?)]|(?<=[{CJK_CHARS}])\.(?=\s|$)|\((?=[{CJK_CHARS}])'
+)
+SPACE_AFTER_FULL_WIDTH = re.compile(r'(?<=[，；：！？。、）]) +')
+CJK_LATIN_GAP = re.compile(rf'(?<=[{CJK_CHARS}]) +(?=[{LATIN_CHARS}])|(?<=[{LATIN_CHARS}]) +(?=[{CJK_CHARS}])')
+CJK_LATIN_BOUNDARY = re.compile(rf'(?<=[{CJK_CHARS}])(?=[{LATIN_CHARS}])|(?<=[{LATIN_CHARS}])(?=[{CJK_CHARS}])')
+
+FULL_WIDTH = {',': '，', ';': '；', ':': '：', '!': '！', '?': '？', '.': '。', '(': '（', ')': '）'}
+
+# 已处理的参考模板 {(模板路径, 修改时间, 排版方案): 处理后的路径}
+_prepared_reference_docs = {}
+
+
+def get_typography_settings(template_style):
+    """获取排版方案的中文排版设置，未配置的方案返回None"""
+    return TYPOGRAPHY_SETTINGS.get(template_style)
+
+
+def apply_typography(text, settings):
+    """对一段正文应用中文排版规则（与Lua过滤器的规则一致，代码内容不应经过此函数）
+
+    Args:
+        text: 已折叠空白的正文文本
+        settings: get_typography_settings 返回的设置
+
+    Returns:
+        str: 处理后的文本
+    """
+    if text.isascii() or not NEEDS_TYPOGRAPHY.search(text):
+        return text
+
+    if settings.get('punctuation'):
+        text = HALF_WIDTH_PUNCTUATION.sub(lambda m: FULL_WIDTH[m.group(0)], text)
+        if ' ' in text:
+            text = SPACE_AFTER_FULL_WIDTH.sub('', text)
+
+    spacing = settings.get('spacing')
+    if spacing == 'auto':
+        if ' ' in text:
+            text = CJK_LATIN_GAP.sub('', text)
+    elif spacing == 'space':
+        text = CJK_LATIN_BOUNDARY.sub(' ', text)
+    return text
+
+
+def get_filter_path(template_dir):
+    """随模板提供的Lua过滤器路径"""
+    return os.path.join(template_dir, 'filters', FILTER_NAME)
+
+
+def get_pandoc_args(template_dir, settings):
+    """Pandoc执行中文排版过滤器所需的参数，过滤器文件不存在时返回空列表"""
+    filter_path = get_filter_path(template_dir)
+    if not os.path.exists(filter_path):
+        print(f"警告: 中文排版过滤器不存在: {filter_path}")
+        return []
+    return [
+        '--lua-filter', filter_path,
+        '-M', f"cjk-spacing={settings['spacing']}",
+        '-M', f"cjk-punctuation={'true' if settings['punctuation'] else 'false'}",
+    ]
+
+
+def prepare_reference_doc(template_file, template_style, settings, cache_dir):
+    """生成写入了中文字体和语言设置的参考模板
+
+    模板中依赖主题的中文字体（eastAsiaTheme）会随主题语言变化，
+    例如主题语言为日文时中文标题会使用日文字体，这里统一替换为排版方案指定的字体
+
+    Args:
+        template_file: 原始参考模板路径
+        template_style: 排版方案
+        settings: get_typography_settings 返回的设置
+        cache_dir: 处理后模板的缓存目录
+
+    Returns:
+        str: 处理后的模板路径，处理失败时返回原始模板路径
+    """
+    try:
+        cache_key = (template_file, os.path.getmtime(template_file), template_style)
+        cached = _prepared_reference_docs.get(cache_key)
+        if cached and os.path.exists(cached):
+            return cached
+
+        digest = hashlib.sha256()
+        with open(template_file, 'rb') as f:
+            digest.update(f.read())
+        digest.update(json.dumps([settings, REFERENCE_DOC_VERSION], sort_keys=True).encode('utf-8'))
+        prepared = os.path.join(cache_dir, f'{template_style}-{digest.hexdigest()[:16]}.docx')
+
+        if not os.path.exists(prepared):
+            import tempfile
+
+            os.makedirs(cache_dir, exist_ok=True)
+            # 队列中的转换线程、预先转换和缩略图可能同时生成同一模板，每次写入使用独立的临时文件
+            fd, temp_path = tempfile.mkstemp(suffix='.part', prefix=os.path.basename(prepared) + '.', dir=cache_dir)
+            os.close(fd)
+            try:
+                with zipfile.ZipFile(template_file) as source, \
+                        zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as target:
+                    for info in source.infolist():
+                        data = source.read(info.filename)
+                        if info.filename == 'word/styles.xml':
+                            data = _prepare_styles(data.decode('utf-8'), settings).encode('utf-8')
+                        elif info.filename == 'word/settings.xml':
+                            data = _prepare_settings(data.decode('utf-8')).encode('utf-8')
+                        target.writestr(info, data)
+                os.replace(temp_path, prepared)
+            finally:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+
+        _prepared_reference_docs[cache_key] = prepared
+        return prepared
+    except (OSError, zipfile.BadZipFile, UnicodeDecodeError) as e:
+        print(f"无法生成中文排版参考模板，使用原始模板: {e}")
+        return template_file
+
+
+def _prepare_styles(styles_xml, settings):
+    """把样式表中依赖主题的中文字体替换为指定字体，并把默认的东亚语言设为中文"""
+
+    def replace_fonts(block, font):
+        def replace(match):
+            tag = match.group(0)
+            if 'w:eastAsiaTheme=' not in tag:
+                return tag
+            tag = re.sub(r'\s+w:eastAsiaTheme="[^"]*"', '', tag)
+            if 'w:eastAsia=' not in tag:
+                tag = tag.replace('<w:rFonts', f'<w:rFonts w:eastAsia="{font}"', 1)
+            return tag
+        return re.sub(r'<w:rFonts\b[^>]*>', replace, block)
+
+    def replace_style(match):
+        block = match.group(0)
+        name = re.search(r'<w:name w:val="([^"]+)"', block)
+        name = name.group(1).lower() if name else ''
+        is_heading = name.startswith(('heading', 'title', 'subtitle'))
+        return replace_fonts(block, settings['heading_font'] if is_heading else settings['body_font'])
+
+    def replace_defaults(match):
+        block = replace_fonts(match.group(0), settings['body_font'])
+        if '<w:rFonts' in block and 'w:eastAsia=' not in block:
+            block = block.replace('<w:rFonts', f'<w:rFonts w:eastAsia="{settings["body_font"]}"', 1)
+        if '<w:lang ' in block:
+            if 'w:eastAsia=' in re.search(r'<w:lang [^>]*>', block).group(0):
+                block = re.sub(r'(<w:lang [^>]*w:eastAsia=")[^"]*"', r'\1zh-CN"', block)
+            else:
+                block = block.replace('<w:lang ', '<w:lang w:eastAsia="zh-CN" ', 1)
+        return block
+
+    styles_xml = re.sub(r'<w:rPrDefault>.*?</w:rPrDefault>', replace_defaults, styles_xml, flags=re.S)
+    styles_xml = re.sub(r'<w:style\b.*?</w:style>', replace_style, styles_xml, flags=re.S)
+
+    if settings['spacing'] == 'auto':
+        # 中西文之间的间距交给Word自动调整，不能被样式关闭
+        styles_xml = re.sub(r'<w:autoSpace(?:DE|DN) w:val="(?:0|false)"/>', '', styles_xml)
+    return styles_xml
+
+
+def _prepare_settings(settings_xml):
+    """主题字体的东亚语言设为中文，避免缺少字体时回退到日文字体"""
+    return re.sub(r'(<w:themeFontLang\b[^>]*w:eastAsia=")[^"]*"', r'\1zh-CN"', settings_xml)
@@ -0,0 +1,75 @@
+"""
+剪贴板内容处理模块
+从剪贴板的HTML或纯文本内容中提取待转换的HTML，并生成供编辑框显示的简短摘要
+"""
+
+import re
+import html
+
+
+# 编辑框中最多显示的字符数，避免大段内容经过文本控件排版
+SUMMARY_CHARS = 2000
+
+# AI回复中常见的Markdown代码块包裹
+CODE_FENCE_PATTERN = re.compile(r'^\s*```[\w-]*[ \t]*\n(.*?)\n\s*```\s*$', re.S)
+
+# 纯文本看起来就是HTML源码
+HTML_SOURCE_PATTERN = re.compile(
+    r'^\s*(<!DOCTYPE\s+html|<html\b|<head\b|<body\b|<(h[1-6]|p|ul|ol|dl|table|pre|blockquote|hr)\b)',
+    re.I
+)
+
+
+def extract_html(html_payload, text_payload):
+    """从剪贴板内容中提取要转换的HTML
+
+    从浏览器复制代码块时，text/html 是经过高亮的代码展示，
+    真正的HTML源码在纯文本中，因此优先使用看起来像HTML源码的纯文本
+
+    Args:
+        html_payload: 剪贴板中的 text/html 内容（可为空）
+        text_payload: 剪贴板中的纯文本内容（可为空）
+
+    Returns:
+        tuple: (html_content, source) source为 'text-html'、'html' 或 'text'；没有可用内容时html_content为空字符串
+    """
+    text = text_payload or ''
+    fence = CODE_FENCE_PATTERN.match(text)
+    if fence:
+        text = fence.group(1)
+
+    if HTML_SOURCE_PATTERN.match(text):
+        return text.strip(), 'text-html'
+    if html_payload and html_payload.strip():
+        return html_payload.strip(), 'html'
+    if text.strip():
+        return text_to_html(text), 'text'
+    return '', ''
+
+
+def text_to_html(text):
+    """把纯文本转换为段落HTML：空行分段，段内换行保留为<br>"""
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text.replace('\r\n', '\n')) if p.strip()]
+    body = '\n'.join(
+        '<p>' + '<br>'.join(html.escape(line) for line in paragraph.split('\n')) + '</p>'
+        for paragraph in paragraphs
+    )
+    return f'<html><body>\n{body}\n</body></html>'
+
+
+def format_size(size):
+    """把字节数格式化为易读的形式"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def summarize(html_content, source, limit=SUMMARY_CHARS):
+    """生成编辑框中显示的只读摘要"""
+    source_text = {'text-html': 'HTML源码', 'html': '网页格式内容', 'text': '纯文本'}.get(source, '内容')
+    size = format_size(len(html_content.encode('utf-8')))
+    header = f'【已从剪贴板读取{source_text}，共 {len(html_content)} 个字符（{size}）】'
+    if len(html_content) <= limit:
+        return f'{header}\n\n{html_content}'
+    return f'{header}\n【以下仅显示前 {limit} 个字符，转换使用完整内容】\n\n{html_content[:limit]}…'
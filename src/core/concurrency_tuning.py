@@ -0,0 +1,143 @@
+"""
+并发数调优模块
+同时运行多少个转换最快取决于电脑：大文档受内存带宽限制，Pandoc（GHC运行时）自身也会启动多个线程，
+“每个核一个”往往不是最优。benchmark_concurrency.py 按输入大小分档测量不同并发数的吞吐量和延迟，
+把每档的最佳并发数保存在应用数据目录中；批量转换（watch_folder.py）和工作进程（conversion_worker.py）
+未指定并发数时按输入大小使用保存的结果
+"""
+
+import os
+import json
+import time
+
+from core.runtime_cache import get_data_root
+
+
+TUNING_FILE = 'concurrency.json'
+TUNING_VERSION = 1
+
+# 输入大小分档：(名称, 上限字节数)，最后一档没有上限
+SIZE_CLASSES = (
+    ('small', 256 * 1024),
+    ('medium', 2 * 1024 * 1024),
+    ('large', 16 * 1024 * 1024),
+    ('huge', None),
+)
+
+# 不知道输入大小时（如工作进程）使用的分档
+DEFAULT_SIZE_CLASS = 'medium'
+
+# 吞吐量达到最高值的这一比例即视为饱和，取达到饱和的最小并发数（延迟和内存占用更低）
+SATURATION_RATIO = 0.95
+
+
+def get_tuning_path():
+    """保存调优结果的文件路径"""
+    return os.path.join(get_data_root(), TUNING_FILE)
+
+
+def size_class(size_bytes):
+    """输入大小所在的分档名称"""
+    for name, limit in SIZE_CLASSES:
+        if limit is None or size_bytes < limit:
+            return name
+    return SIZE_CLASSES[-1][0]
+
+
+def best_workers(points, ratio=SATURATION_RATIO):
+    """从一组测量结果中选出最佳并发数：吞吐量达到最高值 ratio 倍的最小并发数
+
+    Args:
+        points: [{'workers': int, 'jobs_per_second': float, ...}, ...]
+
+    Returns:
+        int: 最佳并发数，没有成功的测量时返回None
+    """
+    measured = [point for point in points if point.get('jobs_per_second')]
+    if not measured:
+        return None
+    peak = max(point['jobs_per_second'] for point in measured)
+    return min(point['workers'] for point in measured if point['jobs_per_second'] >= peak * ratio)
+
+
+def load_tuning(path=None):
+    """读取调优结果，没有结果、无法读取或来自CPU核数不同的电脑时返回None"""
+    path = path or get_tuning_path()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            tuning = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"无法读取并发数调优结果: {e}")
+        return None
+    if tuning.get('version') != TUNING_VERSION or not isinstance(tuning.get('size_classes'), dict):
+        return None
+    if tuning.get('cpu_count') != os.cpu_count():
+        # 复制到了其他电脑，或虚拟机的核数改变了
+        print(f"并发数调优结果来自 {tuning.get('cpu_count')} 核的电脑，当前为 {os.cpu_count()} 核，已忽略")
+        return None
+    return tuning
+
+
+def save_tuning(size_classes, pandoc_path=None, native_writer=True, path=None):
+    """保存各分档的最佳并发数
+
+    Args:
+        size_classes: {分档名称: {'workers': int, ...测量摘要}}
+
+    Returns:
+        str: 保存的文件路径
+    """
+    path = path or get_tuning_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tuning = {
+        'version': TUNING_VERSION,
+        'cpu_count': os.cpu_count(),
+        'pandoc_path': pandoc_path,
+        'native_writer': native_writer,
+        'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'size_classes': size_classes,
+    }
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(tuning, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+
+def recommended_workers(size_bytes=None, default=None, tuning=None):
+    """按调优结果返回该输入大小的最佳并发数
+
+    该档没有测量结果时使用最接近的已测量分档，没有任何调优结果时返回 default
+
+    Args:
+        size_bytes: 输入大小，None 表示未知（使用 DEFAULT_SIZE_CLASS）
+    """
+    tuning = tuning if tuning is not None else load_tuning()
+    if not tuning:
+        return default
+    measured = tuning['size_classes']
+    names = [name for name, _ in SIZE_CLASSES]
+    target = names.index(size_class(size_bytes) if size_bytes is not None else DEFAULT_SIZE_CLASS)
+    candidates = [name for name in names if isinstance(measured.get(name), dict) and measured[name].get('workers')]
+    if not candidates:
+        return default
+    nearest = min(candidates, key=lambda name: (abs(names.index(name) - target), names.index(name)))
+    return max(1, int(measured[nearest]['workers']))
+
+
+def typical_input_size(paths, sample_size=200):
+    """一批输入文件的典型大小（取前 sample_size 个的中位数），没有可读取的文件时返回None"""
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append(os.path.getsize(path))
+        except OSError:
+            continue
+        if len(sizes) >= sample_size:
+            break
+    if not sizes:
+        return None
+    sizes.sort()
+    return sizes[len(sizes) // 2]
@@ -0,0 +1,389 @@
+"""
+转换任务队列模块
+在转换器前增加任务队列：内容和模板都相同的进行中请求合并为一次转换，
+其余请求按可配置的并发数排队执行，并保留最近的任务历史。
+任务分为交互（点击生成）、预先转换和批量（拖入多个文件、监视文件夹）三个优先级类别：
+交互任务总是先于其他任务开始：有交互任务等待时不再开始其他任务，空出的并发数先给交互任务；
+其余类别在低优先级的线程和进程中运行，
+可按类别限制同时运行的转换数，并统计各类别的排队等待时间
+"""
+
+import os
+import sys
+import time
+import hashlib
+import threading
+from collections import deque
+
+
+# 任务状态
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+# 任务的优先级类别（按优先级从高到低）
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_SPECULATIVE = 'speculative'
+PRIORITY_BATCH = 'batch'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_SPECULATIVE, PRIORITY_BATCH)
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: '交互',
+    PRIORITY_SPECULATIVE: '预先转换',
+    PRIORITY_BATCH: '批量',
+}
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_HISTORY_SIZE = 20
+
+# 每个类别保留最近多少次排队等待时间用于统计
+WAIT_SAMPLE_SIZE = 200
+
+
+def default_class_limits(cpu_count=None):
+    """按CPU核数确定各类别同时运行的转换数上限
+
+    交互任务最多每个核一个；预先转换只占一个；批量任务最多使用一半的核，其余留给界面和交互任务
+    """
+    cpus = cpu_count or os.cpu_count() or 1
+    return {PRIORITY_INTERACTIVE: cpus, PRIORITY_SPECULATIVE: 1, PRIORITY_BATCH: max(1, cpus // 2)}
+
+
+def lower_thread_priority():
+    """降低当前线程的调度优先级（不支持的平台上不做处理）
+
+    Linux的nice值按线程生效，线程中启动的子进程也继承这一优先级
+    """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            THREAD_PRIORITY_LOWEST = -2
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_LOWEST)
+        elif sys.platform.startswith('linux'):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (OSError, AttributeError):
+        pass
+
+
+class ConversionJob:
+    """一次HTML到DOCX的转换任务"""
+
+    _next_id = 1
+
+    def __init__(self, html_content, template_style, output_file, source_path=None, key=None,
+                 priority=PRIORITY_INTERACTIVE):
+        self.id = ConversionJob._next_id
+        ConversionJob._next_id += 1
+        self.html_content = html_content
+        # 从文件转换时内容留在磁盘上，html_content为None
+        self.source_path = source_path
+        self.template_style = template_style
+        self.output_file = output_file
+        self.key = key or job_key(html_content, template_style)
+        self.priority = priority
+        self.status = STATUS_QUEUED
+        self.message = ''
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # 合并到此任务的重复请求次数
+        self.coalesced_count = 0
+
+    @property
+    def duration(self):
+        """转换耗时（秒），尚未完成时返回None"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def wait(self):
+        """排队等待时间（秒），尚未开始时返回None"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def in_flight(self):
+        return self.status in (STATUS_QUEUED, STATUS_RUNNING)
+
+
+class _Task:
+    """与转换任务一起调度的后台工作（如预先转换），不记入任务历史"""
+
+    def __init__(self, run, priority):
+        self.run = run
+        self.priority = priority
+        self.submitted_at = time.time()
+        self.started_at = None
+
+
+def job_key(html_content, template_style, content_hash=None):
+    """任务的合并键：内容哈希加模板
+
+    Args:
+        content_hash: 调用方已有的内容指纹（如编辑框的分块哈希），提供时不再对内容计算哈希
+    """
+    digest = content_hash or hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+    return f'{digest}:{template_style}'
+
+
+class ConversionQueue:
+    """转换任务队列（线程安全）
+
+    转换在后台线程中执行，状态变化通过 on_update(job) 回调通知，
+    回调在工作线程中调用，界面层需要自行切回主线程
+
+    max_workers 限制同时运行的转换总数（包括交互任务），
+    class_limits 按优先级类别限制同时运行的转换数（如 default_class_limits()，未指定的类别不限制）
+    """
+
+    def __init__(self, converter, max_workers=DEFAULT_MAX_WORKERS,
+                 history_size=DEFAULT_HISTORY_SIZE, on_update=None, class_limits=None):
+        self.converter = converter
+        self.max_workers = max(1, int(max_workers))
+        self.class_limits = dict(class_limits or {})
+        self.on_update = on_update
+        self.history = deque(maxlen=history_size)
+        self._pending = {priority: deque() for priority in PRIORITIES}
+        self._in_flight = {}
+        self._running = 0
+        self._running_tasks = 0
+        self._running_by_class = dict.fromkeys(PRIORITIES, 0)
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLE_SIZE) for priority in PRIORITIES}
+        self._started_by_class = dict.fromkeys(PRIORITIES, 0)
+        self._lock = threading.Lock()
+
+    def submit(self, html_content, template_style, output_file, content_hash=None, priority=PRIORITY_INTERACTIVE):
+        """提交转换请求
+
+        Args:
+            content_hash: 内容指纹（可选），见 job_key
+            priority: 优先级类别
+
+        Returns:
+            tuple: (job, coalesced) coalesced为True表示请求被合并到了进行中的相同任务
+        """
+        key = job_key(html_content, template_style, content_hash)
+        return self._submit(key, priority, lambda: ConversionJob(
+            html_content, template_style, output_file, key=key, priority=priority
+        ))
+
+    def submit_file(self, source, template_style, output_file, priority=PRIORITY_INTERACTIVE):
+        """提交从磁盘文件转换的请求，内容在工作线程中流式读取
+
+        合并键由文件路径、大小和修改时间组成，在调用线程（界面线程）中只读取文件属性，
+        不对整个文件计算哈希；同一文件未修改时的重复请求会被合并
+
+        Args:
+            source: 已打开的SourceFile（用于计算合并键，任务执行时会重新打开文件）
+            priority: 优先级类别
+
+        Returns:
+            tuple: (job, coalesced)
+        """
+        size, mtime_ns = source.signature()
+        key = f'{os.path.abspath(source.path)}|{size}|{mtime_ns}:{template_style}:{source.format}'
+        return self._submit(key, priority, lambda: ConversionJob(
+            None, template_style, output_file, source_path=source.path, key=key, priority=priority
+        ))
+
+    def submit_task(self, run, priority=PRIORITY_SPECULATIVE):
+        """提交与转换任务一起调度的后台工作（在工作线程中调用 run()）"""
+        with self._lock:
+            self._pending[priority].append(_Task(run, priority))
+        self._dispatch()
+
+    def _submit(self, key, priority, create_job):
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                existing.coalesced_count += 1
+                if existing.status == STATUS_QUEUED and PRIORITIES.index(priority) < PRIORITIES.index(existing.priority):
+                    # 交互请求合并到排队中的批量任务时，任务随之提升到交互类别
+                    self._pending[existing.priority].remove(existing)
+                    existing.priority = priority
+                    self._pending[priority].append(existing)
+                    promoted = True
+                else:
+                    promoted = False
+            else:
+                job = create_job()
+                self._in_flight[key] = job
+                self._pending[priority].append(job)
+                self.history.appendleft(job)
+
+        if existing is not None:
+            if promoted:
+                self._dispatch()
+            return existing, True
+        self._notify(job)
+        self._dispatch()
+        return job, False
+
+    def retry(self, job, output_file=None):
+        """按原任务的内容、模板和优先级类别重新提交（文件任务重新读取文件）"""
+        if job.source_path is not None:
+            from core.source_file import SourceFile
+            with SourceFile(job.source_path) as source:
+                return self.submit_file(source, job.template_style, output_file or job.output_file, job.priority)
+        return self.submit(job.html_content, job.template_style, output_file or job.output_file,
+                           content_hash=job.key.split(':', 1)[0], priority=job.priority)
+
+    def set_max_workers(self, max_workers):
+        """修改并发数，立即对排队中的任务生效"""
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+        self._dispatch()
+
+    def is_output_reserved(self, output_file):
+        """输出路径是否已被进行中的任务占用"""
+        with self._lock:
+            return any(job.output_file == output_file for job in self._in_flight.values())
+
+    def pending_count(self):
+        """排队中和正在转换的任务数（不含预先转换等后台工作）"""
+        with self._lock:
+            queued = sum(isinstance(item, ConversionJob) for pending in self._pending.values() for item in pending)
+            return queued + self._running - self._running_tasks
+
+    def wait_stats(self):
+        """各优先级类别的排队情况和最近的排队等待时间（秒）
+
+        Returns:
+            dict: {类别: {'queued', 'running', 'started', 'mean', 'p95', 'max'}}，没有记录时等待时间为None
+        """
+        stats = {}
+        with self._lock:
+            for priority in PRIORITIES:
+                waits = sorted(self._waits[priority])
+                stats[priority] = {
+                    'queued': len(self._pending[priority]),
+                    'running': self._running_by_class[priority],
+                    'started': self._started_by_class[priority],
+                    'mean': sum(waits) / len(waits) if waits else None,
+                    'p95': waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else None,
+                    'max': waits[-1] if waits else None,
+                }
+        return stats
+
+    def _next_item(self):
+        """按优先级取出下一个可以开始的任务（调用方持有锁）"""
+        if self._running >= self.max_workers:
+            return None
+        for priority in PRIORITIES:
+            pending = self._pending[priority]
+            if not pending:
+                continue
+            limit = self.class_limits.get(priority)
+            if limit is None or self._running_by_class[priority] < limit:
+                return pending.popleft()
+            if priority == PRIORITY_INTERACTIVE:
+                # 交互任务等待时不再开始其他类别的任务，之后空出的并发数留给交互任务
+                return None
+        return None
+
+    def _dispatch(self):
+        """在并发数允许的范围内按优先级启动排队中的任务"""
+        to_start = []
+        with self._lock:
+            while True:
+                item = self._next_item()
+                if item is None:
+                    break
+                item.started_at = time.time()
+                if isinstance(item, ConversionJob):
+                    item.status = STATUS_RUNNING
+                else:
+                    self._running_tasks += 1
+                self._running += 1
+                self._running_by_class[item.priority] += 1
+                self._started_by_class[item.priority] += 1
+                self._waits[item.priority].append(item.started_at - item.submitted_at)
+                to_start.append(item)
+
+        for item in to_start:
+            if isinstance(item, ConversionJob):
+                self._notify(item)
+                target = self._run
+            else:
+                target = self._run_task
+            threading.Thread(target=target, args=(item,), daemon=True).start()
+
+    def _run(self, job):
+        # 预先转换和批量任务在低优先级的线程中运行，支持时Pandoc也以低优先级运行
+        options = {}
+        if job.priority != PRIORITY_INTERACTIVE:
+            lower_thread_priority()
+            if getattr(self.converter, 'supports_background', False):
+                options['background'] = True
+        try:
+            if job.source_path is not None:
+                success, message = self.converter.convert_source_file_to_docx(
+                    job.source_path, job.output_file, job.template_style, **options
+                )
+            else:
+                success, message = self.converter.convert_html_to_docx(
+                    job.html_content, job.output_file, job.template_style, **options
+                )
+        except Exception as e:
+            success, message = False, f"发生错误：\n{str(e)}"
+
+        with self._lock:
+            job.status = STATUS_SUCCEEDED if success else STATUS_FAILED
+            job.message = message
+            job.finished_at = time.time()
+            self._running -= 1
+            self._running_by_class[job.priority] -= 1
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+
+        self._notify(job)
+        self._dispatch()
+
+    def _run_task(self, task):
+        if task.priority != PRIORITY_INTERACTIVE:
+            lower_thread_priority()
+        try:
+            task.run()
+        except Exception as e:
+            print(f"后台任务出错: {e}")
+
+        with self._lock:
+            self._running -= 1
+            self._running_tasks -= 1
+            self._running_by_class[task.priority] -= 1
+        self._dispatch()
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"任务状态回调出错: {e}")
+
+
+def format_wait_stats(stats):
+    """排队等待统计的文字说明（每个有记录的类别一行）"""
+    lines = []
+    for priority in PRIORITIES:
+        entry = stats[priority]
+        if not entry['started']:
+            continue
+        lines.append(
+            f"{PRIORITY_NAMES[priority]}：已开始 {entry['started']} 个，排队等待平均 {entry['mean']:.2f} 秒，"
+            f"P95 {entry['p95']:.2f} 秒，最长 {entry['max']:.2f} 秒（最近 {min(entry['started'], WAIT_SAMPLE_SIZE)} 个）"
+        )
+    return '\n'.join(lines)
+
+
+def unique_output_path(directory, base_name, extension, is_reserved=None):
+    """生成不与现有文件或进行中任务冲突的输出路径"""
+    candidate = os.path.join(directory, f'{base_name}{extension}')
+    index = 2
+    while os.path.exists(candidate) or (is_reserved and is_reserved(candidate)):
+        candidate = os.path.join(directory, f'{base_name}_{index}{extension}')
+        index += 1
+    return candidate
@@ -0,0 +1,833 @@
+"""
+分布式转换模块
+协调进程在TCP端口上等待工作进程连接，工作进程（可以在其他电脑上，也可以是本机的多个进程）
+每空出一个转换槽位就向协调进程领取一个任务（HTML内容或源文件、模板、选项），转换后把DOCX流式传回。
+工作进程定期发送心跳，断开或心跳超时时，其未完成的任务重新分派给其他工作进程；
+协调进程按工作进程统计完成数、失败数、传输量和吞吐量。
+
+与协调进程在同一台电脑上的工作进程（握手时能读到协调进程的探测共享内存）不经套接字接收任务内容：
+HTML内容或源文件的内容放在共享内存中，只发送名称，由工作进程直接映射读取。
+
+协调进程提供与转换器相同的 convert_html_to_docx / convert_source_file_to_docx 接口，
+可以直接作为 ConversionQueue 的转换器使用
+"""
+
+import os
+import hmac
+import json
+import ipaddress
+import time
+import shutil
+import socket
+import struct
+import threading
+from collections import deque
+
+
+PROTOCOL_VERSION = 1
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# 工作进程的心跳间隔，以及协调进程判定工作进程失联的超时时间（秒）
+DEFAULT_HEARTBEAT_INTERVAL = 2.0
+DEFAULT_HEARTBEAT_TIMEOUT = 10.0
+
+# 任务因工作进程失联被重新分派的最大次数
+MAX_ATTEMPTS = 3
+
+# 工作进程断线后重新连接的间隔（秒）
+RECONNECT_SECONDS = 2.0
+
+# 消息头（JSON）的最大长度，和流式收发消息体时每次读写的字节数
+MAX_HEADER_BYTES = 1024 * 1024
+CHUNK_BYTES = 256 * 1024
+
+TOKEN_ENV_VAR = 'JINDOUYUN_WORKER_TOKEN'
+
+# 握手时探测共享内存的字节数
+PROBE_BYTES = 16
+
+# 随任务发给工作进程的转换选项（与转换器的同名属性对应）
+JOB_OPTIONS = ('optimize_output', 'typography', 'embed_fonts', 'offload_tables')
+
+
+class ProtocolError(Exception):
+    """对端发送了无法识别的消息"""
+
+
+def is_loopback(host):
+    """地址是否只指向本机（主机名的所有解析结果都是回环地址）"""
+    try:
+        infos = socket.getaddrinfo(host, None)
+    except (OSError, UnicodeError):
+        return False
+    try:
+        return bool(infos) and all(ipaddress.ip_address(info[4][0].split('%')[0]).is_loopback for info in infos)
+    except ValueError:
+        return False
+
+
+def parse_address(address, default_host=DEFAULT_HOST):
+    """解析“主机:端口”或只有端口的地址
+
+    Returns:
+        tuple: (host, port)
+    """
+    address = str(address)
+    host, _, port = address.rpartition(':')
+    return host or default_host, int(port)
+
+
+class Channel:
+    """一条TCP连接上的消息收发
+
+    每条消息为4字节长度加JSON消息头，消息头中的 size 指明随后消息体的字节数，
+    消息体可以分块流式读写，不需要整体放入内存
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = sock.makefile('rb')
+        self._send_lock = threading.Lock()
+        # 最近一次收到数据的时间（接收大消息体时每块都会更新，传输中的连接不会被判定为失联）
+        self.last_activity = time.monotonic()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def send(self, header, payload=None, payload_path=None):
+        """发送一条消息，消息体为字节串或文件路径（文件按块发送）"""
+        if payload_path is not None:
+            size = os.path.getsize(payload_path)
+        else:
+            payload = payload or b''
+            size = len(payload)
+        data = json.dumps(dict(header, size=size), ensure_ascii=False).encode('utf-8')
+
+        with self._send_lock:
+            self.sock.sendall(struct.pack('!I', len(data)) + data)
+            if payload_path is not None:
+                with open(payload_path, 'rb') as f:
+                    self.sock.sendfile(f)
+            elif payload:
+                self.sock.sendall(payload)
+            self.bytes_sent += 4 + len(data) + size
+
+    def receive(self):
+        """读取下一条消息的消息头，连接关闭时返回None；消息体需随后用 read_payload 读出"""
+        prefix = self.reader.read(4)
+        if not prefix:
+            return None
+        if len(prefix) < 4:
+            raise ProtocolError('连接在消息中途关闭')
+        (length,) = struct.unpack('!I', prefix)
+        if length > MAX_HEADER_BYTES:
+            raise ProtocolError(f'消息头过长: {length} 字节')
+        data = self._read_exact(length)
+        self.last_activity = time.monotonic()
+        try:
+            header = json.loads(data.decode('utf-8'))
+        except ValueError as e:
+            raise ProtocolError(f'无法解析消息头: {e}')
+        if not isinstance(header, dict) or not isinstance(header.get('size', 0), int):
+            raise ProtocolError('消息头格式不正确')
+        return header
+
+    def read_payload(self, header, sink=None):
+        """读取消息体：传入 sink（可写文件）时按块写入，否则返回字节串"""
+        remaining = header.get('size', 0)
+        chunks = []
+        while remaining:
+            chunk = self._read_exact(min(remaining, CHUNK_BYTES))
+            self.last_activity = time.monotonic()
+            remaining -= len(chunk)
+            if sink is not None:
+                sink.write(chunk)
+            else:
+                chunks.append(chunk)
+        return None if sink is not None else b''.join(chunks)
+
+    def _read_exact(self, size):
+        data = self.reader.read(size)
+        if len(data) < size:
+            raise ProtocolError('连接在消息中途关闭')
+        self.bytes_received += len(data)
+        return data
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class RemoteJob:
+    """协调进程中等待分派或正在远程执行的任务"""
+
+    _next_id = 1
+    _id_lock = threading.Lock()
+
+    def __init__(self, template_style, output_file, options, html_content=None, source_path=None):
+        with RemoteJob._id_lock:
+            self.id = RemoteJob._next_id
+            RemoteJob._next_id += 1
+        self.template_style = template_style
+        self.output_file = output_file
+        self.options = options
+        # HTML内容（已编码为UTF-8）或源文件路径，重新分派时再次发送
+        self.payload = html_content.encode('utf-8') if html_content is not None else None
+        self.source_path = source_path
+        # 分派给本机工作进程时内容移入共享内存（之后发给其他工作进程也从共享内存读取）
+        self.shared_input = None
+        self.attempts = 0
+        self.worker = None
+        self.dispatched_at = None
+        self.done = threading.Event()
+        self.success = False
+        self.message = ''
+
+    @property
+    def content(self):
+        """HTML内容的字节（共享内存中的内容或编码后的字节串），源文件任务为None"""
+        return self.shared_input.buffer if self.shared_input is not None else self.payload
+
+    def share(self):
+        """把HTML内容或源文件的内容移入共享内存（只在第一次分派给本机工作进程时进行）
+
+        Returns:
+            SharedInput: 无法分配共享内存时返回None，内容仍经连接发送
+        """
+        if self.shared_input is None:
+            from core.shared_input import SharedInput
+            try:
+                if self.source_path is not None:
+                    self.shared_input = SharedInput.from_file(self.source_path)
+                else:
+                    self.shared_input = SharedInput.create(self.payload)
+            except (OSError, ValueError) as e:
+                print(f"无法分配共享内存，任务内容改为经连接发送: {e}")
+                return None
+            self.payload = None
+        return self.shared_input
+
+    def finish(self, success, message):
+        self.success = success
+        self.message = message
+        if self.shared_input is not None:
+            self.shared_input.close()
+        self.done.set()
+
+
+class WorkerInfo:
+    """协调进程中一个已连接（或已断开）的工作进程"""
+
+    def __init__(self, channel, hello, address):
+        self.channel = channel
+        self.worker_id = str(hello.get('worker_id') or f'{address[0]}:{address[1]}')
+        self.host = str(hello.get('host') or address[0])
+        self.slots = max(1, int(hello.get('slots', 1)))
+        self.connected_at = time.time()
+        self.disconnected_at = None
+        # 工作进程已领取但尚未分派任务的槽位数
+        self.credits = 0
+        self.in_flight = {}
+        self.completed = 0
+        self.failed = 0
+        # 因该工作进程失联而重新分派的任务数
+        self.lost = 0
+        # 任务从分派到收到结果的累计时间（秒）
+        self.busy_seconds = 0.0
+        # 握手时确认与协调进程在同一台电脑上，任务内容经共享内存或源文件路径交给它
+        self.shared_memory = False
+        self.bytes_shared = 0
+
+    @property
+    def alive(self):
+        return self.disconnected_at is None
+
+    def stats(self):
+        """统计信息"""
+        elapsed = (self.disconnected_at or time.time()) - self.connected_at
+        return {
+            'worker_id': self.worker_id,
+            'host': self.host,
+            'slots': self.slots,
+            'alive': self.alive,
+            'in_flight': len(self.in_flight),
+            'completed': self.completed,
+            'failed': self.failed,
+            'lost': self.lost,
+            'bytes_sent': self.channel.bytes_sent,
+            'bytes_received': self.channel.bytes_received,
+            'shared_memory': self.shared_memory,
+            'bytes_shared': self.bytes_shared,
+            'busy_seconds': self.busy_seconds,
+            'jobs_per_minute': self.completed * 60 / elapsed if elapsed > 0 else 0.0,
+            'average_seconds': self.busy_seconds / self.completed if self.completed else None,
+        }
+
+
+class Coordinator:
+    """分布式转换的协调进程（线程安全）
+
+    转换选项（optimize_output、typography、embed_fonts、offload_tables）与转换器同名属性含义相同，随任务发给工作进程；
+    shared_memory 为False时任务内容一律经连接发送。
+    没有设置令牌时只能监听本机地址：任何能连接到端口的程序都能领取任务内容并传回任意文档
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None,
+                 heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL, heartbeat_timeout=DEFAULT_HEARTBEAT_TIMEOUT,
+                 optimize_output=False, typography=False, embed_fonts=False, offload_tables=False, shared_memory=True):
+        self.host = host
+        self.port = port
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV_VAR, '')
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.optimize_output = optimize_output
+        self.typography = typography
+        self.embed_fonts = embed_fonts
+        self.offload_tables = offload_tables
+        self.shared_memory = shared_memory
+        # 握手时让工作进程读取的探测共享内存，内容为随机字节
+        self._probe = None
+        self.workers = []
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+
+    @property
+    def address(self):
+        """实际监听的地址（端口为0时由系统分配）"""
+        return self._server.getsockname()[:2] if self._server is not None else (self.host, self.port)
+
+    def start(self):
+        """开始监听工作进程连接
+
+        Returns:
+            tuple: (host, port) 实际监听的地址
+
+        Raises:
+            ValueError: 没有设置令牌却要监听非本机地址
+        """
+        if not self.token and not is_loopback(self.host):
+            raise ValueError(
+                f"监听 {self.host} 时必须设置令牌（--token 或环境变量 {TOKEN_ENV_VAR}），"
+                f"否则任何能连接到该端口的电脑都能领取任务"
+            )
+        self._server = socket.create_server((self.host, self.port))
+        self._server.settimeout(0.5)
+        self._stop.clear()
+        if self.shared_memory and self._probe is None:
+            from core.shared_input import SharedInput, shared_memory_available
+            if shared_memory_available():
+                try:
+                    self._probe = SharedInput.create(os.urandom(PROBE_BYTES))
+                except OSError as e:
+                    print(f"无法分配共享内存，任务内容一律经连接发送: {e}")
+        for target, name in ((self._accept_loop, 'coordinator-accept'), (self._reap_loop, 'coordinator-reaper')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self.address
+
+    def stop(self):
+        """停止协调进程，尚未完成的任务以失败结束"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        with self._lock:
+            workers = [worker for worker in self.workers if worker.alive]
+            pending, self._pending = list(self._pending), deque()
+        for worker in workers:
+            self._drop_worker(worker, '协调进程已停止', redispatch=False)
+        for job in pending:
+            job.finish(False, '协调进程已停止，任务未执行')
+        if self._probe is not None:
+            self._probe.close()
+            self._probe = None
+
+    def convert_html_to_docx(self, html_content, output_file, template_style='simple'):
+        """把HTML内容交给工作进程转换，完成后写入 output_file
+
+        Returns:
+            tuple: (success, message)
+        """
+        return self._run_job(RemoteJob(template_style, output_file, self._options(), html_content=html_content))
+
+    def convert_source_file_to_docx(self, source_path, output_file, template_style='simple'):
+        """把磁盘上的HTML或Markdown文件发给工作进程转换（按块发送，不整体读入内存）
+
+        Returns:
+            tuple: (success, message)
+        """
+        if not os.path.isfile(source_path):
+            return False, f"输入文件不存在: {source_path}"
+        return self._run_job(RemoteJob(template_style, output_file, self._options(), source_path=source_path))
+
+    def worker_stats(self):
+        """各工作进程的统计信息（包括已断开的）"""
+        with self._lock:
+            return [worker.stats() for worker in self.workers]
+
+    def format_stats(self):
+        """统计信息的文字摘要"""
+        lines = []
+        for stats in self.worker_stats():
+            state = '在线' if stats['alive'] else '已断开'
+            average = f"{stats['average_seconds']:.2f} 秒/个" if stats['average_seconds'] is not None else '-'
+            shared = f"，共享内存 {stats['bytes_shared'] / 1024:.0f} KB" if stats['shared_memory'] else ''
+            lines.append(
+                f"{stats['worker_id']}（{stats['host']}，{stats['slots']} 槽位，{state}）："
+                f"完成 {stats['completed']} 个，失败 {stats['failed']} 个，重新分派 {stats['lost']} 个，"
+                f"{stats['jobs_per_minute']:.1f} 个/分钟，平均 {average}，"
+                f"发送 {stats['bytes_sent'] / 1024:.0f} KB，接收 {stats['bytes_received'] / 1024:.0f} KB{shared}"
+            )
+        return '\n'.join(lines) if lines else '没有工作进程连接过'
+
+    def _options(self):
+        return {name: bool(getattr(self, name)) for name in JOB_OPTIONS}
+
+    def _run_job(self, job):
+        with self._lock:
+            if self._stop.is_set() or self._server is None:
+                return False, '协调进程未启动'
+            self._pending.append(job)
+        self._assign()
+        job.done.wait()
+        return job.success, job.message
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            sock.settimeout(None)
+            threading.Thread(
+                target=self._serve_worker, args=(sock, address), name='coordinator-worker', daemon=True
+            ).start()
+
+    def _serve_worker(self, sock, address):
+        """处理一个工作进程连接：握手后循环读取领取、心跳和结果消息"""
+        channel = Channel(sock)
+        worker = None
+        reason = '连接已关闭'
+        try:
+            hello = channel.receive()
+            if not hello or hello.get('type') != 'hello':
+                raise ProtocolError('未收到握手消息')
+            if hello.get('version') != PROTOCOL_VERSION:
+                channel.send({'type': 'error', 'message': f"协议版本不一致（{hello.get('version')}）"})
+                return
+            if not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                channel.send({'type': 'error', 'message': '令牌不正确'})
+                return
+            if not self.token and not is_loopback(address[0]):
+                channel.send({'type': 'error', 'message': '协调进程没有设置令牌，只接受本机的工作进程'})
+                return
+
+            worker = WorkerInfo(channel, hello, address)
+            with self._lock:
+                self.workers.append(worker)
+            welcome = {'type': 'welcome', 'heartbeat_interval': self.heartbeat_interval}
+            if self._probe is not None and hello.get('shared_memory'):
+                welcome['shared_probe'] = self._probe.name
+            channel.send(welcome)
+            print(f"工作进程已连接: {worker.worker_id}（{worker.host}，{worker.slots} 槽位）")
+
+            while not self._stop.is_set():
+                header = channel.receive()
+                if header is None:
+                    break
+                message_type = header.get('type')
+                if message_type == 'pull':
+                    with self._lock:
+                        worker.credits = min(worker.slots, worker.credits + 1)
+                    self._assign()
+                elif message_type == 'result':
+                    self._receive_result(worker, header)
+                elif message_type == 'shared_probe':
+                    # 工作进程读到的探测内容一致，说明与协调进程在同一台电脑上
+                    worker.shared_memory = self._probe is not None and hmac.compare_digest(
+                        str(header.get('content', '')), bytes(self._probe.buffer).hex()
+                    )
+                    if worker.shared_memory:
+                        print(f"工作进程 {worker.worker_id} 在本机，任务内容经共享内存交给它")
+                elif message_type != 'heartbeat':
+                    raise ProtocolError(f'未知的消息类型: {message_type}')
+        except (OSError, ProtocolError, ValueError) as e:
+            reason = str(e)
+        finally:
+            if worker is not None:
+                self._drop_worker(worker, reason)
+            else:
+                channel.close()
+
+    def _receive_result(self, worker, header):
+        """接收任务结果，DOCX按块写入临时文件后替换输出文件
+
+        任务读完结果之前一直留在 worker.in_flight 中：传输中途连接断开（ProtocolError/OSError）时
+        删除不完整的临时文件并把异常交给 _serve_worker，任务随工作进程断开重新分派
+        """
+        with self._lock:
+            job = worker.in_flight.get(header.get('job_id'))
+            # 重新分派后另一个工作进程的结果写入不同的临时文件
+            attempt = job.attempts if job is not None else 0
+
+        if job is None:
+            # 已被重新分派的任务迟到的结果
+            worker.channel.read_payload(header, _NullSink())
+            return
+
+        success = bool(header.get('success'))
+        message = str(header.get('message', ''))
+        sink = _FileSink(f'{job.output_file}.{job.id}-{attempt}.part') if success else _NullSink()
+        try:
+            worker.channel.read_payload(header, sink)
+        except (OSError, ProtocolError):
+            sink.discard()
+            raise
+
+        with self._lock:
+            owned = worker.in_flight.pop(job.id, None) is job
+        if not owned:
+            # 传输期间工作进程已被判定失联，任务已重新分派
+            sink.discard()
+            return
+
+        if success:
+            error = sink.commit(job.output_file)
+            if error is not None:
+                success, message = False, f"无法保存文档：\n{str(error)}"
+
+        with self._lock:
+            worker.busy_seconds += time.monotonic() - job.dispatched_at
+            if success:
+                worker.completed += 1
+            else:
+                worker.failed += 1
+        if success:
+            # 工作进程的消息中是其临时文件名
+            message = f"转换成功：{os.path.basename(job.output_file)}"
+        job.finish(success, f"{message}（工作进程 {worker.worker_id}）")
+
+    def _assign(self):
+        """把排队中的任务分派给有空闲槽位的工作进程"""
+        while True:
+            with self._lock:
+                worker = next((w for w in self.workers if w.alive and w.credits > 0), None)
+                if worker is None or not self._pending:
+                    return
+                job = self._pending.popleft()
+                worker.credits -= 1
+                job.attempts += 1
+                job.worker = worker
+                job.dispatched_at = time.monotonic()
+                worker.in_flight[job.id] = job
+
+            header = {
+                'type': 'job',
+                'job_id': job.id,
+                'template': job.template_style,
+                'options': job.options,
+                'source': 'file' if job.source_path is not None else 'html',
+                'extension': os.path.splitext(job.source_path)[1] if job.source_path is not None else '.html',
+            }
+            try:
+                if worker.shared_memory and job.share() is not None:
+                    header['shared_memory'] = job.shared_input.name
+                    header['length'] = job.shared_input.size
+                    worker.channel.send(header)
+                    worker.bytes_shared += job.shared_input.size
+                elif job.source_path is not None:
+                    worker.channel.send(header, payload_path=job.source_path)
+                else:
+                    worker.channel.send(header, payload=job.content)
+            except OSError as e:
+                # 发送失败说明连接已断开，任务随工作进程一起重新分派
+                self._drop_worker(worker, str(e))
+
+    def _reap_loop(self):
+        """定期检查心跳，失联的工作进程断开连接并重新分派其任务"""
+        while not self._stop.wait(self.heartbeat_interval / 2):
+            now = time.monotonic()
+            with self._lock:
+                stale = [worker for worker in self.workers
+                         if worker.alive and now - worker.channel.last_activity > self.heartbeat_timeout]
+            for worker in stale:
+                self._drop_worker(worker, f'超过 {self.heartbeat_timeout:.0f} 秒没有心跳')
+
+    def _drop_worker(self, worker, reason, redispatch=True):
+        """断开工作进程，未完成的任务放回队列前端（超过重试次数的以失败结束）"""
+        with self._lock:
+            if not worker.alive:
+                return
+            worker.disconnected_at = time.time()
+            jobs = sorted(worker.in_flight.values(), key=lambda job: job.id)
+            worker.in_flight.clear()
+            worker.credits = 0
+            worker.lost += len(jobs)
+            failed = []
+            if redispatch:
+                for job in reversed(jobs):
+                    if job.attempts >= MAX_ATTEMPTS:
+                        failed.append(job)
+                    else:
+                        self._pending.appendleft(job)
+            else:
+                failed = jobs
+        worker.channel.close()
+        print(f"工作进程已断开: {worker.worker_id}（{reason}），重新分派 {len(jobs) - len(failed)} 个任务")
+
+        for job in failed:
+            job.finish(False, f"工作进程多次中断，任务未完成（最后一次：{worker.worker_id}，{reason}）")
+        self._assign()
+
+
+class _NullSink:
+    """丢弃消息体"""
+
+    def write(self, data):
+        pass
+
+    def discard(self):
+        pass
+
+
+class _FileSink:
+    """把结果写入临时文件
+
+    本地写入出错（磁盘已满、目录不可写等）时记下错误、丢弃其余数据，消息体仍然读完，
+    连接可以继续使用；这种错误重新分派也无法解决，任务以失败结束
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.error = None
+        self._file = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, 'wb')
+        except OSError as e:
+            self.error = e
+
+    def write(self, data):
+        if self._file is None:
+            return
+        try:
+            self._file.write(data)
+        except OSError as e:
+            self.error = e
+            self.discard()
+
+    def commit(self, output_file):
+        """关闭临时文件并替换输出文件
+
+        Returns:
+            OSError: 写入或替换失败时的错误，成功时为None
+        """
+        if self.error is None:
+            try:
+                self._close()
+                os.replace(self.path, output_file)
+                return None
+            except OSError as e:
+                self.error = e
+        self.discard()
+        return self.error
+
+    def discard(self):
+        """关闭并删除临时文件"""
+        try:
+            self._close()
+        except OSError:
+            pass
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _close(self):
+        if self._file is not None:
+            file, self._file = self._file, None
+            file.close()
+
+
+def run_worker(address, converter_factory, slots=1, token=None, worker_id=None,
+               stop_event=None, reconnect=True, shared_memory=True):
+    """工作进程主循环：连接协调进程，领取任务、转换并传回结果，断线后自动重连
+
+    Args:
+        address: 协调进程地址 (host, port)
+        converter_factory: converter_factory(options) 返回用于一个任务的转换器
+        slots: 同时转换的任务数
+        token: 连接令牌，默认读取环境变量 JINDOUYUN_WORKER_TOKEN
+        worker_id: 工作进程名称，默认为“主机名-进程号”
+        stop_event: 设置后退出
+        reconnect: 断线后是否重新连接
+        shared_memory: 与协调进程在同一台电脑上时是否经共享内存接收任务内容
+    """
+    token = token if token is not None else os.environ.get(TOKEN_ENV_VAR, '')
+    if not token and not is_loopback(address[0]):
+        # 不带令牌的协调进程只监听本机地址，连接其他电脑时令牌必不可少
+        print(f"连接其他电脑上的协调进程时必须设置令牌（--token 或环境变量 {TOKEN_ENV_VAR}）")
+        return 1
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    stop_event = stop_event or threading.Event()
+
+    while not stop_event.is_set():
+        try:
+            sock = socket.create_connection(address, timeout=5)
+        except OSError as e:
+            if not reconnect:
+                print(f"无法连接协调进程 {address[0]}:{address[1]}: {e}")
+                return 1
+            stop_event.wait(RECONNECT_SECONDS)
+            continue
+        sock.settimeout(None)
+
+        session = _WorkerSession(Channel(sock), converter_factory, slots, stop_event, shared_memory)
+        try:
+            result = session.run(token, worker_id)
+        finally:
+            session.close()
+        if result is not None:
+            # 协调进程拒绝了连接（令牌或协议版本不一致），重连没有意义
+            print(f"协调进程拒绝连接: {result}")
+            return 1
+        if not reconnect:
+            break
+        stop_event.wait(RECONNECT_SECONDS)
+    return 0
+
+
+class _WorkerSession:
+    """工作进程与协调进程的一次连接"""
+
+    def __init__(self, channel, converter_factory, slots, stop_event, shared_memory=True):
+        self.channel = channel
+        self.converter_factory = converter_factory
+        self.slots = max(1, int(slots))
+        self.stop_event = stop_event
+        self.closed = threading.Event()
+        if shared_memory:
+            from core.shared_input import shared_memory_available
+            shared_memory = shared_memory_available()
+        self.shared_memory = shared_memory
+
+    def run(self, token, worker_id):
+        """握手后循环接收任务，连接断开时返回None，被拒绝时返回原因"""
+        import tempfile
+
+        self.channel.send({
+            'type': 'hello', 'version': PROTOCOL_VERSION, 'token': token,
+            'worker_id': worker_id, 'host': socket.gethostname(), 'slots': self.slots,
+            'shared_memory': self.shared_memory,
+        })
+        welcome = self.channel.receive()
+        if welcome is None:
+            return None
+        if welcome.get('type') != 'welcome':
+            return welcome.get('message', '握手失败')
+        print(f"已连接协调进程，工作进程 {worker_id}，{self.slots} 槽位")
+
+        interval = float(welcome.get('heartbeat_interval', DEFAULT_HEARTBEAT_INTERVAL))
+        threading.Thread(target=self._heartbeat_loop, args=(interval,), name='worker-heartbeat', daemon=True).start()
+        if welcome.get('shared_probe'):
+            # 领取任务前回报探测内容，协调进程据此决定是否经共享内存交付任务
+            self.channel.send({'type': 'shared_probe', 'content': self._read_probe(welcome['shared_probe'])})
+        for _ in range(self.slots):
+            self.channel.send({'type': 'pull'})
+
+        try:
+            while not self.stop_event.is_set():
+                header = self.channel.receive()
+                if header is None:
+                    break
+                if header.get('type') != 'job':
+                    raise ProtocolError(f"未知的消息类型: {header.get('type')}")
+                # 任务内容按块写入临时目录（本机任务的内容在共享内存中），转换在单独的线程中进行
+                work_dir = tempfile.mkdtemp(prefix='jindouyun-worker-')
+                extension = os.path.basename(str(header.get('extension') or '.html'))
+                source_path = os.path.join(work_dir, 'source' + extension)
+                if not header.get('shared_memory'):
+                    with open(source_path, 'wb') as f:
+                        self.channel.read_payload(header, f)
+                threading.Thread(
+                    target=self._convert, args=(header, work_dir, source_path), name='worker-convert', daemon=True
+                ).start()
+        except (OSError, ProtocolError) as e:
+            print(f"与协调进程的连接中断: {e}")
+        return None
+
+    def _convert(self, header, work_dir, source_path):
+        output_file = os.path.join(work_dir, 'output.docx')
+        try:
+            converter = self.converter_factory(header.get('options') or {})
+            template = header.get('template') or 'simple'
+            if header.get('shared_memory'):
+                success, message = self._convert_shared(converter, header, source_path, output_file, template)
+            elif header.get('source') == 'html':
+                with open(source_path, 'r', encoding='utf-8') as f:
+                    success, message = converter.convert_html_to_docx(f.read(), output_file, template)
+            else:
+                success, message = converter.convert_source_file_to_docx(source_path, output_file, template)
+        except Exception as e:
+            success, message = False, f"发生错误：\n{str(e)}"
+
+        try:
+            result = {'type': 'result', 'job_id': header.get('job_id'), 'success': success, 'message': message}
+            if success:
+                self.channel.send(result, payload_path=output_file)
+            else:
+                self.channel.send(result)
+            self.channel.send({'type': 'pull'})
+        except OSError:
+            # 连接已断开，协调进程会把任务重新分派
+            pass
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _convert_shared(self, converter, header, source_path, output_file, template):
+        """转换共享内存中的内容：映射后直接交给转换器，不复制、不落盘（source_path 只用于按扩展名判断格式）"""
+        from core.shared_input import SharedInput
+        from core.source_file import SourceFile
+
+        try:
+            shared_input = SharedInput.attach(str(header['shared_memory']), int(header.get('length', 0)))
+        except (OSError, ValueError) as e:
+            return False, f"无法读取共享内存中的任务内容：\n{str(e)}"
+        with shared_input, SourceFile(source_path, buffer=shared_input.buffer) as source:
+            return converter.convert_html_to_docx(source, output_file, template)
+
+    def _read_probe(self, name):
+        """读取协调进程的探测共享内存，不在同一台电脑上时返回空字符串"""
+        from core.shared_input import SharedInput
+
+        try:
+            with SharedInput.attach(str(name), PROBE_BYTES) as probe:
+                return bytes(probe.buffer).hex()
+        except (OSError, ValueError):
+            return ''
+
+    def _heartbeat_loop(self, interval):
+        while not self.closed.wait(interval):
+            try:
+                self.channel.send({'type': 'heartbeat'})
+            except OSError:
+                break
+
+    def close(self):
+        self.closed.set()
+        self.channel.close()
@@ -0,0 +1,447 @@
+"""
+DOCX体积优化模块
+转换完成后以流式方式重写DOCX压缩包：精简未使用的样式、按哈希合并重复图片、
+移除Word可自动重建的可选部件，并按调优后的压缩级别重新压缩
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import posixpath
+import zipfile
+from xml.parsers import expat
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# XML部件使用的压缩级别：样式精简后部件很小，9级比默认的6级再小约8%，耗时可以忽略
+XML_COMPRESS_LEVEL = 9
+
+# 已经是压缩格式的媒体直接存储，避免重复压缩浪费时间
+STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.wdp', '.zip'}
+
+# 可以安全移除的部件（按关系类型后缀匹配），Word打开时会按需重建
+OPTIONAL_RELATIONSHIP_TYPES = (
+    '/stylesWithEffects',      # Word 2010兼容样式副本
+    '/metadata/thumbnail',     # 模板缩略图
+)
+
+# 在内容中引用样式的元素
+STYLE_REFERENCE_TAGS = (
+    'pStyle', 'rStyle', 'tblStyle', 'numStyleLink', 'styleLink',
+    'clickAndTypeStyle', 'defaultTableStyle',
+)
+
+# 即使未被引用也保留的样式（按样式名前缀），用户在Word中继续编辑时会用到
+KEEP_STYLE_NAME_PREFIXES = ('heading ', 'toc ', 'toc heading', 'caption', 'title', 'subtitle')
+
+STYLE_BLOCK_PATTERN = re.compile(rb'<w:style\b[^>]*?(?:/>|>.*?</w:style>)', re.S)
+RELATIONSHIP_PATTERN = re.compile(rb'<Relationship\b[^>]*?/>', re.S)
+OVERRIDE_PATTERN = re.compile(rb'<Override\b[^>]*?/>', re.S)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def optimize_docx(docx_path, prune_styles=True, dedupe_media=True, remove_optional_parts=True):
+    """优化DOCX文件体积，校验通过后原地替换
+
+    Args:
+        docx_path: DOCX文件路径
+        prune_styles: 是否精简未使用的样式
+        dedupe_media: 是否合并内容相同的图片
+        remove_optional_parts: 是否移除可选部件
+
+    Returns:
+        tuple: (success, message)
+    """
+    start = time.perf_counter()
+    original_size = os.path.getsize(docx_path)
+    temp_path = docx_path + '.opt'
+
+    try:
+        with zipfile.ZipFile(docx_path) as source:
+            plan = _plan(source, prune_styles, dedupe_media, remove_optional_parts)
+            _rewrite(source, temp_path, plan)
+
+        # 只有当优化没有引入新的兼容性问题时才替换原文件（原文件只在输出有问题时才检查）
+        new_problems = set(check_docx(temp_path))
+        if new_problems:
+            new_problems -= set(check_docx(docx_path))
+        if new_problems:
+            os.remove(temp_path)
+            return False, "优化结果未通过校验，保留原文件：\n" + "\n".join(sorted(new_problems))
+
+        optimized_size = os.path.getsize(temp_path)
+        if optimized_size >= original_size:
+            os.remove(temp_path)
+            return True, f"文档已是最小体积，耗时 {(time.perf_counter() - start) * 1000:.1f} ms"
+
+        os.replace(temp_path, docx_path)
+    except (OSError, zipfile.BadZipFile, expat.ExpatError) as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, f"优化失败：{e}"
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    saved = original_size - optimized_size
+    return True, (
+        f"文档体积 {original_size} → {optimized_size} 字节，节省 {saved} 字节"
+        f"（{saved / original_size:.1%}），移除样式 {plan['removed_styles']} 个、"
+        f"重复图片 {len(plan['duplicates'])} 个、"
+        f"可选部件 {len(plan['dropped_parts']) - len(plan['duplicates'])} 个，"
+        f"耗时 {elapsed_ms:.1f} ms"
+    )
+
+
+def _plan(source, prune_styles, dedupe_media, remove_optional_parts):
+    """第一遍：流式扫描各部件，决定要删除、合并和改写的内容"""
+    names = [info.filename for info in source.infolist() if not info.is_dir()]
+    rels = {name: source.read(name) for name in names if name.endswith('.rels')}
+
+    dropped_parts = set()
+    if remove_optional_parts:
+        for rels_name, data in rels.items():
+            for rel in RELATIONSHIP_PATTERN.findall(data):
+                rel_type = _attribute(rel, b'Type') or ''
+                if rel_type.endswith(OPTIONAL_RELATIONSHIP_TYPES) and _attribute(rel, b'TargetMode') != 'External':
+                    dropped_parts.add(_resolve_target(rels_name, _attribute(rel, b'Target')))
+
+    duplicates = {}
+    if dedupe_media:
+        seen = {}
+        for name in names:
+            if not name.startswith('word/media/') or name in dropped_parts:
+                continue
+            digest = _part_sha256(source, name)
+            if digest in seen:
+                duplicates[name] = seen[digest]
+            else:
+                seen[digest] = name
+    dropped_parts.update(duplicates)
+
+    # 没有任何关系指向的部件（通常来自模板）同样可以移除
+    dropped_parts.update(_unreachable_parts(names, rels, dropped_parts))
+
+    styles_xml = None
+    removed_styles = 0
+    if prune_styles and 'word/styles.xml' in names:
+        used = set()
+        for name in names:
+            if (name.startswith('word/') and name.endswith('.xml') and name.count('/') == 1
+                    and name not in dropped_parts and name not in ('word/styles.xml', 'word/stylesWithEffects.xml')):
+                used.update(_collect_style_references(source, name))
+        styles_xml, removed_styles = _prune_styles(source.read('word/styles.xml'), used)
+
+    return {
+        'names': names,
+        'rels': rels,
+        'dropped_parts': dropped_parts,
+        'duplicates': duplicates,
+        'styles_xml': styles_xml,
+        'removed_styles': removed_styles,
+    }
+
+
+def _rewrite(source, output_path, plan):
+    """第二遍：逐个部件写出新的压缩包，未改动的部件分块流式复制"""
+    dropped = plan['dropped_parts']
+    replacements = {}
+    if plan['styles_xml'] is not None:
+        replacements['word/styles.xml'] = plan['styles_xml']
+    for rels_name, data in plan['rels'].items():
+        if _rels_source(rels_name) not in dropped:
+            replacements[rels_name] = _rewrite_relationships(rels_name, data, dropped, plan['duplicates'])
+    replacements['[Content_Types].xml'] = _rewrite_content_types(source.read('[Content_Types].xml'), dropped)
+
+    # [Content_Types].xml 放在第一个，与Word生成的文件保持一致
+    names = ['[Content_Types].xml'] + [n for n in plan['names'] if n != '[Content_Types].xml']
+
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=XML_COMPRESS_LEVEL) as target:
+        for name in names:
+            if name in dropped or (name.endswith('.rels') and name not in replacements):
+                continue
+            if name in replacements:
+                target.writestr(name, replacements[name])
+                continue
+
+            if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+                info = zipfile.ZipInfo(name, source.getinfo(name).date_time)
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info = name
+            with source.open(name) as src, target.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+
+def _collect_style_references(source, name):
+    """收集部件中引用的样式ID"""
+    return _part_references(source, name, relationships=False)[0]
+
+
+def _part_references(archive, name, relationships=True):
+    """分块扫描部件，收集引用的样式ID和关系ID（大文档的正文不整体读入内存）
+
+    Returns:
+        tuple: (style_ids, relationship_ids)
+    """
+    style_ids = set()
+    relationship_ids = set()
+    style_pattern = relationship_pattern = None
+    for index, data in enumerate(_part_chunks(archive, name)):
+        if index == 0:
+            # 命名空间在根元素上声明，位于第一块中
+            style_pattern = _style_reference_pattern(data)
+            relationship_pattern = _relationship_reference_pattern(data) if relationships else None
+        if style_pattern is not None:
+            style_ids.update(value.decode('utf-8') for value in style_pattern.findall(data))
+        if relationship_pattern is not None:
+            relationship_ids.update(value.decode('utf-8') for value in relationship_pattern.findall(data))
+    return style_ids, relationship_ids
+
+
+def _part_chunks(archive, name):
+    """分块读取部件，每块都在“<”之前结束，单个标签不会被拆到两块中"""
+    rest = b''
+    with archive.open(name) as stream:
+        for chunk in iter(lambda: stream.read(COPY_CHUNK_SIZE), b''):
+            data = rest + chunk
+            split = data.rfind(b'<')
+            if split <= 0:
+                rest = data
+                continue
+            yield data[:split]
+            rest = data[split:]
+    if rest:
+        yield rest
+
+
+def _style_reference_pattern(data):
+    """按部件中声明的命名空间前缀匹配样式引用的模式（大文档逐元素解析太慢）"""
+    prefix = _namespace_prefix(data, W_NS)
+    if prefix is None:
+        return None
+    tags = b'|'.join(tag.encode('ascii') for tag in STYLE_REFERENCE_TAGS)
+    return re.compile(rb'<' + prefix + rb':(?:' + tags + rb')\b[^>]*?\s' + prefix + rb':val="([^"]*)"')
+
+
+def _relationship_reference_pattern(data):
+    """部件中通过关系命名空间属性（如 r:id、r:embed）引用关系ID的模式"""
+    prefix = _namespace_prefix(data, R_NS)
+    if prefix is None:
+        return None
+    return re.compile(rb'\s' + prefix + rb':\w+="([^"]*)"')
+
+
+def _namespace_prefix(data, namespace):
+    match = re.search(rb'xmlns:([\w.-]+)="' + re.escape(namespace.encode('ascii')) + rb'"', data)
+    return re.escape(match.group(1)) if match else None
+
+
+def _prune_styles(styles_xml, used):
+    """从styles.xml中删除未使用的样式定义
+
+    样式块按文本删除而不是重新序列化，以保留命名空间声明和 mc:Ignorable 等属性
+    """
+    blocks = STYLE_BLOCK_PATTERN.findall(styles_xml)
+    by_id = {}
+    keep = set(used)
+    for block in blocks:
+        style_id = _attribute(block, b'w:styleId')
+        if style_id is None:
+            continue
+        by_id[style_id] = block
+        name_match = re.search(rb'<w:name\s+w:val="([^"]*)"', block)
+        name = name_match.group(1).decode('utf-8').lower() if name_match else ''
+        if _attribute(block, b'w:default') in ('1', 'true', 'on') or name.startswith(KEEP_STYLE_NAME_PREFIXES):
+            keep.add(style_id)
+
+    # 保留样式继承链上的所有样式
+    pending = list(keep)
+    while pending:
+        block = by_id.get(pending.pop())
+        if block is None:
+            continue
+        for reference in re.findall(rb'<w:(?:basedOn|next|link)\s+w:val="([^"]*)"', block):
+            reference = reference.decode('utf-8')
+            if reference not in keep:
+                keep.add(reference)
+                pending.append(reference)
+
+    removed = 0
+
+    def replace(match):
+        nonlocal removed
+        style_id = _attribute(match.group(0), b'w:styleId')
+        if style_id is None or style_id in keep:
+            return match.group(0)
+        removed += 1
+        return b''
+
+    return STYLE_BLOCK_PATTERN.sub(replace, styles_xml), removed
+
+
+def _unreachable_parts(names, rels, dropped):
+    """从包根关系出发，找出没有被任何关系引用的部件"""
+    reachable = set()
+    pending = ['']
+    while pending:
+        part = pending.pop()
+        rels_name = _rels_name(part)
+        for rel in RELATIONSHIP_PATTERN.findall(rels.get(rels_name, b'')):
+            if _attribute(rel, b'TargetMode') == 'External':
+                continue
+            target = _resolve_target(rels_name, _attribute(rel, b'Target'))
+            if target not in reachable and target not in dropped:
+                reachable.add(target)
+                pending.append(target)
+
+    return {
+        name for name in names
+        if name not in reachable and name != '[Content_Types].xml' and not name.endswith('.rels')
+    }
+
+
+def _rewrite_relationships(rels_name, data, dropped, duplicates):
+    """删除指向已移除部件的关系，并把重复图片的关系指向保留的副本"""
+    base = posixpath.dirname(_rels_source(rels_name))
+
+    def replace(match):
+        rel = match.group(0)
+        if _attribute(rel, b'TargetMode') == 'External':
+            return rel
+        target = _resolve_target(rels_name, _attribute(rel, b'Target'))
+        if target in duplicates:
+            new_target = posixpath.relpath(duplicates[target], base or '.')
+            return re.sub(rb'Target="[^"]*"', b'Target="' + new_target.encode('utf-8') + b'"', rel)
+        if target in dropped:
+            return b''
+        return rel
+
+    return RELATIONSHIP_PATTERN.sub(replace, data)
+
+
+def _rewrite_content_types(data, dropped):
+    """删除已移除部件的内容类型声明"""
+    def replace(match):
+        part_name = _attribute(match.group(0), b'PartName') or ''
+        return b'' if part_name.lstrip('/') in dropped else match.group(0)
+
+    return OVERRIDE_PATTERN.sub(replace, data)
+
+
+def check_docx(docx_path):
+    """检查DOCX文件是否满足Word打开所需的基本约束
+
+    Returns:
+        list: 发现的问题描述，为空表示通过
+    """
+    problems = []
+    try:
+        archive = zipfile.ZipFile(docx_path)
+    except (OSError, zipfile.BadZipFile) as e:
+        return [f"无法打开压缩包: {e}"]
+
+    with archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        names = [info.filename for info in infos]
+        name_set = set(names)
+        if len(names) != len(name_set):
+            problems.append("压缩包中存在重复的部件名")
+        if '[Content_Types].xml' not in name_set:
+            return problems + ["缺少 [Content_Types].xml"]
+
+        content_types = archive.read('[Content_Types].xml')
+        defaults = {e.lower() for e in re.findall(rb'<Default\b[^>]*Extension="([^"]*)"', content_types)}
+        overrides = {p.decode('utf-8').lstrip('/') for p in re.findall(rb'<Override\b[^>]*PartName="([^"]*)"', content_types)}
+        for name in names:
+            extension = name.rsplit('.', 1)[-1].lower().encode('utf-8')
+            if name != '[Content_Types].xml' and name not in overrides and extension not in defaults:
+                problems.append(f"部件缺少内容类型: {name}")
+        for part in overrides - name_set:
+            problems.append(f"内容类型指向不存在的部件: {part}")
+
+        relationship_ids = {}
+        main_document = None
+        for rels_name in (n for n in names if n.endswith('.rels')):
+            ids = set()
+            for rel in RELATIONSHIP_PATTERN.findall(archive.read(rels_name)):
+                ids.add(_attribute(rel, b'Id'))
+                if _attribute(rel, b'TargetMode') == 'External':
+                    continue
+                target = _resolve_target(rels_name, _attribute(rel, b'Target'))
+                if target not in name_set:
+                    problems.append(f"{rels_name} 中的关系指向不存在的部件: {target}")
+                if rels_name == '_rels/.rels' and (_attribute(rel, b'Type') or '').endswith('/officeDocument'):
+                    main_document = target
+            relationship_ids[_rels_source(rels_name)] = ids
+        if main_document is None:
+            problems.append("包关系中缺少主文档")
+
+        style_ids = set()
+        style_references = {}
+        for name in names:
+            if not name.endswith(('.xml', '.rels')):
+                continue
+            # 良构性检查交给C实现的expat，不在Python中逐个处理元素
+            try:
+                with archive.open(name) as stream:
+                    expat.ParserCreate().ParseFile(stream)
+            except expat.ExpatError as e:
+                problems.append(f"部件不是合法的XML: {name} ({e})")
+                continue
+            if name.endswith('.rels'):
+                continue
+
+            part_styles, part_relationships = _part_references(archive, name)
+            part_ids = relationship_ids.get(name, set())
+            for value in sorted(part_relationships - part_ids):
+                problems.append(f"{name} 引用了不存在的关系: {value}")
+            if name == 'word/styles.xml':
+                data = archive.read(name)
+                style_ids.update(v.decode('utf-8') for v in re.findall(rb'<w:style\b[^>]*?\sw:styleId="([^"]*)"', data))
+            elif name != 'word/stylesWithEffects.xml':
+                style_references[name] = part_styles
+
+        if 'word/styles.xml' in name_set:
+            for name, references in style_references.items():
+                for style_id in sorted(references - style_ids):
+                    problems.append(f"{name} 引用了不存在的样式: {style_id}")
+
+    return problems
+
+
+def _part_sha256(source, name):
+    digest = hashlib.sha256()
+    with source.open(name) as stream:
+        for chunk in iter(lambda: stream.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _attribute(element_text, name):
+    match = re.search(rb'\s' + re.escape(name) + rb'="([^"]*)"', element_text)
+    return match.group(1).decode('utf-8') if match else None
+
+
+def _rels_name(part_name):
+    """部件对应的关系文件名，空字符串表示包根"""
+    directory, file_name = posixpath.split(part_name)
+    return posixpath.join(directory, '_rels', file_name + '.rels')
+
+
+def _rels_source(rels_name):
+    """关系文件所属的部件名，包根关系返回空字符串"""
+    directory = posixpath.dirname(posixpath.dirname(rels_name))
+    file_name = posixpath.basename(rels_name)[:-len('.rels')]
+    return posixpath.join(directory, file_name) if file_name else directory
+
+
+def _resolve_target(rels_name, target):
+    """把关系中的相对目标解析为包内部件名"""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    base = posixpath.dirname(_rels_source(rels_name))
+    return posixpath.normpath(posixpath.join(base, target))
@@ -0,0 +1,186 @@
+"""
+草稿日志模块
+以追加写日志的方式保存编辑框草稿：每次编辑只追加一条增量记录（位置、删除长度、插入文本），
+日志增长到一定大小后把完整内容写成快照并清空日志；启动时读取快照并重放日志即可恢复草稿。
+每条记录带有长度和CRC校验，崩溃时写了一半的记录在恢复时会被丢弃
+"""
+
+import os
+import json
+import struct
+import zlib
+
+
+DRAFT_DIR_NAME = 'drafts'
+SNAPSHOT_NAME = 'draft.snapshot'
+JOURNAL_NAME = 'draft.journal'
+
+# 记录头：负载长度、CRC32
+RECORD_HEADER = struct.Struct('<II')
+
+# 日志超过该大小（且超过快照大小）或记录数超过上限时压缩为快照
+COMPACT_MIN_BYTES = 1024 * 1024
+COMPACT_MAX_RECORDS = 20000
+
+
+def get_draft_dir():
+    """获取当前用户的草稿目录"""
+    from core.runtime_cache import get_data_root
+    return os.path.join(get_data_root(), DRAFT_DIR_NAME)
+
+
+def utf16_length(text):
+    """文本的UTF-16长度（与Qt文档中的位置单位一致）"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+class DraftJournal:
+    """草稿日志
+
+    位置和长度以UTF-16单位计，与 QTextDocument.contentsChange 报告的一致，
+    重放时在UTF-16编码的缓冲区上执行，不受表情符号等辅助平面字符影响
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.generation = 0
+        self.length = 0
+        self.snapshot_bytes = 0
+        self.journal_bytes = 0
+        self.record_count = 0
+        self._fd = None
+        self._dirty = False
+
+    def load(self):
+        """读取快照并重放日志，返回恢复的草稿文本，之后的编辑追加到日志中"""
+        os.makedirs(self.directory, exist_ok=True)
+        text, self.generation = self._read_snapshot()
+        self.snapshot_bytes = os.path.getsize(self.snapshot_path) if os.path.exists(self.snapshot_path) else 0
+
+        buffer = bytearray(text.encode('utf-16-le'))
+        valid_bytes = 0
+        journal_generation = None
+        records = 0
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                # 崩溃时写了一半的记录
+                break
+            record = json.loads(payload.decode('utf-8'))
+            offset += RECORD_HEADER.size + length
+            if journal_generation is None:
+                journal_generation = record.get('generation') if isinstance(record, dict) else None
+                if journal_generation != self.generation:
+                    # 日志属于上一次压缩之前，内容已包含在快照中
+                    break
+            else:
+                position, removed, inserted = record
+                start = position * 2
+                buffer[start:start + removed * 2] = inserted.encode('utf-16-le')
+                records += 1
+            valid_bytes = offset
+
+        text = buffer.decode('utf-16-le', errors='replace')
+        if journal_generation != self.generation:
+            self._start_journal()
+        else:
+            # 丢弃末尾不完整的记录，之后的记录接在有效部分之后
+            if valid_bytes < len(data):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+            self._open_journal()
+            self.journal_bytes = valid_bytes
+            self.record_count = records
+        self.length = len(buffer) // 2
+        return text
+
+    def record(self, position, removed, inserted):
+        """追加一条编辑记录：在position处删除removed个字符并插入inserted"""
+        if self._fd is None:
+            return
+        self._append([position, removed, inserted])
+        self.record_count += 1
+        self.length = max(0, self.length - removed) + utf16_length(inserted)
+
+    def sync(self):
+        """把已追加的记录刷到磁盘"""
+        if self._fd is not None and self._dirty:
+            os.fsync(self._fd)
+            self._dirty = False
+
+    def needs_compaction(self):
+        """日志是否已经大到需要压缩"""
+        return (
+            self.record_count >= COMPACT_MAX_RECORDS
+            or self.journal_bytes >= max(COMPACT_MIN_BYTES, self.snapshot_bytes)
+        )
+
+    def compact(self, text):
+        """把当前完整内容写为快照，并开始新的日志"""
+        self.generation += 1
+        data = json.dumps({'generation': self.generation}).encode('utf-8') + b'\n' + text.encode('utf-8')
+        self._write_atomic(self.snapshot_path, data)
+        self.snapshot_bytes = len(data)
+        self.length = utf16_length(text)
+        self._start_journal()
+
+    def reset(self):
+        """清空草稿"""
+        self.compact('')
+
+    def close(self):
+        if self._fd is not None:
+            self.sync()
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                header, _, body = f.read().partition(b'\n')
+            return body.decode('utf-8'), json.loads(header.decode('utf-8'))['generation']
+        except FileNotFoundError:
+            return '', 0
+        except (OSError, ValueError, KeyError) as e:
+            print(f"草稿快照已损坏，忽略: {e}")
+            return '', 0
+
+    def _start_journal(self):
+        """用只包含代数记录的新日志替换旧日志"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        payload = json.dumps({'generation': self.generation}).encode('utf-8')
+        self._write_atomic(self.journal_path, RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._open_journal()
+        self.journal_bytes = RECORD_HEADER.size + len(payload)
+        self.record_count = 0
+
+    def _open_journal(self):
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        self._fd = os.open(self.journal_path, flags, 0o600)
+
+    def _append(self, record):
+        payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        data = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        os.write(self._fd, data)
+        self.journal_bytes += len(data)
+        self._dirty = True
+
+    def _write_atomic(self, path, data):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
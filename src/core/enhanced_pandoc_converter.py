@@ -5,20 +5,78 @@
 
 import os
 import sys
-import subprocess
-from PyQt5.QtWidgets import QMessageBox
+
+
+CANCELLED_MESSAGE = '转换已取消'
+
+# 可取消的转换检查取消标志的间隔（秒），以及后台运行Pandoc时的nice值（POSIX）
+CANCEL_POLL_SECONDS = 0.2
+BACKGROUND_NICE = 10
+
+# 可取消的转换把HTML字符串分块交给原生写入器，每块之间检查取消标志
+CANCEL_CHUNK_CHARS = 256 * 1024
+
+
+class ConversionCancelled(Exception):
+    """可取消的转换已被取消"""
+
+
+def split_html(text, chunk_chars=CANCEL_CHUNK_CHARS):
+    """按标签边界把HTML字符串分块（每块在“<”之前结束，与SourceFile.iter_text一致）"""
+    start = 0
+    while start < len(text):
+        end = start + chunk_chars
+        if end >= len(text):
+            end = len(text)
+        else:
+            split = text.rfind('<', start + 1, end)
+            if split < 0:
+                split = text.find('<', end)
+            end = split if split > 0 else len(text)
+        yield text[start:end]
+        start = end
+
+
+def iter_cancellable(chunks, cancel_event):
+    """逐块交出内容，取消标志被设置时抛出ConversionCancelled"""
+    for chunk in chunks:
+        if cancel_event.is_set():
+            raise ConversionCancelled()
+        yield chunk
 
 
 class EnhancedPandocConverter:
     """增强的Pandoc转换器"""
     
-    def __init__(self, pandoc_path=None):
+    # 任务队列可以要求以后台方式（低优先级）转换
+    supports_background = True
+    
+    def __init__(self, pandoc_path=None, use_native_writer=False, optimize_output=False, typography=False,
+                 embed_fonts=False, offload_tables=False):
         # 优先使用传入的路径，其次使用环境变量中的路径
         self.pandoc_path = pandoc_path or os.environ.get('PANDOC_PATH')
         self.supported_formats = [
             'markdown', 'docx', 'pdf', 'html', 'epub', 'odt', 
             'txt', 'rst', 'json', 'latex', 'xml', 'pptx'
         ]
+        # 白名单标签内的简单文档直接在进程内写出，其余交给Pandoc
+        # （输出尚未与Pandoc逐项比对，默认关闭，需要时由调用方开启）
+        self.use_native_writer = use_native_writer
+        # 转换完成后精简样式、合并重复图片并重新压缩，减小输出文件体积
+        # （会删除模板中未使用的样式，默认关闭，需要时由调用方开启）
+        self.optimize_output = optimize_output
+        # 按排版方案处理中英文混排间距、全角标点和中文字体
+        # （会改写正文中的标点和空格，默认关闭，需要时由调用方开启）
+        self.typography = typography
+        # 把用到的中文字体子集化后嵌入输出文件，未安装该字体的电脑也能按原样显示
+        self.embed_fonts = embed_fonts
+        # 交给Pandoc的内容中行数很多的表格由原生写入器直接写出，不经过Pandoc
+        # （表格的XML和样式尚未与Pandoc逐项比对，默认关闭，需要时由调用方开启）
+        self.offload_tables = offload_tables
+        
+        # 获取项目根目录
+        root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.template_dir = os.path.join(root_dir, 'templates')
     
     def set_pandoc_path(self, path):
         """设置Pandoc可执行文件路径"""
@@ -52,6 +110,8 @@ class EnhancedPandocConverter:
         if not os.path.exists(input_file):
             return False, f"输入文件不存在: {input_file}"
         
+        import subprocess
+        
         # 构建pandoc命令
         cmd = [self.pandoc_path, input_file, '-o', output_file]
         
@@ -73,73 +133,303 @@ class EnhancedPandocConverter:
         except Exception as e:
             return False, f"发生错误：\n{str(e)}"
     
-    def convert_html_to_docx(self, html_content, output_file, template_style='simple'):
+    def get_template_file(self, template_style):
+        """获取排版方案对应的参考模板路径"""
+        return os.path.join(self.template_dir, f'{template_style}.docx')
+    
+    def get_style_options(self, template_style):
+        """获取排版方案对应的Pandoc附加参数"""
+        if template_style == 'academic':
+            # 学术论文风格：使用更正式的格式
+            return ['--toc', '--number-sections']
+        elif template_style == 'technical':
+            # 技术文档风格：保留代码格式
+            return ['--highlight-style', 'pygments']
+        return []
+    
+    def convert_html_to_docx(self, html_content, output_file, template_style='simple', cancel_event=None,
+                             background=False):
         """
         直接将HTML内容转换为DOCX文件
         
         Args:
-            html_content: HTML内容字符串
+            html_content: HTML内容字符串，或已打开的SourceFile（如共享内存中的内容）
             output_file: 输出文件路径
             template_style: 模板样式类型
+            cancel_event: 后台转换（如预先转换）的取消标志，设置后尽快停止；Pandoc以低优先级运行
+            background: 以后台方式转换（如批量任务），Pandoc以低优先级运行
             
         Returns:
             tuple: (success, message)
         """
+        success, message = self._convert_html_to_docx(
+            html_content, output_file, template_style, cancel_event, background
+        )
+        
+        if success and cancel_event is not None and cancel_event.is_set():
+            return False, CANCELLED_MESSAGE
+        if success:
+            self._optimize_output(output_file)
+            self._embed_fonts(output_file)
+        return success, message
+    
+    def convert_source_file_to_docx(self, source_path, output_file, template_style='simple', background=False):
+        """
+        将磁盘上的HTML或Markdown文件转换为DOCX文件，内容按块流式读取，不整体载入内存
+        
+        Args:
+            source_path: 源文件路径
+            output_file: 输出文件路径
+            template_style: 模板样式类型
+            background: 以后台方式转换（如批量任务），Pandoc以低优先级运行
+            
+        Returns:
+            tuple: (success, message)
+        """
+        from core.source_file import SourceFile
+        
+        try:
+            source = SourceFile(source_path)
+        except OSError as e:
+            return False, f"无法读取文件：\n{str(e)}"
+        with source:
+            success, message = self._convert_html_to_docx(source, output_file, template_style, background=background)
+        
+        if success:
+            self._optimize_output(output_file)
+            self._embed_fonts(output_file)
+        return success, message
+    
+    def _optimize_output(self, output_file):
+        """按设置优化输出文件体积"""
+        if not self.optimize_output:
+            return
+        from core.docx_optimizer import optimize_docx
+        try:
+            optimized, optimize_message = optimize_docx(output_file)
+        except Exception as e:
+            # 优化只是附加步骤，出错时保留未优化的文件，不影响转换结果
+            print(f"输出文件优化出错，保留未优化的文件：{e}")
+            return
+        if optimized:
+            print(f"输出文件优化：{optimize_message}")
+        else:
+            print(f"输出文件优化跳过：{optimize_message}")
+    
+    def _embed_fonts(self, output_file):
+        """按设置嵌入中文字体子集（在体积优化之后进行，嵌入的字体不再重新压缩）"""
+        if not self.embed_fonts:
+            return
+        from core.font_embedder import embed_fonts
+        try:
+            embedded, embed_message = embed_fonts(output_file)
+        except Exception as e:
+            print(f"字体嵌入出错，保留未嵌入字体的文件：{e}")
+            return
+        if embedded:
+            print(f"字体嵌入：{embed_message}")
+        else:
+            print(f"字体嵌入跳过：{embed_message}")
+    
+    def get_typography(self, template_style):
+        """获取排版方案的中文排版设置，未启用时返回None"""
+        if not self.typography:
+            return None
+        from core.cjk_typography import get_typography_settings
+        return get_typography_settings(template_style)
+    
+    def get_reference_doc(self, template_style, typography=None):
+        """转换使用的参考模板：启用中文排版时为写入了中文字体设置的模板，两条转换路径共用"""
+        template_file = self.get_template_file(template_style)
+        if typography and os.path.exists(template_file):
+            from core.cjk_typography import prepare_reference_doc
+            from core.runtime_cache import get_cache_root
+            template_file = prepare_reference_doc(
+                template_file, template_style, typography,
+                os.path.join(os.path.dirname(get_cache_root()), 'templates')
+            )
+        return template_file
+    
+    def _convert_html_to_docx(self, html_content, output_file, template_style, cancel_event=None, background=False,
+                              fallback=False):
+        """使用原生写入器或Pandoc生成DOCX文件（html_content为字符串或已打开的SourceFile）
+        
+        fallback 为True时全部交给Pandoc（大表格写回失败后重新转换）
+        """
+        from core.source_file import SourceFile, FORMAT_HTML
+        
+        source = html_content if isinstance(html_content, SourceFile) else None
+        style_options = self.get_style_options(template_style)
+        typography = self.get_typography(template_style)
+        template_file = self.get_reference_doc(template_style, typography)
+        
+        # 优先尝试原生写入器（只处理HTML），不支持的内容或选项回退到Pandoc
+        if self.use_native_writer and not fallback and os.path.exists(template_file) \
+                and (source is None or source.format == FORMAT_HTML):
+            from core.native_docx_writer import NativeDocxWriter, UnsupportedContentError
+            content = source.iter_text() if source else html_content
+            if cancel_event is not None:
+                content = iter_cancellable(split_html(content) if source is None else content, cancel_event)
+            try:
+                return NativeDocxWriter(typography).convert_html_to_docx(
+                    content, output_file, template_file, style_options
+                )
+            except ConversionCancelled:
+                return False, CANCELLED_MESSAGE
+            except UnsupportedContentError as e:
+                print(f"快速写入器不支持当前内容，改用Pandoc转换: {e}")
+            except Exception as e:
+                print(f"快速写入器出错，改用Pandoc转换: {e}")
+        
         if not self.pandoc_path:
             return False, "未设置Pandoc路径"
             
         if not os.path.exists(self.pandoc_path):
             return False, f"Pandoc可执行文件不存在: {self.pandoc_path}"
         
+        if cancel_event is not None and cancel_event.is_set():
+            return False, CANCELLED_MESSAGE
+        
+        offload = None
+        if self.offload_tables and not fallback and (source is None or source.format == FORMAT_HTML):
+            from core.table_offload import TableOffload, has_large_table
+            if has_large_table(source if source is not None else html_content):
+                offload = TableOffload()
+        
+        import subprocess
+        
+        temp_html_path = None
+        stdin_data = None
         try:
             import tempfile
             
-            # 获取项目根目录
-            current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            template_dir = os.path.join(current_dir, 'templates')
-            
-            # 创建临时HTML文件
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as temp_file:
-                # 直接使用用户提供的HTML内容，不添加额外结构
-                temp_file.write(html_content)
-                temp_html_path = temp_file.name
+            if offload is not None:
+                # 大表格换成占位段落后写入临时文件交给Pandoc
+                chunks = source.iter_text() if source is not None else split_html(html_content)
+                if cancel_event is not None:
+                    chunks = iter_cancellable(chunks, cancel_event)
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8', newline='') as temp_file:
+                    temp_html_path = temp_file.name
+                    offload.extract(chunks, temp_file.write)
+                input_path = temp_html_path
+            elif source is not None and source.is_utf8 and source.in_memory:
+                # 内存中的UTF-8内容（如共享内存）直接写入Pandoc的标准输入，不落盘
+                stdin_data = source.buffer[source.bom_length:]
+                input_path = None
+            elif source is not None and source.is_utf8:
+                # UTF-8文件由Pandoc直接读取
+                input_path = source.path
+            else:
+                # 创建临时HTML文件
+                with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8', newline='') as temp_file:
+                    temp_html_path = temp_file.name
+                    if source is not None:
+                        # 其他编码的文件流式转码为UTF-8
+                        source.copy_text(temp_file)
+                    else:
+                        # 直接使用用户提供的HTML内容，不添加额外结构
+                        temp_file.write(html_content)
+                input_path = temp_html_path
             
             # 构建pandoc命令
-            cmd = [self.pandoc_path, temp_html_path, '-o', output_file]
+            cmd = [self.pandoc_path] + ([input_path] if input_path else []) + ['-o', output_file]
+            if source is not None:
+                cmd.extend(['-f', source.format])
             
             # 添加样式相关参数
             cmd.extend(['--standalone'])
             
             # 添加对应模板文件
-            template_file = os.path.join(template_dir, f'{template_style}.docx')
             if os.path.exists(template_file):
                 cmd.extend(['--reference-doc', template_file])
             else:
                 print(f"警告: 模板文件不存在: {template_file}")
             
             # 根据样式类型添加额外的参数
-            if template_style == 'academic':
-                # 学术论文风格：使用更正式的格式
-                cmd.extend(['--toc', '--number-sections'])
-            elif template_style == 'technical':
-                # 技术文档风格：保留代码格式
-                cmd.extend(['--highlight-style', 'pygments'])
+            cmd.extend(style_options)
+            
+            # 中文排版过滤器在Pandoc进程内执行
+            if typography:
+                from core.cjk_typography import get_pandoc_args
+                cmd.extend(get_pandoc_args(self.template_dir, typography))
             
             # 执行转换
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, check=True
-            )
+            self._run_pandoc(cmd, stdin_data, cancel_event, background or cancel_event is not None)
             
-            # 清理临时文件
-            try:
-                os.unlink(temp_html_path)
-            except:
-                pass
+            if offload is not None and offload.tables:
+                try:
+                    offload.splice(output_file, typography)
+                except Exception as e:
+                    print(f"大表格写回失败，改用Pandoc转换全部内容: {e}")
+                    return self._convert_html_to_docx(
+                        html_content, output_file, template_style, cancel_event, background, fallback=True
+                    )
+                print(f"{len(offload.tables)} 个大表格由原生写入器直接写出")
             
             return True, f"转换成功：{os.path.basename(output_file)}"
             
+        except ConversionCancelled:
+            return False, CANCELLED_MESSAGE
+            
         except subprocess.CalledProcessError as e:
-            return False, f"转换失败：\n{e.stderr if e.stderr else str(e)}"
+            stderr = e.stderr.decode('utf-8', errors='replace') if isinstance(e.stderr, bytes) else e.stderr
+            return False, f"转换失败：\n{stderr if stderr else str(e)}"
             
         except Exception as e:
-            return False, f"发生错误：\n{str(e)}"
\ No newline at end of file
+            return False, f"发生错误：\n{str(e)}"
+            
+        finally:
+            if stdin_data is not None:
+                stdin_data.release()
+            # 清理临时文件
+            if temp_html_path:
+                try:
+                    os.unlink(temp_html_path)
+                except OSError:
+                    pass
+    
+    def _run_pandoc(self, cmd, stdin_data=None, cancel_event=None, background=False):
+        """运行Pandoc，失败时抛出CalledProcessError
+        
+        从标准输入读取时以字节方式传入；后台转换以低优先级运行，可取消时结束Pandoc进程并抛出ConversionCancelled
+        """
+        import subprocess
+        
+        text = stdin_data is None
+        if not background:
+            options = {'text': True} if text else {'input': stdin_data}
+            subprocess.run(cmd, capture_output=True, check=True, **options)
+            return
+        
+        process = subprocess.Popen(
+            cmd, stdin=None if text else subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=text, creationflags=getattr(subprocess, 'IDLE_PRIORITY_CLASS', 0)
+        )
+        if hasattr(os, 'setpriority'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, process.pid, BACKGROUND_NICE)
+            except OSError:
+                pass
+        pending_input = stdin_data
+        while True:
+            try:
+                _, stderr = process.communicate(
+                    pending_input, timeout=None if cancel_event is None else CANCEL_POLL_SECONDS
+                )
+                break
+            except subprocess.TimeoutExpired:
+                # 未写完的输入由communicate在下次调用时继续写入
+                pending_input = None
+                if cancel_event.is_set():
+                    process.kill()
+                    process.wait()
+                    # 不等待管道读完：Pandoc启动的子进程可能仍持有管道
+                    for pipe in (process.stdin, process.stdout, process.stderr):
+                        if pipe is not None:
+                            try:
+                                pipe.close()
+                            except OSError:
+                                pass
+                    raise ConversionCancelled()
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
@@ -0,0 +1,382 @@
+"""
+文件夹监视转换模块
+监视一个文件夹，把新增或修改后的HTML文件用指定模板转换为DOCX：
+文件大小和修改时间稳定一段时间后才视为写入完成，内容哈希已转换过的文件直接跳过，
+转换通过任务队列按并发数执行，待转换的文件在监视器内只保存路径，突发的大量文件不会占用过多内存；
+每个文件的状态记录在输出目录的SQLite任务记录中，中断后重新监视时从中断处继续，多次失败的文件被隔离；
+指定批量输出归档时，转换完成的文档逐个写入同一个ZIP归档，输出目录中只有任务记录
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import threading
+from collections import deque
+
+from core.conversion_queue import job_key, PRIORITY_BATCH, STATUS_RUNNING, STATUS_SUCCEEDED, STATUS_FAILED
+from core.job_store import JobStore, STATUS_QUARANTINED
+
+
+WATCH_EXTENSIONS = ('.html', '.htm')
+
+# 文件大小和修改时间保持不变多久后才开始转换（秒）
+DEFAULT_SETTLE_SECONDS = 1.0
+# 仍被写入程序打开的文件最多等待多久（秒），超时后按大小和修改时间判断
+DEFAULT_OPEN_WRITE_SECONDS = 30.0
+# 没有文件系统事件时的兜底全量扫描间隔（秒）
+DEFAULT_RESCAN_SECONDS = 5.0
+
+# 任务记录文件，保存在输出目录中
+STORE_FILE_NAME = '.typesetter_jobs.sqlite3'
+
+# 读取HTML文件时依次尝试的编码
+SOURCE_ENCODINGS = ('utf-8-sig', 'gb18030')
+
+
+def is_watched_file(name):
+    """是否为需要转换的文件（忽略隐藏文件和Office临时文件）"""
+    return (
+        name.lower().endswith(WATCH_EXTENSIONS)
+        and not name.startswith(('.', '~$'))
+    )
+
+
+def read_source(path):
+    """读取HTML文件内容"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in SOURCE_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode('utf-8', errors='replace')
+
+
+class FolderWatcher:
+    """文件夹监视器
+
+    不依赖具体的事件来源：界面中由 QFileSystemWatcher 触发 scan()/notify()，
+    无界面模式下由 inotify 或定时轮询触发，调用方需要定期调用 poll() 推进转换，
+    并把任务队列的状态变化转发给 on_job_updated()
+    """
+
+    def __init__(self, queue, watch_dir, output_dir, template_style,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, rescan_seconds=DEFAULT_RESCAN_SECONDS,
+                 max_backlog=None, archive=None):
+        self.queue = queue
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.template_style = template_style
+        self.settle_seconds = settle_seconds
+        self.rescan_seconds = rescan_seconds
+        # 任务队列中最多同时存放的监视任务数，其余文件留在监视器中排队
+        self.max_backlog = max_backlog
+        # 批量输出归档（BatchArchive），文档在其暂存目录中生成，转换成功后移入归档
+        self.archive = archive
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.store = JobStore(os.path.join(self.output_dir, STORE_FILE_NAME))
+
+        # 已处理过的文件签名 {path: (size, mtime_ns)}
+        self._seen = {}
+        # 等待写入完成的文件 {path: (signature, 签名最近一次变化的时间)}
+        self._settling = {}
+        # 事件来源报告仍处于打开写入状态的文件
+        self._writing = set()
+        # 写入完成、等待提交的文件路径
+        self._ready = deque()
+        # 已提交的任务 {job_id: (path, key)}
+        self._jobs = {}
+        self._last_scan = 0.0
+        self._lock = threading.RLock()
+
+        self.converted_count = 0
+        self.skipped_count = 0
+        self.failed_count = 0
+        self.quarantined_count = 0
+        self.resumed_count = 0
+        self._resume()
+
+    def _resume(self):
+        """上次中断时排队或正在转换的文件不必等待写入完成，按原顺序优先提交"""
+        for record in self.store.recover():
+            path = record['source_path']
+            if not path or os.path.dirname(path) != self.watch_dir:
+                continue
+            signature = self._signature(path)
+            if signature is None:
+                continue
+            self._seen[path] = signature
+            self._ready.append(path)
+            self.resumed_count += 1
+        if self.resumed_count:
+            print(f"继续上次中断的转换：{self.resumed_count} 个文件")
+
+    def scan(self):
+        """扫描监视目录，找出新增或修改过的文件"""
+        now = time.monotonic()
+        try:
+            entries = list(os.scandir(self.watch_dir))
+        except OSError as e:
+            print(f"无法扫描监视目录: {e}")
+            return
+        with self._lock:
+            self._last_scan = now
+            for entry in entries:
+                if is_watched_file(entry.name):
+                    self._consider(entry.path, now)
+
+    def notify(self, path, writing=False):
+        """文件系统事件通知：path为None时重新扫描整个目录
+
+        Args:
+            path: 发生变化的文件路径
+            writing: 事件来源能确定文件仍被打开写入时为True（如inotify收到修改事件但尚未关闭）
+        """
+        if path is None:
+            self.scan()
+            return
+        path = os.path.abspath(path)
+        if os.path.dirname(path) != self.watch_dir or not is_watched_file(os.path.basename(path)):
+            return
+        with self._lock:
+            if writing:
+                self._writing.add(path)
+            else:
+                self._writing.discard(path)
+            self._consider(path, time.monotonic())
+
+    def poll(self):
+        """把写入完成的文件提交到任务队列
+
+        Returns:
+            bool: 是否还有等待写入完成或等待提交的文件
+        """
+        now = time.monotonic()
+        if now - self._last_scan >= self.rescan_seconds:
+            self.scan()
+
+        with self._lock:
+            for path, (signature, changed_at) in list(self._settling.items()):
+                current = self._signature(path)
+                settle_seconds = DEFAULT_OPEN_WRITE_SECONDS if path in self._writing else self.settle_seconds
+                if current is None:
+                    # 文件已被删除或移走
+                    del self._settling[path]
+                    self._writing.discard(path)
+                elif current != signature:
+                    self._settling[path] = (current, now)
+                elif now - changed_at >= settle_seconds:
+                    del self._settling[path]
+                    self._writing.discard(path)
+                    self._seen[path] = signature
+                    self._ready.append(path)
+            self._feed()
+            return bool(self._settling or self._ready)
+
+    def on_job_updated(self, job):
+        """任务队列状态变化：记录到任务记录中，失败的文件排到最后重试，并继续提交排队的文件"""
+        if job.status == STATUS_RUNNING:
+            # 开始执行的通知可能在提交过程中同步发出，此时任务尚未登记，按合并键记录
+            if self.owns(job):
+                self.store.mark_running(job.key)
+            return
+        if job.status not in (STATUS_SUCCEEDED, STATUS_FAILED):
+            return
+        with self._lock:
+            entry = self._jobs.pop(job.id, None)
+            if entry is None:
+                return
+            path, key = entry
+            success, message, output_file = job.status == STATUS_SUCCEEDED, job.message, job.output_file
+            if success and self.archive is not None:
+                # 先写入归档再记录成功，中断后记录为成功的文档一定能从归档中恢复
+                try:
+                    output_file = self.archive.member_path(self.archive.add(job.output_file))
+                except (OSError, ValueError) as e:
+                    success, message = False, f"无法写入归档：\n{str(e)}"
+            status = self.store.mark_finished(key, success, message, output_file)
+            if status == STATUS_SUCCEEDED:
+                self.converted_count += 1
+            elif status == STATUS_QUARANTINED:
+                self.quarantined_count += 1
+                print(f"转换失败 {self.store.max_attempts} 次，已隔离: {os.path.basename(path)}\n{message}")
+            else:
+                self.failed_count += 1
+                print(f"转换失败，稍后重试: {os.path.basename(path)}\n{message}")
+                self._ready.append(path)
+            self._feed()
+
+    def owns(self, job):
+        """任务是否由监视器提交（按输出目录判断，任务提交过程中的状态通知也能识别）"""
+        return os.path.dirname(os.path.abspath(job.output_file)) == self._document_dir()
+
+    def _document_dir(self):
+        """转换器写入文档的目录：输出目录，或批量输出归档的暂存目录"""
+        return self.archive.staging_dir if self.archive is not None else self.output_dir
+
+    def backlog(self):
+        """尚未完成的文件数（等待写入完成、等待提交和转换中的）"""
+        with self._lock:
+            return len(self._settling) + len(self._ready) + len(self._jobs)
+
+    def _consider(self, path, now):
+        signature = self._signature(path)
+        if signature is None or signature[0] == 0:
+            return
+        if self._seen.get(path) == signature or path in self._settling:
+            return
+        self._settling[path] = (signature, now)
+
+    def _feed(self):
+        """在任务队列容量允许时提交等待中的文件"""
+        limit = self.max_backlog or self.queue.max_workers * 2
+        while self._ready and len(self._jobs) < limit:
+            path = self._ready.popleft()
+            try:
+                html_content = read_source(path)
+            except OSError as e:
+                print(f"无法读取文件 {path}: {e}")
+                continue
+
+            key = job_key(html_content, self.template_style)
+            if any(key == k for _, k in self._jobs.values()):
+                self.skipped_count += 1
+                continue
+            status = self.store.status(key)
+            if status == STATUS_SUCCEEDED:
+                self.skipped_count += 1
+                continue
+            if status == STATUS_QUARANTINED:
+                # 内容修改后合并键变化，会作为新的输入重新转换
+                self.quarantined_count += 1
+                continue
+
+            output_file = os.path.join(
+                self._document_dir(), os.path.splitext(os.path.basename(path))[0] + '.docx'
+            )
+            if self.queue.is_output_reserved(output_file):
+                # 同一文件的上一个版本仍在转换，稍后再提交
+                self._ready.append(path)
+                break
+
+            self.store.mark_queued(key, self.template_style, path, output_file)
+            job, coalesced = self.queue.submit(
+                html_content, self.template_style, output_file, content_hash=key.split(':', 1)[0],
+                priority=PRIORITY_BATCH
+            )
+            if coalesced:
+                self.skipped_count += 1
+                continue
+            self._jobs[job.id] = (path, key)
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+
+class InotifySource:
+    """基于inotify的文件事件来源（仅Linux，供无界面模式使用）"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self.directory = directory
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, 'inotify_add_watch 失败')
+
+    def wait(self, timeout):
+        """等待文件事件
+
+        Returns:
+            list: [(path, writing)] writing表示文件仍被打开写入；path为None表示事件溢出，需要全量扫描
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        events = {}
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(data):
+            _, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                events[None] = False
+            elif name:
+                # 同一批事件中以最后一个事件为准：关闭或移入表示写入结束
+                path = os.path.join(self.directory, os.fsdecode(name))
+                events[path] = not mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        return list(events.items())
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_event_source(directory):
+    """创建文件事件来源，不支持inotify的平台返回None（退回定时轮询）"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        return InotifySource(directory)
+    except (OSError, AttributeError) as e:
+        print(f"inotify不可用，改为定时扫描: {e}")
+        return None
+
+
+def run_headless(watcher, poll_interval=0.5, stop_event=None, once=False):
+    """无界面模式的监视循环，直到 stop_event 被设置（或收到Ctrl+C）
+
+    Args:
+        once: 为True时转换完目录中现有的文件（包括上次中断未完成的）后返回
+    """
+    source = create_event_source(watcher.watch_dir)
+    if source is not None:
+        # 有文件事件时只需要偶尔兜底扫描
+        watcher.rescan_seconds = max(watcher.rescan_seconds, 60.0)
+    watcher.scan()
+    try:
+        while stop_event is None or not stop_event.is_set():
+            if source is not None:
+                for path, writing in source.wait(poll_interval):
+                    watcher.notify(path, writing)
+            else:
+                time.sleep(poll_interval)
+            waiting = watcher.poll()
+            if once and not waiting and not watcher.backlog():
+                break
+    finally:
+        if source is not None:
+            source.close()
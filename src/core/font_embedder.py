@@ -0,0 +1,547 @@
+"""
+字体嵌入模块
+转换完成后收集文档中实际用到的字符，把文档引用的中文字体按这些字符子集化后嵌入DOCX
+（Word的嵌入字体格式：经过混淆的TrueType字体），收件人没有安装对应字体时也能按原样显示。
+完整的中文字体有十几到几十MB，子集通常只有几十到几百KB；
+子集按（字体文件, 字符集）的哈希缓存在用户缓存目录中，批量转换时相同的字符集直接复用。
+依赖 fontTools，未安装时跳过
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import shutil
+import struct
+import hashlib
+import zipfile
+import threading
+from xml.parsers import expat
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+FONT_RELATIONSHIP_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/font'
+OBFUSCATED_FONT_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.obfuscatedFont'
+
+FONT_TABLE = 'word/fontTable.xml'
+FONT_TABLE_RELS = 'word/_rels/fontTable.xml.rels'
+SETTINGS = 'word/settings.xml'
+THEME = 'word/theme/theme1.xml'
+
+# 子集化逻辑变化时递增，使旧的缓存失效
+SUBSET_VERSION = 1
+
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf', '.otc')
+
+# 含有正文文字的部件；样式和编号部件只用于收集引用的字体
+TEXT_PART_PATTERN = re.compile(r'word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml$')
+FONT_PART_PATTERN = re.compile(r'word/(styles|numbering)\.xml$')
+
+# w:rFonts 中的字体属性，以及依赖主题的字体属性
+FONT_ATTRIBUTES = ('ascii', 'hAnsi', 'eastAsia', 'cs')
+THEME_FONT_ATTRIBUTES = ('asciiTheme', 'hAnsiTheme', 'eastAsiaTheme')
+
+# OS/2 fsType：受限授权（不允许嵌入）、不允许子集化、只允许嵌入位图
+FS_TYPE_RESTRICTED = 0x0002
+FS_TYPE_NO_SUBSETTING = 0x0100
+FS_TYPE_BITMAP_ONLY = 0x0200
+
+# settings.xml 中排在 embedTrueTypeFonts 之前的元素（Word按架构顺序校验）
+SETTINGS_PRECEDING = (
+    'writeProtection', 'view', 'zoom', 'removePersonalInformation', 'removeDateAndTime',
+    'doNotDisplayPageBoundaries', 'displayBackgroundShape', 'printPostScriptOverText',
+    'printFractionalCharacterWidth', 'printFormsData',
+)
+
+# 字体索引（扫描系统字体目录的结果），进程内只构建一次
+_font_index = None
+_font_index_lock = threading.Lock()
+
+
+def get_font_cache_dir():
+    """字体子集和字体索引的缓存目录"""
+    from core.runtime_cache import get_cache_root
+    return os.path.join(os.path.dirname(get_cache_root()), 'fonts')
+
+
+def get_font_dirs():
+    """当前系统的字体目录"""
+    home = os.path.expanduser('~')
+    if sys.platform.startswith('win'):
+        windir = os.environ.get('WINDIR') or r'C:\Windows'
+        local = os.environ.get('LOCALAPPDATA') or os.path.join(home, 'AppData', 'Local')
+        return [os.path.join(windir, 'Fonts'), os.path.join(local, 'Microsoft', 'Windows', 'Fonts')]
+    if sys.platform == 'darwin':
+        return ['/System/Library/Fonts', '/Library/Fonts', os.path.join(home, 'Library', 'Fonts')]
+    return ['/usr/share/fonts', '/usr/local/share/fonts',
+            os.path.join(home, '.local', 'share', 'fonts'), os.path.join(home, '.fonts')]
+
+
+def fonttools_available():
+    try:
+        import fontTools.subset  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class FontIndex:
+    """按字体名（包括中文本地化名称）查找字体文件
+
+    扫描结果按文件路径、修改时间和大小缓存在 index.json 中，之后只读取新增或变化的字体文件
+    """
+
+    def __init__(self, font_dirs=None, cache_dir=None):
+        self.font_dirs = font_dirs or get_font_dirs()
+        self.cache_path = os.path.join(cache_dir or get_font_cache_dir(), 'index.json')
+        # {字体名(小写): [(路径, 字体序号, 是否TrueType轮廓, fsType, 是否粗体或斜体)]}
+        self.faces = {}
+        self._load()
+
+    def find(self, name):
+        """查找字体，同名时优先返回常规字重
+
+        Returns:
+            dict: {'path', 'font_number', 'truetype', 'fs_type'}，找不到时返回None
+        """
+        faces = self.faces.get(name.strip().lower())
+        if not faces:
+            return None
+        path, font_number, truetype, fs_type, styled = min(faces, key=lambda face: face[4])
+        return {'path': path, 'font_number': font_number, 'truetype': truetype, 'fs_type': fs_type}
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+
+        files = {}
+        changed = False
+        for path in self._font_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = cached.get(path)
+            if not entry or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                entry = {'mtime': stat.st_mtime, 'size': stat.st_size, 'faces': _read_faces(path)}
+                changed = True
+            files[path] = entry
+        changed = changed or len(files) != len(cached)
+
+        for path, entry in files.items():
+            for font_number, names, truetype, fs_type, styled in entry['faces']:
+                for name in names:
+                    self.faces.setdefault(name.lower(), []).append((path, font_number, truetype, fs_type, styled))
+
+        if changed:
+            try:
+                os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                temp_path = f'{self.cache_path}.{os.getpid()}.part'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(files, f, ensure_ascii=False)
+                os.replace(temp_path, self.cache_path)
+            except OSError as e:
+                print(f"无法缓存字体索引: {e}")
+
+    def _font_files(self):
+        for font_dir in self.font_dirs:
+            for root, _, names in os.walk(font_dir):
+                for name in names:
+                    if name.lower().endswith(FONT_EXTENSIONS):
+                        yield os.path.join(root, name)
+
+
+def _read_faces(path):
+    """读取字体文件中各字体的名称（家族名、全名，各语言版本）、轮廓类型和嵌入许可"""
+    from fontTools.ttLib import TTFont, TTCollection, TTLibError
+
+    faces = []
+    try:
+        if path.lower().endswith(('.ttc', '.otc')):
+            fonts = TTCollection(path, lazy=True).fonts
+        else:
+            fonts = [TTFont(path, lazy=True)]
+        for font_number, font in enumerate(fonts):
+            names = set()
+            for record in font['name'].names:
+                if record.nameID in (1, 4, 16):
+                    try:
+                        names.add(record.toUnicode().strip())
+                    except UnicodeDecodeError:
+                        continue
+            os2 = font['OS/2'] if 'OS/2' in font else None
+            faces.append([
+                font_number,
+                sorted(name for name in names if name),
+                font.sfntVersion != 'OTTO',
+                os2.fsType if os2 is not None else 0,
+                # fsSelection：斜体（bit 0）或粗体（bit 5）
+                bool(os2.fsSelection & 0x21) if os2 is not None else False,
+            ])
+    except (TTLibError, OSError, KeyError, AssertionError, ValueError, struct.error) as e:
+        print(f"无法读取字体 {path}: {e}")
+    return faces
+
+
+def get_font_index():
+    """获取字体索引（首次调用时扫描字体目录）"""
+    global _font_index
+    with _font_index_lock:
+        if _font_index is None:
+            _font_index = FontIndex()
+        return _font_index
+
+
+def embed_fonts(docx_path, font_index=None, cache_dir=None):
+    """把文档引用的中文字体按用到的字符子集化后嵌入DOCX，校验通过后原地替换
+
+    只嵌入常规字重（粗体由Word模拟）；没有TrueType轮廓、授权不允许嵌入或子集化的字体会被跳过
+
+    Args:
+        docx_path: DOCX文件路径
+        font_index: 字体索引，默认扫描系统字体目录
+        cache_dir: 子集缓存目录
+
+    Returns:
+        tuple: (success, message)
+    """
+    from core.cjk_typography import CJK_CHARS
+
+    if not fonttools_available():
+        return False, "未安装fontTools，跳过字体嵌入"
+
+    start = time.perf_counter()
+    cache_dir = cache_dir or get_font_cache_dir()
+    temp_path = docx_path + '.fonts'
+
+    try:
+        with zipfile.ZipFile(docx_path) as source:
+            names = set(source.namelist())
+            if FONT_TABLE not in names:
+                return False, "文档中没有字体表，跳过字体嵌入"
+            chars, font_names, east_asian_names = collect_font_usage(source, names)
+            cjk = {char for char in chars if re.match(f'[{CJK_CHARS}]', char)}
+            if not cjk:
+                return True, "文档中没有中文字符，无需嵌入字体"
+
+            font_index = font_index or get_font_index()
+            embedded, skipped = {}, []
+            for name in sorted(font_names):
+                font = font_index.find(name)
+                reason = _unembeddable_reason(font)
+                if reason:
+                    # 找不到的字体只报告东亚字体，西文字体（如 Calibri）缺失时不影响中文显示
+                    if font is not None or name in east_asian_names:
+                        skipped.append(f'{name}（{reason}）')
+                    continue
+                subset = _subset_for_document(font, chars, cjk, cache_dir)
+                if subset is None:
+                    # 不含文档中的中文字符（西文字体），不需要嵌入
+                    continue
+                embedded[name] = subset
+
+            if not embedded:
+                message = "没有需要嵌入的中文字体"
+                return True, message + (f"，跳过：{'、'.join(skipped)}" if skipped else '')
+
+            _write_embedded(source, temp_path, embedded)
+
+        from core.docx_optimizer import check_docx
+        # 只有当嵌入没有引入新的兼容性问题时才替换原文件
+        new_problems = set(check_docx(temp_path))
+        if new_problems:
+            new_problems -= set(check_docx(docx_path))
+        if new_problems:
+            os.remove(temp_path)
+            return False, "嵌入字体后的文档未通过校验，保留原文件：\n" + "\n".join(sorted(new_problems))
+        os.replace(temp_path, docx_path)
+    except (OSError, zipfile.BadZipFile, expat.ExpatError) as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False, f"字体嵌入失败：{e}"
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    fonts = '、'.join(
+        f"{name}（{subset['glyph_count']} 个字符，{len(subset['data']) / 1024:.0f} KB）"
+        for name, subset in embedded.items()
+    )
+    message = f"嵌入字体 {fonts}，耗时 {elapsed_ms:.1f} ms"
+    if skipped:
+        message += f"，跳过：{'、'.join(skipped)}"
+    return True, message
+
+
+def _unembeddable_reason(font):
+    if font is None:
+        return '未找到字体文件'
+    if not font['truetype']:
+        return '不是TrueType字体'
+    fs_type = font['fs_type']
+    if fs_type & 0x000F == FS_TYPE_RESTRICTED:
+        return '字体授权不允许嵌入'
+    if fs_type & (FS_TYPE_NO_SUBSETTING | FS_TYPE_BITMAP_ONLY):
+        return '字体授权不允许子集化'
+    return None
+
+
+def collect_font_usage(source, names):
+    """流式解析正文、页眉页脚、样式和编号部件，收集用到的字符和引用的字体名
+
+    Returns:
+        tuple: (用到的字符, 引用的字体名, 其中用作东亚字体的字体名)
+    """
+    chars = set()
+    font_names = set()
+    east_asian_names = set()
+    theme_fonts = set()
+
+    for name in sorted(names):
+        collect_text = bool(TEXT_PART_PATTERN.match(name))
+        if not collect_text and not FONT_PART_PATTERN.match(name):
+            continue
+
+        in_text = False
+
+        def start(tag, attrs):
+            nonlocal in_text
+            if tag == f'{W_NS} t':
+                in_text = collect_text
+            elif tag == f'{W_NS} rFonts':
+                for attribute in FONT_ATTRIBUTES:
+                    value = attrs.get(f'{W_NS} {attribute}')
+                    if value:
+                        font_names.add(value)
+                        if attribute == 'eastAsia':
+                            east_asian_names.add(value)
+                for attribute in THEME_FONT_ATTRIBUTES:
+                    value = attrs.get(f'{W_NS} {attribute}')
+                    if value:
+                        theme_fonts.add(value)
+
+        def end(tag):
+            nonlocal in_text
+            if tag == f'{W_NS} t':
+                in_text = False
+
+        def data(text):
+            if in_text:
+                chars.update(text)
+
+        parser = expat.ParserCreate(namespace_separator=' ')
+        parser.buffer_text = True
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = data
+        with source.open(name) as stream:
+            parser.ParseFile(stream)
+
+    if theme_fonts and THEME in names:
+        latin, east_asian = _resolve_theme_fonts(source.read(THEME), theme_fonts)
+        font_names.update(latin | east_asian)
+        east_asian_names.update(east_asian)
+    return chars, font_names, east_asian_names
+
+
+def _resolve_theme_fonts(theme_xml, references):
+    """把 majorEastAsia、minorHAnsi 等主题字体引用解析为字体名（东亚字体取简体中文的字体）
+
+    Returns:
+        tuple: (西文字体名, 东亚字体名)
+    """
+    latin_fonts, east_asian_fonts = set(), set()
+    for group in ('major', 'minor'):
+        block = re.search(rb'<a:' + group.encode() + rb'Font>(.*?)</a:' + group.encode() + rb'Font>', theme_xml, re.S)
+        if block is None:
+            continue
+        block = block.group(1)
+        if {f'{group}HAnsi', f'{group}Ascii'} & references:
+            latin = re.search(rb'<a:latin\b[^>]*\btypeface="([^"]+)"', block)
+            if latin:
+                latin_fonts.add(latin.group(1).decode('utf-8'))
+        if f'{group}EastAsia' in references:
+            for pattern in (rb'<a:font\b[^>]*\bscript="Hans"[^>]*\btypeface="([^"]+)"',
+                            rb'<a:ea\b[^>]*\btypeface="([^"]+)"'):
+                east_asian = re.search(pattern, block)
+                if east_asian:
+                    east_asian_fonts.add(east_asian.group(1).decode('utf-8'))
+                    break
+    return latin_fonts, east_asian_fonts
+
+
+def _subset_for_document(font, chars, cjk, cache_dir):
+    """按文档用到的字符生成字体子集（命中缓存时直接读取）
+
+    Returns:
+        dict: {'data': 子集字体, 'glyph_count': 字符数, 'digest': 缓存键}；
+        字体不含文档中的中文字符时返回None
+    """
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    stat = os.stat(font['path'])
+    with TTFont(font['path'], fontNumber=font['font_number'], lazy=True) as ttfont:
+        cmap = ttfont.getBestCmap() or {}
+    if not any(ord(char) in cmap for char in cjk):
+        return None
+    codepoints = sorted(ord(char) for char in chars if ord(char) in cmap)
+
+    digest = hashlib.sha256(json.dumps([
+        SUBSET_VERSION, font['path'], stat.st_mtime, stat.st_size, font['font_number'], codepoints
+    ]).encode('utf-8')).hexdigest()
+    cache_path = os.path.join(cache_dir, f'{digest}.ttf')
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return {'data': f.read(), 'glyph_count': len(codepoints), 'digest': digest}
+
+    options = subset.Options()
+    options.font_number = font['font_number']
+    # 保留全部名称记录，Word按字体名（包括中文名）匹配嵌入的字体
+    options.name_IDs = ['*']
+    options.name_languages = ['*']
+    options.name_legacy = True
+    options.notdef_outline = True
+    options.legacy_kern = True
+    subset_font = subset.load_font(font['path'], options, lazy=False)
+    try:
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(subset_font)
+        buffer = io.BytesIO()
+        subset.save_font(subset_font, buffer, options)
+    finally:
+        subset_font.close()
+    data = buffer.getvalue()
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.part'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"无法缓存字体子集: {e}")
+    return {'data': data, 'glyph_count': len(codepoints), 'digest': digest}
+
+
+def font_key(digest):
+    """由子集哈希生成嵌入字体的fontKey（GUID），相同子集的输出保持一致"""
+    return '{' + str(uuid.UUID(digest[:32])).upper() + '}'
+
+
+def obfuscate_font(data, key):
+    """按ECMA-376的嵌入字体格式混淆字体：前32字节与fontKey的16字节（逆序）异或，再次调用即可还原"""
+    key_bytes = bytes.fromhex(key.strip('{}').replace('-', ''))[::-1]
+    head = bytes(byte ^ key_bytes[index % 16] for index, byte in enumerate(data[:32]))
+    return head + data[32:]
+
+
+def _write_embedded(source, output_path, embedded):
+    """写出嵌入了字体的新压缩包：改写字体表、字体表关系、内容类型和设置，其余部件流式复制"""
+    names = [info.filename for info in source.infolist() if not info.is_dir()]
+
+    rels_xml = source.read(FONT_TABLE_RELS) if FONT_TABLE_RELS in names else (
+        b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        b'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships"></Relationships>'
+    )
+    existing_ids = set(re.findall(rb'\sId="([^"]*)"', rels_xml))
+
+    # 同一子集（例如同一字体的中英文名）只写入一份
+    parts = {}
+    new_relationships = []
+    embed_elements = {}
+    for name, subset in embedded.items():
+        digest = subset['digest']
+        if digest not in parts:
+            index = len(parts) + 1
+            while f'fonts/embedded{index}.odttf'.encode() in rels_xml:
+                index += 1
+            relationship_id = _unique_id(existing_ids, f'rIdFont{index}')
+            key = font_key(digest)
+            parts[digest] = (f'word/fonts/embedded{index}.odttf', relationship_id, key, obfuscate_font(subset['data'], key))
+            new_relationships.append(
+                f'<Relationship Id="{relationship_id}" Type="{FONT_RELATIONSHIP_TYPE}" '
+                f'Target="fonts/embedded{index}.odttf"/>'
+            )
+        _, relationship_id, key, _ = parts[digest]
+        embed_elements[name] = f'<w:embedRegular r:id="{relationship_id}" w:fontKey="{key}" w:subsetted="1"/>'
+
+    replacements = {
+        FONT_TABLE: _add_font_embeds(source.read(FONT_TABLE), embed_elements),
+        FONT_TABLE_RELS: rels_xml.replace(
+            b'</Relationships>', ''.join(new_relationships).encode('utf-8') + b'</Relationships>'
+        ),
+        '[Content_Types].xml': _add_font_content_type(source.read('[Content_Types].xml')),
+    }
+    if SETTINGS in names:
+        replacements[SETTINGS] = _enable_font_embedding(source.read(SETTINGS))
+
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as target:
+        for name in names:
+            if name in replacements:
+                target.writestr(name, replacements.pop(name))
+                continue
+            info = source.getinfo(name)
+            with source.open(name) as src, target.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        # 原来没有的字体表关系文件
+        for name, data in replacements.items():
+            target.writestr(name, data)
+        for part_name, _, _, data in parts.values():
+            target.writestr(part_name, data)
+
+
+def _unique_id(existing_ids, candidate):
+    base, index = candidate, 1
+    while candidate.encode() in existing_ids:
+        index += 1
+        candidate = f'{base}_{index}'
+    existing_ids.add(candidate.encode())
+    return candidate
+
+
+def _add_font_embeds(font_table, embed_elements):
+    """在字体表中为每个字体添加嵌入引用，字体表中没有的字体追加新条目"""
+    text = font_table.decode('utf-8')
+    if f'xmlns:r="{R_NS}"' not in text:
+        text = re.sub(r'<w:fonts\b', f'<w:fonts xmlns:r="{R_NS}"', text, count=1)
+
+    for name, element in embed_elements.items():
+        escaped = name.replace('&', '&amp;').replace('"', '&quot;').replace('<', '&lt;')
+        pattern = re.compile(r'<w:font\s+w:name="' + re.escape(escaped) + r'"\s*(/>|>(.*?)</w:font>)', re.S)
+        match = pattern.search(text)
+        if match is None:
+            entry = f'<w:font w:name="{escaped}">{element}</w:font>'
+            text = text.replace('</w:fonts>', entry + '</w:fonts>', 1)
+            continue
+        body = re.sub(r'<w:embed(?:Regular|Bold|Italic|BoldItalic)\b[^>]*/>', '', match.group(2) or '')
+        # 嵌入引用位于字体条目的最后（在 w:sig 等元素之后）
+        entry = f'<w:font w:name="{escaped}">{body}{element}</w:font>'
+        text = text[:match.start()] + entry + text[match.end():]
+    return text.encode('utf-8')
+
+
+def _add_font_content_type(content_types):
+    if re.search(rb'<Default\b[^>]*Extension="odttf"', content_types, re.I):
+        return content_types
+    default = f'<Default Extension="odttf" ContentType="{OBFUSCATED_FONT_CONTENT_TYPE}"/>'.encode('utf-8')
+    return re.sub(rb'(<Types\b[^>]*>)', lambda match: match.group(1) + default, content_types, count=1)
+
+
+def _enable_font_embedding(settings_xml):
+    """在设置中开启嵌入TrueType字体和只保存子集，保证Word另存时仍保留嵌入的字体"""
+    text = settings_xml.decode('utf-8')
+    text = re.sub(r'<w:(?:embedTrueTypeFonts|saveSubsetFonts|embedSystemFonts)\b[^>]*/>', '', text)
+    preceding = '|'.join(SETTINGS_PRECEDING)
+    position = None
+    for match in re.finditer(rf'<w:(?:{preceding})\b[^>]*/>', text):
+        position = match.end()
+    if position is None:
+        position = re.search(r'<w:settings\b[^>]*>', text).end()
+    return (text[:position] + '<w:embedTrueTypeFonts/><w:saveSubsetFonts/>' + text[position:]).encode('utf-8')
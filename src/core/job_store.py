@@ -0,0 +1,180 @@
+"""
+批量任务记录模块
+用SQLite（WAL模式）持久化批量转换中每个输入的内容哈希、模板、状态、执行次数、耗时和输出路径：
+进程崩溃或重启后，已完成的输入直接跳过，中断时排队或正在转换的输入按原顺序优先恢复；
+多次失败（包括转换过程中进程崩溃）的输入被隔离，不再重复转换，也不会阻塞其余输入
+"""
+
+import time
+import sqlite3
+import threading
+
+from core.conversion_queue import STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, STATUS_FAILED
+
+
+STATUS_QUARANTINED = 'quarantined'
+
+# 同一输入最多执行的次数，超过后隔离
+MAX_ATTEMPTS = 3
+
+SCHEMA_VERSION = 1
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    template TEXT NOT NULL,
+    source_path TEXT,
+    output_file TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    submitted_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at);
+'''
+
+
+class JobStore:
+    """批量任务记录（线程安全）
+
+    key 为任务队列的合并键（内容哈希:模板），同一内容用同一模板只记录一次
+    """
+
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # 任务状态回调来自多个工作线程，共用一个连接并由锁串行化
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.row_factory = sqlite3.Row
+        # WAL：每次更新只追加日志，崩溃后已提交的记录不会丢失，读取也不会被写入阻塞
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._lock:
+            self._db.executescript(SCHEMA)
+            self._db.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get(self, key):
+        """查询一个输入的记录，没有记录时返回None"""
+        with self._lock:
+            row = self._db.execute('SELECT * FROM jobs WHERE key = ?', (key,)).fetchone()
+        return dict(row) if row else None
+
+    def status(self, key):
+        record = self.get(key)
+        return record['status'] if record else None
+
+    def mark_queued(self, key, template, source_path, output_file):
+        """记录提交到任务队列的输入（已有记录时保留执行次数）"""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                '''INSERT INTO jobs (key, content_hash, template, source_path, output_file, status, submitted_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (key) DO UPDATE SET
+                       source_path = excluded.source_path, output_file = excluded.output_file,
+                       status = excluded.status, submitted_at = excluded.submitted_at''',
+                (key, key.split(':', 1)[0], template, source_path, output_file, STATUS_QUEUED, now)
+            )
+
+    def mark_running(self, key):
+        """记录开始转换（执行次数加一；转换中进程崩溃的这一次也计入）"""
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ? WHERE key = ?',
+                (STATUS_RUNNING, time.time(), key)
+            )
+
+    def mark_finished(self, key, success, message='', output_file=None):
+        """记录转换结果，失败次数达到上限时隔离
+
+        Returns:
+            str: 记录后的状态
+        """
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute('SELECT attempts, started_at FROM jobs WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if success:
+                status = STATUS_SUCCEEDED
+            elif row['attempts'] >= self.max_attempts:
+                status = STATUS_QUARANTINED
+            else:
+                status = STATUS_FAILED
+            duration = now - row['started_at'] if row['started_at'] else None
+            self._db.execute(
+                '''UPDATE jobs SET status = ?, message = ?, finished_at = ?, duration = ?,
+                       output_file = COALESCE(?, output_file) WHERE key = ?''',
+                (status, message, now, duration, output_file, key)
+            )
+        return status
+
+    def recover(self):
+        """恢复上次中断的批量任务：返回中断时排队或正在转换的记录（按提交顺序）
+
+        正在转换时中断的输入，若执行次数已达上限则隔离（可能正是它导致了进程崩溃）
+
+        Returns:
+            list: 需要重新提交的记录
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE jobs SET status = ?, message = ? WHERE status = ? AND attempts >= ?',
+                (STATUS_QUARANTINED, '多次在转换过程中中断', STATUS_RUNNING, self.max_attempts)
+            )
+            rows = self._db.execute(
+                'SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY submitted_at',
+                (STATUS_QUEUED, STATUS_RUNNING)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def quarantined(self):
+        """被隔离的输入"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT * FROM jobs WHERE status = ? ORDER BY finished_at', (STATUS_QUARANTINED,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def release_quarantined(self):
+        """解除隔离（清零执行次数），之后这些输入会被重新转换
+
+        Returns:
+            int: 解除隔离的输入数
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'UPDATE jobs SET status = ?, attempts = 0 WHERE status = ?', (STATUS_FAILED, STATUS_QUARANTINED)
+            )
+        return cursor.rowcount
+
+    def iter_records(self, batch_size=500):
+        """按提交顺序逐批读取全部记录（不一次性载入内存）"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    'SELECT rowid, * FROM jobs WHERE rowid > ? ORDER BY rowid LIMIT ?', (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1]['rowid']
+            for row in rows:
+                record = dict(row)
+                del record['rowid']
+                yield record
+
+    def counts(self):
+        """各状态的记录数"""
+        with self._lock:
+            rows = self._db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
@@ -0,0 +1,695 @@
+"""
+原生DOCX写入器模块
+针对AI提示词限定的HTML标签子集，直接在进程内将HTML流式写为OOXML，
+遇到不支持的结构或选项时交由Pandoc处理
+"""
+
+import os
+import re
+import base64
+import struct
+import zipfile
+from html.parser import HTMLParser
+from urllib.parse import unquote
+from xml.sax.saxutils import escape, quoteattr
+
+from core.cjk_typography import apply_typography
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+REL_HYPERLINK = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink'
+REL_IMAGE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+REL_NUMBERING = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering'
+NUMBERING_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml'
+
+DOCUMENT_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml" '
+    'mc:Ignorable="w14"><w:body>'
+)
+
+# 块级标签、行内标签以及只起结构作用的标签，三者之外的标签一律交给Pandoc
+BLOCK_TAGS = {
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td', 'pre', 'blockquote', 'hr',
+}
+INLINE_TAGS = {'strong', 'b', 'em', 'i', 'a', 'img', 'code', 'br'}
+STRUCTURE_TAGS = {'html', 'head', 'body', 'meta', 'title'}
+
+# 页面可用宽度上限（6英寸，单位EMU）
+MAX_IMAGE_WIDTH_EMU = 5486400
+EMU_PER_PIXEL = 9525
+
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class UnsupportedContentError(Exception):
+    """HTML内容或转换选项超出原生写入器支持范围"""
+
+
+class NativeDocxWriter:
+    """原生DOCX写入器"""
+
+    # 这些Pandoc选项需要Pandoc自身的排版逻辑（目录、章节编号），无法在快速路径中实现
+    UNSUPPORTED_OPTIONS = {'--toc', '--number-sections'}
+
+    def __init__(self, typography=None):
+        # 中文排版设置，与Pandoc路径中Lua过滤器的规则一致
+        self.typography = typography
+
+    def supports_options(self, extra_args):
+        """检查Pandoc附加参数是否可由原生写入器处理"""
+        return not any(arg in self.UNSUPPORTED_OPTIONS for arg in extra_args or [])
+
+    def convert_html_to_docx(self, html_content, output_file, template_file, extra_args=None):
+        """
+        将HTML内容直接写为DOCX文件
+
+        Args:
+            html_content: HTML内容字符串，或按标签边界分块的文本迭代器（大文件流式转换）
+            output_file: 输出文件路径
+            template_file: 参考模板docx路径
+            extra_args: 原本要传给Pandoc的附加参数
+
+        Returns:
+            tuple: (success, message)
+
+        Raises:
+            UnsupportedContentError: 内容或选项需要交由Pandoc处理
+        """
+        if not self.supports_options(extra_args):
+            raise UnsupportedContentError(f"不支持的选项: {' '.join(extra_args)}")
+
+        if not template_file or not os.path.exists(template_file):
+            raise UnsupportedContentError(f"模板文件不存在: {template_file}")
+
+        temp_output = output_file + '.part'
+        try:
+            with zipfile.ZipFile(template_file) as template_zip, \
+                    zipfile.ZipFile(temp_output, 'w', zipfile.ZIP_DEFLATED) as output_zip:
+                self._write_package(html_content, template_zip, output_zip)
+            os.replace(temp_output, output_file)
+        finally:
+            if os.path.exists(temp_output):
+                os.unlink(temp_output)
+
+        return True, f"转换成功：{os.path.basename(output_file)}"
+
+    def _write_package(self, html_content, template_zip, output_zip):
+        """按模板复制各部件，并流式写入新的正文、编号、关系和媒体部件"""
+        names = set(template_zip.namelist())
+        styles = StyleMap(template_zip.read('word/styles.xml').decode('utf-8')
+                          if 'word/styles.xml' in names else '')
+        template_document = template_zip.read('word/document.xml').decode('utf-8')
+        sect_pr_match = re.search(r'<w:sectPr[ >].*?</w:sectPr>(?!.*<w:sectPr)',
+                                  template_document, re.S)
+        sect_pr = sect_pr_match.group(0) if sect_pr_match else ''
+
+        rels = template_zip.read('word/_rels/document.xml.rels').decode('utf-8')
+        content_types = template_zip.read('[Content_Types].xml').decode('utf-8')
+        if 'word/numbering.xml' in names:
+            numbering = template_zip.read('word/numbering.xml').decode('utf-8')
+        else:
+            numbering = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         f'<w:numbering xmlns:w="{W_NS}"></w:numbering>')
+            rels = _add_relationship(rels, 'rIdNativeNumbering', REL_NUMBERING, 'numbering.xml')
+            content_types = content_types.replace(
+                '</Types>',
+                f'<Override PartName="/word/numbering.xml" ContentType="{NUMBERING_CONTENT_TYPE}"/></Types>'
+            )
+
+        # 先写正文：解析过程中发现不支持的内容会直接抛出异常
+        with output_zip.open('word/document.xml', 'w') as document_stream:
+            builder = OoxmlBuilder(styles, NumberingBuilder(numbering), document_stream.write,
+                                   self.typography)
+            document_stream.write(DOCUMENT_HEADER.encode('utf-8'))
+            for chunk in ([html_content] if isinstance(html_content, str) else html_content):
+                builder.feed(chunk)
+            builder.close()
+            document_stream.write(f'{sect_pr}</w:body></w:document>'.encode('utf-8'))
+
+        rels = _add_relationships(rels, builder.relationships)
+
+        for part_name, data, extension, content_type in builder.media:
+            output_zip.writestr(part_name, data, compress_type=zipfile.ZIP_STORED)
+            if f'Extension="{extension}"' not in content_types:
+                content_types = content_types.replace(
+                    '</Types>',
+                    f'<Default Extension="{extension}" ContentType="{content_type}"/></Types>'
+                )
+
+        output_zip.writestr('word/numbering.xml', builder.numbering.merged_xml())
+        output_zip.writestr('word/_rels/document.xml.rels', rels)
+        output_zip.writestr('[Content_Types].xml', content_types)
+
+        skip_parts = {'word/document.xml', 'word/numbering.xml',
+                      'word/_rels/document.xml.rels', '[Content_Types].xml'}
+        for info in template_zip.infolist():
+            if info.filename not in skip_parts and not info.filename.endswith('/'):
+                output_zip.writestr(info, template_zip.read(info.filename))
+
+
+class StyleMap:
+    """按样式名称解析参考模板中的样式ID（WPS生成的模板使用数字ID）"""
+
+    def __init__(self, styles_xml):
+        self.ids = {}
+        for match in re.finditer(r'<w:style\b([^>]*)>\s*<w:name w:val="([^"]+)"', styles_xml):
+            style_id = re.search(r'w:styleId="([^"]+)"', match.group(1))
+            if style_id:
+                self.ids.setdefault(match.group(2).lower(), style_id.group(1))
+
+    def find(self, *names):
+        """返回第一个存在于模板中的样式ID，均不存在时返回None"""
+        for name in names:
+            style_id = self.ids.get(name.lower())
+            if style_id:
+                return style_id
+        return None
+
+
+class NumberingBuilder:
+    """为每个列表实例生成编号定义，合并到模板原有的numbering.xml中"""
+
+    BULLETS = ['•', '◦', '▪']
+
+    def __init__(self, numbering_xml):
+        abstract_ids = [int(x) for x in re.findall(r'w:abstractNumId="(\d+)"', numbering_xml)]
+        num_ids = [int(x) for x in re.findall(r'<w:num w:numId="(\d+)"', numbering_xml)]
+        self.numbering_xml = numbering_xml
+        self.bullet_abstract = max(abstract_ids, default=-1) + 1
+        self.decimal_abstract = self.bullet_abstract + 1
+        self.base_num_id = max(num_ids, default=0) + 1
+        self.instances = []  # [(ordered, start)]
+
+    def new_list(self, ordered, start=1):
+        """登记一个新的列表实例，返回其numId"""
+        self.instances.append((ordered, start))
+        return self.base_num_id + len(self.instances) - 1
+
+    def merged_xml(self):
+        """将新编号定义追加到模板编号部件中，返回合并后的XML"""
+        if not self.instances:
+            return self.numbering_xml
+
+        abstracts = (self._abstract_num(self.bullet_abstract, False)
+                     + self._abstract_num(self.decimal_abstract, True))
+        nums = ''.join(
+            f'<w:num w:numId="{self.base_num_id + index}">'
+            f'<w:abstractNumId w:val="{self.decimal_abstract if ordered else self.bullet_abstract}"/>'
+            f'<w:lvlOverride w:ilvl="0"><w:startOverride w:val="{start}"/></w:lvlOverride>'
+            f'</w:num>'
+            for index, (ordered, start) in enumerate(self.instances)
+        )
+
+        # abstractNum必须位于所有num之前
+        numbering_xml = self.numbering_xml
+        first_num = numbering_xml.find('<w:num ')
+        if first_num == -1:
+            first_num = numbering_xml.rfind('</w:numbering>')
+        merged = numbering_xml[:first_num] + abstracts + numbering_xml[first_num:]
+        end = merged.rfind('</w:numbering>')
+        return merged[:end] + nums + merged[end:]
+
+    def _abstract_num(self, abstract_id, ordered):
+        levels = []
+        for level in range(9):
+            if ordered:
+                fmt, text = 'decimal', f'%{level + 1}.'
+            else:
+                fmt, text = 'bullet', self.BULLETS[level % len(self.BULLETS)]
+            levels.append(
+                f'<w:lvl w:ilvl="{level}"><w:start w:val="1"/><w:numFmt w:val="{fmt}"/>'
+                f'<w:lvlText w:val="{text}"/><w:lvlJc w:val="left"/>'
+                f'<w:pPr><w:ind w:left="{720 * (level + 1)}" w:hanging="360"/></w:pPr></w:lvl>'
+            )
+        return (f'<w:abstractNum w:abstractNumId="{abstract_id}">'
+                f'<w:multiLevelType w:val="multilevel"/>{"".join(levels)}</w:abstractNum>')
+
+
+class OoxmlBuilder(HTMLParser):
+    """HTML事件驱动的OOXML正文生成器，段落完成即写出"""
+
+    def __init__(self, styles, numbering, write, typography=None):
+        super().__init__(convert_charrefs=True)
+        self._write = write
+        self.typography = typography
+        self.numbering = numbering
+        self.relationships = []  # [(rId, type, target, external)]
+        self.media = []  # [(part_name, data, extension, content_type)]
+
+        self.style_body = styles.find('Body Text', 'Normal (Web)', 'Normal')
+        self.style_compact = styles.find('Compact', 'List Paragraph') or self.style_body
+        self.style_code = styles.find('Source Code', 'HTML Preformatted', 'macro')
+        self.style_quote = styles.find('Block Text', 'Quote')
+        self.style_term = styles.find('Definition Term')
+        self.style_definition = styles.find('Definition')
+        self.style_table = styles.find('Table', 'Table Grid')
+        self.style_verbatim = styles.find('Verbatim Char', 'HTML Code')
+        self.style_hyperlink = styles.find('Hyperlink')
+        self.style_headings = [styles.find(f'heading {level}') for level in range(1, 7)]
+
+        self._sinks = []  # 表格单元格内的段落先缓存，表格结束后整体写出
+        self._blocks = []  # 块级上下文栈
+        self._lists = []  # [(numId, ordered)]
+        self._table = None
+        self._para = None  # 当前段落的runs
+        self._para_ppr = ''
+        self._at_space = True
+        self._bold = 0
+        self._italic = 0
+        self._code = 0
+        self._links = []
+        self._in_head = False
+        self._in_title = False
+        self._in_pre = False
+        self._image_count = 0
+
+    # ---- 输出 ----
+
+    def _emit(self, xml):
+        if self._sinks:
+            self._sinks[-1].append(xml)
+        else:
+            self._write(xml.encode('utf-8'))
+
+    def _open_paragraph(self, style=None, extra_ppr=''):
+        self._close_paragraph()
+        ppr = f'<w:pStyle w:val="{style}"/>' if style else ''
+        self._para = []
+        self._para_ppr = ppr + extra_ppr
+        self._at_space = True
+
+    def _close_paragraph(self):
+        if self._para is None:
+            return
+        ppr = f'<w:pPr>{self._para_ppr}</w:pPr>' if self._para_ppr else ''
+        self._emit(f'<w:p>{ppr}{"".join(self._para)}</w:p>')
+        self._para = None
+
+    def _ensure_paragraph(self):
+        """行内内容出现时，按当前块级上下文打开隐式段落"""
+        if self._para is None:
+            style, extra = self._context_paragraph_props()
+            self._open_paragraph(style, extra)
+
+    def _context_paragraph_props(self):
+        """根据块级上下文栈确定新段落的样式和缩进/编号"""
+        style = self.style_body
+        extra = ''
+        for block in reversed(self._blocks):
+            tag = block['tag']
+            if tag == 'li':
+                style = self.style_compact
+                if block['first']:
+                    block['first'] = False
+                    extra = (f'<w:numPr><w:ilvl w:val="{block["level"]}"/>'
+                             f'<w:numId w:val="{block["list"]}"/></w:numPr>')
+                else:
+                    extra = f'<w:ind w:left="{720 * (block["level"] + 1)}"/>'
+                break
+            if tag in ('td', 'th'):
+                style = self.style_compact
+                break
+            if tag == 'dd':
+                style = self.style_definition or self.style_body
+                if not self.style_definition:
+                    extra = '<w:ind w:left="720"/>'
+                break
+            if tag == 'blockquote':
+                style = self.style_quote or self.style_body
+                if not self.style_quote:
+                    extra = '<w:ind w:left="720" w:right="720"/>'
+                break
+        return style, extra
+
+    def _add_run(self, text=None, raw=None):
+        self._ensure_paragraph()
+        rpr = ''
+        if self._code:
+            rpr += (f'<w:rStyle w:val="{self.style_verbatim}"/>' if self.style_verbatim
+                    else '<w:rFonts w:ascii="Consolas" w:hAnsi="Consolas"/>')
+        elif self._links and self.style_hyperlink:
+            rpr += f'<w:rStyle w:val="{self.style_hyperlink}"/>'
+        if self._bold:
+            rpr += '<w:b/><w:bCs/>'
+        if self._italic:
+            rpr += '<w:i/><w:iCs/>'
+        rpr = f'<w:rPr>{rpr}</w:rPr>' if rpr else ''
+
+        if raw is None:
+            text = INVALID_XML_CHARS.sub('', text)
+            raw = f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+        run = f'<w:r>{rpr}{raw}</w:r>'
+
+        if self._links:
+            run = self._links[-1].replace('{run}', run)
+        self._para.append(run)
+
+    # ---- HTMLParser回调 ----
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if self._in_head and tag not in STRUCTURE_TAGS:
+            raise UnsupportedContentError(f"head中的<{tag}>")
+        if tag in STRUCTURE_TAGS:
+            self._in_head = self._in_head or tag == 'head'
+            self._in_title = tag == 'title'
+        elif tag in BLOCK_TAGS:
+            self._start_block(tag, attrs)
+        elif tag in INLINE_TAGS:
+            self._start_inline(tag, attrs)
+        else:
+            raise UnsupportedContentError(f"<{tag}>")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ('br', 'img', 'hr', 'meta'):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self._in_head = False
+        elif tag == 'title':
+            self._in_title = False
+        elif tag in BLOCK_TAGS:
+            self._end_block(tag)
+        elif tag in ('strong', 'b'):
+            self._bold = max(0, self._bold - 1)
+        elif tag in ('em', 'i'):
+            self._italic = max(0, self._italic - 1)
+        elif tag == 'code':
+            self._code = max(0, self._code - 1)
+        elif tag == 'a' and self._links:
+            self._links.pop()
+
+    def handle_data(self, data):
+        if self._in_head:
+            if self._in_title and data.strip():
+                # Pandoc会把标题生成为文档标题段落
+                raise UnsupportedContentError("非空<title>")
+            return
+
+        if self._in_pre:
+            if self._para is not None and not self._para:
+                data = data[1:] if data.startswith('\n') else data
+            lines = data.split('\n')
+            for index, line in enumerate(lines):
+                if index:
+                    self._add_run(raw='<w:br/>')
+                if line:
+                    self._add_run(line)
+            return
+
+        text = re.sub(r'\s+', ' ', data)
+        if self._para is None or self._at_space:
+            text = text.lstrip()
+        if not text:
+            return
+        if self.typography and not self._code:
+            text = apply_typography(text, self.typography)
+        self._add_run(text)
+        self._at_space = text.endswith(' ')
+
+    # ---- 块级元素 ----
+
+    def _start_block(self, tag, attrs):
+        self._close_paragraph()
+        if self._in_pre:
+            raise UnsupportedContentError(f"<pre>中的<{tag}>")
+
+        if tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            self._open_paragraph(self.style_headings[int(tag[1]) - 1])
+        elif tag == 'p':
+            style, extra = self._context_paragraph_props()
+            self._open_paragraph(style, extra)
+        elif tag in ('ul', 'ol'):
+            start = attrs.get('start', '1')
+            start = int(start) if start.isdigit() else 1
+            self._lists.append((self.numbering.new_list(tag == 'ol', start), tag == 'ol'))
+        elif tag == 'li':
+            num_id = self._lists[-1][0] if self._lists else self.numbering.new_list(False)
+            self._blocks.append({'tag': 'li', 'first': True, 'list': num_id,
+                                 'level': min(max(len(self._lists) - 1, 0), 8)})
+        elif tag == 'dt':
+            self._open_paragraph(self.style_term or self.style_body)
+            if not self.style_term:
+                self._bold += 1
+        elif tag in ('dd', 'blockquote'):
+            self._blocks.append({'tag': tag})
+        elif tag == 'pre':
+            self._open_paragraph(self.style_code)
+            self._in_pre = True
+        elif tag == 'hr':
+            self._open_paragraph(None, '<w:pBdr><w:bottom w:val="single" w:sz="6" '
+                                       'w:space="1" w:color="auto"/></w:pBdr>')
+            self._close_paragraph()
+        elif tag == 'table':
+            if self._table is not None:
+                raise UnsupportedContentError("嵌套表格")
+            self._table = {'rows': [], 'row': None, 'cell': None, 'head': False}
+        elif tag == 'thead':
+            self._require_table(tag)['head'] = True
+        elif tag == 'tbody':
+            self._require_table(tag)['head'] = False
+        elif tag == 'tr':
+            table = self._require_table(tag)
+            table['row'] = {'cells': [], 'head': table['head']}
+        elif tag in ('td', 'th'):
+            table = self._require_table(tag)
+            if cell_span(attrs.get('colspan')) > 1 or cell_span(attrs.get('rowspan')) > 1:
+                # 合并单元格需要gridSpan/vMerge，由Pandoc处理
+                raise UnsupportedContentError("合并单元格")
+            if table['row'] is None:
+                table['row'] = {'cells': [], 'head': table['head']}
+            table['cell'] = []
+            self._sinks.append(table['cell'])
+            self._blocks.append({'tag': tag})
+            if tag == 'th':
+                self._bold += 1
+
+    def _end_block(self, tag):
+        self._close_paragraph()
+
+        if tag == 'pre':
+            self._in_pre = False
+        elif tag in ('ul', 'ol'):
+            if self._lists:
+                self._lists.pop()
+        elif tag in ('li', 'dd', 'blockquote'):
+            self._pop_block(tag)
+        elif tag == 'dt':
+            if not self.style_term:
+                self._bold = max(0, self._bold - 1)
+        elif tag in ('td', 'th') and self._table is not None and self._table['cell'] is not None:
+            cell = self._table['cell']
+            self._sinks.pop()
+            self._pop_block(tag)
+            if tag == 'th':
+                self._bold = max(0, self._bold - 1)
+            self._table['row']['cells'].append(''.join(cell) or '<w:p/>')
+            self._table['cell'] = None
+        elif tag == 'tr' and self._table is not None and self._table['row'] is not None:
+            self._add_row(self._table, self._table['row'])
+            self._table['row'] = None
+        elif tag == 'thead' and self._table is not None:
+            self._table['head'] = False
+        elif tag == 'table' and self._table is not None:
+            table = self._table
+            self._table = None
+            if table['row'] is not None and table['row']['cells']:
+                self._add_row(table, table['row'])
+            self._finish_table(table)
+
+    def _pop_block(self, tag):
+        for index in range(len(self._blocks) - 1, -1, -1):
+            if self._blocks[index]['tag'] == tag:
+                del self._blocks[index:]
+                return
+
+    def _require_table(self, tag):
+        if self._table is None:
+            raise UnsupportedContentError(f"表格外的<{tag}>")
+        return self._table
+
+    def _add_row(self, table, row):
+        """一行结束：先缓存，列数要等整个表格结束后才能确定"""
+        table['rows'].append(row)
+
+    def _finish_table(self, table):
+        self._emit(self._table_xml(table['rows']))
+
+    def _table_xml(self, rows):
+        columns = max((len(row['cells']) for row in rows), default=0)
+        if not columns:
+            return ''
+        parts = [self._table_start_xml(columns)]
+        parts.extend(self._row_xml(row, columns) for row in rows)
+        parts.append('</w:tbl>')
+        return ''.join(parts)
+
+    def _table_start_xml(self, columns):
+        style = f'<w:tblStyle w:val="{self.style_table}"/>' if self.style_table else ''
+        grid = ''.join(f'<w:gridCol w:w="{9000 // columns}"/>' for _ in range(columns))
+        return (f'<w:tbl><w:tblPr>{style}<w:tblW w:w="5000" w:type="pct"/>'
+                f'<w:tblLook w:val="0020" w:firstRow="1" w:lastRow="0" w:firstColumn="0" '
+                f'w:lastColumn="0" w:noHBand="0" w:noVBand="0"/></w:tblPr>'
+                f'<w:tblGrid>{grid}</w:tblGrid>')
+
+    def _row_xml(self, row, columns):
+        cells = row['cells'] + ['<w:p/>'] * (columns - len(row['cells']))
+        row_pr = '<w:trPr><w:tblHeader/></w:trPr>' if row['head'] else ''
+        return (f'<w:tr>{row_pr}'
+                + ''.join(f'<w:tc><w:tcPr><w:tcW w:w="0" w:type="auto"/></w:tcPr>{cell}</w:tc>' for cell in cells)
+                + '</w:tr>')
+
+    # ---- 行内元素 ----
+
+    def _start_inline(self, tag, attrs):
+        if tag in ('strong', 'b'):
+            self._bold += 1
+        elif tag in ('em', 'i'):
+            self._italic += 1
+        elif tag == 'code':
+            if attrs.get('class'):
+                # 带语言标记的代码需要Pandoc的语法高亮
+                raise UnsupportedContentError("带class的<code>")
+            self._code += 1
+        elif tag == 'br':
+            self._add_run(raw='<w:br/>')
+            self._at_space = True
+        elif tag == 'a':
+            self._links.append(self._hyperlink_wrapper(attrs.get('href') or ''))
+        elif tag == 'img':
+            self._add_image(attrs)
+
+    def _hyperlink_wrapper(self, href):
+        if not href or href == '#':
+            return '{run}'
+        if href.startswith('#'):
+            return f'<w:hyperlink w:anchor={quoteattr(href[1:])}>{{run}}</w:hyperlink>'
+        rel_id = f'rIdNativeLink{len(self.relationships) + 1}'
+        self.relationships.append((rel_id, REL_HYPERLINK, href, True))
+        return f'<w:hyperlink r:id="{rel_id}">{{run}}</w:hyperlink>'
+
+    def _add_image(self, attrs):
+        src = attrs.get('src') or ''
+        if re.match(r'^(https?|ftp)://', src, re.I):
+            # 远程图片由Pandoc负责下载
+            raise UnsupportedContentError(f"远程图片: {src[:80]}")
+        data = _load_image_data(src)
+        if data is None:
+            # 与Pandoc一致：找不到的本地图片以替代文本代替
+            if attrs.get('alt'):
+                self._add_run(attrs['alt'])
+            return
+        extension, content_type, width, height = _image_info(data)
+        if extension is None:
+            raise UnsupportedContentError("不支持的图片格式")
+
+        self._image_count += 1
+        index = self._image_count
+        part_name = f'word/media/native_image{index}.{extension}'
+        rel_id = f'rIdNativeImage{index}'
+        self.media.append((part_name, data, extension, content_type))
+        self.relationships.append((rel_id, REL_IMAGE, f'media/native_image{index}.{extension}', False))
+
+        cx, cy = width * EMU_PER_PIXEL, height * EMU_PER_PIXEL
+        if cx > MAX_IMAGE_WIDTH_EMU:
+            cx, cy = MAX_IMAGE_WIDTH_EMU, int(cy * MAX_IMAGE_WIDTH_EMU / cx)
+        alt = quoteattr(attrs.get('alt') or '')
+        self._add_run(raw=(
+            f'<w:drawing><wp:inline distT="0" distB="0" distL="0" distR="0">'
+            f'<wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{index}" name="Picture {index}" descr={alt}/>'
+            f'<a:graphic><a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+            f'<pic:pic><pic:nvPicPr><pic:cNvPr id="{index}" name="native_image{index}.{extension}"/>'
+            f'<pic:cNvPicPr/></pic:nvPicPr><pic:blipFill><a:blip r:embed="{rel_id}"/>'
+            f'<a:stretch><a:fillRect/></a:stretch></pic:blipFill><pic:spPr>'
+            f'<a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+            f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr></pic:pic>'
+            f'</a:graphicData></a:graphic></wp:inline></w:drawing>'
+        ))
+
+    def close(self):
+        super().close()
+        self._close_paragraph()
+        if self._table is not None:
+            raise UnsupportedContentError("未闭合的<table>")
+
+
+def cell_span(value):
+    """colspan/rowspan属性值对应的跨度，缺省或无效时为1（与浏览器一致，只取开头的数字）"""
+    match = re.match(r'\s*(\d+)', value or '')
+    return int(match.group(1)) if match else 1
+
+
+def _add_relationship(rels_xml, rel_id, rel_type, target, external=False):
+    return _add_relationships(rels_xml, [(rel_id, rel_type, target, external)])
+
+
+def _add_relationships(rels_xml, relationships):
+    """一次追加多个关系（上万个链接时逐个替换字符串太慢）"""
+    if not relationships:
+        return rels_xml
+    added = []
+    for rel_id, rel_type, target, external in relationships:
+        mode = ' TargetMode="External"' if external else ''
+        added.append(f'<Relationship Id="{rel_id}" Type="{rel_type}" '
+                     f'Target={quoteattr(target)}{mode}/>')
+    return rels_xml.replace('</Relationships>', ''.join(added) + '</Relationships>')
+
+
+def _load_image_data(src):
+    """读取data URI或本地文件形式的图片，读取失败时返回None"""
+    if src.startswith('data:'):
+        header, _, payload = src.partition(',')
+        if ';base64' not in header:
+            return None
+        try:
+            return base64.b64decode(payload)
+        except ValueError:
+            return None
+    if src.startswith('file://'):
+        src = unquote(src[len('file://'):])
+        if re.match(r'^/[A-Za-z]:', src):
+            src = src[1:]
+    if '://' in src:
+        return None
+    if os.path.isfile(src):
+        with open(src, 'rb') as f:
+            return f.read()
+    return None
+
+
+def _image_info(data):
+    """从文件头识别图片格式和像素尺寸
+
+    Returns:
+        tuple: (扩展名, Content-Type, 宽, 高)，无法识别时扩展名为None
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', 'image/png', width, height
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', 'image/gif', width, height
+    if data.startswith(b'\xff\xd8'):
+        offset = 2
+        while offset + 9 < len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            segment_length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if marker in (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                          0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF):
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return 'jpeg', 'image/jpeg', width, height
+            offset += 2 + segment_length
+    return None, None, 0, 0
@@ -5,8 +5,6 @@ Pandoc转换器模块
 
 import os
 import sys
-import subprocess
-from PyQt5.QtWidgets import QMessageBox
 
 
 class PandocConverter:
@@ -52,6 +50,8 @@ class PandocConverter:
         if not os.path.exists(input_file):
             return False, f"输入文件不存在: {input_file}"
         
+        import subprocess
+        
         # 构建pandoc命令
         cmd = [self.pandoc_path, input_file, '-o', output_file]
         
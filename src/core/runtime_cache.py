@@ -0,0 +1,279 @@
+"""
+运行时缓存模块
+单文件打包时，将pandoc等大体积资源以压缩包形式打入exe，
+首次启动解压到按版本区分、经过哈希校验的用户缓存目录，之后的启动直接复用。
+引导程序每次启动仍会把压缩包本身解压到 _MEIPASS，这里省去的是每次展开完整的资源目录
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import zipfile
+
+try:
+    import fcntl
+except ImportError:
+    # Windows：打开的文件使目录无法改名，不需要额外加锁
+    fcntl = None
+
+
+APP_NAME = 'jindouyun-typesetter'
+
+# 打包时压缩包及其哈希文件在exe内的相对目录
+PAYLOAD_DIR = 'payload'
+
+# 缓存目录中标记解压完成的清单文件
+MANIFEST_NAME = '.manifest.json'
+
+# 使用中标记：正在运行的程序在退出前一直打开（POSIX上另加共享锁），清理旧版本时跳过这些目录
+IN_USE_NAME = '.in-use'
+
+# 清理旧版本时先改名为带该标记的目录再删除，删除中断时下次清理直接删除
+STALE_MARKER = '.stale-'
+
+# 本进程持有的使用中标记（进程退出时由系统关闭）
+_in_use_files = []
+
+
+class PayloadError(Exception):
+    """exe中的资源压缩包既无法解压到用户缓存目录，也无法解压到临时目录"""
+
+
+def get_cache_root():
+    """获取当前用户的运行时缓存根目录"""
+    if sys.platform.startswith('win'):
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, APP_NAME, 'runtime')
+
+
+def get_data_root():
+    """获取当前用户的应用数据根目录（草稿、日志等需要长期保留的文件）"""
+    if sys.platform.startswith('win'):
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, APP_NAME)
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """分块计算文件的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_payload_archive(name, source_dir, output_dir):
+    """打包阶段：把资源目录压缩成单个压缩包并写出哈希文件（供spec文件调用）
+
+    Args:
+        name: 资源名称，例如 'pandoc'
+        source_dir: 资源目录
+        output_dir: 压缩包输出目录
+
+    Returns:
+        list: 可直接追加到PyInstaller datas中的 (文件, 目标目录) 列表
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    archive_path = os.path.join(output_dir, f'{name}.zip')
+
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        for root, _, files in os.walk(source_dir):
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                archive.write(file_path, os.path.relpath(file_path, source_dir))
+
+    hash_path = archive_path + '.sha256'
+    with open(hash_path, 'w', encoding='utf-8') as f:
+        f.write(file_sha256(archive_path))
+
+    return [(archive_path, PAYLOAD_DIR), (hash_path, PAYLOAD_DIR)]
+
+
+def resolve_bundled_payload(name, bundle_dir, cache_root=None):
+    """运行阶段：返回资源在用户缓存中的目录，必要时先解压
+
+    Args:
+        name: 资源名称，例如 'pandoc'
+        bundle_dir: exe解压出的临时目录（sys._MEIPASS）
+        cache_root: 缓存根目录，默认为当前用户缓存目录
+
+    Returns:
+        str: 资源目录路径；exe中没有对应压缩包时返回None（资源按原样打包在 bundle_dir 中）
+
+    Raises:
+        PayloadError: 缓存目录和临时目录都无法解压（如压缩包损坏）
+    """
+    archive_path = os.path.join(bundle_dir, PAYLOAD_DIR, f'{name}.zip')
+    hash_path = archive_path + '.sha256'
+    if not os.path.exists(archive_path) or not os.path.exists(hash_path):
+        return None
+
+    with open(hash_path, 'r', encoding='utf-8') as f:
+        expected_hash = f.read().strip()
+
+    cache_root = cache_root or get_cache_root()
+    target_dir = os.path.join(cache_root, f'{name}-{expected_hash[:16]}')
+
+    # 先标记使用中再校验，校验通过后其他版本的程序不会再删除该目录
+    if os.path.isdir(target_dir) and _mark_in_use(target_dir):
+        if _is_cache_valid(target_dir, expected_hash):
+            return target_dir
+        # 缓存已失效，释放标记以便重新解压时替换整个目录
+        _in_use_files.pop().close()
+
+    try:
+        _extract_payload(archive_path, expected_hash, target_dir)
+        _mark_in_use(target_dir)
+    except (OSError, zipfile.BadZipFile, ValueError) as e:
+        # exe中没有原样打包的资源目录，只能解压到本次运行的临时目录（退出时随之删除）
+        print(f"运行时缓存解压失败，改为解压到临时目录: {e}")
+        fallback_dir = os.path.join(bundle_dir, name)
+        try:
+            _extract_payload(archive_path, expected_hash, fallback_dir)
+        except (OSError, zipfile.BadZipFile, ValueError) as fallback_error:
+            raise PayloadError(f"{name} 无法解压：{fallback_error}") from fallback_error
+        return fallback_dir
+
+    _remove_stale_versions(cache_root, name, target_dir)
+    return target_dir
+
+
+def _is_cache_valid(target_dir, expected_hash):
+    """通过清单中的哈希、文件大小和修改时间快速校验缓存（只做stat，不重新计算哈希）
+
+    压缩包的哈希在解压前校验，并决定缓存目录名；目录中的文件解压后不再由程序改写，
+    其他程序改写或替换文件（包括大小相同的）都会改变修改时间，缓存随之失效并重新解压。
+    每次启动重新计算上百MB的哈希正是缓存要省去的耗时，而能改写用户缓存目录的程序同样能改写exe本身，
+    重新计算哈希并不能多防住什么。旧版本清单中没有修改时间，同样视为失效
+    """
+    manifest_path = os.path.join(target_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if manifest.get('sha256') != expected_hash:
+        return False
+
+    files = manifest.get('files')
+    if not files:
+        return False
+    for relative_path, recorded in files.items():
+        try:
+            if _file_signature(os.path.join(target_dir, relative_path)) != recorded:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _file_signature(path):
+    """缓存校验使用的文件属性：[大小, 修改时间（纳秒）]（与清单中JSON数组的格式一致）"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _extract_payload(archive_path, expected_hash, target_dir):
+    """校验压缩包哈希后解压到临时目录，再整体改名为目标目录"""
+    actual_hash = file_sha256(archive_path)
+    if actual_hash != expected_hash:
+        raise ValueError(f"压缩包哈希不匹配: {actual_hash} != {expected_hash}")
+
+    staging_dir = f'{target_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    files = {}
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            extracted_path = archive.extract(info, staging_dir)
+            # 目录整体改名不会改变文件的修改时间，清单在暂存目录中记录即可
+            files[info.filename] = _file_signature(extracted_path)
+
+    with open(os.path.join(staging_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump({'sha256': expected_hash, 'files': files}, f)
+
+    # 其他进程可能已抢先完成解压，此时保留已有目录
+    if _is_cache_valid(target_dir, expected_hash):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return
+
+    shutil.rmtree(target_dir, ignore_errors=True)
+    try:
+        os.replace(staging_dir, target_dir)
+    except OSError:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        if not _is_cache_valid(target_dir, expected_hash):
+            raise
+
+
+def _remove_stale_versions(cache_root, name, keep_dir):
+    """清理同一资源的旧版本缓存，避免缓存目录无限增长（仍在运行的其他版本正在使用的目录保留）"""
+    try:
+        entries = os.listdir(cache_root)
+    except OSError:
+        return
+
+    for entry in entries:
+        path = os.path.join(cache_root, entry)
+        if not entry.startswith(f'{name}-') or path == keep_dir or '.tmp-' in entry:
+            continue
+        if STALE_MARKER in entry:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            _remove_unused(path)
+
+
+def _mark_in_use(directory):
+    """打开目录中的使用中标记并保持到进程退出
+
+    Returns:
+        bool: 是否标记成功（目录正被清理时返回False）
+    """
+    try:
+        marker = open(os.path.join(directory, IN_USE_NAME), 'ab')
+    except OSError:
+        return False
+    if fcntl is not None:
+        try:
+            fcntl.flock(marker, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            marker.close()
+            return False
+    _in_use_files.append(marker)
+    return True
+
+
+def _remove_unused(directory):
+    """删除没有程序在使用的旧版本目录
+
+    先把目录改名再删除：Windows上目录中有打开的文件（使用中标记、正在运行的pandoc.exe）时改名失败；
+    POSIX上改名前先取得使用中标记的排他锁，有程序持有共享锁时跳过
+    """
+    lock = None
+    if fcntl is not None:
+        try:
+            lock = open(os.path.join(directory, IN_USE_NAME), 'ab')
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            if lock is not None:
+                lock.close()
+            return
+    stale_dir = f'{directory}{STALE_MARKER}{os.getpid()}'
+    try:
+        os.rename(directory, stale_dir)
+    except OSError:
+        return
+    finally:
+        if lock is not None:
+            lock.close()
+    shutil.rmtree(stale_dir, ignore_errors=True)
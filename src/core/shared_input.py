@@ -0,0 +1,130 @@
+"""
+共享内存输入模块
+协调进程把任务的HTML内容（或源文件的内容）放入一段命名共享内存，只把名称和长度发给本机的工作进程；
+工作进程映射同一段内存，原生写入器按块解码、Pandoc从标准输入读取，内容不经过套接字传输，
+也不在工作进程中复制一份
+"""
+
+import os
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # pragma: no cover - 没有共享内存支持的平台
+    shared_memory = None
+
+
+# 共享内存段名称的前缀（便于在 /dev/shm 中识别残留的段）
+NAME_PREFIX = 'jdy_'
+
+
+def shared_memory_available():
+    """当前平台是否支持命名共享内存"""
+    return shared_memory is not None
+
+
+class SharedInput:
+    """一段放有任务内容的命名共享内存
+
+    创建方（协调进程）关闭时删除这段内存；附加方（工作进程）关闭时只解除映射
+    """
+
+    def __init__(self, segment, size, owner):
+        self._segment = segment
+        self.size = size
+        self.owner = owner
+        # 共享内存分配的大小按页对齐，对外只暴露内容部分
+        self.buffer = segment.buf[:size]
+
+    @classmethod
+    def create(cls, data):
+        """新建共享内存并写入内容（内容只复制这一次）
+
+        Raises:
+            OSError: 无法分配共享内存
+        """
+        shared_input = cls(_allocate(len(data)), len(data), owner=True)
+        shared_input.buffer[:] = data
+        return shared_input
+
+    @classmethod
+    def from_file(cls, path):
+        """新建共享内存并把文件内容直接读入（不经过Python字节串）
+
+        Raises:
+            OSError: 无法读取文件或分配共享内存
+        """
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            shared_input = cls(_allocate(size), size, owner=True)
+            try:
+                read = f.readinto(shared_input.buffer)
+                if size and read != size:
+                    raise OSError(f'文件在读取过程中被修改: {path}')
+            except BaseException:
+                shared_input.close()
+                raise
+        return shared_input
+
+    @classmethod
+    def attach(cls, name, size):
+        """映射其他进程创建的共享内存
+
+        Raises:
+            OSError: 共享内存不存在（已被删除，或不在同一台电脑上）
+            ValueError: 共享内存比声明的内容短
+        """
+        segment = shared_memory.SharedMemory(name=name)
+        _untrack(segment)
+        if segment.size < size:
+            segment.close()
+            raise ValueError(f'共享内存长度不足: {segment.size} < {size}')
+        return cls(segment, size, owner=False)
+
+    @property
+    def name(self):
+        return self._segment.name
+
+    def close(self):
+        """解除映射，创建方同时删除共享内存"""
+        if self._segment is None:
+            return
+        segment, self._segment = self._segment, None
+        self.buffer.release()
+        try:
+            segment.close()
+        except BufferError:
+            # 仍有对内容的引用（如异常回溯中的切片），映射在这些引用释放后回收
+            pass
+        if self.owner:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _allocate(size):
+    # 长度为0的共享内存无法创建
+    return shared_memory.SharedMemory(
+        name=f'{NAME_PREFIX}{os.getpid()}_{os.urandom(6).hex()}', create=True, size=max(1, size)
+    )
+
+
+def _untrack(segment):
+    """附加方不登记到资源跟踪进程
+
+    Python 3.13之前，附加已有的共享内存也会被登记，附加方退出时会把创建方仍在使用的共享内存删除
+    """
+    # 同一进程创建的共享内存由创建方登记和删除
+    if os.name != 'posix' or segment.name.startswith(f'{NAME_PREFIX}{os.getpid()}_'):
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    except (ImportError, AttributeError):
+        pass
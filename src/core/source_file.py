@@ -0,0 +1,207 @@
+"""
+源文件读取模块
+以内存映射方式打开磁盘上的HTML或Markdown文件：根据开头几KB判断编码和格式，
+转换时按块解码流式交给转换器，编辑框中只按页显示预览，整个文件不会一次性读入内存
+"""
+
+import os
+import re
+import mmap
+import codecs
+
+from core.clipboard_payload import HTML_SOURCE_PATTERN
+
+
+# 判断编码和格式时读取的字节数
+SNIFF_BYTES = 64 * 1024
+
+# 流式转换时每次解码的字节数
+CHUNK_BYTES = 1024 * 1024
+
+# 预览每页的字节数（编辑框排版64KB的纯文本不会卡顿）
+PREVIEW_PAGE_BYTES = 64 * 1024
+
+FORMAT_HTML = 'html'
+FORMAT_MARKDOWN = 'markdown'
+
+HTML_EXTENSIONS = ('.html', '.htm', '.xhtml')
+MARKDOWN_EXTENSIONS = ('.md', '.markdown', '.mdown', '.mkd')
+
+FILE_FILTER = 'HTML或Markdown文件 (*.html *.htm *.xhtml *.md *.markdown);;所有文件 (*)'
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+META_CHARSET_PATTERN = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+# 国标编码统一按超集GB18030解码
+ENCODING_ALIASES = {'gb2312': 'gb18030', 'gbk': 'gb18030', 'x-gbk': 'gb18030', 'cp936': 'gb18030'}
+
+
+def sniff_encoding(head):
+    """根据文件开头判断编码
+
+    依次使用：BOM、开头内容能否按UTF-8解码（纯ASCII时参考HTML中声明的charset）、GB18030
+
+    Returns:
+        tuple: (encoding, bom_length)
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+
+    try:
+        # final=False：末尾被截断的多字节字符不算解码失败
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        utf8 = False
+    else:
+        utf8 = True
+    if utf8 and not head.isascii():
+        return 'utf-8', 0
+
+    declared = META_CHARSET_PATTERN.search(head)
+    if declared:
+        name = declared.group(1).decode('ascii').lower()
+        try:
+            encoding = codecs.lookup(ENCODING_ALIASES.get(name, name)).name
+        except LookupError:
+            encoding = None
+        # 声明与实际内容矛盾时以内容为准
+        if encoding and not encoding.startswith('utf-16') and (utf8 or encoding != 'utf-8'):
+            return encoding, 0
+    return ('utf-8' if utf8 else 'gb18030'), 0
+
+
+def sniff_format(path, head_text):
+    """根据扩展名判断格式，扩展名未知时按内容是否像HTML源码判断"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in HTML_EXTENSIONS:
+        return FORMAT_HTML
+    if extension in MARKDOWN_EXTENSIONS:
+        return FORMAT_MARKDOWN
+    return FORMAT_HTML if HTML_SOURCE_PATTERN.match(head_text) else FORMAT_MARKDOWN
+
+
+class SourceFile:
+    """内存映射打开的源文件（只读），用完后需要 close()
+
+    传入 buffer（如共享内存中的内容）时直接读取这段内存，path 只用于按扩展名判断格式，
+    buffer 由调用方负责释放
+    """
+
+    def __init__(self, path, buffer=None):
+        self.path = path
+        self.buffer = buffer
+        if buffer is not None:
+            self.size = len(buffer)
+            self._file = None
+            self._map = buffer
+        else:
+            self.size = os.path.getsize(path)
+            self._file = open(path, 'rb')
+            # 空文件无法映射
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+        head = bytes(self._map[:SNIFF_BYTES])
+        self.encoding, self.bom_length = sniff_encoding(head)
+        self.format = sniff_format(path, self._decode(head[self.bom_length:]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            if self.size:
+                self._map.close()
+            self._file.close()
+            self._file = None
+
+    @property
+    def is_utf8(self):
+        return self.encoding == 'utf-8'
+
+    @property
+    def in_memory(self):
+        """内容来自内存而不是磁盘上的文件"""
+        return self.buffer is not None
+
+    def iter_text(self, chunk_bytes=CHUNK_BYTES):
+        """按块解码全文
+
+        HTML的每块都在“<”之前结束，文本节点不会被拆到两块中，
+        原生写入器逐块解析时空白折叠和中文排版与一次性解析的结果一致
+        """
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        rest = ''
+        for start in range(self.bom_length, self.size, chunk_bytes):
+            text = rest + decoder.decode(self._map[start:start + chunk_bytes])
+            split = text.rfind('<') if self.format == FORMAT_HTML else len(text)
+            if split <= 0:
+                rest = text
+                continue
+            yield text[:split]
+            rest = text[split:]
+        rest += decoder.decode(b'', final=True)
+        if rest:
+            yield rest
+
+    def signature(self):
+        """文件的签名：(大小, 修改时间（纳秒）)，只读取文件属性，不读取内容
+
+        内存中的内容（传入 buffer）没有修改时间，返回 (大小, None)
+        """
+        if self._file is None:
+            return self.size, None
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime_ns
+
+    def count_matches(self, pattern, limit=None):
+        """统计原始字节中与 pattern（字节正则）匹配的次数，不解码；达到 limit 时停止
+
+        只适用于兼容ASCII的编码，UTF-16的内容返回0
+        """
+        if self.encoding.startswith('utf-16'):
+            return 0
+        count = 0
+        for _ in pattern.finditer(self._map, self.bom_length):
+            count += 1
+            if limit is not None and count >= limit:
+                break
+        return count
+
+    def copy_text(self, stream):
+        """把解码后的全文写入文本流（用于转码为Pandoc要求的UTF-8）"""
+        for text in self.iter_text():
+            stream.write(text)
+
+    @property
+    def page_count(self):
+        return max(1, -(-(self.size - self.bom_length) // PREVIEW_PAGE_BYTES))
+
+    def read_page(self, index):
+        """读取预览中的一页，页边界对齐到换行处"""
+        start = self._page_boundary(index)
+        end = self._page_boundary(index + 1)
+        return self._decode(self._map[start:end])
+
+    def _page_boundary(self, index):
+        offset = self.bom_length + index * PREVIEW_PAGE_BYTES
+        if index <= 0:
+            return self.bom_length
+        if offset >= self.size:
+            return self.size
+        if self.encoding.startswith('utf-16'):
+            return offset - (offset - self.bom_length) % 2
+        # 换行符不会出现在UTF-8和GB18030多字节字符的中间
+        newline = bytes(self._map[offset:offset + PREVIEW_PAGE_BYTES]).find(b'\n')
+        return offset + newline + 1 if newline >= 0 else offset
+
+    def _decode(self, data):
+        return codecs.decode(data, self.encoding, errors='replace')
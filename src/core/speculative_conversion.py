@@ -0,0 +1,289 @@
+"""
+预先转换模块
+用户通常粘贴内容、停顿、选择模板后才点击生成，转换的等待全部落在点击之后。
+编辑框内容停止变化一段时间后，在后台以低优先级用当前模板预先转换到缓存目录；
+点击生成时若内容、模板和转换选项都与预先转换的一致，直接把生成好的文件移到输出位置
+（预先转换仍在进行时等待它完成）。内容或模板变化时取消进行中的预先转换，使用电池时减少预先转换
+"""
+
+import os
+import sys
+import time
+import shutil
+import threading
+
+from core.conversion_queue import job_key, lower_thread_priority, PRIORITY_SPECULATIVE
+
+
+# 编辑框停止变化多久后开始预先转换（毫秒），使用电池时等待更久
+IDLE_MS = 1500
+BATTERY_IDLE_MS = 6000
+# 使用电池时只预先转换不超过该长度的内容（字符数）
+BATTERY_MAX_CHARS = 200 * 1024
+
+# 电源状态的缓存时间（秒），编辑时频繁查询不必每次读取系统状态
+POWER_CACHE_SECONDS = 30.0
+
+# 缓存目录由所有运行中的实例共用，其他进程留下的结果超过该时间（秒）才视为残留并删除
+STALE_SECONDS = 24 * 3600
+
+# 参与匹配的转换选项（与转换器的同名属性对应）
+OPTION_NAMES = ('use_native_writer', 'optimize_output', 'typography', 'embed_fonts', 'offload_tables')
+
+
+def get_speculative_dir():
+    """预先转换的缓存目录"""
+    from core.runtime_cache import get_cache_root
+    return os.path.join(os.path.dirname(get_cache_root()), 'speculative')
+
+
+_power_cache = (0.0, None)
+
+
+def on_battery_power():
+    """是否正在使用电池供电（无法判断时返回False）"""
+    global _power_cache
+    checked_at, on_battery = _power_cache
+    if on_battery is None or time.monotonic() - checked_at > POWER_CACHE_SECONDS:
+        on_battery = _read_battery_state()
+        _power_cache = (time.monotonic(), on_battery)
+    return on_battery
+
+
+def _read_battery_state():
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class SystemPowerStatus(ctypes.Structure):
+            _fields_ = [
+                ('ACLineStatus', wintypes.BYTE), ('BatteryFlag', wintypes.BYTE),
+                ('BatteryLifePercent', wintypes.BYTE), ('SystemStatusFlag', wintypes.BYTE),
+                ('BatteryLifeTime', wintypes.DWORD), ('BatteryFullLifeTime', wintypes.DWORD),
+            ]
+
+        status = SystemPowerStatus()
+        if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+            return False
+        # 0：未接通电源，1：接通电源，255：未知
+        return status.ACLineStatus == 0
+
+    # Linux：有接通的外接电源时不是电池供电，否则看电池是否在放电
+    supply_dir = '/sys/class/power_supply'
+    try:
+        supplies = os.listdir(supply_dir)
+    except OSError:
+        return False
+    discharging = False
+    for name in supplies:
+        try:
+            with open(os.path.join(supply_dir, name, 'type')) as f:
+                supply_type = f.read().strip()
+            if supply_type == 'Mains':
+                with open(os.path.join(supply_dir, name, 'online')) as f:
+                    if f.read().strip() == '1':
+                        return False
+            elif supply_type == 'Battery':
+                with open(os.path.join(supply_dir, name, 'status')) as f:
+                    discharging = discharging or f.read().strip() == 'Discharging'
+        except OSError:
+            continue
+    return discharging
+
+
+class _Speculation:
+    """一次预先转换"""
+
+    _next_id = 1
+
+    def __init__(self, key, html_content, template_style, options, cache_dir):
+        self.key = key
+        # 点击生成时直接比较内容，不再计算哈希（内容相同的字符串比较只是一次内存比较）
+        self.html_content = html_content
+        self.template_style = template_style
+        self.options = options
+        self.output_file = os.path.join(cache_dir, f'{os.getpid()}_{_Speculation._next_id}.docx')
+        _Speculation._next_id += 1
+        self.cancel_event = threading.Event()
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.success = False
+        self.started_at = time.monotonic()
+        self.duration = None
+
+    def discard(self):
+        """取消并在结束后删除生成的文件"""
+        self.cancel_event.set()
+        if self.done.is_set():
+            _remove(self.output_file)
+
+
+class SpeculativeConverter:
+    """带预先转换的转换器（线程安全）
+
+    提供与转换器相同的 convert_html_to_docx / convert_source_file_to_docx 接口，
+    作为任务队列的转换器使用；同一时间最多只有一个预先转换。
+    提供 scheduler（任务队列）时，预先转换作为预先转换类别的后台工作由它调度，否则在单独的线程中运行
+    """
+
+    def __init__(self, converter, cache_dir=None, scheduler=None):
+        self.converter = converter
+        self.cache_dir = cache_dir or get_speculative_dir()
+        self.scheduler = scheduler
+        self._current = None
+        self._lock = threading.Lock()
+        # 命中预先转换的次数，以及命中时节省的转换时间（秒）
+        self.hit_count = 0
+        self.saved_seconds = 0.0
+        self._clear_cache_dir(stale_only=True)
+
+    def speculate(self, html_content, template_style, content_hash=None):
+        """在后台预先转换，已有相同内容的预先转换时（包括失败的）不重复进行
+
+        Args:
+            content_hash: 内容指纹（可选），提供时不再对内容计算哈希
+
+        Returns:
+            bool: 是否开始了新的预先转换
+        """
+        options = self._options()
+        key = f'{job_key(html_content, template_style, content_hash)}:{options}'
+        with self._lock:
+            current = self._current
+            if current is not None and current.key == key:
+                return False
+            if current is not None:
+                current.discard()
+            speculation = _Speculation(key, html_content, template_style, options, self.cache_dir)
+            self._current = speculation
+        if self.scheduler is not None:
+            self.scheduler.submit_task(lambda: self._run(speculation, html_content, template_style), PRIORITY_SPECULATIVE)
+        else:
+            threading.Thread(
+                target=self._run, args=(speculation, html_content, template_style), name='speculative-convert', daemon=True
+            ).start()
+        return True
+
+    @property
+    def supports_background(self):
+        return getattr(self.converter, 'supports_background', False)
+
+    def cancel(self):
+        """取消进行中的预先转换并丢弃已完成的结果"""
+        with self._lock:
+            current, self._current = self._current, None
+        if current is not None:
+            current.discard()
+
+    def close(self):
+        """退出前取消预先转换并删除本进程的结果"""
+        self.cancel()
+        self._clear_cache_dir()
+
+    def convert_html_to_docx(self, html_content, output_file, template_style='simple', **options):
+        """与预先转换一致时直接使用其结果（仍在进行时等待完成），否则正常转换
+
+        预先转换还在排队、没有开始时不等待它，直接转换
+
+        Returns:
+            tuple: (success, message)
+        """
+        with self._lock:
+            speculation = self._current
+            if speculation is not None and speculation.template_style == template_style \
+                    and speculation.options == self._options() and speculation.html_content == html_content:
+                # 认领后内容再变化也不会取消这次转换
+                self._current = None
+                if not speculation.started.is_set():
+                    speculation.discard()
+                    speculation = None
+            else:
+                speculation = None
+
+        if speculation is not None:
+            waited_at = time.monotonic()
+            speculation.done.wait()
+            if speculation.success:
+                try:
+                    _move(speculation.output_file, output_file)
+                except OSError as e:
+                    print(f"无法使用预先转换的结果: {e}")
+                else:
+                    with self._lock:
+                        self.hit_count += 1
+                        self.saved_seconds += max(0.0, speculation.duration - (time.monotonic() - waited_at))
+                    return True, f"转换成功：{os.path.basename(output_file)}（已预先生成）"
+            _remove(speculation.output_file)
+
+        return self.converter.convert_html_to_docx(html_content, output_file, template_style, **options)
+
+    def convert_source_file_to_docx(self, source_path, output_file, template_style='simple', **options):
+        return self.converter.convert_source_file_to_docx(source_path, output_file, template_style, **options)
+
+    def _options(self):
+        # 转换选项改变后（如开启嵌入字体）预先转换的结果不再适用
+        return ''.join('1' if getattr(self.converter, name, False) else '0' for name in OPTION_NAMES)
+
+    def _run(self, speculation, html_content, template_style):
+        speculation.started.set()
+        if speculation.cancel_event.is_set():
+            # 排队期间已被取消或被点击生成跳过
+            speculation.done.set()
+            return
+        lower_thread_priority()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            success, message = self.converter.convert_html_to_docx(
+                html_content, speculation.output_file, template_style, cancel_event=speculation.cancel_event
+            )
+        except Exception as e:
+            success, message = False, f"发生错误：\n{str(e)}"
+        speculation.success = success and not speculation.cancel_event.is_set()
+        speculation.duration = time.monotonic() - speculation.started_at
+        speculation.done.set()
+        if speculation.cancel_event.is_set():
+            _remove(speculation.output_file)
+        elif not success:
+            print(f"预先转换失败（点击生成时将重新转换）: {message}")
+
+    def _clear_cache_dir(self, stale_only=False):
+        """删除本进程的预先转换结果，以及其他进程残留的过期结果
+
+        缓存目录由所有实例共用，其他运行中的实例的结果不能删除：只删除文件名以本进程ID开头的文件
+        和修改时间超过 STALE_SECONDS 的文件（崩溃的进程留下的）
+
+        Args:
+            stale_only: 只删除过期的文件（启动时本进程还没有生成任何结果）
+        """
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        own_prefix = f'{os.getpid()}_'
+        expired_before = time.time() - STALE_SECONDS
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            if not stale_only and name.startswith(own_prefix):
+                _remove(path)
+                continue
+            try:
+                expired = os.path.getmtime(path) < expired_before
+            except OSError:
+                continue
+            if expired:
+                _remove(path)
+
+
+def _move(source, target):
+    try:
+        os.replace(source, target)
+    except OSError:
+        # 缓存目录与输出目录不在同一磁盘
+        shutil.move(source, target)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,245 @@
+"""
+界面卡顿监测模块
+辅助线程定期向界面线程的事件循环投递心跳，超过阈值仍未得到响应时，
+通过 sys._current_frames 抓取主线程当前的Python调用栈；界面恢复响应后把卡顿时长和调用栈追加写入日志，
+用于定位阻塞界面的同步调用（如同步转换、启动时的版本检查）
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+
+
+DEFAULT_THRESHOLD_MS = 250
+MIN_THRESHOLD_MS = 50
+
+# 每次卡顿最多保留的不同调用栈数，以及每个调用栈保留的最内层帧数
+MAX_STACK_SAMPLES = 5
+MAX_STACK_DEPTH = 40
+
+LOG_DIR_NAME = 'logs'
+LOG_NAME = 'stalls.jsonl'
+
+# 日志超过该大小时轮换为 .1 文件，只保留一份旧日志
+LOG_MAX_BYTES = 512 * 1024
+
+SUMMARY_SIZE = 10
+
+# 项目根目录：调用栈中位于此目录下的帧视为应用代码
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_stall_log_path():
+    """卡顿日志路径"""
+    from core.runtime_cache import get_data_root
+    return os.path.join(get_data_root(), LOG_DIR_NAME, LOG_NAME)
+
+
+class StallWatchdog:
+    """界面线程卡顿监测
+
+    post_ping(token) 在辅助线程中调用，需要把心跳排入界面线程的事件循环，
+    界面线程处理到心跳时调用 pong(token)
+    """
+
+    def __init__(self, post_ping, threshold_ms=DEFAULT_THRESHOLD_MS, log_path=None, main_thread_id=None):
+        self.post_ping = post_ping
+        self.threshold = max(MIN_THRESHOLD_MS, int(threshold_ms)) / 1000
+        self.log_path = log_path or get_stall_log_path()
+        self.main_thread_id = main_thread_id or threading.main_thread().ident
+        # 本次运行中记录到的卡顿（按时长降序，最多 SUMMARY_SIZE 条）
+        self.stalls = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._token = 0
+        # 尚未得到响应的心跳：(token, 发出时间)
+        self._pending = None
+        self._samples = []
+        self._last_sample_at = 0
+        # 已结束、等待辅助线程写入日志的卡顿记录
+        self._finished = []
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stall-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监测，并写出尚未写入日志的记录"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        with self._lock:
+            self._pending = None
+            self._samples = []
+
+    def pong(self, token):
+        """界面线程处理到心跳时调用（只记录内存状态，文件写入留给辅助线程）"""
+        now = time.monotonic()
+        with self._lock:
+            if self._pending is None or self._pending[0] != token:
+                return
+            sent_at = self._pending[1]
+            samples = self._samples
+            self._pending = None
+            self._samples = []
+            self._last_sample_at = 0
+
+            duration = now - sent_at
+            if duration < self.threshold:
+                return
+            record = {
+                'time': time.time() - duration,
+                'duration_ms': round(duration * 1000),
+                'samples': samples,
+            }
+            self._finished.append(record)
+            self.stalls.append(record)
+            self.stalls.sort(key=lambda item: item['duration_ms'], reverse=True)
+            del self.stalls[SUMMARY_SIZE:]
+
+    def _run(self):
+        interval = self.threshold / 4
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            post_token = None
+            with self._lock:
+                if self._pending is None:
+                    self._token += 1
+                    self._pending = (self._token, now)
+                    post_token = self._token
+                else:
+                    waited = now - self._pending[1]
+                    # 卡顿期间每隔一个阈值采样一次调用栈
+                    if waited >= self.threshold and now - self._last_sample_at >= self.threshold:
+                        self._last_sample_at = now
+                        self._add_sample(self._capture_stack())
+                finished, self._finished = self._finished, []
+
+            if finished:
+                self._write(finished)
+            if post_token is not None:
+                try:
+                    self.post_ping(post_token)
+                except Exception as e:
+                    print(f"卡顿监测无法投递心跳: {e}")
+                    break
+
+        with self._lock:
+            finished, self._finished = self._finished, []
+        if finished:
+            self._write(finished)
+
+    def _capture_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return []
+        return [[entry.filename, entry.lineno, entry.name, entry.line or '']
+                for entry in traceback.extract_stack(frame, limit=MAX_STACK_DEPTH)]
+
+    def _add_sample(self, stack):
+        # 与上一次相同的调用栈只计数，长时间阻塞在同一处时不重复保存
+        if self._samples and self._samples[-1]['stack'] == stack:
+            self._samples[-1]['count'] += 1
+        elif len(self._samples) < MAX_STACK_SAMPLES:
+            self._samples.append({'count': 1, 'stack': stack})
+
+    def _write(self, records):
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path + '.1')
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"无法写入卡顿日志: {e}")
+
+
+def read_stall_log(log_path=None):
+    """读取卡顿日志（包括轮换出的旧日志），忽略无法解析的行
+
+    Returns:
+        list: 卡顿记录，按时间先后排列
+    """
+    log_path = log_path or get_stall_log_path()
+    records = []
+    for path in (log_path + '.1', log_path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and 'duration_ms' in record:
+                        records.append(record)
+        except OSError:
+            continue
+    return records
+
+
+def clear_stall_log(log_path=None):
+    """删除卡顿日志"""
+    log_path = log_path or get_stall_log_path()
+    for path in (log_path, log_path + '.1'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def stall_location(record):
+    """卡顿发生的位置：第一次采样中最内层的应用代码帧，没有应用代码时取最内层帧
+
+    Returns:
+        list: [文件, 行号, 函数, 源码]，没有采样时返回None
+    """
+    samples = record.get('samples') or []
+    if not samples or not samples[0]['stack']:
+        return None
+    stack = samples[0]['stack']
+    for frame in reversed(stack):
+        if os.path.abspath(frame[0]).startswith(APP_ROOT + os.sep):
+            return frame
+    return stack[-1]
+
+
+def summarize_stalls(records, count=SUMMARY_SIZE):
+    """按卡顿位置汇总，返回最严重的若干项
+
+    Returns:
+        list: [{'location', 'count', 'worst_ms', 'total_ms', 'worst'}]，按最长卡顿时长降序
+    """
+    groups = {}
+    for record in records:
+        location = stall_location(record)
+        key = tuple(location[:3]) if location else None
+        group = groups.setdefault(key, {'location': location, 'count': 0, 'worst_ms': 0, 'total_ms': 0, 'worst': None})
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        if record['duration_ms'] >= group['worst_ms']:
+            group['worst_ms'] = record['duration_ms']
+            group['worst'] = record
+    return sorted(groups.values(), key=lambda group: group['worst_ms'], reverse=True)[:count]
+
+
+def format_location(location):
+    """把帧格式化为“文件:行号 函数”"""
+    if not location:
+        return '（未采样到调用栈）'
+    filename, lineno, name = location[:3]
+    if os.path.abspath(filename).startswith(APP_ROOT + os.sep):
+        filename = os.path.relpath(filename, APP_ROOT)
+    return f'{filename}:{lineno} {name}'
@@ -0,0 +1,212 @@
+"""
+大表格直接写入模块
+AI生成的报告中常有上千行的表格，交给Pandoc时HTML读取和docx写出占去大部分时间和内存。
+转换前把行数很多的 <table> 从HTML中取出，以占位段落代替；Pandoc生成文档后，
+用原生写入器按文档的表格样式逐行写出这些表格的OOXML，替换占位段落
+"""
+
+import os
+import re
+import zipfile
+from html import unescape
+
+from core.native_docx_writer import OoxmlBuilder, StyleMap, NumberingBuilder, _add_relationships
+
+
+# 行数达到该值的表格直接写入
+LARGE_TABLE_ROWS = 500
+
+TABLE_TAG = re.compile(r'<(/?)table\b[^>]*>', re.I)
+ROW_TAG = re.compile(r'<tr\b', re.I)
+ROW_TAG_BYTES = re.compile(rb'<tr\b', re.I)
+CELL_TAG = re.compile(r'<t[dh]\b', re.I)
+CODE_WITH_CLASS = re.compile(r'<code\b[^>]*\bclass\s*=', re.I)
+SPAN_ATTRIBUTE = re.compile(r'\b(?:colspan|rowspan)\s*=\s*["\']?\s*(\d+)', re.I)
+
+# 直接写入的表格只含少数几种标签，用正则切分标签和文本比HTMLParser快一倍
+TOKEN = re.compile(r'<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>|([^<]+|<)', re.S)
+ATTRIBUTE = re.compile(r'([^\s/>"\'=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+# 直接写入的表格只能包含这些标签：原生写入器能处理，且不需要合并列表编号和图片部件
+OFFLOAD_TAGS = {'table', 'thead', 'tbody', 'tr', 'th', 'td', 'p', 'strong', 'b', 'em', 'i', 'a', 'code', 'br'}
+OTHER_TAG = re.compile(r'<(?!(?:%s)\b)[a-zA-Z]' % '|'.join(sorted(OFFLOAD_TAGS)), re.I)
+
+
+def has_large_table(content, min_rows=LARGE_TABLE_ROWS):
+    """粗略判断内容中是否可能有大表格（<tr 的总数达到行数下限），不解析HTML
+
+    Args:
+        content: HTML字符串或已打开的SourceFile
+    """
+    if isinstance(content, str):
+        count = 0
+        for _ in ROW_TAG.finditer(content):
+            count += 1
+            if count >= min_rows:
+                return True
+        return False
+    return content.count_matches(ROW_TAG_BYTES, min_rows) >= min_rows
+
+
+class TableOffload:
+    """从HTML中取出大表格，Pandoc生成文档后再写回"""
+
+    def __init__(self, min_rows=LARGE_TABLE_ROWS):
+        self.min_rows = min_rows
+        # 占位文本只含字母和数字，不会被Pandoc或中文排版过滤器改写
+        self.token = os.urandom(6).hex().upper()
+        self.tables = []  # [(占位文本, 表格HTML, 列数)]
+
+    def extract(self, chunks, write):
+        """逐块读取HTML，把内容（大表格换成占位段落）交给 write
+
+        chunks 需按标签边界分块（如 split_html、SourceFile.iter_text 的结果）；
+        嵌套表格、未闭合的表格、含有合并单元格或其他标签的表格原样保留，由Pandoc处理
+        """
+        table = None  # 正在读取的顶层表格的各块
+        depth = 0
+        nested = False
+        for chunk in chunks:
+            position = 0
+            for match in TABLE_TAG.finditer(chunk):
+                if match.group(1):
+                    if not depth:
+                        continue
+                    depth -= 1
+                    if not depth:
+                        table.append(chunk[position:match.end()])
+                        write(self._replace(''.join(table), nested))
+                        table = None
+                        position = match.end()
+                elif depth:
+                    nested = True
+                    depth += 1
+                else:
+                    write(chunk[position:match.start()])
+                    table, depth, nested = [], 1, False
+                    position = match.start()
+            if table is not None:
+                table.append(chunk[position:])
+            else:
+                write(chunk[position:])
+        if table is not None:
+            write(''.join(table))
+
+    def splice(self, docx_path, typography=None):
+        """把取出的表格写回 docx_path 中对应的占位段落
+
+        Args:
+            docx_path: Pandoc生成的文档
+            typography: 中文排版设置，与Pandoc路径中Lua过滤器的规则一致
+
+        Raises:
+            ValueError: 文档中找不到占位段落
+            UnsupportedContentError: 表格内容超出原生写入器支持范围
+        """
+        temp_path = docx_path + '.part'
+        try:
+            with zipfile.ZipFile(docx_path) as source_zip, \
+                    zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as output_zip:
+                self._write_package(source_zip, output_zip, typography)
+            os.replace(temp_path, docx_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _replace(self, table_html, nested):
+        """大表格换成占位段落，其余表格原样返回"""
+        columns = 0 if nested else self._offload_columns(table_html)
+        if not columns:
+            return table_html
+        marker = f'JDYTABLE{self.token}N{len(self.tables)}'
+        self.tables.append((marker, table_html, columns))
+        return f'<p>{marker}</p>'
+
+    def _offload_columns(self, table_html):
+        """可以直接写入时返回表格的列数，否则返回0"""
+        # 只记录各行的起始位置，不把上万行拆成字符串
+        starts = [match.start() for match in ROW_TAG.finditer(table_html)]
+        if len(starts) < self.min_rows:
+            return 0
+        if OTHER_TAG.search(table_html) or CODE_WITH_CLASS.search(table_html):
+            return 0
+        if any(int(match.group(1)) > 1 for match in SPAN_ATTRIBUTE.finditer(table_html)):
+            # 合并单元格需要gridSpan/vMerge，原生写入器不支持
+            return 0
+        # 没有合并单元格时每个单元格占一列，列数即各行单元格数的最大值
+        ends = starts[1:] + [len(table_html)]
+        return max(len(CELL_TAG.findall(table_html, start, end)) for start, end in zip(starts, ends))
+
+    def _write_package(self, source_zip, output_zip, typography):
+        names = set(source_zip.namelist())
+        styles = StyleMap(source_zip.read('word/styles.xml').decode('utf-8')
+                          if 'word/styles.xml' in names else '')
+        document = source_zip.read('word/document.xml').decode('utf-8')
+        spans = [_placeholder_span(document, marker) for marker, _, _ in self.tables]
+        if any(spans[index][0] < spans[index - 1][1] for index in range(1, len(spans))):
+            raise ValueError("占位段落的顺序与表格不一致")
+
+        # 正文逐行写出，表格的OOXML不在内存中整体拼接
+        with output_zip.open('word/document.xml', 'w') as document_stream:
+            builder = _StreamingTableBuilder(styles, NumberingBuilder(''), document_stream.write, typography)
+            position = 0
+            for (start, end), (_, table_html, columns) in zip(spans, self.tables):
+                document_stream.write(document[position:start].encode('utf-8'))
+                builder.columns = columns
+                builder.feed_table(table_html)
+                position = end
+            builder.close()
+            document_stream.write(document[position:].encode('utf-8'))
+
+        rels = _add_relationships(source_zip.read('word/_rels/document.xml.rels').decode('utf-8'),
+                                  builder.relationships)
+        output_zip.writestr('word/_rels/document.xml.rels', rels)
+
+        skip_parts = {'word/document.xml', 'word/_rels/document.xml.rels'}
+        for info in source_zip.infolist():
+            if info.filename not in skip_parts and not info.filename.endswith('/'):
+                output_zip.writestr(info, source_zip.read(info.filename))
+
+
+class _StreamingTableBuilder(OoxmlBuilder):
+    """每行结束即写出的表格生成器，列数由调用方预先统计"""
+
+    columns = 0
+
+    def feed_table(self, table_html):
+        """解析一个表格：按标签和文本直接调用HTMLParser的回调（表格内容已检查过只含允许的标签）"""
+        for match in TOKEN.finditer(table_html):
+            closing, tag, attributes, data = match.groups()
+            if data is not None:
+                self.handle_data(unescape(data) if '&' in data else data)
+            elif tag is None:
+                continue
+            elif closing:
+                self.handle_endtag(tag.lower())
+            else:
+                attrs = [(name.lower(), unescape(double or single or bare))
+                         for name, double, single, bare in ATTRIBUTE.findall(attributes)]
+                if attributes.endswith('/'):
+                    self.handle_startendtag(tag.lower(), attrs)
+                else:
+                    self.handle_starttag(tag.lower(), attrs)
+
+    def _add_row(self, table, row):
+        if not table.get('started'):
+            table['started'] = True
+            self._emit(self._table_start_xml(self.columns))
+        self._emit(self._row_xml(row, self.columns))
+
+    def _finish_table(self, table):
+        if table.get('started'):
+            self._emit('</w:tbl>')
+
+
+def _placeholder_span(document, marker):
+    """占位文本所在段落在 document.xml 中的范围"""
+    index = document.find(marker)
+    start = max(document.rfind('<w:p>', 0, index), document.rfind('<w:p ', 0, index)) if index >= 0 else -1
+    end = document.find('</w:p>', index) if index >= 0 else -1
+    if start < 0 or end < 0:
+        raise ValueError(f"生成的文档中找不到表格占位段落: {marker}")
+    return start, end + len('</w:p>')
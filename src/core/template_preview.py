@@ -0,0 +1,276 @@
+"""
+模板预览模块
+用快速写入器把固定的示例文档按排版方案转换，再从输出文档中解析出每个段落的排版属性
+（字体、字号、颜色、对齐、缩进、段前段后和行距），供界面层绘制模板缩略图；
+缩略图按模板内容的哈希缓存在用户缓存目录中
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import xml.etree.ElementTree as ET
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# 绘制逻辑或示例文档变化时递增，使旧的缩略图失效
+RENDER_VERSION = 1
+
+SAMPLE_HTML = '''<html><body>
+<h1>季度工作报告</h1>
+<p>本报告总结第三季度的主要工作进展，并说明下一阶段的计划。整体进度符合预期，各项指标稳步提升。</p>
+<h2>一、项目进展</h2>
+<p>核心模块已完成开发与测试，团队共完成12项任务，其中3项提前交付，<strong>质量评审全部通过</strong>。</p>
+<ul>
+<li>完成数据接口的重构</li>
+<li>上线新版排版引擎</li>
+<li>文档导出速度提升40%</li>
+</ul>
+<h2>二、下一步计划</h2>
+<p>下一阶段将重点推进性能优化和用户体验改进，预计在年底前完成全部目标。</p>
+<h3>2.1 技术方案</h3>
+<p>转换服务通过统一接口调用，示例如下：</p>
+<pre><code>convert(input_file, template="simple")</code></pre>
+<p>新的方案将在测试环境中验证两周后正式上线。</p>
+</body></html>'''
+
+# Word在段前段后设为“自动”时使用的间距（磅）
+AUTO_SPACING_PT = 14
+
+# A4纸张和2.54厘米页边距（模板中没有分节属性时使用）
+DEFAULT_PAGE = {'width': 595.3, 'height': 841.9, 'top': 72, 'right': 72, 'bottom': 72, 'left': 72}
+
+
+def get_thumbnail_cache_dir():
+    """缩略图缓存目录"""
+    from core.runtime_cache import get_cache_root
+    return os.path.join(os.path.dirname(get_cache_root()), 'thumbnails')
+
+
+def get_thumbnail_path(template_file, template_style, typography=None, cache_dir=None):
+    """缩略图的缓存路径：由模板内容、中文排版设置和绘制版本决定
+
+    Returns:
+        str: 缓存路径，模板无法读取时返回None
+    """
+    from core.runtime_cache import file_sha256
+
+    try:
+        template_hash = file_sha256(template_file)
+    except OSError:
+        return None
+    digest = hashlib.sha256(
+        json.dumps([template_hash, typography, RENDER_VERSION, SAMPLE_HTML], sort_keys=True).encode('utf-8')
+    ).hexdigest()
+    return os.path.join(cache_dir or get_thumbnail_cache_dir(), f'{template_style}-{digest[:16]}.png')
+
+
+def layout_sample(template_file, typography=None):
+    """按模板转换示例文档，返回绘制缩略图所需的页面和段落属性
+
+    Args:
+        template_file: 参考模板路径（已处理中文字体时传入处理后的模板）
+        typography: 中文排版设置
+
+    Returns:
+        dict: {'page': 页面尺寸和页边距（磅）, 'paragraphs': [{'props': 段落属性, 'runs': [(文本, 文字属性)], 'bullet': bool}]}
+    """
+    from core.native_docx_writer import NativeDocxWriter
+
+    temp_dir = tempfile.mkdtemp(prefix='template_preview_')
+    try:
+        output_file = os.path.join(temp_dir, 'sample.docx')
+        NativeDocxWriter(typography).convert_html_to_docx(SAMPLE_HTML, output_file, template_file)
+        with zipfile.ZipFile(output_file) as docx:
+            document = ET.fromstring(docx.read('word/document.xml'))
+            styles = StyleResolver(ET.fromstring(docx.read('word/styles.xml')))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    body = document.find(f'{W}body')
+    paragraphs = []
+    for paragraph in body.iter(f'{W}p'):
+        ppr = paragraph.find(f'{W}pPr')
+        style_id = _val(ppr.find(f'{W}pStyle')) if ppr is not None else None
+        props = styles.paragraph(style_id)
+        props.update(_paragraph_props(ppr))
+        props.update(_run_props(ppr.find(f'{W}rPr') if ppr is not None else None))
+
+        runs = []
+        for run in paragraph.iter(f'{W}r'):
+            rpr = run.find(f'{W}rPr')
+            run_props = dict(props)
+            if rpr is not None:
+                run_props.update(styles.character(_val(rpr.find(f'{W}rStyle'))))
+                run_props.update(_run_props(rpr))
+            text = ''.join('\n' if child.tag == f'{W}br' else (child.text or '')
+                           for child in run if child.tag in (f'{W}t', f'{W}br'))
+            if text:
+                runs.append((text, run_props))
+        paragraphs.append({
+            'props': props,
+            'runs': runs,
+            'bullet': ppr is not None and ppr.find(f'{W}numPr') is not None,
+        })
+
+    return {'page': _page_props(body.find(f'{W}sectPr')), 'paragraphs': paragraphs}
+
+
+class StyleResolver:
+    """按 basedOn 继承链解析段落样式和字符样式的最终属性"""
+
+    def __init__(self, styles_root):
+        self.styles = {}
+        self.default_paragraph = None
+        for style in styles_root.iter(f'{W}style'):
+            style_id = style.get(f'{W}styleId')
+            self.styles[style_id] = style
+            if style.get(f'{W}type') == 'paragraph' and style.get(f'{W}default') in ('1', 'true'):
+                self.default_paragraph = style_id
+
+        self.defaults = {}
+        defaults = styles_root.find(f'{W}docDefaults')
+        if defaults is not None:
+            self.defaults.update(_paragraph_props(defaults.find(f'{W}pPrDefault/{W}pPr')))
+            self.defaults.update(_run_props(defaults.find(f'{W}rPrDefault/{W}rPr')))
+
+    def paragraph(self, style_id):
+        props = dict(self.defaults)
+        for style in self._chain(style_id or self.default_paragraph):
+            props.update(_paragraph_props(style.find(f'{W}pPr')))
+            props.update(_run_props(style.find(f'{W}rPr')))
+        return props
+
+    def character(self, style_id):
+        props = {}
+        for style in self._chain(style_id):
+            props.update(_run_props(style.find(f'{W}rPr')))
+        return props
+
+    def _chain(self, style_id):
+        """从最顶层的基础样式到当前样式"""
+        chain = []
+        while style_id in self.styles and len(chain) < 20:
+            style = self.styles[style_id]
+            chain.append(style)
+            style_id = _val(style.find(f'{W}basedOn'))
+        return reversed(chain)
+
+
+def _val(element, attribute='val'):
+    return element.get(f'{W}{attribute}') if element is not None else None
+
+
+def _twips(element, attribute):
+    """以缇为单位的属性转换为磅"""
+    value = _val(element, attribute)
+    try:
+        return int(value) / 20 if value is not None else None
+    except ValueError:
+        return None
+
+
+def _on(element):
+    """开关属性（如 <w:b/>、<w:b w:val="0"/>）"""
+    return _val(element) not in ('0', 'false', 'off')
+
+
+def _paragraph_props(ppr):
+    props = {}
+    if ppr is None:
+        return props
+
+    jc = _val(ppr.find(f'{W}jc'))
+    if jc:
+        props['align'] = {'start': 'left', 'end': 'right', 'both': 'justify', 'distribute': 'justify'}.get(jc, jc)
+
+    spacing = ppr.find(f'{W}spacing')
+    if spacing is not None:
+        for side in ('before', 'after'):
+            if _val(spacing, f'{side}Autospacing') in ('1', 'true'):
+                props[side] = AUTO_SPACING_PT
+            elif _twips(spacing, side) is not None:
+                props[side] = _twips(spacing, side)
+        line = _val(spacing, 'line')
+        if line and line.lstrip('-').isdigit():
+            if _val(spacing, 'lineRule') in (None, 'auto'):
+                props['line'] = ('multiple', int(line) / 240)
+            else:
+                props['line'] = ('exact', int(line) / 20)
+
+    ind = ppr.find(f'{W}ind')
+    if ind is not None:
+        for side, names in (('left', ('left', 'start')), ('right', ('right', 'end'))):
+            for name in names:
+                if _twips(ind, name) is not None:
+                    props[side] = _twips(ind, name)
+        if _val(ind, 'firstLineChars'):
+            props['first_line_chars'] = int(_val(ind, 'firstLineChars')) / 100
+            props.pop('first_line', None)
+        elif _twips(ind, 'firstLine') is not None:
+            props['first_line'] = _twips(ind, 'firstLine')
+            props.pop('first_line_chars', None)
+        elif _twips(ind, 'hanging') is not None:
+            props['first_line'] = -_twips(ind, 'hanging')
+
+    bottom = ppr.find(f'{W}pBdr/{W}bottom')
+    if bottom is not None and _val(bottom) not in ('nil', 'none'):
+        props['border_bottom'] = _color(_val(bottom, 'color'))
+
+    shading = _val(ppr.find(f'{W}shd'), 'fill')
+    if shading:
+        props['shading'] = _color(shading)
+    return props
+
+
+def _run_props(rpr):
+    props = {}
+    if rpr is None:
+        return props
+
+    fonts = rpr.find(f'{W}rFonts')
+    if fonts is not None:
+        for key, attribute in (('font', 'ascii'), ('east_asian_font', 'eastAsia')):
+            if _val(fonts, attribute):
+                props[key] = _val(fonts, attribute)
+
+    size = _val(rpr.find(f'{W}sz'))
+    if size and size.isdigit():
+        props['size'] = int(size) / 2
+    for key, tag in (('bold', 'b'), ('italic', 'i')):
+        element = rpr.find(f'{W}{tag}')
+        if element is not None:
+            props[key] = _on(element)
+
+    color = _color(_val(rpr.find(f'{W}color')))
+    if color:
+        props['color'] = color
+    shading = _val(rpr.find(f'{W}shd'), 'fill')
+    if shading:
+        props['highlight'] = _color(shading)
+    return props
+
+
+def _color(value):
+    """十六进制颜色（auto和无效值返回None）"""
+    if value and len(value) == 6 and all(c in '0123456789abcdefABCDEF' for c in value):
+        return f'#{value}'
+    return None
+
+
+def _page_props(sect_pr):
+    page = dict(DEFAULT_PAGE)
+    if sect_pr is None:
+        return page
+    size = sect_pr.find(f'{W}pgSz')
+    for key, attribute in (('width', 'w'), ('height', 'h')):
+        if _twips(size, attribute):
+            page[key] = _twips(size, attribute)
+    margins = sect_pr.find(f'{W}pgMar')
+    for key in ('top', 'right', 'bottom', 'left'):
+        if _twips(margins, key) is not None:
+            page[key] = abs(_twips(margins, key))
+    return page
@@ -5,12 +5,6 @@
 
 import sys
 from datetime import datetime, timezone, timedelta
-try:
-    import ntplib
-except ImportError:
-    ntplib = None
-
-from PyQt5.QtWidgets import QMessageBox
 
 # 北京时间时区 (UTC+8)
 BEIJING_TZ = timezone(timedelta(hours=8))
@@ -25,7 +19,10 @@ def check_network_time():
     Returns:
         datetime: 北京时间对象，如果失败则返回None
     """
-    if ntplib is None:
+    # ntplib只在真正查询网络时间时才导入，避免拖慢启动
+    try:
+        import ntplib
+    except ImportError:
         return None
         
     try:
@@ -63,6 +60,7 @@ def is_expired(current_time=None):
 
 def show_version_expired_dialog():
     """显示版本过期对话框"""
+    from PyQt5.QtWidgets import QMessageBox
     QMessageBox.critical(
         None,
         "版本过期",
@@ -73,6 +71,7 @@ def show_version_expired_dialog():
 
 def show_network_error_dialog():
     """显示网络连接错误对话框"""
+    from PyQt5.QtWidgets import QMessageBox
     QMessageBox.critical(
         None,
         "网络连接失败",
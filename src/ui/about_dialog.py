@@ -6,7 +6,7 @@
 import os
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QTextEdit, QTabWidget, QScrollArea, QWidget
+    QTextEdit, QTabWidget, QScrollArea, QWidget, QCheckBox
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QPixmap, QIcon
@@ -36,6 +36,7 @@ class AboutDialog(QDialog):
         
         # 创建选项卡
         tabs = QTabWidget()
+        self.tabs = tabs
         
         # 关于选项卡
         about_tab = self.create_about_tab()
@@ -69,6 +70,10 @@ class AboutDialog(QDialog):
         license_tab = self.create_license_tab()
         tabs.addTab(license_tab, "许可协议")
         
+        # 卡顿诊断选项卡
+        self.diagnostics_tab = self.create_diagnostics_tab()
+        tabs.addTab(self.diagnostics_tab, "卡顿诊断")
+        
         layout.addWidget(tabs)
         
         # 添加反馈链接区域
@@ -458,4 +463,82 @@ class AboutDialog(QDialog):
         scroll_area.setWidget(license_text)
         layout.addWidget(scroll_area)
         
-        return widget
\ No newline at end of file
+        return widget
+    
+    def create_diagnostics_tab(self):
+        """创建卡顿诊断选项卡"""
+        from ui.stall_monitor import is_enabled, get_threshold_ms
+        
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        
+        self.stall_checkbox = QCheckBox(
+            f"启用界面卡顿监测（界面超过 {get_threshold_ms()} 毫秒无响应时记录当时的调用栈）"
+        )
+        self.stall_checkbox.setChecked(is_enabled())
+        self.stall_checkbox.toggled.connect(self.set_stall_monitor_enabled)
+        layout.addWidget(self.stall_checkbox)
+        
+        self.stall_summary = QTextEdit()
+        self.stall_summary.setReadOnly(True)
+        layout.addWidget(self.stall_summary)
+        
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        refresh_button = QPushButton("刷新")
+        refresh_button.clicked.connect(self.refresh_stall_summary)
+        button_layout.addWidget(refresh_button)
+        clear_button = QPushButton("清空记录")
+        clear_button.clicked.connect(self.clear_stall_log)
+        button_layout.addWidget(clear_button)
+        layout.addLayout(button_layout)
+        
+        self.refresh_stall_summary()
+        return widget
+    
+    def set_stall_monitor_enabled(self, enabled):
+        """开启或关闭卡顿监测"""
+        from ui.stall_monitor import set_stall_monitor_enabled
+        set_stall_monitor_enabled(enabled)
+        self.refresh_stall_summary()
+    
+    def clear_stall_log(self):
+        """清空卡顿日志"""
+        from core.stall_watchdog import clear_stall_log
+        clear_stall_log()
+        self.refresh_stall_summary()
+    
+    def refresh_stall_summary(self):
+        """按卡顿位置汇总日志中最严重的卡顿"""
+        import html
+        import time
+        from core.stall_watchdog import (
+            get_stall_log_path, read_stall_log, summarize_stalls, format_location
+        )
+        
+        records = read_stall_log()
+        parts = [f"<p>卡顿日志：{html.escape(get_stall_log_path())}</p>"]
+        if not records:
+            parts.append("<p>暂无卡顿记录。开启监测后，界面无响应超过阈值的情况会记录在此。</p>")
+            self.stall_summary.setHtml(''.join(parts))
+            return
+        
+        parts.append(f"<p>共记录 {len(records)} 次卡顿，按位置汇总最严重的几处：</p>")
+        for group in summarize_stalls(records):
+            worst = group['worst']
+            started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(worst.get('time', 0)))
+            parts.append(
+                f"<h4>{html.escape(format_location(group['location']))}</h4>"
+                f"<p>最长 {group['worst_ms']} 毫秒（{started}），共 {group['count']} 次，"
+                f"累计 {group['total_ms']} 毫秒</p>"
+            )
+            samples = worst.get('samples') or []
+            if samples:
+                # 只显示最内层的几帧，完整调用栈见日志文件
+                lines = [
+                    f"{format_location(frame)}  {frame[3]}"
+                    for frame in samples[0]['stack'][-8:]
+                ]
+                stack_text = html.escape('\n'.join(lines))
+                parts.append(f"<pre>{stack_text}</pre>")
+        self.stall_summary.setHtml(''.join(parts))
@@ -0,0 +1,23 @@
+"""
+应用设置模块
+统一提供保存用户偏好（主题、并发数等）所用的QSettings
+"""
+
+from PyQt5.QtCore import QSettings
+
+
+SETTINGS_ORGANIZATION = 'jindouyun-typesetter'
+SETTINGS_APPLICATION = 'typesetter'
+
+
+def get_settings():
+    """获取应用的QSettings对象"""
+    return QSettings(SETTINGS_ORGANIZATION, SETTINGS_APPLICATION)
+
+
+def get_int_setting(key, default):
+    """读取整数设置，值无效时返回默认值"""
+    try:
+        return int(get_settings().value(key, default))
+    except (TypeError, ValueError):
+        return default
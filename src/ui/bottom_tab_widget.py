@@ -35,7 +35,6 @@ class InfoTabWidget(QFrame):
         title_label = QLabel("Copyright © 2025 BrucePeng")
         title_label.setObjectName("titleLabel")
         title_label.setAlignment(Qt.AlignCenter)
-        title_label.setStyleSheet("font-size: 22px; font-weight: 600; color: #4b5563;")
         
         # Tab控件
         self.tab_widget = QTabWidget()
@@ -51,8 +50,7 @@ class InfoTabWidget(QFrame):
         main_layout.addWidget(title_label)
         main_layout.addWidget(self.tab_widget)
         
-        # 设置样式
-        self.set_styles()
+        # 样式由应用级主题提供（见 ui/theme.py）
         
     def create_disclaimer_tab(self):
         """创建免责声明标签页"""
@@ -61,7 +59,6 @@ class InfoTabWidget(QFrame):
         
         disclaimer_text = QTextEdit()
         disclaimer_text.setReadOnly(True)
-        disclaimer_text.setStyleSheet("font-size: 20px; line-height: 1.5;")
         disclaimer_text.setPlainText(
             "免责声明\n\n"
             "本软件（筋斗云排版）仅用于文档格式转换，不对用户提供的内容负责。\n\n"
@@ -81,7 +78,6 @@ class InfoTabWidget(QFrame):
         
         service_text = QTextEdit()
         service_text.setReadOnly(True)
-        service_text.setStyleSheet("font-size: 20px; line-height: 1.5;")
         service_text.setPlainText(
             "服务协议\n\n"
             "1. 服务内容\n"
@@ -108,7 +104,6 @@ class InfoTabWidget(QFrame):
         
         privacy_text = QTextEdit()
         privacy_text.setReadOnly(True)
-        privacy_text.setStyleSheet("font-size: 20px; line-height: 1.5;")
         privacy_text.setPlainText(
             "隐私政策\n\n"
             "1. 信息收集\n"
@@ -128,69 +123,6 @@ class InfoTabWidget(QFrame):
         privacy_layout.addWidget(privacy_text)
         self.tab_widget.addTab(privacy_widget, "隐私政策")
         
-    def set_styles(self):
-        """设置样式 - 使用更低调的颜色和样式"""
-        self.setStyleSheet("""
-            QFrame#infoTabWidget {
-                background-color: #f9fafb;
-                border: 1px solid #e5e7eb;
-                border-radius: 6px;
-                margin: 5px 0px;
-            }
-            
-            QLabel#titleLabel {
-                color: #6b7280;
-                font-size: 14px;
-                font-weight: 500;
-                padding: 5px 0px;
-                border-bottom: 1px solid #e5e7eb;
-                margin-bottom: 5px;
-            }
-            
-            QTabWidget#infoTabs::pane {
-                border: 1px solid #e5e7eb;
-                background-color: #ffffff;
-                border-radius: 4px;
-                top: -1px;
-            }
-            
-            QTabBar::tab {
-                background-color: #f3f4f6;
-                border: 1px solid #e5e7eb;
-                padding: 8px 16px;
-                margin-right: 2px;
-                border-bottom: none;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                font-size: 20px;
-                font-weight: 600;
-                color: #6b7280;
-                min-width: 140px;
-                max-width: 140px;
-            }
-            
-            QTabBar::tab:selected {
-                background-color: #ffffff;
-                border-bottom: 1px solid #ffffff;
-                color: #4b5563;
-                font-weight: 500;
-            }
-            
-            QTabBar::tab:hover:!selected {
-                background-color: #e5e7eb;
-                color: #4b5563;
-            }
-            
-            QTextEdit {
-                border: none;
-                background-color: #ffffff;
-                color: #4b5563;
-                font-size: 20px;
-                line-height: 1.5;
-                padding: 12px;
-            }
-        """)
-    
     def create_about_tab(self):
         """创建关于与鸣谢标签页"""
         about_widget = QWidget()
@@ -198,7 +130,6 @@ class InfoTabWidget(QFrame):
         
         about_text = QTextEdit()
         about_text.setReadOnly(True)
-        about_text.setStyleSheet("font-size: 20px; line-height: 1.5;")
         about_text.setHtml("""
             <h3>关于与鸣谢</h3>
             <p><b>筋斗云排版</b>是一款专为AI生成内容设计的智能排版工具，一键即可将AI内容转换为多种精美排版的Word文档，让您告别繁琐的手动调整。</p>
@@ -232,5 +163,23 @@ class InfoTabWidget(QFrame):
         """)
         
         about_layout.addWidget(about_text)
+        
+        # 完整的关于对话框，其中的“卡顿诊断”页可开启界面卡顿监测并查看记录
+        diagnostics_layout = QHBoxLayout()
+        diagnostics_layout.addStretch()
+        diagnostics_button = QPushButton("🩺 卡顿诊断")
+        diagnostics_button.setObjectName("diagnosticsButton")
+        diagnostics_button.setToolTip("查看界面卡顿记录，或开启卡顿监测")
+        diagnostics_button.clicked.connect(self.open_diagnostics)
+        diagnostics_layout.addWidget(diagnostics_button)
+        about_layout.addLayout(diagnostics_layout)
+        
         self.tab_widget.addTab(about_widget, "关于与鸣谢")
+        
+    def open_diagnostics(self):
+        """打开关于对话框的卡顿诊断页"""
+        from ui.about_dialog import AboutDialog
+        dialog = AboutDialog(self.window())
+        dialog.tabs.setCurrentWidget(dialog.diagnostics_tab)
+        dialog.exec_()
     
@@ -0,0 +1,71 @@
+"""
+编辑框内容指纹
+跟随编辑框文档的 contentsChange 信号增量更新各段落的哈希，
+点击生成或预先转换时直接取指纹，不必每次对整个编辑框内容重新计算哈希
+"""
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtGui import QTextCursor
+
+from core.block_hashes import BlockHashes
+
+
+# 选中文本中的段落分隔符
+PARAGRAPH_SEPARATOR = '\u2029'
+
+
+class ContentFingerprint(QObject):
+    """编辑框内容的分块哈希
+
+    指纹由编辑框中的全部文本决定（包括首尾空白），
+    相同指纹的内容 toPlainText() 的结果也相同
+    """
+
+    def __init__(self, text_edit, parent=None):
+        super().__init__(parent or text_edit)
+        self.document = text_edit.document()
+        self.hashes = BlockHashes()
+        self._reset()
+        self.document.contentsChange.connect(self._on_contents_change)
+
+    def fingerprint(self):
+        return self.hashes.fingerprint()
+
+    def snapshot(self):
+        return self.hashes.snapshot()
+
+    def changed_ranges(self, snapshot):
+        """与 snapshot 相比发生变化的段落范围，见 BlockHashes.changed_ranges"""
+        return self.hashes.changed_ranges(snapshot)
+
+    def _on_contents_change(self, position, removed, added):
+        # 修改前后都只影响从 position 所在段落到修改结束处所在段落的范围，之后的段落只是编号移动
+        first = self.document.findBlock(position)
+        last = self.document.findBlock(position + added)
+        if not last.isValid():
+            # 替换全部内容时结束位置包括最后的段落分隔符
+            last = self.document.lastBlock()
+        count = last.blockNumber() - first.blockNumber() + 1
+        removed_blocks = count - (self.document.blockCount() - len(self.hashes))
+        if not first.isValid() or removed_blocks < 1:
+            self._reset()
+            return
+        try:
+            self.hashes.replace(first.blockNumber(), removed_blocks, self._texts(first, last))
+        except IndexError as e:
+            print(f"内容指纹与编辑框不一致，重新计算: {e}")
+        if len(self.hashes) != self.document.blockCount():
+            self._reset()
+
+    def _reset(self):
+        self.hashes.reset(self._texts(self.document.begin(), self.document.lastBlock()))
+
+    def _texts(self, first, last):
+        """从 first 到 last 各段落的文本
+
+        一次取出整个范围再按段落分隔符拆分，比逐个段落调用 QTextBlock.text() 快得多
+        """
+        cursor = QTextCursor(self.document)
+        cursor.setPosition(first.position())
+        cursor.setPosition(last.position() + last.length() - 1, QTextCursor.KeepAnchor)
+        return cursor.selectedText().split(PARAGRAPH_SEPARATOR)
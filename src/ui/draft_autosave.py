@@ -0,0 +1,104 @@
+"""
+草稿自动保存
+把编辑框的每次修改作为增量追加到草稿日志中，定时刷盘并在日志过大时压缩，启动时恢复上次的草稿
+"""
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtGui import QTextCursor
+
+from core.draft_journal import DraftJournal, get_draft_dir
+
+
+# 刷盘间隔（毫秒）
+SYNC_INTERVAL_MS = 2000
+
+# QTextDocument中的段落分隔符，toPlainText() 中为换行
+PLAIN_TEXT_TABLE = str.maketrans({'\u2029': '\n', '\u2028': '\n'})
+
+
+class DraftAutosave(QObject):
+    """编辑框草稿的自动保存与恢复"""
+
+    def __init__(self, text_edit, directory=None, parent=None):
+        super().__init__(parent or text_edit)
+        self.text_edit = text_edit
+        self.document = text_edit.document()
+        self.journal = DraftJournal(directory or get_draft_dir())
+        # 编辑框显示的不是草稿内容时（如剪贴板摘要）暂停记录
+        self.suspended = False
+
+        self._sync_timer = QTimer(self)
+        self._sync_timer.setSingleShot(True)
+        self._sync_timer.setInterval(SYNC_INTERVAL_MS)
+        self._sync_timer.timeout.connect(self.sync)
+
+    def restore(self):
+        """恢复上次的草稿并开始记录
+
+        Returns:
+            str: 恢复的草稿内容（没有草稿时为空字符串）
+        """
+        try:
+            text = self.journal.load()
+        except OSError as e:
+            print(f"无法读取草稿: {e}")
+            return ''
+
+        if text:
+            self.suspended = True
+            self.text_edit.setPlainText(text)
+            self.suspended = False
+        self.document.contentsChange.connect(self._on_contents_change)
+        return text
+
+    def suspend(self):
+        """暂停记录（编辑框将显示非草稿内容）"""
+        self.suspended = True
+
+    def resume(self, text=''):
+        """以编辑框当前内容为准恢复记录"""
+        self.suspended = False
+        self._compact(text)
+
+    def sync(self):
+        """刷盘，日志过大时压缩为快照"""
+        try:
+            if self.journal.length != self.document.characterCount() - 1 and not self.suspended:
+                # 记录与编辑框内容不一致时，以编辑框为准重写快照
+                self._compact(self.text_edit.toPlainText())
+            elif self.journal.needs_compaction() and not self.suspended:
+                self._compact(self.text_edit.toPlainText())
+            else:
+                self.journal.sync()
+        except OSError as e:
+            print(f"草稿保存失败: {e}")
+
+    def close(self):
+        """退出前保存"""
+        self._sync_timer.stop()
+        self.sync()
+        self.journal.close()
+
+    def _compact(self, text):
+        try:
+            self.journal.compact(text)
+        except OSError as e:
+            print(f"草稿保存失败: {e}")
+
+    def _on_contents_change(self, position, removed, added):
+        if self.suspended:
+            return
+        inserted = ''
+        if added:
+            cursor = QTextCursor(self.document)
+            end = min(position + added, self.document.characterCount() - 1)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            inserted = cursor.selectedText().translate(PLAIN_TEXT_TABLE)
+        try:
+            self.journal.record(position, removed, inserted)
+        except OSError as e:
+            print(f"草稿保存失败: {e}")
+            return
+        if not self._sync_timer.isActive():
+            self._sync_timer.start()
@@ -0,0 +1,154 @@
+"""
+任务历史控件
+显示最近的转换任务及其耗时，支持打开生成的文档、重试任务和调整并发数
+"""
+
+import os
+import time
+from PyQt5.QtWidgets import (
+    QFrame, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QSpinBox
+)
+from PyQt5.QtCore import Qt, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices
+
+from core.conversion_queue import STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, STATUS_FAILED, PRIORITY_NAMES
+
+
+STATUS_TEXT = {
+    STATUS_QUEUED: '排队中',
+    STATUS_RUNNING: '生成中',
+    STATUS_SUCCEEDED: '成功',
+    STATUS_FAILED: '失败',
+}
+
+
+class JobHistoryWidget(QFrame):
+    """最近转换任务列表"""
+
+    retry_requested = pyqtSignal(object)
+    max_workers_changed = pyqtSignal(int)
+
+    COLUMNS = ['时间', '样式', '状态', '耗时', '文件']
+
+    def __init__(self, template_names, max_workers, history_size, parent=None):
+        super().__init__(parent)
+        self.setObjectName("jobHistoryPanel")
+        self.template_names = template_names
+        self.history_size = history_size
+        self.jobs = {}
+        self.init_ui(max_workers)
+
+    def init_ui(self, max_workers):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(10)
+
+        header_layout = QHBoxLayout()
+        title_label = QLabel('最近任务')
+        title_label.setObjectName("jobHistoryTitle")
+
+        workers_label = QLabel('同时生成：')
+        workers_label.setObjectName("jobHistoryHint")
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setObjectName("jobWorkersSpin")
+        self.workers_spin.setRange(1, 8)
+        self.workers_spin.setValue(max_workers)
+        self.workers_spin.valueChanged.connect(self.max_workers_changed.emit)
+
+        header_layout.addWidget(title_label)
+        header_layout.addStretch()
+        header_layout.addWidget(workers_label)
+        header_layout.addWidget(self.workers_spin)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setObjectName("jobHistoryTable")
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setMinimumHeight(220)
+        self.table.itemSelectionChanged.connect(self._update_buttons)
+        self.table.itemDoubleClicked.connect(lambda item: self._open_selected())
+
+        button_layout = QHBoxLayout()
+        self.open_button = QPushButton('📂 打开文件')
+        self.open_button.setObjectName("historyButton")
+        self.open_button.clicked.connect(self._open_selected)
+        self.retry_button = QPushButton('🔁 重试')
+        self.retry_button.setObjectName("historyButton")
+        self.retry_button.clicked.connect(self._retry_selected)
+        button_layout.addWidget(self.open_button)
+        button_layout.addWidget(self.retry_button)
+        button_layout.addStretch()
+
+        layout.addLayout(header_layout)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+        self._update_buttons()
+
+    def update_job(self, job):
+        """新增或刷新一条任务记录"""
+        row = self._find_row(job.id)
+        if row is None:
+            row = 0
+            self.table.insertRow(0)
+            for column in range(len(self.COLUMNS)):
+                self.table.setItem(0, column, QTableWidgetItem())
+            self.table.item(0, 0).setData(Qt.UserRole, job.id)
+            # 只保留最近的任务
+            while self.table.rowCount() > self.history_size:
+                removed_id = self.table.item(self.table.rowCount() - 1, 0).data(Qt.UserRole)
+                self.jobs.pop(removed_id, None)
+                self.table.removeRow(self.table.rowCount() - 1)
+        self.jobs[job.id] = job
+
+        duration = job.duration
+        values = [
+            time.strftime('%H:%M:%S', time.localtime(job.submitted_at)),
+            self.template_names.get(job.template_style, job.template_style),
+            STATUS_TEXT.get(job.status, job.status),
+            f'{duration:.1f} 秒' if duration is not None else '-',
+            os.path.basename(job.output_file),
+        ]
+        for column, value in enumerate(values):
+            self.table.item(row, column).setText(value)
+        self.table.item(row, 2).setToolTip(job.message)
+        wait = job.wait
+        self.table.item(row, 3).setToolTip(
+            f'{PRIORITY_NAMES.get(job.priority, job.priority)}任务，排队 {wait:.1f} 秒' if wait is not None
+            else f'{PRIORITY_NAMES.get(job.priority, job.priority)}任务'
+        )
+        self.table.item(row, 4).setToolTip(job.output_file)
+        self._update_buttons()
+
+    def _find_row(self, job_id):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 0).data(Qt.UserRole) == job_id:
+                return row
+        return None
+
+    def _selected_job(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        return self.jobs.get(self.table.item(rows[0].row(), 0).data(Qt.UserRole))
+
+    def _update_buttons(self):
+        job = self._selected_job()
+        self.open_button.setEnabled(bool(job and job.status == STATUS_SUCCEEDED and os.path.exists(job.output_file)))
+        self.retry_button.setEnabled(bool(job and not job.in_flight))
+
+    def _open_selected(self):
+        job = self._selected_job()
+        if job and job.status == STATUS_SUCCEEDED and os.path.exists(job.output_file):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(job.output_file))
+
+    def _retry_selected(self):
+        job = self._selected_job()
+        if job and not job.in_flight:
+            self.retry_requested.emit(job)
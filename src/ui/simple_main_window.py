@@ -5,30 +5,29 @@
 
 import os
 import sys
-from datetime import datetime
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QPushButton, QLabel, QTextEdit, QMessageBox, 
-    QApplication, QScrollArea, QFrame
+    QApplication, QScrollArea, QFrame, QShortcut, QFileDialog
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QKeySequence
 
 # 添加当前目录到路径，以便导入模块
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# 导入核心模块
-from core.enhanced_pandoc_converter import EnhancedPandocConverter
+from ui.theme import apply_theme, set_widget_state, load_theme_name, save_theme_name
+from ui.app_settings import get_settings, get_int_setting
 
-# 导入版本检查模块
-from core.version_checker import get_expiration_message, get_test_version_message
-
-# 导入底部tab组件
-from ui.bottom_tab_widget import InfoTabWidget
+# 转换器、版本检查和底部tab组件都在首次使用时才导入，首帧只加载界面本身需要的模块
 
 
 class SimpleMainWindow(QMainWindow):
     """简化的主窗口类 - 三步操作界面"""
     
+    # 任务状态变化（由工作线程发出，在主线程中处理）
+    job_updated = pyqtSignal(object)
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle('筋斗云排版')
@@ -45,8 +44,21 @@ class SimpleMainWindow(QMainWindow):
         # 获取pandoc路径
         self._init_pandoc_path()
         
-        # 初始化转换器
-        self.converter = EnhancedPandocConverter(self.pandoc_path)
+        # 转换器和任务队列在第一次生成文档时才创建
+        self._converter = None
+        self._job_queue = None
+        # 预先转换（编辑框停止变化一段时间后在后台转换，首次预先转换时才创建；编辑时占用CPU，默认关闭）
+        self._speculative_converter = None
+        self.speculation_enabled = get_settings().value('speculative/enabled', False, type=bool)
+        self.history_panel = None
+        # 一次拖入或启动时传入的多个文件：全部完成后只汇总提示一次
+        self._batch_jobs = []
+        self.job_updated.connect(self._on_job_updated)
+        
+        # 文件夹监视（开始监视时才创建）
+        self.folder_watcher = None
+        self._fs_watcher = None
+        self._watch_timer = None
         
         # 预设排版方案
         self.layout_templates = {
@@ -74,14 +86,86 @@ class SimpleMainWindow(QMainWindow):
         
         self.selected_template = 'simple'  # 默认选择
         self.html_content = ''
+        # 直接从剪贴板转换时的完整内容（编辑框中只显示摘要）
+        self._clipboard_html = None
+        # 打开的源文件（编辑框中只显示当前页的预览）
+        self._source_file = None
+        self._preview_page = 0
+        # 编辑框内容的分块哈希（第一次需要指纹时创建，之后随编辑增量更新）
+        self._content_fingerprint = None
+        # 草稿自动保存（窗口显示后再恢复草稿）
+        self.draft_autosave = None
+        # 模板缩略图（窗口显示后再加载）
+        self.thumbnail_loader = None
+        # 常驻托盘模式（开启时才创建托盘图标）
+        self.tray_icon = None
+        self._quitting = False
+        
+        # 在创建控件之前应用主题，控件首次显示时只需计算一次样式
+        self.theme_name = apply_theme(load_theme_name())
         
         self.init_ui()
         
+        self._speculation_timer = QTimer(self)
+        self._speculation_timer.setSingleShot(True)
+        self._speculation_timer.timeout.connect(self._speculate)
+        self.html_input.textChanged.connect(self._schedule_speculation)
+        
+    @property
+    def converter(self):
+        """转换器（延迟创建）"""
+        if self._converter is None:
+            from core.enhanced_pandoc_converter import EnhancedPandocConverter
+            settings = get_settings()
+            self._converter = EnhancedPandocConverter(
+                self.pandoc_path,
+                use_native_writer=settings.value('output/native_writer', False, type=bool),
+                optimize_output=settings.value('output/optimize', False, type=bool),
+                typography=settings.value('output/typography', False, type=bool),
+                embed_fonts=settings.value('output/embed_fonts', False, type=bool),
+                offload_tables=settings.value('output/offload_tables', False, type=bool),
+            )
+        return self._converter
+        
+    @property
+    def speculative_converter(self):
+        """带预先转换的转换器（随任务队列创建，未开启预先转换时为None）"""
+        return self.job_queue.converter if self.speculation_enabled else None
+        
+    @property
+    def content_fingerprint(self):
+        """编辑框内容指纹（延迟创建）"""
+        if self._content_fingerprint is None:
+            from ui.content_fingerprint import ContentFingerprint
+            self._content_fingerprint = ContentFingerprint(self.html_input)
+        return self._content_fingerprint
+        
+    @property
+    def job_queue(self):
+        """转换任务队列（延迟创建）"""
+        if self._job_queue is None:
+            from core.conversion_queue import ConversionQueue, DEFAULT_MAX_WORKERS, default_class_limits
+            # 按CPU核数限制各类别同时运行的转换数，点击生成不排在批量转换之后
+            self._job_queue = ConversionQueue(
+                self.converter,
+                max_workers=get_int_setting('queue/max_workers', DEFAULT_MAX_WORKERS),
+                on_update=self.job_updated.emit,
+                class_limits=default_class_limits()
+            )
+            if self.speculation_enabled:
+                from core.speculative_conversion import SpeculativeConverter
+                # 预先转换由任务队列按优先级调度，点击生成时先匹配预先转换的结果
+                self._speculative_converter = SpeculativeConverter(self.converter, scheduler=self._job_queue)
+                self._job_queue.converter = self._speculative_converter
+        return self._job_queue
+        
     def _init_pandoc_path(self):
         """初始化pandoc路径"""
         if getattr(sys, 'frozen', False):
-            # 在打包后的exe中
-            if hasattr(sys, '_MEIPASS'):
+            # 在打包后的exe中，优先使用入口程序设置的路径（可能指向运行时缓存）
+            if os.environ.get('PANDOC_PATH') and os.path.exists(os.environ['PANDOC_PATH']):
+                self.pandoc_path = os.environ['PANDOC_PATH']
+            elif hasattr(sys, '_MEIPASS'):
                 self.pandoc_path = os.path.join(sys._MEIPASS, 'pandoc', 'pandoc.exe')
             else:
                 self.pandoc_path = os.path.join(os.path.dirname(sys.executable), 'pandoc', 'pandoc.exe')
@@ -104,15 +188,7 @@ class SimpleMainWindow(QMainWindow):
         scroll_area.setWidgetResizable(True)
         scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)  # 允许水平滚动
-        scroll_area.setStyleSheet("""
-            QScrollArea {
-                border: none;
-                background: transparent;
-            }
-            QScrollArea > QWidget > QWidget {
-                background: transparent;
-            }
-        """)
+        scroll_area.setObjectName("mainScrollArea")
         
         # 创建滚动内容容器
         scroll_content = QWidget()
@@ -168,23 +244,13 @@ class SimpleMainWindow(QMainWindow):
         # 创建底部区域
         self._create_bottom_area(scroll_layout)
         
-        # 设置样式
-        self._set_styles()
-        
         # 设置默认描述（在所有UI组件创建后）
         self.template_desc_label.setText(self.layout_templates['simple']['description'])
         
     def _create_header_area(self, parent_layout):
         """创建顶部标题区域"""
         header_frame = QFrame()
-        header_frame.setStyleSheet("""
-            QFrame {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #667eea, stop:1 #764ba2);
-                border-radius: 12px;
-                padding: 25px 20px;
-                margin-bottom: 10px;
-            }
-        """)
+        header_frame.setObjectName("headerFrame")
         
         header_layout = QVBoxLayout(header_frame)
         header_layout.setSpacing(8)
@@ -197,12 +263,7 @@ class SimpleMainWindow(QMainWindow):
         # 副标题说明
         subtitle_label = QLabel('三步完成专业文档排版：粘贴HTML → 选择样式 → 导出Word')
         subtitle_label.setAlignment(Qt.AlignCenter)
-        subtitle_label.setStyleSheet("""
-            font-size: 32px;
-            color: #e0f2fe;
-            font-weight: 500;
-            margin-top: 5px;
-        """)
+        subtitle_label.setObjectName("headerSubtitle")
         
         header_layout.addWidget(title_label)
         header_layout.addWidget(subtitle_label)
@@ -213,14 +274,6 @@ class SimpleMainWindow(QMainWindow):
         """创建步骤1区域：AI工具使用说明和HTML输入"""
         step1_frame = QFrame()
         step1_frame.setObjectName("step1Frame")
-        step1_frame.setStyleSheet("""
-            QFrame#step1Frame {
-                background-color: #d7e8ff;
-                border: 2px solid #93c5fd;
-                border-radius: 12px;
-                padding: 0px;
-            }
-        """)
         
         step1_layout = QVBoxLayout(step1_frame)
         step1_layout.setSpacing(20)
@@ -228,32 +281,18 @@ class SimpleMainWindow(QMainWindow):
         
         # 步骤1标题
         step1_title = QLabel('步骤 1：准备HTML内容')
-        step1_title.setStyleSheet("""
-            font-size: 36px;
-            font-weight: 700;
-            color: #1e293b;
-            margin-bottom: 5px;
-        """)
+        step1_title.setProperty("role", "stepTitle")
                 
         # AI工具使用说明
         ai_instruction_title = QLabel('使用AI工具生成HTML内容：')
-        ai_instruction_title.setStyleSheet("""
-            font-size: 28px;
-            font-weight: 600;
-            color: #0369a1;
-            margin-bottom: 8px;
-        """)
+        ai_instruction_title.setObjectName("aiInstructionTitle")
         
         ai_instruction_text = QLabel(
             '1. 打开任意AI对话工具（如ChatGPT、deepseek等）\n'
             '2. 复制以下指令并发送给AI：\n'
             '3. 将AI返回的HTML内容粘贴到下方文本框'
         )
-        ai_instruction_text.setStyleSheet("""
-            font-size: 26px;
-            color: #0c4a6e;
-            line-height: 1.4;
-        """)
+        ai_instruction_text.setObjectName("aiInstructionText")
         
         # AI指令标题和复制按钮行
         ai_command_row_layout = QHBoxLayout()
@@ -271,48 +310,62 @@ class SimpleMainWindow(QMainWindow):
         self.ai_command_input.setPlainText('【请输入文档题目】\n\n你是一个专业的HTML语义化标记专家。请根据以下规则，将上文所要求撰写的文档内容以结构良好的HTML代码输出：\n### 角色与任务\n- 角色：你是一个经验丰富的Web开发者，擅长使用HTML5进行语义化标记。\n- 主要任务：使用以下指定的HTML标签集合，对文档内容进行结构清晰、语义准确的格式化，确保输出代码具有良好的可访问性和结构清晰性。\n- 可用标签列表：html, body, head, meta, h1, h2, h3, h4, h5, h6, p, br, hr, strong, b, em, i, ul, ol, li, dl, dt, dd, a, img, table, thead, tbody, tr, th, td, code, pre, blockquote。\n### 具体规则\n1. 文档结构：\n   - 若内容包含标题层级，使用`h1`-`h6`表示标题等级（如主标题用`h1`，子标题用`h2`等）。\n   - 段落用`p`标签，换行用`br`，水平分割线用`hr`。\n   - 列表内容：无序列表用`ul` > `li`，有序列表用`ol` > `li`，定义列表用`dl` > `dt`（术语）和`dd`（描述）。\n2. 文本强调：加粗用`strong`（重要）或`b`（纯样式），斜体用`em`（强调）或`i`（技术术语）。\n3. 媒体与表格：图片链接用`img`（需补全alt属性），表格数据用`table` > `thead`/`tbody` > `tr` > `th`/`td`。\n4. 代码与引用：内联代码用`code`，代码块用`pre` > `code`，引用块用`blockquote`。\n### 输出要求\n- 生成的HTML文档结构（包括`html`、`head`、`body`等必要标签，但head中不要包含title标签）。\n- 将最终HTML代码包裹在Markdown代码块中（即使用三重反引号格式）。\n- 示例输出格式：\n```\n<!DOCTYPE html>\n<html>\n<head><meta charset="UTF-8">\n<!-- 注意：head内部不要包含title标签 -->\n</head>\n<body>......</body>\n</html>\n```')
         self.ai_command_input.setFixedHeight(240)
         self.ai_command_input.setReadOnly(True)  # 设置为只读模式
-        self.ai_command_input.setStyleSheet("""
-            QTextEdit {
-                border: 1px solid #93c5fd;
-                border-radius: 6px;
-                padding: 12px;
-                font-size: 22px;
-                font-family: 'Consolas', 'Monaco', monospace;
-                background-color: white;
-                selection-background-color: #3b82f6;
-                color: #475569;
-            }
-            QTextEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.ai_command_input.setObjectName("aiCommandInput")
         
         # HTML输入区域
         html_input_label = QLabel('粘贴HTML内容：')
-        html_input_label.setStyleSheet("""
-            font-size: 32px;
-            font-weight: 600;
-            color: #1e293b;
-            margin-bottom: 10px;
-        """)
+        html_input_label.setObjectName("htmlInputLabel")
+        
+        # 直接转换剪贴板按钮：内容不经过编辑框排版
+        self.clipboard_button = QPushButton('⚡ 直接转换剪贴板 (Ctrl+Shift+V)')
+        self.clipboard_button.setObjectName("clipboardButton")
+        self.clipboard_button.setMinimumHeight(40)
+        self.clipboard_button.clicked.connect(self._convert_clipboard)
+        
+        self.clipboard_shortcut = QShortcut(QKeySequence('Ctrl+Shift+V'), self)
+        self.clipboard_shortcut.setContext(Qt.ApplicationShortcut)
+        self.clipboard_shortcut.activated.connect(self._convert_clipboard)
+        
+        # 打开文件按钮：大文件从磁盘流式转换，编辑框只显示分页预览
+        self.open_file_button = QPushButton('📂 打开文件 (Ctrl+O)')
+        self.open_file_button.setObjectName("openFileButton")
+        self.open_file_button.setMinimumHeight(40)
+        self.open_file_button.clicked.connect(self._open_file)
+        
+        self.open_file_shortcut = QShortcut(QKeySequence.Open, self)
+        self.open_file_shortcut.activated.connect(self._open_file)
+        
+        html_input_row_layout = QHBoxLayout()
+        html_input_row_layout.addWidget(html_input_label)
+        html_input_row_layout.addStretch()
+        html_input_row_layout.addWidget(self.open_file_button)
+        html_input_row_layout.addWidget(self.clipboard_button)
         
         self.html_input = QTextEdit()
+        # 只接受纯文本：粘贴的是HTML源码，草稿日志按纯文本记录
+        self.html_input.setAcceptRichText(False)
         self.html_input.setPlaceholderText('请在此处粘贴HTML内容...')
         self.html_input.setMinimumHeight(400)
-        self.html_input.setStyleSheet("""
-            QTextEdit {
-                border: 1px solid #cbd5e1;
-                border-radius: 6px;
-                padding: 12px;
-                font-family: 'Consolas', 'Monaco', monospace;
-                font-size: 26px;
-                background-color: white;
-            }
-            QTextEdit:focus {
-                border: 2px solid #3b82f6;
-                background-color: white;
-            }
-        """)
+        self.html_input.setObjectName("htmlInput")
+        
+        # 打开文件时的预览翻页
+        self.preview_prev_button = QPushButton('◀ 上一页')
+        self.preview_prev_button.setObjectName("previewPageButton")
+        self.preview_prev_button.clicked.connect(lambda: self._show_preview_page(self._preview_page - 1))
+        self.preview_next_button = QPushButton('下一页 ▶')
+        self.preview_next_button.setObjectName("previewPageButton")
+        self.preview_next_button.clicked.connect(lambda: self._show_preview_page(self._preview_page + 1))
+        self.preview_page_label = QLabel()
+        self.preview_page_label.setObjectName("previewPageLabel")
+        
+        self.preview_nav = QWidget()
+        preview_nav_layout = QHBoxLayout(self.preview_nav)
+        preview_nav_layout.setContentsMargins(0, 0, 0, 0)
+        preview_nav_layout.addWidget(self.preview_page_label)
+        preview_nav_layout.addStretch()
+        preview_nav_layout.addWidget(self.preview_prev_button)
+        preview_nav_layout.addWidget(self.preview_next_button)
+        self.preview_nav.hide()
         
         # 添加到布局
         step1_layout.addWidget(step1_title)
@@ -320,8 +373,9 @@ class SimpleMainWindow(QMainWindow):
         step1_layout.addWidget(ai_instruction_text)
         step1_layout.addLayout(ai_command_row_layout)
         step1_layout.addWidget(self.ai_command_input)
-        step1_layout.addWidget(html_input_label)
+        step1_layout.addLayout(html_input_row_layout)
         step1_layout.addWidget(self.html_input)
+        step1_layout.addWidget(self.preview_nav)
         
         parent_layout.addWidget(step1_frame)
         
@@ -330,14 +384,6 @@ class SimpleMainWindow(QMainWindow):
         step2_frame = QFrame()
         step2_frame.setObjectName("step2Frame")
         step2_frame.setFixedWidth(680)  # 设置固定宽度
-        step2_frame.setStyleSheet("""
-            QFrame#step2Frame {
-                background-color: #d7e8ff;
-                border: 2px solid #93c5fd;
-                border-radius: 12px;
-                padding: 0px;
-            }
-        """)
         
         step2_layout = QVBoxLayout(step2_frame)
         step2_layout.setSpacing(20)
@@ -345,12 +391,7 @@ class SimpleMainWindow(QMainWindow):
         
         # 步骤2标题
         step2_title = QLabel('步骤 2：选择文档样式')
-        step2_title.setStyleSheet("""
-            font-size: 36px;
-            font-weight: 700;
-            color: #1e293b;
-            margin-bottom: 5px;
-        """)
+        step2_title.setProperty("role", "stepTitle")
                 
         # 创建纵向按钮布局
         self.template_buttons_layout = QVBoxLayout()
@@ -368,13 +409,14 @@ class SimpleMainWindow(QMainWindow):
         for i, template in enumerate(templates):
             button = QPushButton(template['name'])
             button.setMinimumHeight(60)
+            button.setProperty("role", "template")
             button.setProperty("template_id", template['id'])
             button.setProperty("template_desc", template['desc'])
             button.clicked.connect(lambda checked, t=template: self._on_template_button_clicked(t))
             
             # 第一个按钮默认选中
+            button.setProperty("selected", i == 0)
             if i == 0:
-                button.setObjectName("selectedTemplate")
                 self.selected_template = template['id']
             
             self.template_buttons.append(button)
@@ -382,21 +424,10 @@ class SimpleMainWindow(QMainWindow):
         
         # 样式描述
         desc_label = QLabel('样式描述：')
-        desc_label.setStyleSheet("""
-            font-size: 28px;
-            font-weight: 600;
-            color: #475569;
-            margin-bottom: 0px;
-        """)
+        desc_label.setObjectName("templateDescTitle")
         
         self.template_desc_label = QLabel(self.layout_templates['simple']['description'])
-        self.template_desc_label.setStyleSheet("""
-            font-size: 26px;
-            color: #64748b;
-            line-height: 1.5;
-            padding: 0px;
-            margin-top: 0px;
-        """)
+        self.template_desc_label.setObjectName("templateDescLabel")
         self.template_desc_label.setWordWrap(True)
         self.template_desc_label.setMinimumHeight(80)
         
@@ -413,14 +444,6 @@ class SimpleMainWindow(QMainWindow):
         step3_frame = QFrame()
         step3_frame.setObjectName("step3Frame")
         step3_frame.setFixedWidth(680)  # 设置固定宽度
-        step3_frame.setStyleSheet("""
-            QFrame#step3Frame {
-                background-color: #d7e8ff;
-                border: 2px solid #6ee7b7;
-                border-radius: 12px;
-                padding: 0px;
-            }
-        """)
         
         step3_layout = QVBoxLayout(step3_frame)
         step3_layout.setSpacing(20)
@@ -428,12 +451,7 @@ class SimpleMainWindow(QMainWindow):
         
         # 步骤3标题
         step3_title = QLabel('步骤 3：生成文档')
-        step3_title.setStyleSheet("""
-            font-size: 36px;
-            font-weight: 700;
-            color: #1e293b;
-            margin-bottom: 5px;
-        """)        
+        step3_title.setProperty("role", "stepTitle")
        
         # 操作按钮区域（纵向布局）
         button_layout = QVBoxLayout()
@@ -451,24 +469,60 @@ class SimpleMainWindow(QMainWindow):
         self.clear_button.clicked.connect(self._clear_content)
         self.clear_button.setObjectName("clearButton")
         
+        # 监视文件夹按钮
+        self.watch_button = QPushButton('👀 监视文件夹')
+        self.watch_button.setMinimumHeight(50)
+        self.watch_button.clicked.connect(self._toggle_folder_watch)
+        self.watch_button.setObjectName("watchButton")
+        
+        # 嵌入中文字体开关
+        self.embed_fonts_button = QPushButton('🔤 嵌入中文字体')
+        self.embed_fonts_button.setMinimumHeight(50)
+        self.embed_fonts_button.setObjectName("embedFontsButton")
+        self.embed_fonts_button.setToolTip('把文档用到的中文字体按实际用到的字符子集化后嵌入，未安装该字体的电脑也能按原样显示')
+        self.embed_fonts_button.clicked.connect(self._toggle_embed_fonts)
+        set_widget_state(
+            self.embed_fonts_button, 'selected', get_settings().value('output/embed_fonts', False, type=bool)
+        )
+        
+        # 中文排版开关
+        self.typography_button = QPushButton('🈶 中文排版')
+        self.typography_button.setMinimumHeight(50)
+        self.typography_button.setObjectName("typographyButton")
+        self.typography_button.setToolTip('把中文后的半角标点改为全角、统一中英文间距，并使用排版方案指定的中文字体（代码不受影响）')
+        self.typography_button.clicked.connect(self._toggle_typography)
+        set_widget_state(
+            self.typography_button, 'selected', get_settings().value('output/typography', False, type=bool)
+        )
+        
+        # 快速写入器开关
+        self.native_writer_button = QPushButton('⚡ 快速生成')
+        self.native_writer_button.setMinimumHeight(50)
+        self.native_writer_button.setObjectName("nativeWriterButton")
+        self.native_writer_button.setToolTip('只用到提示词限定标签的简单HTML文档不经过Pandoc，由程序直接生成，转换更快')
+        self.native_writer_button.clicked.connect(self._toggle_native_writer)
+        set_widget_state(
+            self.native_writer_button, 'selected', get_settings().value('output/native_writer', False, type=bool)
+        )
+        
+        option_layout = QHBoxLayout()
+        option_layout.setSpacing(15)
+        option_layout.addWidget(self.watch_button)
+        option_layout.addWidget(self.typography_button)
+        option_layout.addWidget(self.embed_fonts_button)
+        option_layout.addWidget(self.native_writer_button)
+        
         button_layout.addWidget(self.generate_button)
         button_layout.addWidget(self.clear_button)
+        button_layout.addLayout(option_layout)
         
         # 状态标签
         self.status_label = QLabel('状态：等待用户输入...')
-        self.status_label.setStyleSheet("""
-            font-size: 30px;
-            color: #475569;
-            font-weight: 600;
-        """)
+        self.status_label.setObjectName("statusLabel")
         
         # 文件保存位置说明
         save_location = QLabel('📁 文档将保存到：桌面/筋斗云_timestamp.docx')
-        save_location.setStyleSheet("""
-            font-size: 26px;
-            color: #64748b;
-            font-weight: 500;
-        """)
+        save_location.setObjectName("saveLocationLabel")
         
         # 添加到布局
         step3_layout.addWidget(step3_title)
@@ -476,22 +530,25 @@ class SimpleMainWindow(QMainWindow):
         step3_layout.addWidget(self.status_label)
         step3_layout.addWidget(save_location)
         
+        # 文件夹监视状态
+        self.watch_label = QLabel()
+        self.watch_label.setObjectName("watchStatusLabel")
+        self.watch_label.setWordWrap(True)
+        self.watch_label.hide()
+        step3_layout.addWidget(self.watch_label)
+        
+        # 任务历史在第一次生成文档时才添加
+        self.step3_layout = step3_layout
+        
         parent_layout.addWidget(step3_frame)
 
     def _create_bottom_area(self, parent_layout):
         """创建底部信息区域"""
+        from core.version_checker import get_expiration_message, get_test_version_message
+        
         # 创建底部信息区域（版本信息）
         info_frame = QFrame()
         info_frame.setObjectName("infoFrame")
-        info_frame.setStyleSheet("""
-            QFrame#infoFrame {
-                background-color: #f8fafc;
-                border-top: 1px solid #e2e8f0;
-                border-radius: 0px;
-                padding: 15px 0px 5px 0px;
-                margin: 10px 0px 0px 0px;
-            }
-        """)
         
         info_layout = QVBoxLayout(info_frame)
         info_layout.setSpacing(5)
@@ -499,22 +556,13 @@ class SimpleMainWindow(QMainWindow):
         
         # 版本过期时间
         self.expiration_label = QLabel()
-        self.expiration_label.setStyleSheet("""
-            font-size: 24px;
-            color: #dc2626;
-            font-weight: 600;
-        """)
+        self.expiration_label.setObjectName("expirationLabel")
         self.expiration_label.setAlignment(Qt.AlignCenter)
         self.expiration_label.setText(get_expiration_message())
         
         # 测试版本说明
         self.test_version_label = QLabel()
-        self.test_version_label.setStyleSheet("""
-            font-size: 22px;
-            color: #991b1b;
-            font-style: italic;
-            line-height: 1.4;
-        """)
+        self.test_version_label.setObjectName("testVersionLabel")
         self.test_version_label.setAlignment(Qt.AlignCenter)
         self.test_version_label.setWordWrap(True)
         self.test_version_label.setText(get_test_version_message())
@@ -535,151 +583,191 @@ class SimpleMainWindow(QMainWindow):
         # 创建反馈与建议链接
         feedback_label = QLabel('<a href="https://wj.qq.com/s2/25048545/zf1s/">反馈与建议_点击此处</a>')
         feedback_label.setOpenExternalLinks(True)
-        feedback_label.setStyleSheet("""
-            font-size: 25px;
-            color: #3b82f6;
-            text-decoration: underline;
-            padding: 10px;
-        """)
+        feedback_label.setObjectName("feedbackLabel")
         feedback_layout.addWidget(feedback_label)
         
         # 添加右侧弹簧
         feedback_layout.addStretch()
         
+        # 主题切换按钮
+        self.theme_button = QPushButton()
+        self.theme_button.setObjectName("themeButton")
+        self.theme_button.clicked.connect(self._toggle_theme)
+        self._update_theme_button()
+        feedback_layout.addWidget(self.theme_button)
+        
+        # 常驻托盘开关
+        self.tray_button = QPushButton('📌 常驻托盘')
+        self.tray_button.setObjectName("trayButton")
+        self.tray_button.setToolTip('开启后关闭窗口只隐藏到系统托盘，再次打开无需重新启动')
+        self.tray_button.clicked.connect(self._toggle_tray_mode)
+        feedback_layout.addWidget(self.tray_button)
+        if get_settings().value('tray/enabled', False, type=bool):
+            QTimer.singleShot(0, lambda: self.set_tray_mode(True))
+        
         # 将反馈区域添加到父布局（在tab区域之前）
         parent_layout.addWidget(feedback_frame)
         
-        # 添加信息展示区域
-        self.bottom_tabs = InfoTabWidget()
-        parent_layout.addWidget(self.bottom_tabs)
-                
-    def _set_styles(self):
-        """设置整体样式"""
-        self.setStyleSheet("""
-            QMainWindow {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #f8fafc, stop:1 #f1f5f9);
-                font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
-            }
+        # 添加信息展示区域：位于首屏之外，窗口显示后再创建
+        self.bottom_tabs = None
+        self.bottom_tabs_layout = QVBoxLayout()
+        self.bottom_tabs_layout.setContentsMargins(0, 0, 0, 0)
+        parent_layout.addLayout(self.bottom_tabs_layout)
+        QTimer.singleShot(0, self._create_info_tabs)
+        QTimer.singleShot(0, self._restore_draft)
+        QTimer.singleShot(0, self._load_template_thumbnails)
+        
+    def _restore_draft(self):
+        """恢复上次未完成的草稿，并开始自动保存"""
+        from ui.draft_autosave import DraftAutosave
+        
+        self.draft_autosave = DraftAutosave(self.html_input)
+        if self.draft_autosave.restore():
+            self.status_label.setText('状态：已恢复上次未完成的草稿')
             
-            /* 添加QLabel全局样式，确保没有边框 */
-            QLabel {
-                border: none;
-                background: transparent;
-            }
-            
-            /* 主按钮样式 - 绿色 */
-            QPushButton#generateButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #22c55e, stop:1 #16a34a);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                padding: 12px 24px;
-                font-size: 30px;
-                font-weight: 600;
-                min-height: 100px;
-            }
-            QPushButton#generateButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #16a34a, stop:1 #15803d);
-            }
-            QPushButton#generateButton:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #15803d, stop:1 #166534);
-                padding: 13px 23px 11px 25px;
-            }
-            
-            /* 次按钮样式 */
-            QPushButton#clearButton {
-                background: transparent;
-                color: #617087;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 24px;
-                font-size: 30px;
-                font-weight: 500;
-                min-height: 100px;
-            }
-            QPushButton#clearButton:hover {
-                background: #ff7171;
-                color: #1b1b1b;
-            }
-            QPushButton#clearButton:pressed {
-                background: #a20000;
-                color: #ffffff;
-                padding: 13px 23px 11px 25px;
-            }
-            
-            /* 复制按钮样式 */
-            QPushButton#copyButton {
-                background-color: #f8fafc;
-                color: #475569;
-                border: 1px solid #e2e8f0;
-                border-radius: 6px;
-                padding: 6px 12px;
-                font-size: 20px;
-                font-weight: 500;
-                min-height: 40px;
-                min-width: 120px;
-            }
-            QPushButton#copyButton:hover {
-                background-color: #f1f5f9;
-                color: #334155;
-                border-color: #cbd5e1;
-            }
-            QPushButton#copyButton:pressed {
-                background-color: #e2e8f0;
-                color: #1e293b;
-            }
-            
-            /* 模板选择按钮样式 */
-            QPushButton {
-                background-color: #f8fafc;
-                color: #475569;
-                border: 2px solid #e2e8f0;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 28px;
-                font-weight: 600;
-                min-height: 60px;
-            }
-            QPushButton:hover {
-                background-color: #e2e8f0;
-                color: #334155;
-                border-color: #cbd5e1;
-            }
-            QPushButton:pressed {
-                background-color: #cbd5e1;
-                color: #1e293b;
-            }
-            QPushButton#selectedTemplate {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #3b82f6, stop:1 #2563eb);
-                color: white;
-                border: 2px solid #2563eb;
-            }
-            QPushButton#selectedTemplate:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #2563eb, stop:1 #1d4ed8);
-            }
-            QPushButton#selectedTemplate:pressed {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #1d4ed8, stop:1 #1e40af);
-            }
+    def _load_template_thumbnails(self):
+        """加载模板缩略图（已缓存的立即显示，其余在后台绘制完成后显示）"""
+        from ui.template_thumbnails import TemplateThumbnailLoader
+        
+        self.thumbnail_loader = TemplateThumbnailLoader(self.converter, self)
+        self.thumbnail_loader.thumbnail_ready.connect(self._set_template_thumbnail)
+        self.thumbnail_loader.load([button.property("template_id") for button in self.template_buttons])
+        
+    def _set_template_thumbnail(self, template_id, image):
+        """在模板按钮上显示缩略图"""
+        from PyQt5.QtGui import QIcon, QPixmap
+        
+        pixmap = QPixmap.fromImage(image)
+        for button in self.template_buttons:
+            if button.property("template_id") == template_id:
+                button.setIcon(QIcon(pixmap))
+                button.setIconSize(pixmap.size() / pixmap.devicePixelRatio())
+                
+    def closeEvent(self, event):
+        """退出前保存草稿；常驻托盘时只隐藏窗口"""
+        if self.tray_icon is not None and not self._quitting:
+            event.ignore()
+            self.hide()
+            if self.draft_autosave:
+                self.draft_autosave.sync()
+            self.tray_icon.show_hidden_hint()
+            return
+        if self.draft_autosave:
+            self.draft_autosave.close()
+        if self._speculative_converter is not None:
+            self._speculative_converter.close()
+        self._close_source_file()
+        super().closeEvent(event)
+        
+    def quit_application(self):
+        """退出程序（常驻托盘时从托盘菜单调用）"""
+        self._quitting = True
+        self.close()
+        QApplication.quit()
+        
+    def bring_to_front(self):
+        """显示窗口并切换到前台"""
+        self.setWindowState(self.windowState() & ~Qt.WindowMinimized)
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        
+    def set_tray_mode(self, enabled):
+        """开启或关闭常驻托盘模式"""
+        from PyQt5.QtWidgets import QSystemTrayIcon
+        
+        if enabled and not QSystemTrayIcon.isSystemTrayAvailable():
+            QMessageBox.warning(self, '提示', '当前系统不支持托盘图标')
+            enabled = False
+        get_settings().setValue('tray/enabled', enabled)
+        
+        if enabled and self.tray_icon is None:
+            from ui.tray_icon import TrayIcon
+            self.tray_icon = TrayIcon(self)
+            self.tray_icon.show()
+        elif not enabled and self.tray_icon is not None:
+            self.tray_icon.hide()
+            self.tray_icon.deleteLater()
+            self.tray_icon = None
+        QApplication.instance().setQuitOnLastWindowClosed(not enabled)
+        set_widget_state(self.tray_button, 'selected', enabled)
+        
+    def _toggle_tray_mode(self):
+        self.set_tray_mode(self.tray_icon is None)
+        
+    def _toggle_embed_fonts(self):
+        """开启或关闭嵌入中文字体（之后生成的文档生效）"""
+        enabled = not get_settings().value('output/embed_fonts', False, type=bool)
+        if enabled:
+            from core.font_embedder import fonttools_available
+            if not fonttools_available():
+                QMessageBox.warning(self, '提示', '嵌入中文字体需要安装 fontTools：\npip install fonttools')
+                return
+        get_settings().setValue('output/embed_fonts', enabled)
+        if self._converter is not None:
+            self._converter.embed_fonts = enabled
+        set_widget_state(self.embed_fonts_button, 'selected', enabled)
+        self.status_label.setText('状态：已开启嵌入中文字体' if enabled else '状态：已关闭嵌入中文字体')
+        # 之前的预先转换使用的是旧选项
+        self._schedule_speculation()
+        
+    def _toggle_typography(self):
+        """开启或关闭中文排版（之后生成的文档生效）"""
+        enabled = not get_settings().value('output/typography', False, type=bool)
+        get_settings().setValue('output/typography', enabled)
+        if self._converter is not None:
+            self._converter.typography = enabled
+        set_widget_state(self.typography_button, 'selected', enabled)
+        self.status_label.setText('状态：已开启中文排版' if enabled else '状态：已关闭中文排版')
+        # 缩略图按参考模板的中文字体绘制
+        if self.thumbnail_loader is not None:
+            self.thumbnail_loader.load([button.property("template_id") for button in self.template_buttons])
+        # 之前的预先转换使用的是旧选项
+        self._schedule_speculation()
+        
+    def _toggle_native_writer(self):
+        """开启或关闭快速写入器（之后生成的文档生效）"""
+        enabled = not get_settings().value('output/native_writer', False, type=bool)
+        get_settings().setValue('output/native_writer', enabled)
+        if self._converter is not None:
+            self._converter.use_native_writer = enabled
+        set_widget_state(self.native_writer_button, 'selected', enabled)
+        self.status_label.setText('状态：已开启快速生成' if enabled else '状态：已关闭快速生成')
+        # 之前的预先转换使用的是旧选项
+        self._schedule_speculation()
+        
+    def handle_launch_args(self, args):
+        """处理启动参数（包括之后的启动转交过来的）：显示窗口，打开一个文件或直接转换多个文件"""
+        self.bring_to_front()
+        paths = [arg for arg in args if not arg.startswith('-') and os.path.isfile(arg)]
+        if len(paths) == 1:
+            self.open_source_file(paths[0])
+        elif paths:
+            self._convert_files(paths)
             
-            /* 滚动条样式 */
-            QScrollBar:vertical {
-                background: #f1f5f9;
-                width: 12px;
-                border-radius: 6px;
-            }
-            QScrollBar::handle:vertical {
-                background: #cbd5e1;
-                border-radius: 6px;
-                min-height: 20px;
-            }
-            QScrollBar::handle:vertical:hover {
-                background: #94a3b8;
-            }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
-                border: none;
-                background: none;
-            }
-        """)
+    def _create_info_tabs(self):
+        """延迟创建底部信息tab区域"""
+        from ui.bottom_tab_widget import InfoTabWidget
+        
+        self.bottom_tabs = InfoTabWidget()
+        self.bottom_tabs_layout.addWidget(self.bottom_tabs)
+                
+    def set_theme(self, theme_name):
+        """切换界面主题（只替换应用级样式表，不重建控件）"""
+        self.theme_name = apply_theme(theme_name)
+        save_theme_name(self.theme_name)
+        self._update_theme_button()
+        
+    def _toggle_theme(self):
+        """在浅色和深色主题之间切换"""
+        self.set_theme('dark' if self.theme_name == 'light' else 'light')
+        
+    def _update_theme_button(self):
+        """更新主题切换按钮的文字"""
+        if self.theme_name == 'light':
+            self.theme_button.setText('🌙 深色模式')
+        else:
+            self.theme_button.setText('☀️ 浅色模式')
         
     def _on_template_button_clicked(self, template):
         """处理模板按钮点击事件"""
@@ -694,14 +782,13 @@ class SimpleMainWindow(QMainWindow):
         self.template_desc_label.setText(template_desc)
         
         # 更新按钮样式
+        self._select_template_button(template['id'])
+        self._schedule_speculation()
+        
+    def _select_template_button(self, template_id):
+        """切换模板按钮的选中状态，只刷新状态发生变化的按钮"""
         for button in self.template_buttons:
-            if button.property("template_id") == template['id']:
-                button.setObjectName("selectedTemplate")
-            else:
-                button.setObjectName("")
-            # 应用样式更新
-            button.style().unpolish(button)
-            button.style().polish(button)
+            set_widget_state(button, "selected", button.property("template_id") == template_id)
                 
     def _copy_ai_command(self):
         """复制AI指令到剪贴板"""
@@ -715,65 +802,360 @@ class SimpleMainWindow(QMainWindow):
         QTimer.singleShot(1000, lambda: self.copy_button.setText("📋 一键复制"))
                 
     def _generate_document(self):
-        """生成Word文档"""
-        # 获取HTML内容
-        html_content = self.html_input.toPlainText().strip()
+        """生成Word文档（提交到任务队列，相同内容的重复点击会被合并）"""
+        # 打开文件时由工作线程从磁盘流式读取，编辑框中只有预览
+        if self._source_file is not None:
+            job, coalesced = self.job_queue.submit_file(
+                self._source_file, self.selected_template, self._make_output_path()
+            )
+            if coalesced:
+                self.status_label.setText('状态：相同内容正在生成中，已合并本次请求')
+            return
+            
+        # 获取HTML内容（剪贴板模式下编辑框只有摘要，使用保存的完整内容）
+        if self._clipboard_html is not None:
+            html_content, content_hash = self._clipboard_html, None
+        else:
+            html_content = self.html_input.toPlainText().strip()
+            content_hash = self.content_fingerprint.fingerprint() if html_content else None
         
         if not html_content:
             QMessageBox.warning(self, '提示', '请先输入HTML内容')
             return
             
+        self._submit_job(html_content, content_hash)
+        
+    def _schedule_speculation(self):
+        """内容或模板变化：取消进行中的预先转换，停止变化一段时间后重新开始（使用电池时等待更久）"""
+        if self._speculative_converter is not None:
+            self._speculative_converter.cancel()
+        if not self.speculation_enabled:
+            return
+        from core.speculative_conversion import IDLE_MS, BATTERY_IDLE_MS, on_battery_power
+        self._speculation_timer.start(BATTERY_IDLE_MS if on_battery_power() else IDLE_MS)
+        
+    def _speculate(self):
+        """用编辑框中的内容和当前模板在后台预先转换"""
+        from core.speculative_conversion import BATTERY_MAX_CHARS, on_battery_power
+        
+        # 剪贴板摘要和文件预览不是要转换的内容
+        if self._clipboard_html is not None or self._source_file is not None:
+            return
+        html_content = self.html_input.toPlainText().strip()
+        if not html_content or (on_battery_power() and len(html_content) > BATTERY_MAX_CHARS):
+            return
+        # 任务队列在有空闲时才开始预先转换，并让它以低优先级运行
+        self.speculative_converter.speculate(
+            html_content, self.selected_template, self.content_fingerprint.fingerprint()
+        )
+        
+    def _convert_clipboard(self):
+        """直接转换剪贴板中的HTML或纯文本，不经过编辑框"""
+        from core.clipboard_payload import extract_html, summarize
+        
+        mime_data = QApplication.clipboard().mimeData()
+        html_content, source = extract_html(
+            mime_data.html() if mime_data.hasHtml() else '',
+            mime_data.text() if mime_data.hasText() else ''
+        )
+        if not html_content:
+            QMessageBox.warning(self, '提示', '剪贴板中没有可转换的内容')
+            return
+            
+        # 编辑框只显示截断后的只读摘要，摘要不记入草稿
+        self._close_source_file()
+        self._clipboard_html = html_content
+        if self.draft_autosave:
+            self.draft_autosave.suspend()
+        self.html_input.setReadOnly(True)
+        self.html_input.setPlainText(summarize(html_content, source))
+        
+        self._submit_job(html_content)
+        
+    def _open_file(self):
+        """打开HTML或Markdown文件：转换时从磁盘流式读取，编辑框只显示分页预览"""
+        from core.source_file import FILE_FILTER
+        
+        settings = get_settings()
+        path, _ = QFileDialog.getOpenFileName(
+            self, '打开要转换的文件', settings.value('open/folder', os.path.expanduser('~')), FILE_FILTER
+        )
+        if not path:
+            return
+        settings.setValue('open/folder', os.path.dirname(path))
+        self.open_source_file(path)
+        
+    def open_source_file(self, path):
+        """打开源文件并显示第一页预览"""
+        from core.source_file import SourceFile, FORMAT_HTML
+        from core.clipboard_payload import format_size
+        
         try:
-            self.status_label.setText('状态：正在生成文档...')
-            QApplication.processEvents()
+            source = SourceFile(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, '提示', f'无法打开文件：\n{e}')
+            return
             
-            # 生成输出文件名
-            desktop_path = os.path.join(os.path.expanduser('~'), 'Desktop')
-            if not os.path.exists(desktop_path):
-                desktop_path = os.path.expanduser('~')  # 如果桌面不存在，使用用户目录
-                
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_filename = f'筋斗云_{timestamp}.docx'
-            output_path = os.path.join(desktop_path, output_filename)
+        self._close_source_file()
+        self._clipboard_html = None
+        self._source_file = source
+        
+        # 预览不记入草稿
+        if self.draft_autosave:
+            self.draft_autosave.suspend()
+        self.html_input.setReadOnly(True)
+        self.preview_nav.show()
+        self._show_preview_page(0)
+        
+        format_name = 'HTML' if source.format == FORMAT_HTML else 'Markdown'
+        self.status_label.setText(
+            f'状态：已打开 {os.path.basename(path)}（{format_size(source.size)}，'
+            f'{format_name}，{source.encoding.upper()}），点击生成Word文档开始转换'
+        )
+        
+    def _convert_files(self, paths):
+        """用当前选择的样式直接转换多个文件"""
+        from core.source_file import SourceFile
+        from core.conversion_queue import PRIORITY_BATCH
+        
+        errors = []
+        for path in paths:
+            try:
+                with SourceFile(path) as source:
+                    # 批量转换让位于点击生成
+                    job, _ = self.job_queue.submit_file(
+                        source, self.selected_template, self._make_output_path(), priority=PRIORITY_BATCH
+                    )
+                if job not in self._batch_jobs:
+                    self._batch_jobs.append(job)
+            except (OSError, ValueError) as e:
+                errors.append(f'{os.path.basename(path)}：{e}')
+        if errors:
+            QMessageBox.warning(self, '提示', '以下文件无法打开：\n' + '\n'.join(errors))
             
-            # 使用增强转换器直接转换HTML内容
-            success, message = self.converter.convert_html_to_docx(
-                html_content, output_path, self.selected_template
+    def _show_preview_page(self, index):
+        """在编辑框中显示源文件的一页预览"""
+        source = self._source_file
+        if source is None:
+            return
+        self._preview_page = max(0, min(index, source.page_count - 1))
+        self.html_input.setPlainText(source.read_page(self._preview_page))
+        self.preview_page_label.setText(
+            f'{os.path.basename(source.path)}　第 {self._preview_page + 1} / {source.page_count} 页（转换使用完整文件）'
+        )
+        self.preview_prev_button.setEnabled(self._preview_page > 0)
+        self.preview_next_button.setEnabled(self._preview_page < source.page_count - 1)
+        
+    def _close_source_file(self):
+        """关闭打开的源文件，隐藏预览翻页"""
+        if self._source_file is not None:
+            self._source_file.close()
+            self._source_file = None
+        self.preview_nav.hide()
+        
+    def _submit_job(self, html_content, content_hash=None):
+        """把转换请求提交到任务队列（content_hash 为编辑框内容指纹，见 job_key）"""
+        # 已经在转换这份内容，不必再预先转换
+        self._speculation_timer.stop()
+        job, coalesced = self.job_queue.submit(
+            html_content, self.selected_template, self._make_output_path(), content_hash
+        )
+        if coalesced:
+            self.status_label.setText('状态：相同内容正在生成中，已合并本次请求')
+            
+    def _make_output_path(self):
+        """生成输出文件路径（同一秒内的多个任务不会互相覆盖）"""
+        from datetime import datetime
+        from core.conversion_queue import unique_output_path
+        
+        desktop_path = os.path.join(os.path.expanduser('~'), 'Desktop')
+        if not os.path.exists(desktop_path):
+            desktop_path = os.path.expanduser('~')  # 如果桌面不存在，使用用户目录
+            
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return unique_output_path(
+            desktop_path, f'筋斗云_{timestamp}', '.docx', self.job_queue.is_output_reserved
+        )
+        
+    def _retry_job(self, job):
+        """按历史任务的内容和样式重新生成"""
+        try:
+            self.job_queue.retry(job, self._make_output_path())
+        except OSError as e:
+            QMessageBox.warning(self, '提示', f'无法重新读取源文件：\n{e}')
+        
+    def _set_max_workers(self, max_workers):
+        """修改同时生成的任务数"""
+        self.job_queue.set_max_workers(max_workers)
+        get_settings().setValue('queue/max_workers', max_workers)
+        
+    def _ensure_history_panel(self):
+        """首次提交任务时创建任务历史区域"""
+        if self.history_panel is None:
+            from ui.job_history_widget import JobHistoryWidget
+            
+            template_names = {key: value['name'] for key, value in self.layout_templates.items()}
+            self.history_panel = JobHistoryWidget(
+                template_names, self.job_queue.max_workers, self.job_queue.history.maxlen
             )
+            self.history_panel.retry_requested.connect(self._retry_job)
+            self.history_panel.max_workers_changed.connect(self._set_max_workers)
+            self.step3_layout.addWidget(self.history_panel)
+        return self.history_panel
+        
+    def _on_job_updated(self, job):
+        """任务状态变化（主线程）"""
+        from core.conversion_queue import STATUS_QUEUED, STATUS_RUNNING, STATUS_SUCCEEDED, PRIORITY_BATCH
+        
+        self._ensure_history_panel().update_job(job)
+        
+        # 监视文件夹的任务只更新监视状态，不弹出提示框
+        if self.folder_watcher is not None and self.folder_watcher.owns(job):
+            self.folder_watcher.on_job_updated(job)
+            self._update_watch_label()
+            return
             
-            if success:
-                self.status_label.setText(f'状态：文档生成成功 - {output_filename}')
-                QMessageBox.information(
-                    self, 
-                    '成功', 
-                    f'文档已成功生成！\n\n保存位置：{output_path}\n\n文件名：{output_filename}\n\n使用样式：{self.layout_templates[self.selected_template]["name"]}'
-                )
-            else:
-                self.status_label.setText('状态：文档生成失败')
-                QMessageBox.critical(self, '错误', f'文档生成失败：\n{message}')
-                
-        except Exception as e:
+        # 批量任务不逐个弹出提示框，结果见任务历史，整批完成后汇总提示一次
+        if job in self._batch_jobs or job.priority == PRIORITY_BATCH:
+            self._on_batch_job_updated(job)
+            return
+            
+        output_filename = os.path.basename(job.output_file)
+        
+        if job.status == STATUS_QUEUED:
+            self.status_label.setText(f'状态：已加入队列（等待中 {self.job_queue.pending_count()} 个）')
+        elif job.status == STATUS_RUNNING:
+            self.status_label.setText('状态：正在生成文档...')
+        elif job.status == STATUS_SUCCEEDED:
+            self.status_label.setText(f'状态：文档生成成功 - {output_filename}')
+            QMessageBox.information(
+                self, 
+                '成功', 
+                f'文档已成功生成！\n\n保存位置：{job.output_file}\n\n文件名：{output_filename}\n\n使用样式：{self.layout_templates[job.template_style]["name"]}'
+            )
+        else:
             self.status_label.setText('状态：文档生成失败')
-            QMessageBox.critical(self, '错误', f'发生错误：\n{str(e)}')
+            QMessageBox.critical(self, '错误', f'文档生成失败：\n{job.message}')
             
+    def _on_batch_job_updated(self, job):
+        """批量任务状态变化：更新进度，整批完成后汇总提示"""
+        from core.conversion_queue import STATUS_SUCCEEDED
+        
+        if job not in self._batch_jobs:
+            # 不属于当前批次的批量任务（在任务历史中重试的，或已汇总的批次中迟到的状态通知），
+            # 结果只在任务历史中显示
+            return
+            
+        remaining = sum(1 for item in self._batch_jobs if item.in_flight)
+        if remaining:
+            done = len(self._batch_jobs) - remaining
+            self.status_label.setText(f'状态：批量生成中（已完成 {done} / {len(self._batch_jobs)} 个）')
+            return
+            
+        jobs, self._batch_jobs = self._batch_jobs, []
+        failed = [item for item in jobs if item.status != STATUS_SUCCEEDED]
+        summary = f'批量生成完成：成功 {len(jobs) - len(failed)} 个'
+        if failed:
+            summary += f'，失败 {len(failed)} 个'
+        self.status_label.setText(f'状态：{summary}')
+        
+        message = f'{summary}\n\n保存位置：{os.path.dirname(jobs[0].output_file)}'
+        if failed:
+            details = []
+            for item in failed[:10]:
+                # 只显示错误消息的第一行，完整内容见任务历史
+                reason = (item.message or '').strip().split('\n')[0] or '未知错误'
+                details.append(f'{os.path.basename(item.source_path or item.output_file)}：{reason}')
+            if len(failed) > 10:
+                details.append(f'……等 {len(failed)} 个文件')
+            message += '\n\n失败的文件：\n' + '\n'.join(details)
+            
+        # 窗口隐藏在托盘中时用托盘通知，不弹出窗口
+        if self.tray_icon is not None and not self.isVisible():
+            self.tray_icon.show_notification(message, warning=bool(failed))
+        elif failed:
+            QMessageBox.warning(self, '批量生成完成', message)
+        else:
+            QMessageBox.information(self, '批量生成完成', message)
+            
+    def _toggle_folder_watch(self):
+        """开始或停止监视文件夹"""
+        if self._watch_timer is not None:
+            self._stop_folder_watch()
+            return
+            
+        settings = get_settings()
+        folder = QFileDialog.getExistingDirectory(
+            self, '选择要监视的文件夹', settings.value('watch/folder', os.path.expanduser('~'))
+        )
+        if not folder:
+            return
+        settings.setValue('watch/folder', folder)
+        self._start_folder_watch(folder)
+        
+    def _start_folder_watch(self, folder):
+        """用当前选择的样式监视文件夹，新增或修改的HTML文件自动转换到“筋斗云_输出”子目录"""
+        from PyQt5.QtCore import QFileSystemWatcher
+        from core.folder_watcher import FolderWatcher
+        
+        self.folder_watcher = FolderWatcher(
+            self.job_queue, folder, os.path.join(folder, '筋斗云_输出'), self.selected_template
+        )
+        self._fs_watcher = QFileSystemWatcher([folder], self)
+        self._fs_watcher.directoryChanged.connect(lambda path: self.folder_watcher.scan())
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setInterval(250)
+        self._watch_timer.timeout.connect(self._poll_folder_watch)
+        
+        self.folder_watcher.scan()
+        self._watch_timer.start()
+        self.watch_button.setText('⏹ 停止监视')
+        set_widget_state(self.watch_button, 'selected', True)
+        self.watch_label.show()
+        self._update_watch_label()
+        
+    def _stop_folder_watch(self):
+        """停止监视（已提交的任务继续完成）"""
+        self._watch_timer.stop()
+        self._watch_timer.deleteLater()
+        self._watch_timer = None
+        self._fs_watcher.deleteLater()
+        self._fs_watcher = None
+        self.watch_button.setText('👀 监视文件夹')
+        set_widget_state(self.watch_button, 'selected', False)
+        self._update_watch_label()
+        
+    def _poll_folder_watch(self):
+        """定时提交写入完成的文件"""
+        self.folder_watcher.poll()
+        self._update_watch_label()
+        
+    def _update_watch_label(self):
+        watcher = self.folder_watcher
+        state = '监视中' if self._watch_timer is not None else '已停止监视'
+        template_name = self.layout_templates[watcher.template_style]['name']
+        self.watch_label.setText(
+            f'{state}：{watcher.watch_dir}（{template_name}）\n'
+            f'已转换 {watcher.converted_count} 个，跳过重复 {watcher.skipped_count} 个，'
+            f'失败 {watcher.failed_count} 次，隔离 {watcher.quarantined_count} 个，待处理 {watcher.backlog()} 个'
+        )
+        
     def _clear_content(self):
         """清空内容"""
+        self._clipboard_html = None
+        self._close_source_file()
+        self.html_input.setReadOnly(False)
         self.html_input.clear()
+        if self.draft_autosave and self.draft_autosave.suspended:
+            self.draft_autosave.resume()
         self.status_label.setText('状态：等待用户输入...')
         
         # 重置为默认选择
         # 重置第一个按钮为选中状态
-        for button in self.template_buttons:
-            if button.property("template_id") == 'simple':
-                button.setObjectName("selectedTemplate")
-            else:
-                button.setObjectName("")
+        self._select_template_button('simple')
         
         # 重置选择的模板为默认值
         self.selected_template = 'simple'
         
         # 重置描述为默认值
-        self.template_desc_label.setText(self.layout_templates['simple']['description'])
-        
-        # 强制刷新样式
-        self.setStyleSheet(self.styleSheet())
\ No newline at end of file
+        self.template_desc_label.setText(self.layout_templates['simple']['description'])
\ No newline at end of file
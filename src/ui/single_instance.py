@@ -0,0 +1,153 @@
+"""
+单实例模块
+第一个启动的进程在本地套接字（Windows为命名管道）上监听；之后的启动把命令行参数转交给它并立即退出，
+由已运行的实例显示窗口并打开参数中的文件，省去重复的解压、导入、版本检查和启动画面
+"""
+
+import os
+import sys
+import json
+import hashlib
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+
+# 连接和等待已运行实例确认的超时时间（毫秒）
+CONNECT_TIMEOUT_MS = 500
+REPLY_TIMEOUT_MS = 2000
+
+# 单条消息的最大长度，超出的连接直接断开
+MAX_MESSAGE_BYTES = 1024 * 1024
+
+
+def get_server_name():
+    """本地服务名：按用户主目录区分，同一台机器上的不同用户各自运行一个实例"""
+    from core.runtime_cache import APP_NAME
+
+    digest = hashlib.sha256(os.path.expanduser('~').encode('utf-8')).hexdigest()[:12]
+    return f'{APP_NAME}-{digest}'
+
+
+def forward_to_running_instance(args, server_name=None):
+    """把启动参数转交给已运行的实例（不需要QApplication）
+
+    Args:
+        args: 命令行参数（不含程序名）
+        server_name: 本地服务名，默认按当前用户生成
+
+    Returns:
+        bool: 是否已转交（为True时当前进程应直接退出）
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(server_name or get_server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        return False
+
+    if sys.platform.startswith('win'):
+        # 允许已运行的实例把窗口切换到前台
+        import ctypes
+        ctypes.windll.user32.AllowSetForegroundWindow(-1)
+
+    message = json.dumps({'args': list(args), 'cwd': os.getcwd()}, ensure_ascii=False)
+    socket.write(message.encode('utf-8') + b'\n')
+    socket.waitForBytesWritten(CONNECT_TIMEOUT_MS)
+    # 等待确认，确保消息被读取后再断开；已运行实例暂时无响应时消息仍在管道中，稍后会被处理
+    if not socket.waitForReadyRead(REPLY_TIMEOUT_MS):
+        print("已运行的实例暂未响应，启动参数将在其恢复后处理")
+    socket.disconnectFromServer()
+    return True
+
+
+class SingleInstanceServer(QObject):
+    """接收后续启动转交的参数
+
+    主窗口创建之前收到的消息会先保存，attach 时再交给处理函数
+    """
+
+    def __init__(self, server_name=None, parent=None):
+        super().__init__(parent)
+        self.server_name = server_name or get_server_name()
+        self.server = QLocalServer(self)
+        # 只允许当前用户连接
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._handler = None
+        self._pending = []
+        # 各连接尚未读完的消息
+        self._buffers = {}
+
+    def listen(self):
+        """开始监听
+
+        Returns:
+            bool: 当前进程是否为主实例；为False表示另一个实例恰好同时启动并已在监听
+        """
+        if self.server.listen(self.server_name):
+            return True
+
+        if self.server.serverError() == QLocalSocket.AddressInUseError:
+            probe = QLocalSocket()
+            probe.connectToServer(self.server_name)
+            if probe.waitForConnected(CONNECT_TIMEOUT_MS):
+                probe.disconnectFromServer()
+                return False
+            # 上次异常退出残留的套接字文件
+            QLocalServer.removeServer(self.server_name)
+            if self.server.listen(self.server_name):
+                return True
+
+        print(f"无法启用单实例模式: {self.server.errorString()}")
+        return True
+
+    def attach(self, handler):
+        """设置处理函数 handler(args)，并处理之前收到的消息"""
+        self._handler = handler
+        pending, self._pending = self._pending, []
+        for args in pending:
+            handler(args)
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b''
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            socket.disconnected.connect(lambda socket=socket: self._on_disconnected(socket))
+
+    def _on_disconnected(self, socket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        if socket not in self._buffers:
+            return
+        buffer = self._buffers[socket] + bytes(socket.readAll())
+        if b'\n' not in buffer:
+            if len(buffer) > MAX_MESSAGE_BYTES:
+                socket.abort()
+            else:
+                self._buffers[socket] = buffer
+            return
+
+        line = buffer.split(b'\n', 1)[0]
+        del self._buffers[socket]
+        socket.write(b'ok\n')
+        socket.flush()
+        socket.disconnectFromServer()
+
+        try:
+            message = json.loads(line.decode('utf-8'))
+            cwd = message.get('cwd') or os.getcwd()
+            # 相对路径按发起启动的进程的工作目录解析
+            args = [
+                os.path.normpath(os.path.join(cwd, arg)) if not arg.startswith('-') else arg
+                for arg in message.get('args', [])
+            ]
+        except (ValueError, AttributeError, TypeError) as e:
+            print(f"无法解析转交的启动参数: {e}")
+            return
+
+        if self._handler is None:
+            self._pending.append(args)
+        else:
+            self._handler(args)
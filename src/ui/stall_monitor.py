@@ -0,0 +1,88 @@
+"""
+界面卡顿监测的Qt接入
+心跳通过排队信号送入界面线程的事件循环，卡顿判断和调用栈采样由 core.stall_watchdog 在辅助线程中完成。
+默认关闭，可在“关于与鸣谢”对话框的“卡顿诊断”页开启，或设置环境变量 JINDOUYUN_STALL_WATCHDOG
+（值为1或卡顿阈值毫秒数）
+"""
+
+import os
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+from ui.app_settings import get_settings, get_int_setting
+
+
+ENABLED_KEY = 'diagnostics/stall_watchdog'
+THRESHOLD_KEY = 'diagnostics/stall_threshold_ms'
+ENV_VAR = 'JINDOUYUN_STALL_WATCHDOG'
+
+_monitor = None
+
+
+class StallMonitor(QObject):
+    """把卡顿监测的心跳接入界面线程（须在界面线程中创建）"""
+
+    # 从辅助线程发出，跨线程时自动排队到界面线程处理
+    ping = pyqtSignal(int)
+
+    def __init__(self, threshold_ms, parent=None):
+        super().__init__(parent)
+        from core.stall_watchdog import StallWatchdog
+        self.watchdog = StallWatchdog(self.ping.emit, threshold_ms)
+        self.ping.connect(self._on_ping)
+
+    def _on_ping(self, token):
+        self.watchdog.pong(token)
+
+
+def get_threshold_ms():
+    """卡顿阈值（毫秒）：环境变量中的数值优先，其次为用户设置"""
+    from core.stall_watchdog import DEFAULT_THRESHOLD_MS
+
+    value = os.environ.get(ENV_VAR, '')
+    if value.isdigit() and int(value) > 1:
+        return int(value)
+    return get_int_setting(THRESHOLD_KEY, DEFAULT_THRESHOLD_MS)
+
+
+def is_enabled():
+    """是否开启了卡顿监测"""
+    value = os.environ.get(ENV_VAR, '')
+    if value:
+        return value != '0'
+    return get_settings().value(ENABLED_KEY, False, type=bool)
+
+
+def get_stall_monitor():
+    """当前运行的卡顿监测，未开启时返回None"""
+    return _monitor
+
+
+def install_stall_monitor():
+    """按设置启动卡顿监测（在创建QApplication后、进入事件循环前调用，启动阶段的阻塞也会被记录）"""
+    if is_enabled():
+        set_stall_monitor_running(True)
+    return _monitor
+
+
+def set_stall_monitor_running(running):
+    """启动或停止卡顿监测（不修改设置）"""
+    global _monitor
+
+    if running and _monitor is None:
+        app = QApplication.instance()
+        _monitor = StallMonitor(get_threshold_ms(), app)
+        _monitor.watchdog.start()
+        if app is not None:
+            app.aboutToQuit.connect(_monitor.watchdog.stop)
+    elif not running and _monitor is not None:
+        _monitor.watchdog.stop()
+        _monitor.deleteLater()
+        _monitor = None
+
+
+def set_stall_monitor_enabled(enabled):
+    """保存开关设置并立即生效"""
+    get_settings().setValue(ENABLED_KEY, bool(enabled))
+    set_stall_monitor_running(enabled)
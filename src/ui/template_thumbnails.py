@@ -0,0 +1,191 @@
+"""
+模板缩略图
+已缓存的缩略图直接读取；没有缓存的在后台线程中按示例文档绘制，完成后写入缓存并通知界面，
+启动过程不等待绘制
+"""
+
+import os
+import threading
+
+from PyQt5.QtCore import QObject, QPointF, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QImage, QPainter, QPen, QTextCharFormat, QTextLayout, QTextOption
+
+
+# 缩略图的逻辑尺寸（像素），显示页面上部
+THUMBNAIL_WIDTH = 132
+THUMBNAIL_HEIGHT = 90
+
+# 按2倍分辨率绘制，高分屏上也清晰
+RENDER_SCALE = 2
+
+# 等宽字体：代码文字使用西文字体，其余文字优先使用中文字体
+MONOSPACE_FONTS = ('Consolas', 'Courier', 'Courier New', 'Menlo', 'Monaco')
+
+ALIGNMENTS = {
+    'left': Qt.AlignLeft,
+    'center': Qt.AlignHCenter,
+    'right': Qt.AlignRight,
+    'justify': Qt.AlignJustify,
+}
+
+
+def render_thumbnail(layout, width=THUMBNAIL_WIDTH, height=THUMBNAIL_HEIGHT, scale=RENDER_SCALE):
+    """把 layout_sample 返回的示例文档排版绘制为缩略图（可在非界面线程中调用）
+
+    Returns:
+        QImage: 设置了设备像素比的图片
+    """
+    image = QImage(width * scale, height * scale, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    painter = QPainter(image)
+    painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing)
+
+    page = layout['page']
+    px_per_pt = image.width() / page['width']
+    left = page['left'] * px_per_pt
+    text_width = (page['width'] - page['left'] - page['right']) * px_per_pt
+    y = page['top'] * px_per_pt
+
+    for paragraph in layout['paragraphs']:
+        if y >= image.height():
+            break
+        props = paragraph['props']
+        y += props.get('before', 0) * px_per_pt
+        text = ''.join(text for text, _ in paragraph['runs']) or ' '
+
+        text_layout = QTextLayout(text.replace('\n', ' '), _font(props, px_per_pt))
+        option = QTextOption(ALIGNMENTS.get(props.get('align'), Qt.AlignLeft))
+        option.setWrapMode(QTextOption.WrapAtWordBoundaryOrAnywhere)
+        text_layout.setTextOption(option)
+        text_layout.setFormats(_formats(paragraph['runs'], px_per_pt))
+
+        indent = props.get('left', 0) * px_per_pt
+        first_line = props.get('first_line', 0) * px_per_pt
+        if 'first_line_chars' in props:
+            first_line = props['first_line_chars'] * props.get('size', 10.5) * px_per_pt
+        right = props.get('right', 0) * px_per_pt
+
+        line_y = 0
+        text_layout.beginLayout()
+        while True:
+            line = text_layout.createLine()
+            if not line.isValid():
+                break
+            line_indent = indent + (first_line if line.lineNumber() == 0 else 0)
+            line.setLineWidth(max(1, text_width - line_indent - right))
+            line.setPosition(QPointF(line_indent, line_y))
+            line_y += _line_height(props, line.height(), px_per_pt)
+        text_layout.endLayout()
+
+        if props.get('shading'):
+            painter.fillRect(QRectF(left + indent, y, text_width - indent - right, line_y), QColor(props['shading']))
+        if paragraph['bullet']:
+            radius = max(1.0, props.get('size', 10.5) * px_per_pt / 6)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(props.get('color') or '#000000'))
+            painter.drawEllipse(QPointF(left + indent - radius * 4, y + line_y / 2), radius, radius)
+        text_layout.draw(painter, QPointF(left, y))
+        y += line_y
+
+        if props.get('border_bottom'):
+            painter.setPen(QPen(QColor(props['border_bottom']), max(1.0, px_per_pt)))
+            painter.drawLine(QPointF(left, y + 2), QPointF(left + text_width, y + 2))
+        y += props.get('after', 0) * px_per_pt
+
+    painter.end()
+    image.setDevicePixelRatio(scale)
+    return image
+
+
+def _font(props, px_per_pt):
+    family = props.get('font') if props.get('font') in MONOSPACE_FONTS else props.get('east_asian_font')
+    font = QFont(family or props.get('font') or '')
+    font.setPixelSize(max(1, round(props.get('size', 10.5) * px_per_pt)))
+    font.setBold(bool(props.get('bold')))
+    font.setItalic(bool(props.get('italic')))
+    return font
+
+
+def _formats(runs, px_per_pt):
+    formats = []
+    start = 0
+    for text, props in runs:
+        char_format = QTextCharFormat()
+        char_format.setFont(_font(props, px_per_pt))
+        char_format.setForeground(QColor(props.get('color') or '#000000'))
+        if props.get('highlight'):
+            char_format.setBackground(QColor(props['highlight']))
+        formats.append(QTextLayout.FormatRange())
+        formats[-1].start = start
+        formats[-1].length = len(text)
+        formats[-1].format = char_format
+        start += len(text)
+    return formats
+
+
+def _line_height(props, natural_height, px_per_pt):
+    rule, value = props.get('line', ('multiple', 1.0))
+    if rule == 'exact':
+        return value * px_per_pt
+    return natural_height * value
+
+
+class TemplateThumbnailLoader(QObject):
+    """加载模板缩略图：缓存命中时立即返回，其余在后台线程中绘制"""
+
+    # (排版方案, QImage)，在主线程中处理
+    thumbnail_ready = pyqtSignal(str, object)
+
+    def __init__(self, converter, parent=None):
+        super().__init__(parent)
+        self.converter = converter
+
+    def load(self, template_styles):
+        """读取已缓存的缩略图，未缓存的排版方案交给后台线程绘制"""
+        from core.template_preview import get_thumbnail_path
+
+        missing = []
+        for template_style in template_styles:
+            template_file = self.converter.get_template_file(template_style)
+            path = get_thumbnail_path(template_file, template_style, self.converter.get_typography(template_style))
+            if path is None:
+                continue
+            image = QImage(path) if os.path.exists(path) else QImage()
+            if image.isNull():
+                missing.append((template_style, path))
+                continue
+            image.setDevicePixelRatio(RENDER_SCALE)
+            self.thumbnail_ready.emit(template_style, image)
+
+        if missing:
+            threading.Thread(target=self._render_missing, args=(missing,), daemon=True).start()
+
+    def _render_missing(self, missing):
+        import tempfile
+        from core.template_preview import layout_sample
+
+        for template_style, path in missing:
+            try:
+                # 与转换时一样使用写入了中文字体的参考模板
+                typography = self.converter.get_typography(template_style)
+                reference_doc = self.converter.get_reference_doc(template_style, typography)
+                image = render_thumbnail(layout_sample(reference_doc, typography))
+            except Exception as e:
+                print(f"无法生成模板缩略图（{template_style}）: {e}")
+                continue
+            self.thumbnail_ready.emit(template_style, image)
+
+            temp_path = None
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # 多个窗口可能同时生成同一缩略图，每次写入使用独立的临时文件
+                fd, temp_path = tempfile.mkstemp(suffix='.part', prefix=os.path.basename(path) + '.',
+                                                 dir=os.path.dirname(path))
+                os.close(fd)
+                if image.save(temp_path, 'PNG'):
+                    os.replace(temp_path, path)
+            except OSError as e:
+                print(f"无法缓存模板缩略图: {e}")
+            finally:
+                if temp_path and os.path.exists(temp_path):
+                    os.unlink(temp_path)
@@ -0,0 +1,560 @@
+"""
+主题模块
+按主题调色板把整个应用的样式一次性编译为应用级QSS，选中等状态通过动态属性切换，
+切换主题时不需要重建控件树
+"""
+
+from string import Template
+
+from PyQt5.QtWidgets import QApplication
+
+from ui.app_settings import get_settings
+
+
+DEFAULT_THEME = 'light'
+
+# 主题调色板：样式表中的 ${名称} 占位符在编译时替换为对应颜色
+THEMES = {
+    'light': {
+        'name': '浅色',
+        'window_bg_start': '#f8fafc',
+        'window_bg_end': '#f1f5f9',
+        'header_subtitle': '#e0f2fe',
+        'card_bg': '#d7e8ff',
+        'card_border': '#93c5fd',
+        'card_border_success': '#6ee7b7',
+        'heading': '#1e293b',
+        'instruction_title': '#0369a1',
+        'instruction_text': '#0c4a6e',
+        'text_secondary': '#475569',
+        'text_muted': '#64748b',
+        'input_bg': 'white',
+        'input_text': 'black',
+        'input_border': '#cbd5e1',
+        'command_border': '#93c5fd',
+        'command_text': '#475569',
+        'focus': '#3b82f6',
+        'info_bg': '#f8fafc',
+        'info_border': '#e2e8f0',
+        'danger': '#dc2626',
+        'danger_soft': '#991b1b',
+        'link': '#3b82f6',
+        'button_bg': '#f8fafc',
+        'button_text': '#475569',
+        'button_border': '#e2e8f0',
+        'button_hover_bg': '#e2e8f0',
+        'button_hover_text': '#334155',
+        'button_hover_border': '#cbd5e1',
+        'button_pressed_bg': '#cbd5e1',
+        'button_pressed_text': '#1e293b',
+        'clear_text': '#617087',
+        'clear_hover_bg': '#ff7171',
+        'clear_hover_text': '#1b1b1b',
+        'clear_pressed_bg': '#a20000',
+        'scrollbar_bg': '#f1f5f9',
+        'scrollbar_handle': '#cbd5e1',
+        'scrollbar_handle_hover': '#94a3b8',
+        'tabs_bg': '#f9fafb',
+        'tabs_border': '#e5e7eb',
+        'tabs_title': '#4b5563',
+        'tabs_pane_bg': '#ffffff',
+        'tab_bg': '#f3f4f6',
+        'tab_text': '#6b7280',
+        'tab_selected_text': '#4b5563',
+        'tab_hover_bg': '#e5e7eb',
+        'tabs_text': '#4b5563',
+    },
+    'dark': {
+        'name': '深色',
+        'window_bg_start': '#0f172a',
+        'window_bg_end': '#1e293b',
+        'header_subtitle': '#e0f2fe',
+        'card_bg': '#1e293b',
+        'card_border': '#334155',
+        'card_border_success': '#047857',
+        'heading': '#f1f5f9',
+        'instruction_title': '#7dd3fc',
+        'instruction_text': '#bae6fd',
+        'text_secondary': '#cbd5e1',
+        'text_muted': '#94a3b8',
+        'input_bg': '#0f172a',
+        'input_text': '#e2e8f0',
+        'input_border': '#334155',
+        'command_border': '#334155',
+        'command_text': '#cbd5e1',
+        'focus': '#60a5fa',
+        'info_bg': '#1e293b',
+        'info_border': '#334155',
+        'danger': '#f87171',
+        'danger_soft': '#fca5a5',
+        'link': '#60a5fa',
+        'button_bg': '#1e293b',
+        'button_text': '#cbd5e1',
+        'button_border': '#334155',
+        'button_hover_bg': '#334155',
+        'button_hover_text': '#f1f5f9',
+        'button_hover_border': '#475569',
+        'button_pressed_bg': '#475569',
+        'button_pressed_text': '#ffffff',
+        'clear_text': '#94a3b8',
+        'clear_hover_bg': '#b91c1c',
+        'clear_hover_text': '#ffffff',
+        'clear_pressed_bg': '#7f1d1d',
+        'scrollbar_bg': '#1e293b',
+        'scrollbar_handle': '#475569',
+        'scrollbar_handle_hover': '#64748b',
+        'tabs_bg': '#111827',
+        'tabs_border': '#374151',
+        'tabs_title': '#d1d5db',
+        'tabs_pane_bg': '#1f2937',
+        'tab_bg': '#111827',
+        'tab_text': '#9ca3af',
+        'tab_selected_text': '#e5e7eb',
+        'tab_hover_bg': '#374151',
+        'tabs_text': '#d1d5db',
+    },
+}
+
+# 应用级样式表模板
+# 控件通过 objectName（唯一控件）或 role 属性（同类控件）匹配，状态通过 selected 等动态属性匹配
+STYLESHEET_TEMPLATE = Template("""
+    QMainWindow {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 ${window_bg_start}, stop:1 ${window_bg_end});
+        font-family: 'Segoe UI', 'Microsoft YaHei', sans-serif;
+    }
+
+    /* 添加QLabel全局样式，确保没有边框 */
+    QLabel {
+        border: none;
+        background: transparent;
+    }
+
+    QScrollArea#mainScrollArea {
+        border: none;
+        background: transparent;
+    }
+    QScrollArea#mainScrollArea > QWidget > QWidget {
+        background: transparent;
+    }
+
+    /* 顶部标题区域 */
+    QFrame#headerFrame, QFrame#headerFrame QLabel {
+        background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #667eea, stop:1 #764ba2);
+        border-radius: 12px;
+        padding: 25px 20px;
+        margin-bottom: 10px;
+    }
+    QLabel#headerSubtitle {
+        font-size: 32px;
+        color: ${header_subtitle};
+        font-weight: 500;
+        margin-top: 5px;
+    }
+
+    /* 步骤区域 */
+    QFrame#step1Frame, QFrame#step2Frame {
+        background-color: ${card_bg};
+        border: 2px solid ${card_border};
+        border-radius: 12px;
+        padding: 0px;
+    }
+    QFrame#step3Frame {
+        background-color: ${card_bg};
+        border: 2px solid ${card_border_success};
+        border-radius: 12px;
+        padding: 0px;
+    }
+    QLabel[role="stepTitle"] {
+        font-size: 36px;
+        font-weight: 700;
+        color: ${heading};
+        margin-bottom: 5px;
+    }
+    QLabel#aiInstructionTitle {
+        font-size: 28px;
+        font-weight: 600;
+        color: ${instruction_title};
+        margin-bottom: 8px;
+    }
+    QLabel#aiInstructionText {
+        font-size: 26px;
+        color: ${instruction_text};
+        line-height: 1.4;
+    }
+    QLabel#htmlInputLabel {
+        font-size: 32px;
+        font-weight: 600;
+        color: ${heading};
+        margin-bottom: 10px;
+    }
+    QLabel#templateDescTitle {
+        font-size: 28px;
+        font-weight: 600;
+        color: ${text_secondary};
+        margin-bottom: 0px;
+    }
+    QLabel#templateDescLabel {
+        font-size: 26px;
+        color: ${text_muted};
+        line-height: 1.5;
+        padding: 0px;
+        margin-top: 0px;
+    }
+    QLabel#statusLabel {
+        font-size: 30px;
+        color: ${text_secondary};
+        font-weight: 600;
+    }
+    QLabel#saveLocationLabel {
+        font-size: 26px;
+        color: ${text_muted};
+        font-weight: 500;
+    }
+
+    /* 输入区域 */
+    QTextEdit#aiCommandInput {
+        border: 1px solid ${command_border};
+        border-radius: 6px;
+        padding: 12px;
+        font-size: 22px;
+        font-family: 'Consolas', 'Monaco', monospace;
+        background-color: ${input_bg};
+        selection-background-color: #3b82f6;
+        color: ${command_text};
+    }
+    QTextEdit#htmlInput {
+        border: 1px solid ${input_border};
+        border-radius: 6px;
+        padding: 12px;
+        font-family: 'Consolas', 'Monaco', monospace;
+        font-size: 26px;
+        background-color: ${input_bg};
+        color: ${input_text};
+    }
+    QTextEdit#aiCommandInput:focus, QTextEdit#htmlInput:focus {
+        border: 2px solid ${focus};
+    }
+
+    /* 底部信息区域 */
+    QFrame#infoFrame {
+        background-color: ${info_bg};
+        border-top: 1px solid ${info_border};
+        border-radius: 0px;
+        padding: 15px 0px 5px 0px;
+        margin: 10px 0px 0px 0px;
+    }
+    QLabel#expirationLabel {
+        font-size: 24px;
+        color: ${danger};
+        font-weight: 600;
+    }
+    QLabel#testVersionLabel {
+        font-size: 22px;
+        color: ${danger_soft};
+        font-style: italic;
+        line-height: 1.4;
+    }
+    QLabel#feedbackLabel {
+        font-size: 25px;
+        color: ${link};
+        text-decoration: underline;
+        padding: 10px;
+    }
+
+    /* 主按钮样式 - 绿色 */
+    QPushButton#generateButton {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #22c55e, stop:1 #16a34a);
+        color: white;
+        border: none;
+        border-radius: 10px;
+        padding: 12px 24px;
+        font-size: 30px;
+        font-weight: 600;
+        min-height: 100px;
+    }
+    QPushButton#generateButton:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #16a34a, stop:1 #15803d);
+    }
+    QPushButton#generateButton:pressed {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #15803d, stop:1 #166534);
+        padding: 13px 23px 11px 25px;
+    }
+
+    /* 次按钮样式 */
+    QPushButton#clearButton {
+        background: transparent;
+        color: ${clear_text};
+        border: none;
+        border-radius: 8px;
+        padding: 12px 24px;
+        font-size: 30px;
+        font-weight: 500;
+        min-height: 100px;
+    }
+    QPushButton#clearButton:hover {
+        background: ${clear_hover_bg};
+        color: ${clear_hover_text};
+    }
+    QPushButton#clearButton:pressed {
+        background: ${clear_pressed_bg};
+        color: #ffffff;
+        padding: 13px 23px 11px 25px;
+    }
+
+    /* 复制、剪贴板转换、打开文件、预览翻页、主题切换、任务历史、监视文件夹、中文排版、嵌入字体、快速生成、常驻托盘和卡顿诊断按钮样式 */
+    QPushButton#copyButton, QPushButton#clipboardButton, QPushButton#openFileButton,
+    QPushButton#previewPageButton, QPushButton#themeButton,
+    QPushButton#historyButton, QPushButton#watchButton, QPushButton#typographyButton, QPushButton#embedFontsButton,
+    QPushButton#nativeWriterButton, QPushButton#trayButton, QPushButton#diagnosticsButton {
+        background-color: ${button_bg};
+        color: ${button_text};
+        border: 1px solid ${button_border};
+        border-radius: 6px;
+        padding: 6px 12px;
+        font-size: 20px;
+        font-weight: 500;
+        min-height: 40px;
+        min-width: 120px;
+    }
+    QPushButton#copyButton:hover, QPushButton#clipboardButton:hover, QPushButton#openFileButton:hover,
+    QPushButton#previewPageButton:hover, QPushButton#themeButton:hover, QPushButton#historyButton:hover, QPushButton#watchButton:hover,
+    QPushButton#typographyButton:hover, QPushButton#embedFontsButton:hover, QPushButton#nativeWriterButton:hover,
+    QPushButton#trayButton:hover, QPushButton#diagnosticsButton:hover {
+        background-color: ${button_hover_bg};
+        color: ${button_hover_text};
+        border-color: ${button_hover_border};
+    }
+    QPushButton#copyButton:pressed, QPushButton#clipboardButton:pressed, QPushButton#openFileButton:pressed,
+    QPushButton#previewPageButton:pressed, QPushButton#themeButton:pressed, QPushButton#historyButton:pressed, QPushButton#watchButton:pressed,
+    QPushButton#typographyButton:pressed, QPushButton#embedFontsButton:pressed, QPushButton#nativeWriterButton:pressed,
+    QPushButton#trayButton:pressed, QPushButton#diagnosticsButton:pressed {
+        background-color: ${button_pressed_bg};
+        color: ${button_pressed_text};
+    }
+    QPushButton#watchButton[selected="true"], QPushButton#typographyButton[selected="true"],
+    QPushButton#embedFontsButton[selected="true"], QPushButton#nativeWriterButton[selected="true"],
+    QPushButton#trayButton[selected="true"] {
+        border: 2px solid ${focus};
+        color: ${focus};
+    }
+
+    /* 文件夹监视状态 */
+    QLabel#watchStatusLabel {
+        font-size: 22px;
+        color: ${text_muted};
+    }
+
+    /* 打开文件的预览翻页 */
+    QLabel#previewPageLabel {
+        font-size: 20px;
+        color: ${text_muted};
+    }
+
+    QPushButton#historyButton:disabled, QPushButton#previewPageButton:disabled {
+        color: ${text_muted};
+    }
+
+    /* 任务历史区域 */
+    QLabel#jobHistoryTitle {
+        font-size: 28px;
+        font-weight: 600;
+        color: ${text_secondary};
+    }
+    QLabel#jobHistoryHint {
+        font-size: 22px;
+        color: ${text_muted};
+    }
+    QSpinBox#jobWorkersSpin {
+        font-size: 22px;
+        min-width: 60px;
+        padding: 4px;
+        background-color: ${input_bg};
+        color: ${input_text};
+        border: 1px solid ${input_border};
+        border-radius: 4px;
+    }
+    QTableWidget#jobHistoryTable {
+        font-size: 20px;
+        background-color: ${input_bg};
+        color: ${input_text};
+        border: 1px solid ${input_border};
+        border-radius: 6px;
+        gridline-color: ${info_border};
+        selection-background-color: ${focus};
+        selection-color: white;
+    }
+    QTableWidget#jobHistoryTable QHeaderView::section {
+        background-color: ${button_bg};
+        color: ${text_secondary};
+        border: none;
+        border-bottom: 1px solid ${input_border};
+        padding: 6px;
+        font-size: 20px;
+        font-weight: 600;
+    }
+
+    /* 模板选择按钮样式 */
+    QPushButton[role="template"] {
+        background-color: ${button_bg};
+        color: ${button_text};
+        border: 2px solid ${button_border};
+        border-radius: 8px;
+        padding: 12px 20px;
+        font-size: 28px;
+        font-weight: 600;
+        min-height: 60px;
+    }
+    QPushButton[role="template"]:hover {
+        background-color: ${button_hover_bg};
+        color: ${button_hover_text};
+        border-color: ${button_hover_border};
+    }
+    QPushButton[role="template"]:pressed {
+        background-color: ${button_pressed_bg};
+        color: ${button_pressed_text};
+    }
+    QPushButton[role="template"][selected="true"] {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #3b82f6, stop:1 #2563eb);
+        color: white;
+        border: 2px solid #2563eb;
+    }
+    QPushButton[role="template"][selected="true"]:hover {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #2563eb, stop:1 #1d4ed8);
+    }
+    QPushButton[role="template"][selected="true"]:pressed {
+        background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #1d4ed8, stop:1 #1e40af);
+    }
+
+    /* 滚动条样式 */
+    QScrollBar:vertical {
+        background: ${scrollbar_bg};
+        width: 12px;
+        border-radius: 6px;
+    }
+    QScrollBar::handle:vertical {
+        background: ${scrollbar_handle};
+        border-radius: 6px;
+        min-height: 20px;
+    }
+    QScrollBar::handle:vertical:hover {
+        background: ${scrollbar_handle_hover};
+    }
+    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
+        border: none;
+        background: none;
+    }
+
+    /* 底部信息Tab区域 - 使用更低调的颜色和样式 */
+    QFrame#infoTabWidget {
+        background-color: ${tabs_bg};
+        border: 1px solid ${tabs_border};
+        border-radius: 6px;
+        margin: 5px 0px;
+    }
+    QLabel#titleLabel {
+        color: ${tabs_title};
+        font-size: 22px;
+        font-weight: 600;
+        padding: 5px 0px;
+        border-bottom: 1px solid ${tabs_border};
+        margin-bottom: 5px;
+    }
+    QTabWidget#infoTabs::pane {
+        border: 1px solid ${tabs_border};
+        background-color: ${tabs_pane_bg};
+        border-radius: 4px;
+        top: -1px;
+    }
+    QFrame#infoTabWidget QTabBar::tab {
+        background-color: ${tab_bg};
+        border: 1px solid ${tabs_border};
+        padding: 8px 16px;
+        margin-right: 2px;
+        border-bottom: none;
+        border-top-left-radius: 4px;
+        border-top-right-radius: 4px;
+        font-size: 20px;
+        font-weight: 600;
+        color: ${tab_text};
+        min-width: 140px;
+        max-width: 140px;
+    }
+    QFrame#infoTabWidget QTabBar::tab:selected {
+        background-color: ${tabs_pane_bg};
+        border-bottom: 1px solid ${tabs_pane_bg};
+        color: ${tab_selected_text};
+        font-weight: 500;
+    }
+    QFrame#infoTabWidget QTabBar::tab:hover:!selected {
+        background-color: ${tab_hover_bg};
+        color: ${tab_selected_text};
+    }
+    QFrame#infoTabWidget QTextEdit {
+        border: none;
+        background-color: ${tabs_pane_bg};
+        color: ${tabs_text};
+        font-size: 20px;
+        line-height: 1.5;
+        padding: 12px;
+    }
+""")
+
+_compiled_stylesheets = {}
+
+
+def compile_stylesheet(theme_name):
+    """编译指定主题的应用级样式表（结果会被缓存）
+
+    Args:
+        theme_name: 主题名称，见 THEMES
+
+    Returns:
+        str: 可直接传给 QApplication.setStyleSheet 的样式表
+    """
+    if theme_name not in THEMES:
+        theme_name = DEFAULT_THEME
+    if theme_name not in _compiled_stylesheets:
+        _compiled_stylesheets[theme_name] = STYLESHEET_TEMPLATE.substitute(THEMES[theme_name])
+    return _compiled_stylesheets[theme_name]
+
+
+def apply_theme(theme_name, app=None):
+    """把主题样式表设置到整个应用上，已有控件会自动重新应用样式
+
+    Returns:
+        str: 实际应用的主题名称
+    """
+    if theme_name not in THEMES:
+        theme_name = DEFAULT_THEME
+    app = app or QApplication.instance()
+    stylesheet = compile_stylesheet(theme_name)
+    # 重新设置相同的样式表同样会触发所有控件重新计算样式
+    if app.styleSheet() != stylesheet:
+        app.setStyleSheet(stylesheet)
+    return theme_name
+
+
+def set_widget_state(widget, name, value):
+    """设置控件的动态属性，并只刷新这一个控件的样式
+
+    Returns:
+        bool: 属性值是否发生了变化
+    """
+    if widget.property(name) == value:
+        return False
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    return True
+
+
+def load_theme_name():
+    """读取用户上次选择的主题"""
+    theme_name = get_settings().value('theme', DEFAULT_THEME)
+    return theme_name if theme_name in THEMES else DEFAULT_THEME
+
+
+def save_theme_name(theme_name):
+    """保存用户选择的主题"""
+    get_settings().setValue('theme', theme_name)
@@ -0,0 +1,43 @@
+"""
+系统托盘图标
+常驻托盘模式下关闭主窗口只隐藏窗口，进程和已创建的界面保留，
+再次启动或点击托盘图标时直接重新显示窗口
+"""
+
+from PyQt5.QtWidgets import QSystemTrayIcon, QMenu, QStyle
+
+
+class TrayIcon(QSystemTrayIcon):
+    """主窗口的托盘图标"""
+
+    def __init__(self, window):
+        icon = window.windowIcon()
+        if icon.isNull():
+            icon = window.style().standardIcon(QStyle.SP_FileDialogDetailedView)
+        super().__init__(icon, window)
+        self.window = window
+        self.setToolTip(window.windowTitle())
+        # 隐藏到托盘的提示每次运行只显示一次
+        self.hint_shown = False
+
+        menu = QMenu(window)
+        menu.addAction('显示主窗口', window.bring_to_front)
+        menu.addSeparator()
+        menu.addAction('退出', window.quit_application)
+        self.setContextMenu(menu)
+        self.activated.connect(self._on_activated)
+
+    def show_hidden_hint(self):
+        """提示窗口已隐藏到托盘"""
+        if not self.hint_shown:
+            self.hint_shown = True
+            self.showMessage(self.window.windowTitle(), '程序仍在托盘中运行，再次启动或点击托盘图标即可打开窗口')
+
+    def show_notification(self, message, warning=False):
+        """窗口隐藏时的通知（如批量生成完成）"""
+        icon = QSystemTrayIcon.Warning if warning else QSystemTrayIcon.Information
+        self.showMessage(self.window.windowTitle(), message, icon)
+
+    def _on_activated(self, reason):
+        if reason in (QSystemTrayIcon.Trigger, QSystemTrayIcon.DoubleClick):
+            self.window.bring_to_front()
@@ -0,0 +1,160 @@
+--[[
+筋斗云排版 中文排版过滤器
+由 Pandoc 通过 --lua-filter 在进程内执行，规则与 src/core/cjk_typography.py 中的 apply_typography 一致。
+
+元数据参数（由转换器通过 -M 传入，处理后从文档元数据中移除）：
+  cjk-spacing      auto  去掉中英文之间的手动空格，由Word的中西文自动间距统一处理
+                   space 在中英文之间补一个空格
+                   keep  保持原样
+  cjk-punctuation  true  中文语境中的半角标点改为全角，并去掉全角标点后多余的空格
+]]
+
+local spacing = 'keep'
+local punctuation = false
+
+-- 中文之后的半角标点 -> 全角标点
+local FULL_WIDTH = {
+  [0x2C] = 0xFF0C, -- ,
+  [0x3B] = 0xFF1B, -- ;
+  [0x3A] = 0xFF1A, -- :
+  [0x21] = 0xFF01, -- !
+  [0x3F] = 0xFF1F, -- ?
+}
+
+-- 之后的空格需要去掉的全角标点：，；：！？。、）
+local NO_SPACE_AFTER = {
+  [0xFF0C] = true, [0xFF1B] = true, [0xFF1A] = true, [0xFF01] = true,
+  [0xFF1F] = true, [0x3002] = true, [0x3001] = true, [0xFF09] = true,
+}
+
+local function is_cjk(c)
+  return c ~= nil and (
+    (c >= 0x3040 and c <= 0x30FF) or (c >= 0x3400 and c <= 0x4DBF) or
+    (c >= 0x4E00 and c <= 0x9FFF) or (c >= 0xF900 and c <= 0xFAFF))
+end
+
+local function is_latin(c)
+  return c ~= nil and (
+    (c >= 0x30 and c <= 0x39) or (c >= 0x41 and c <= 0x5A) or (c >= 0x61 and c <= 0x7A))
+end
+
+local function codepoints(text)
+  local result = {}
+  for _, c in utf8.codes(text) do
+    result[#result + 1] = c
+  end
+  return result
+end
+
+local function encode(cps, first, last)
+  local chars = {}
+  for i = first or 1, last or #cps do
+    chars[#chars + 1] = utf8.char(cps[i])
+  end
+  return table.concat(chars)
+end
+
+local function fix_punctuation(cps)
+  for i = 1, #cps do
+    local c, prev, next = cps[i], cps[i - 1], cps[i + 1]
+    if FULL_WIDTH[c] and is_cjk(prev) then
+      cps[i] = FULL_WIDTH[c]
+    elseif c == 0x2E and is_cjk(prev) and next == nil then
+      cps[i] = 0x3002
+    elseif c == 0x28 and is_cjk(next) then
+      cps[i] = 0xFF08
+    elseif c == 0x29 and is_cjk(prev) then
+      cps[i] = 0xFF09
+    end
+  end
+end
+
+-- 在中英文交界处拆分文本，中间插入空格
+local function split_boundaries(cps, target)
+  local start = 1
+  for i = 2, #cps do
+    local prev, c = cps[i - 1], cps[i]
+    if (is_cjk(prev) and is_latin(c)) or (is_latin(prev) and is_cjk(c)) then
+      target:insert(pandoc.Str(encode(cps, start, i - 1)))
+      target:insert(pandoc.Space())
+      start = i
+    end
+  end
+  target:insert(pandoc.Str(encode(cps, start)))
+end
+
+local function last_codepoint(el)
+  if el and el.t == 'Str' and el.text ~= '' then
+    return utf8.codepoint(el.text, utf8.offset(el.text, -1))
+  end
+end
+
+local function first_codepoint(el)
+  if el and el.t == 'Str' and el.text ~= '' then
+    return utf8.codepoint(el.text, 1)
+  end
+end
+
+local function drop_space(prev_el, next_el)
+  local prev, next = last_codepoint(prev_el), first_codepoint(next_el)
+  if punctuation and NO_SPACE_AFTER[prev] then
+    return true
+  end
+  if spacing == 'auto' then
+    return (is_cjk(prev) and is_latin(next)) or (is_latin(prev) and is_cjk(next))
+  end
+  return false
+end
+
+local function meta_value(meta, key, default)
+  local value = meta[key]
+  if value == nil then
+    return default
+  end
+  meta[key] = nil
+  if type(value) == 'boolean' then
+    return tostring(value)
+  end
+  return pandoc.utils.stringify(value)
+end
+
+function Meta(meta)
+  spacing = meta_value(meta, 'cjk-spacing', spacing)
+  punctuation = meta_value(meta, 'cjk-punctuation', 'false') == 'true'
+  return meta
+end
+
+function Inlines(inlines)
+  if spacing == 'keep' and not punctuation then
+    return nil
+  end
+
+  local result = pandoc.List()
+  for i, el in ipairs(inlines) do
+    if el.t == 'Str' then
+      local cps = codepoints(el.text)
+      if punctuation then
+        fix_punctuation(cps)
+      end
+      if spacing == 'space' then
+        split_boundaries(cps, result)
+      else
+        result:insert(pandoc.Str(encode(cps)))
+      end
+    elseif el.t == 'Code' then
+      -- 行内代码原样保留（代码块不属于Inlines，不经过此过滤器）
+      result:insert(el)
+    elseif (el.t == 'Space' or el.t == 'SoftBreak') and drop_space(result[#result], inlines[i + 1]) then
+      -- 去掉多余的空格
+    else
+      result:insert(el)
+    end
+  end
+  return result
+end
+
+-- 先读取元数据中的设置，再处理正文
+return {
+  { Meta = Meta },
+  { Inlines = Inlines },
+}
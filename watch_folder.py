@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件夹监视转换（无界面模式）
+监视指定文件夹，把新增或修改后的HTML文件自动转换为DOCX，
+Linux下使用inotify接收文件事件，其他平台定时扫描
+"""
+
+import os
+import sys
+
+
+DEFAULT_WORKERS = 2
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="监视文件夹并自动把HTML文件转换为Word文档")
+    parser.add_argument("folder", help="要监视的文件夹")
+    parser.add_argument("--output", help="DOCX输出目录，默认为监视文件夹下的“筋斗云_输出”")
+    parser.add_argument("--template", default="simple",
+                        choices=["simple", "academic", "business", "technical"], help="排版模板")
+    parser.add_argument("--workers", type=int,
+                        help="同时转换的文件数，默认按 benchmark_concurrency.py --save 保存的结果和文件大小确定（没有结果时为2）")
+    parser.add_argument("--settle", type=float, default=1.0, help="文件保持不变多少秒后才开始转换")
+    parser.add_argument("--once", action="store_true",
+                        help="批量模式：转换完文件夹中现有的文件后退出（中断后再次运行会从中断处继续）")
+    parser.add_argument("--retry-quarantined", action="store_true", help="解除隔离，重新转换多次失败的文件")
+    parser.add_argument("--archive", metavar="ZIP",
+                        help="把转换完成的文档逐个写入该ZIP归档（附带清单manifest.jsonl），不在输出目录中逐个生成文件")
+    parser.add_argument("--typography", action="store_true",
+                        help="按排版方案把中文后的半角标点改为全角、统一中英文间距，并使用方案指定的中文字体")
+    parser.add_argument("--embed-fonts", action="store_true", help="把用到的中文字体子集化后嵌入输出文档（需要fontTools）")
+    parser.add_argument("--optimize", action="store_true",
+                        help="转换后精简未使用的样式、合并重复图片并重新压缩，减小输出文档体积")
+    parser.add_argument("--native-writer", action="store_true",
+                        help="简单的HTML文档由进程内的快速写入器直接生成，不经过Pandoc")
+    parser.add_argument("--offload-tables", action="store_true",
+                        help="交给Pandoc的文档中500行以上的表格由快速写入器直接写出，不经过Pandoc")
+    parser.add_argument("--coordinator", metavar="[HOST:]PORT",
+                        help="作为协调进程监听该地址，把转换分派给 conversion_worker.py 工作进程（--workers 为同时分派的任务数）")
+    parser.add_argument("--token",
+                        help="工作进程的连接令牌，默认读取环境变量 JINDOUYUN_WORKER_TOKEN（监听非本机地址时必须设置）")
+    parser.add_argument("--pandoc", help="pandoc可执行文件路径，默认使用项目内置或PANDOC_PATH")
+    parser.add_argument("--src", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"),
+                        help="源代码目录路径")
+
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"监视目录不存在: {args.folder}")
+        return 1
+
+    sys.path.insert(0, args.src)
+    from core.enhanced_pandoc_converter import EnhancedPandocConverter
+    from core.conversion_queue import ConversionQueue, STATUS_SUCCEEDED, format_wait_stats
+    from core.folder_watcher import FolderWatcher, run_headless, WATCH_EXTENSIONS
+
+    pandoc_path = args.pandoc
+    if not pandoc_path:
+        bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pandoc', 'pandoc.exe')
+        pandoc_path = os.environ.get('PANDOC_PATH') or (bundled if os.path.exists(bundled) else 'pandoc')
+
+    output_dir = args.output or os.path.join(args.folder, '筋斗云_输出')
+    watcher = None
+
+    def on_update(job):
+        watcher.on_job_updated(job)
+        if job.finished_at is not None:
+            state = '完成' if job.status == STATUS_SUCCEEDED else '失败'
+            print(f"[{state}] {os.path.basename(job.output_file)} ({job.duration:.1f} 秒)")
+
+    coordinator = None
+    if args.coordinator:
+        from core.distributed_workers import Coordinator, parse_address
+        host, port = parse_address(args.coordinator)
+        coordinator = Coordinator(host, port, token=args.token, optimize_output=args.optimize,
+                                  typography=args.typography, embed_fonts=args.embed_fonts,
+                                  offload_tables=args.offload_tables)
+        try:
+            host, port = coordinator.start()
+        except (OSError, ValueError) as e:
+            print(f"协调进程无法启动: {e}")
+            return 1
+        print(f"协调进程已启动: {host}:{port}，等待工作进程连接")
+        converter = coordinator
+    else:
+        converter = EnhancedPandocConverter(pandoc_path, use_native_writer=args.native_writer,
+                                            optimize_output=args.optimize, typography=args.typography,
+                                            embed_fonts=args.embed_fonts, offload_tables=args.offload_tables)
+    archive = None
+    if args.archive:
+        from core.batch_archive import BatchArchive
+        archive = BatchArchive(args.archive)
+    if args.workers is None:
+        args.workers = DEFAULT_WORKERS
+        if coordinator is None:
+            from core.concurrency_tuning import recommended_workers, typical_input_size
+            size = typical_input_size(
+                os.path.join(args.folder, name) for name in sorted(os.listdir(args.folder))
+                if name.lower().endswith(WATCH_EXTENSIONS)
+            )
+            args.workers = recommended_workers(size, default=DEFAULT_WORKERS)
+    queue = ConversionQueue(converter, max_workers=args.workers, on_update=on_update)
+    watcher = FolderWatcher(queue, args.folder, output_dir, args.template, settle_seconds=args.settle,
+                            archive=archive)
+
+    if args.retry_quarantined:
+        print(f"已解除隔离: {watcher.store.release_quarantined()} 个文件")
+
+    mode = '转换' if args.once else '监视'
+    print(f"正在{mode}: {watcher.watch_dir}")
+    print(f"输出目录: {watcher.output_dir}（模板: {args.template}，并发: {args.workers}）")
+    if archive is not None:
+        print(f"输出归档: {archive.path}")
+    try:
+        run_headless(watcher, once=args.once)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        print(f"已停止{mode}：转换 {watcher.converted_count} 个，跳过 {watcher.skipped_count} 个，"
+              f"失败 {watcher.failed_count} 次，隔离 {watcher.quarantined_count} 个")
+        for record in watcher.store.quarantined():
+            name = os.path.basename(record['source_path'] or '')
+            print(f"  [隔离] {name}（{record['attempts']} 次）：{' '.join(record['message'].split())}")
+        wait_summary = format_wait_stats(queue.wait_stats())
+        if wait_summary:
+            print(wait_summary)
+        if coordinator is not None:
+            print(coordinator.format_stats())
+            coordinator.stop()
+        if archive is not None:
+            archive.close(watcher.store.iter_records())
+            print(f"已写入归档 {archive.added_count} 个文档: {archive.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())